@@ -28,15 +28,22 @@ router = APIRouter()
 
 
 from python_ai_services.services.trade_history_service import TradeHistoryService # Added
-from pathlib import Path # Added for default fills_dir path
 
 # Dependency for TradeHistoryService (singleton)
 # This should ideally be in a central dependency management file or main.py
 # For now, defining here for clarity of this subtask.
-_trade_history_service_instance = TradeHistoryService(fills_dir=Path("agent_fills")) # Default path
+_trade_history_service_instance: Optional[TradeHistoryService] = None
 def get_trade_history_service_instance() -> TradeHistoryService:
+    global _trade_history_service_instance
+    if _trade_history_service_instance is None:
+        _trade_history_service_instance = TradeHistoryService(session_factory=SessionLocal)
     return _trade_history_service_instance
 
+async def stop_trade_history_service() -> None:
+    """Commits fills still queued by ingest_fills (durability="accept") and stops the writer. Called on app shutdown."""
+    if _trade_history_service_instance is not None:
+        await _trade_history_service_instance.stop_fill_writer()
+
 # Dependency for TradingDataService
 def get_trading_data_service(
     agent_service: AgentManagementService = Depends(get_agent_management_service_singleton),
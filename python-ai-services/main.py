@@ -285,7 +285,8 @@ async def lifespan(app: FastAPI):
     persistence_service = AgentPersistenceService(
         supabase_url=supabase_url,
         supabase_key=supabase_key,
-        redis_url=redis_url_for_persistence
+        redis_url=redis_url_for_persistence,
+        memory_index_dir=os.getenv("AGENT_MEMORY_INDEX_DIR") # Unset keeps memory search on the Supabase RPC
     )
     await persistence_service.connect_clients() # Connect to Redis and create Supabase client
     services["agent_persistence_service"] = persistence_service
@@ -294,10 +295,15 @@ async def lifespan(app: FastAPI):
     # Initialize AgentStateManager (refactored)
     try:
         redis_ttl = int(os.getenv("REDIS_REALTIME_STATE_TTL_SECONDS", "3600"))
+        write_behind_interval = os.getenv("AGENT_STATE_WRITE_BEHIND_SECONDS") # Unset keeps Supabase writes inline
         agent_state_manager = AgentStateManager(
             persistence_service=persistence_service,
-            redis_realtime_ttl_seconds=redis_ttl
+            redis_realtime_ttl_seconds=redis_ttl,
+            cache_max_size=int(os.getenv("AGENT_STATE_CACHE_MAX_SIZE", "10000")),
+            cache_ttl_seconds=float(os.getenv("AGENT_STATE_CACHE_TTL_SECONDS", "300")),
+            write_behind_flush_interval_seconds=float(write_behind_interval) if write_behind_interval else None
         )
+        await agent_state_manager.start()
         services["agent_state_manager"] = agent_state_manager
         logger.info("Refactored AgentStateManager initialized.")
     except Exception as e:
@@ -355,6 +361,21 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"Error closing MemoryService Letta client: {e}")
 
+    try:
+        # Same module path the routes import it by (api/v1/performance_routes.py), so this is their instance
+        from python_ai_services.api.v1.dashboard_data_routes import stop_trade_history_service
+        await stop_trade_history_service() # Commits fills accepted but not yet written
+        logger.info("TradeHistoryService fill writer stopped.")
+    except Exception as e:
+        logger.error(f"Error stopping TradeHistoryService fill writer: {e}")
+
+    if services.get("agent_state_manager"):
+        try:
+            await services["agent_state_manager"].close() # Flushes write-behind state before clients close
+            logger.info("AgentStateManager closed.")
+        except Exception as e:
+            logger.error(f"Error closing AgentStateManager: {e}")
+
     if services.get("agent_persistence_service"):
         try:
             await services["agent_persistence_service"].close_clients()
@@ -19,7 +19,7 @@ from pydantic import BaseModel, Field
 import uuid
 import math
 from enum import Enum
-from scipy import stats
+from scipy import sparse, stats
 from scipy.optimize import minimize
 import warnings
 warnings.filterwarnings('ignore')
@@ -206,6 +206,13 @@ class StressTestRequest(BaseModel):
     portfolio_id: str = Field(..., description="Portfolio identifier")
     scenario_ids: List[str] = Field(..., description="Stress test scenario IDs")
     include_correlation_breakdown: bool = Field(default=True, description="Include correlation breakdown scenarios")
+    position_detail_limit: Optional[int] = Field(default=50, ge=0, description="Positions listed per scenario in component_contributions and risk_decomposition, largest absolute P&L first (None lists every position)")
+
+class VaRSuiteRequest(BaseModel):
+    portfolio_id: str = Field(..., description="Portfolio identifier")
+    confidence_levels: List[float] = Field(default=[0.95, 0.99], description="Confidence levels (0-1)")
+    time_horizon: int = Field(default=1, description="Time horizon in days")
+    lookback_days: int = Field(default=252, description="Historical data lookback period")
 
 class RiskLimitRequest(BaseModel):
     name: str = Field(..., description="Risk limit name")
@@ -215,6 +222,361 @@ class RiskLimitRequest(BaseModel):
     scope: str = Field(..., description="Scope of limit")
     description: str = Field(default="", description="Limit description")
 
+@dataclass
+class VaRSuite:
+    """Every VaR method at every requested confidence level, from one set of portfolio returns"""
+    observations: int
+    var_results: Dict[VaRMethod, Dict[float, Dict[str, Any]]]  # method -> confidence -> {"var", "details", "parameters"}
+    expected_shortfall: Dict[float, float]
+    backtests: Dict[float, Dict[str, Any]]  # Backtest of the historical VaR per confidence level
+
+def _sorted_percentile(sorted_values: np.ndarray, q: float) -> float:
+    """np.percentile's linear interpolation on already sorted values"""
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(math.floor(position))
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return float(sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower))
+
+class PortfolioReturnsMatrix:
+    """
+    Aligned asset-returns matrix for one portfolio, with the VaR inputs derived from it cached.
+
+    Rows are bars (oldest first, capacity doubled when full) and columns are the portfolio's
+    symbols. Portfolio returns over a lookback are one matrix-vector product with the position
+    weights. The sorted returns, moments and Monte Carlo draws for a lookback are computed once
+    and shared by every method and confidence level. They are dropped when a bar is appended or
+    the weights change. The Cholesky factor of the asset covariance only depends on the returns,
+    so it survives weight changes, and the standard normal draws are reused across bars so that
+    successive Monte Carlo estimates differ by the data rather than by sampling noise.
+    """
+
+    def __init__(self, symbols: List[str], returns: np.ndarray, weights: np.ndarray, seed: int = 42):
+        self.symbols = symbols
+        self.length = len(returns)
+        self._returns = np.empty((max(1024, 2 * self.length), len(symbols)))
+        self._returns[:self.length] = returns
+        self.weights = weights
+        self._rng = np.random.default_rng(seed)
+        self._normal_draws: Dict[int, np.ndarray] = {}  # simulations -> (simulations x assets) standard normals
+        self._stats: Dict[Tuple[int, int], Dict[str, Any]] = {}  # (lookback, simulations) -> shared VaR inputs
+        self._cholesky: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}  # lookback -> (asset means, factor)
+
+    def asset_returns(self, lookback: int) -> np.ndarray:
+        return self._returns[max(0, self.length - lookback):self.length]
+
+    def append(self, row: np.ndarray):
+        """Add one bar of asset returns (in symbols order)"""
+        if self.length == len(self._returns):
+            grown = np.empty((2 * len(self._returns), len(self.symbols)))
+            grown[:self.length] = self._returns[:self.length]
+            self._returns = grown
+        self._returns[self.length] = row
+        self.length += 1
+        self._stats.clear()
+        self._cholesky.clear()
+
+    def set_weights(self, weights: np.ndarray):
+        if not np.array_equal(weights, self.weights):
+            self.weights = weights
+            self._stats.clear()
+
+    def portfolio_returns(self, lookback: int) -> np.ndarray:
+        return self.asset_returns(lookback) @ self.weights
+
+    def _cholesky_factor(self, lookback: int) -> Tuple[np.ndarray, np.ndarray]:
+        cached = self._cholesky.get(lookback)
+        if cached is None:
+            returns = self.asset_returns(lookback)
+            covariance = np.atleast_2d(np.cov(returns, rowvar=False, bias=True))
+            jitter = 0.0
+            while True:
+                try:
+                    factor = np.linalg.cholesky(covariance + jitter * np.eye(len(covariance)))
+                    break
+                except np.linalg.LinAlgError:  # Singular (e.g. duplicate or constant assets): regularize
+                    jitter = max(jitter * 10, 1e-12 * max(np.trace(covariance), 1e-12))
+            cached = (returns.mean(axis=0), factor)
+            self._cholesky[lookback] = cached
+        return cached
+
+    def _shared_stats(self, lookback: int, simulations: int) -> Dict[str, Any]:
+        stats_key = (lookback, simulations)
+        shared = self._stats.get(stats_key)
+        if shared is None:
+            returns = self.portfolio_returns(lookback)
+            sorted_returns = np.sort(returns)
+            mean_return = float(returns.mean())
+            deviations = returns - mean_return
+            m2 = float(np.mean(deviations ** 2))
+            m3 = float(np.mean(deviations ** 3))
+            m4 = float(np.mean(deviations ** 4))
+
+            # Correlated Monte Carlo draws: portfolio return = w.mu + z @ (L^T w) for asset draws mu + L z
+            asset_means, factor = self._cholesky_factor(lookback)
+            normal_draws = self._normal_draws.get(simulations)
+            if normal_draws is None:
+                normal_draws = self._normal_draws[simulations] = self._rng.standard_normal((simulations, len(self.symbols)))
+            draws = float(asset_means @ self.weights) + normal_draws @ (factor.T @ self.weights)
+
+            shared = {
+                "returns": returns,
+                "sorted": sorted_returns,
+                "tail_sums": np.concatenate(([0.0], np.cumsum(sorted_returns))),
+                "mean": mean_return,
+                "std": math.sqrt(m2),
+                "skewness": m3 / m2 ** 1.5 if m2 > 0 else 0.0,
+                "excess_kurtosis": m4 / m2 ** 2 - 3 if m2 > 0 else 0.0,
+                "simulated": np.sort(draws),
+                "simulated_std": float(np.std(draws))
+            }
+            self._stats[stats_key] = shared
+        return shared
+
+    def var_suite(self, lookback: int, confidence_levels: List[float], simulations: int = 10000) -> VaRSuite:
+        """Historical, parametric, Monte Carlo and Cornish-Fisher VaR at each confidence level in one pass"""
+        shared = self._shared_stats(lookback, simulations)
+        sorted_returns = shared["sorted"]
+        n = len(sorted_returns)
+        mean_return, std_return = shared["mean"], shared["std"]
+        skewness, excess_kurtosis = shared["skewness"], shared["excess_kurtosis"]
+
+        var_results: Dict[VaRMethod, Dict[float, Dict[str, Any]]] = {method: {} for method in (
+            VaRMethod.HISTORICAL, VaRMethod.PARAMETRIC, VaRMethod.MONTE_CARLO, VaRMethod.CORNISH_FISHER
+        )}
+        expected_shortfall: Dict[float, float] = {}
+        backtests: Dict[float, Dict[str, Any]] = {}
+
+        for confidence_level in confidence_levels:
+            var_quantile = 1 - confidence_level
+            z = float(stats.norm.ppf(var_quantile))
+
+            historical_var = _sorted_percentile(sorted_returns, var_quantile * 100)
+            var_results[VaRMethod.HISTORICAL][confidence_level] = {
+                "var": historical_var,
+                "details": {
+                    "method": "historical",
+                    "observations": n,
+                    "min_return": float(sorted_returns[0]),
+                    "max_return": float(sorted_returns[-1]),
+                    "mean_return": mean_return,
+                    "volatility": std_return
+                },
+                "parameters": {"confidence_level": confidence_level, "quantile": var_quantile}
+            }
+
+            var_results[VaRMethod.PARAMETRIC][confidence_level] = {
+                "var": mean_return + z * std_return,
+                "details": {"method": "parametric_normal", "mean": mean_return, "volatility": std_return, "z_score": z},
+                "parameters": {"confidence_level": confidence_level, "distribution": "normal"}
+            }
+
+            var_results[VaRMethod.MONTE_CARLO][confidence_level] = {
+                "var": _sorted_percentile(shared["simulated"], var_quantile * 100),
+                "details": {
+                    "method": "monte_carlo",
+                    "simulations": simulations,
+                    "mean": mean_return,
+                    "volatility": shared["simulated_std"],
+                    "correlated_assets": len(self.symbols)
+                },
+                "parameters": {"confidence_level": confidence_level, "simulations": simulations}
+            }
+
+            # Cornish-Fisher expansion (accounts for skewness and kurtosis)
+            cf_z = (z +
+                    (z**2 - 1) * skewness / 6 +
+                    (z**3 - 3*z) * excess_kurtosis / 24 -
+                    (2*z**3 - 5*z) * skewness**2 / 36)
+            var_results[VaRMethod.CORNISH_FISHER][confidence_level] = {
+                "var": mean_return + cf_z * std_return,
+                "details": {
+                    "method": "cornish_fisher",
+                    "mean": mean_return,
+                    "volatility": std_return,
+                    "skewness": skewness,
+                    "excess_kurtosis": excess_kurtosis,
+                    "adjusted_z_score": cf_z
+                },
+                "parameters": {"confidence_level": confidence_level, "original_z_score": z}
+            }
+
+            # Expected shortfall is the mean of returns at or below the historical VaR
+            violations = int(np.searchsorted(sorted_returns, historical_var, side="right"))
+            expected_shortfall[confidence_level] = (
+                float(shared["tail_sums"][violations] / violations) if violations > 0 else historical_var
+            )
+            backtests[confidence_level] = self._backtest(violations, n, confidence_level)
+
+        return VaRSuite(observations=n, var_results=var_results,
+                        expected_shortfall=expected_shortfall, backtests=backtests)
+
+    @staticmethod
+    def _backtest(violations: int, total_observations: int, confidence_level: float) -> Dict[str, Any]:
+        """Backtest VaR model performance from its violation count"""
+        # Expected violation rate
+        expected_violations = total_observations * (1 - confidence_level)
+        violation_rate = violations / total_observations
+
+        # Kupiec test for unconditional coverage
+        if expected_violations > 0:
+            lr_stat = -2 * np.log((confidence_level**violations) * ((1-confidence_level)**(total_observations-violations))) + \
+                     2 * np.log((violation_rate**violations) * ((1-violation_rate)**(total_observations-violations)))
+            p_value = 1 - stats.chi2.cdf(lr_stat, df=1)
+        else:
+            lr_stat = p_value = np.nan
+
+        return {
+            "violations": violations,
+            "total_observations": total_observations,
+            "violation_rate": violation_rate,
+            "expected_violation_rate": 1 - confidence_level,
+            "kupiec_lr_stat": lr_stat,
+            "kupiec_p_value": p_value,
+            "model_adequate": p_value > 0.05 if not np.isnan(p_value) else None
+        }
+
+class StressTestBook:
+    """
+    Scenario-matrix stress testing for one portfolio.
+
+    Scenarios compile to a (scenarios x risk factors) shock matrix and positions to a sparse
+    (risk factors x positions) dollar exposure matrix, so the P&L of every position under every
+    scenario is one matrix multiply. A position's risk factor is its "underlying" (its own symbol
+    by default). Nonlinear positions add a delta-gamma term from optional per-unit "delta",
+    "gamma" and "underlying_price" fields. Plain positions have delta 1 and no gamma.
+
+    The scenarios x positions P&L matrix is kept between runs. A changed position only
+    re-evaluates its own column, and a new scenario only its own row.
+    """
+
+    def __init__(self):
+        self.factors: List[str] = []
+        self.factor_index: Dict[str, int] = {}
+        self.scenarios: List[StressTestScenario] = []
+        self.scenario_index: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        self.position_keys: List[Tuple] = []
+        self.position_factors = np.zeros(0, dtype=int)
+        self.dollar_deltas = np.zeros(0)
+        self.dollar_gammas = np.zeros(0)
+        self.shocks = np.zeros((0, 0))  # scenarios x factors
+        self.pnl = np.zeros((0, 0))  # scenarios x positions
+        self._exposures: Optional[Tuple[sparse.csc_matrix, Optional[sparse.csc_matrix]]] = None
+
+    @staticmethod
+    def _position_key(position: Dict[str, Any], symbol: str) -> Tuple:
+        return (position["quantity"], position["price"], position.get("delta", 1.0), position.get("gamma", 0.0),
+                position.get("underlying", symbol), position.get("underlying_price", position["price"]))
+
+    @staticmethod
+    def _effective_shock(scenario: StressTestScenario, factor: Optional[str]) -> float:
+        """Shock to one risk factor, or to any factor the scenario does not name when factor is None"""
+        shock = scenario.market_shocks.get(factor, scenario.market_shocks.get("all", 0.0))
+        
+        # Enhanced shock based on volatility
+        vol_multiplier = scenario.volatility_multipliers.get(factor, scenario.volatility_multipliers.get("all", 1.0))
+        if vol_multiplier > 1:
+            shock *= vol_multiplier
+        
+        # Liquidity constraints worsen the shock
+        liquidity_constraint = scenario.liquidity_constraints.get(factor, scenario.liquidity_constraints.get("all", 0.0))
+        if liquidity_constraint > 0:
+            shock *= (1 + liquidity_constraint)
+        
+        return shock
+
+    def _shock_row(self, scenario: StressTestScenario) -> np.ndarray:
+        row = np.full(len(self.factors), self._effective_shock(scenario, None))
+        named = scenario.market_shocks.keys() | scenario.volatility_multipliers.keys() | scenario.liquidity_constraints.keys()
+        for factor in named:
+            index = self.factor_index.get(factor)
+            if index is not None:
+                row[index] = self._effective_shock(scenario, factor)
+        return row
+
+    def _exposure_matrices(self) -> Tuple[sparse.csc_matrix, Optional[sparse.csc_matrix]]:
+        if self._exposures is None:
+            shape = (len(self.factors), len(self.symbols))
+            coordinates = (self.position_factors, np.arange(len(self.symbols)))
+            gammas = None
+            if np.any(self.dollar_gammas):
+                gammas = sparse.csc_matrix((self.dollar_gammas, coordinates), shape=shape)
+            self._exposures = (sparse.csc_matrix((self.dollar_deltas, coordinates), shape=shape), gammas)
+        return self._exposures
+
+    def _evaluate(self, shocks: np.ndarray) -> np.ndarray:
+        """Delta-gamma P&L of every position under each row of factor shocks"""
+        deltas, gammas = self._exposure_matrices()
+        pnl = np.asarray(shocks @ deltas)
+        if gammas is not None:
+            pnl += 0.5 * np.asarray((shocks * shocks) @ gammas)
+        return pnl
+
+    def _add_factor(self, factor: str) -> int:
+        self.factor_index[factor] = len(self.factors)
+        self.factors.append(factor)
+        column = np.array([self._effective_shock(scenario, factor) for scenario in self.scenarios])
+        self.shocks = np.column_stack([self.shocks, column.reshape(len(self.scenarios), 1)])
+        return self.factor_index[factor]
+
+    def _set_position(self, index: int, symbol: str, key: Tuple):
+        quantity, _, delta, gamma, underlying, underlying_price = key
+        factor = self.factor_index.get(underlying)
+        if factor is None:
+            factor = self._add_factor(underlying)
+        self.position_keys[index] = key
+        self.position_factors[index] = factor
+        self.dollar_deltas[index] = quantity * delta * underlying_price
+        self.dollar_gammas[index] = quantity * gamma * underlying_price ** 2
+        self._exposures = None
+
+    def sync_positions(self, positions: Dict[str, Dict[str, Any]]):
+        """Bring the exposures in line with the portfolio, re-evaluating only changed positions"""
+        symbols = list(positions)
+        keys = [self._position_key(positions[symbol], symbol) for symbol in symbols]
+        
+        if symbols[:len(self.symbols)] != self.symbols:
+            # Positions removed or reordered: rebuild every exposure
+            self.symbols, self.position_keys = [], []
+            self.position_factors = np.zeros(0, dtype=int)
+            self.dollar_deltas, self.dollar_gammas = np.zeros(0), np.zeros(0)
+            self.pnl = np.zeros((len(self.scenarios), 0))
+        
+        existing = len(self.symbols)
+        changed = [i for i in range(existing) if keys[i] != self.position_keys[i]]
+        
+        if len(symbols) > existing:
+            added = len(symbols) - existing
+            self.symbols = symbols
+            self.position_keys.extend([None] * added)
+            self.position_factors = np.concatenate([self.position_factors, np.zeros(added, dtype=int)])
+            self.dollar_deltas = np.concatenate([self.dollar_deltas, np.zeros(added)])
+            self.dollar_gammas = np.concatenate([self.dollar_gammas, np.zeros(added)])
+            self.pnl = np.column_stack([self.pnl, np.zeros((len(self.scenarios), added))])
+            changed.extend(range(existing, len(symbols)))
+        
+        for index in changed:
+            self._set_position(index, symbols[index], keys[index])
+        
+        if len(changed) == len(symbols):
+            self.pnl = self._evaluate(self.shocks).reshape(len(self.scenarios), len(symbols))
+        elif changed:
+            columns = np.array(changed)
+            shocks = self.shocks[:, self.position_factors[columns]]
+            self.pnl[:, columns] = shocks * self.dollar_deltas[columns] + 0.5 * shocks * shocks * self.dollar_gammas[columns]
+
+    def scenario_rows(self, scenarios: List[StressTestScenario]) -> np.ndarray:
+        """Rows of the P&L matrix for the given scenarios, compiling and evaluating any new ones"""
+        new_scenarios = [scenario for scenario in scenarios if scenario.id not in self.scenario_index]
+        if new_scenarios:
+            for scenario in new_scenarios:
+                self.scenario_index[scenario.id] = len(self.scenarios)
+                self.scenarios.append(scenario)
+            shocks = np.array([self._shock_row(scenario) for scenario in new_scenarios]).reshape(len(new_scenarios), len(self.factors))
+            self.shocks = np.vstack([self.shocks.reshape(-1, len(self.factors)), shocks])
+            self.pnl = np.vstack([self.pnl.reshape(-1, len(self.symbols)), self._evaluate(shocks)])
+        return np.array([self.scenario_index[scenario.id] for scenario in scenarios], dtype=int)
+
 class AdvancedRiskManagement:
     def __init__(self):
         self.risk_metrics = {}
@@ -225,6 +587,9 @@ class AdvancedRiskManagement:
         self.risk_alerts = {}
         self.portfolio_data = {}
         self.market_data = {}
+        self.returns_matrices: Dict[str, PortfolioReturnsMatrix] = {}
+        self.stress_books: Dict[str, StressTestBook] = {}
+        self.correlation_breakdown_scenarios: Optional[List[StressTestScenario]] = None
         self.active_websockets = []
         
         # Initialize sample data and scenarios
@@ -488,215 +853,117 @@ class AdvancedRiskManagement:
     
     async def calculate_var(self, request: VaRRequest) -> VaRCalculation:
         """Calculate Value at Risk using specified method"""
+        suite_request = VaRSuiteRequest(
+            portfolio_id=request.portfolio_id,
+            confidence_levels=[request.confidence_level],
+            time_horizon=request.time_horizon,
+            lookback_days=request.lookback_days
+        )
+        return (await self.calculate_var_suite(suite_request, methods=[request.method]))[0]
+    
+    async def calculate_var_suite(self, request: VaRSuiteRequest,
+                                  methods: Optional[List[VaRMethod]] = None) -> List[VaRCalculation]:
+        """Calculate VaR for every method and confidence level from one pass over the portfolio returns"""
         if request.portfolio_id not in self.portfolio_data:
             raise HTTPException(status_code=404, detail="Portfolio not found")
         
-        calculation_id = str(uuid.uuid4())
-        portfolio = self.portfolio_data[request.portfolio_id]
-        
-        # Get portfolio returns
-        portfolio_returns = await self._calculate_portfolio_returns(request.portfolio_id, request.lookback_days)
+        returns_matrix = self._portfolio_returns_matrix(request.portfolio_id)
         
-        if len(portfolio_returns) < 30:
+        if returns_matrix is None or min(returns_matrix.length, request.lookback_days) < 30:
             raise HTTPException(status_code=400, detail="Insufficient data for VaR calculation")
         
-        # Calculate VaR based on method
-        if request.method == VaRMethod.HISTORICAL:
-            var_result = await self._calculate_historical_var(portfolio_returns, request.confidence_level)
-        elif request.method == VaRMethod.PARAMETRIC:
-            var_result = await self._calculate_parametric_var(portfolio_returns, request.confidence_level)
-        elif request.method == VaRMethod.MONTE_CARLO:
-            var_result = await self._calculate_monte_carlo_var(portfolio_returns, request.confidence_level)
-        elif request.method == VaRMethod.CORNISH_FISHER:
-            var_result = await self._calculate_cornish_fisher_var(portfolio_returns, request.confidence_level)
-        else:
-            var_result = await self._calculate_historical_var(portfolio_returns, request.confidence_level)
-        
-        # Calculate expected shortfall (CVaR)
-        expected_shortfall = await self._calculate_expected_shortfall(portfolio_returns, request.confidence_level)
-        
-        # Get portfolio value
+        suite = returns_matrix.var_suite(request.lookback_days, request.confidence_levels)
         portfolio_value = await self._calculate_portfolio_value(request.portfolio_id)
+        timestamp = datetime.now().isoformat()
         
-        # Convert to absolute amounts
-        var_amount = abs(var_result["var"] * portfolio_value)
-        var_percentage = abs(var_result["var"])
-        
-        # Run backtesting if historical method
-        backtesting_results = None
-        if request.method == VaRMethod.HISTORICAL:
-            backtesting_results = await self._backtest_var(portfolio_returns, var_result["var"], request.confidence_level)
-        
-        calculation = VaRCalculation(
-            id=calculation_id,
-            portfolio_id=request.portfolio_id,
-            method=request.method,
-            confidence_level=request.confidence_level,
-            time_horizon=request.time_horizon,
-            var_amount=var_amount,
-            var_percentage=var_percentage * 100,
-            expected_shortfall=expected_shortfall * portfolio_value,
-            timestamp=datetime.now().isoformat(),
-            underlying_data=var_result.get("details", {}),
-            model_parameters=var_result.get("parameters", {}),
-            backtesting_results=backtesting_results
-        )
-        
-        self.var_calculations[calculation_id] = calculation
-        
-        logger.info(f"VaR calculated for {request.portfolio_id}: {var_percentage*100:.2f}% ({request.method.value})")
-        
-        return calculation
-    
-    async def _calculate_portfolio_returns(self, portfolio_id: str, lookback_days: int) -> np.ndarray:
-        """Calculate portfolio returns time series"""
-        portfolio = self.portfolio_data[portfolio_id]
-        positions = portfolio["positions"]
-        
-        # Get returns for each position
-        all_returns = {}
-        weights = {}
-        
-        total_value = 0
-        for symbol, position in positions.items():
-            if symbol in self.market_data:
-                market_data = self.market_data[symbol].tail(lookback_days)
-                all_returns[symbol] = market_data['returns'].values
+        calculations = []
+        for method in methods or [m for m in VaRMethod if m != VaRMethod.EXTREME_VALUE]:
+            # Methods without a dedicated model fall back to historical VaR
+            var_results = suite.var_results.get(method, suite.var_results[VaRMethod.HISTORICAL])
+            
+            for confidence_level in request.confidence_levels:
+                var_result = var_results[confidence_level]
                 
-                position_value = position["quantity"] * position["price"]
-                weights[symbol] = position_value
-                total_value += position_value
-        
-        # Normalize weights
-        for symbol in weights:
-            weights[symbol] /= total_value
-        
-        # Calculate portfolio returns
-        min_length = min(len(returns) for returns in all_returns.values())
-        portfolio_returns = np.zeros(min_length)
-        
-        for symbol, weight in weights.items():
-            symbol_returns = all_returns[symbol][-min_length:]
-            portfolio_returns += weight * symbol_returns
+                # Convert to absolute amounts
+                var_amount = abs(var_result["var"] * portfolio_value)
+                var_percentage = abs(var_result["var"])
+                
+                calculation = VaRCalculation(
+                    id=str(uuid.uuid4()),
+                    portfolio_id=request.portfolio_id,
+                    method=method,
+                    confidence_level=confidence_level,
+                    time_horizon=request.time_horizon,
+                    var_amount=var_amount,
+                    var_percentage=var_percentage * 100,
+                    expected_shortfall=suite.expected_shortfall[confidence_level] * portfolio_value,
+                    timestamp=timestamp,
+                    underlying_data=var_result.get("details", {}),
+                    model_parameters=var_result.get("parameters", {}),
+                    backtesting_results=suite.backtests[confidence_level] if method == VaRMethod.HISTORICAL else None
+                )
+                
+                self.var_calculations[calculation.id] = calculation
+                calculations.append(calculation)
+                
+                logger.info(f"VaR calculated for {request.portfolio_id}: {var_percentage*100:.2f}% ({method.value})")
         
-        return portfolio_returns
+        return calculations
     
-    async def _calculate_historical_var(self, returns: np.ndarray, confidence_level: float) -> Dict[str, Any]:
-        """Calculate historical VaR"""
-        var_quantile = 1 - confidence_level
-        var_value = np.percentile(returns, var_quantile * 100)
-        
-        return {
-            "var": var_value,
-            "details": {
-                "method": "historical",
-                "observations": len(returns),
-                "min_return": np.min(returns),
-                "max_return": np.max(returns),
-                "mean_return": np.mean(returns),
-                "volatility": np.std(returns)
-            },
-            "parameters": {
-                "confidence_level": confidence_level,
-                "quantile": var_quantile
-            }
-        }
+    def _portfolio_weights(self, portfolio_id: str, symbols: List[str]) -> np.ndarray:
+        """Position value weights over the given symbols, normalized to sum to one"""
+        positions = self.portfolio_data[portfolio_id]["positions"]
+        weights = np.array([positions[symbol]["quantity"] * positions[symbol]["price"] for symbol in symbols], dtype=float)
+        return weights / weights.sum()
     
-    async def _calculate_parametric_var(self, returns: np.ndarray, confidence_level: float) -> Dict[str, Any]:
-        """Calculate parametric (normal) VaR"""
-        mean_return = np.mean(returns)
-        std_return = np.std(returns)
-        
-        # Z-score for confidence level
-        z_score = stats.norm.ppf(1 - confidence_level)
-        var_value = mean_return + z_score * std_return
+    def _portfolio_returns_matrix(self, portfolio_id: str) -> Optional[PortfolioReturnsMatrix]:
+        """Aligned returns matrix for the portfolio's positions with market data, rebuilt only when its inputs change"""
+        symbols = [symbol for symbol in self.portfolio_data[portfolio_id]["positions"] if symbol in self.market_data]
+        if not symbols:
+            return None
+        
+        aligned_length = min(len(self.market_data[symbol]) for symbol in symbols)
+        returns_matrix = self.returns_matrices.get(portfolio_id)
+        
+        if returns_matrix is None or returns_matrix.symbols != symbols or returns_matrix.length != aligned_length:
+            returns = np.column_stack([self.market_data[symbol]['returns'].values[-aligned_length:] for symbol in symbols])
+            returns_matrix = PortfolioReturnsMatrix(symbols, returns, self._portfolio_weights(portfolio_id, symbols))
+            self.returns_matrices[portfolio_id] = returns_matrix
+        else:
+            returns_matrix.set_weights(self._portfolio_weights(portfolio_id, symbols))
         
-        return {
-            "var": var_value,
-            "details": {
-                "method": "parametric_normal",
-                "mean": mean_return,
-                "volatility": std_return,
-                "z_score": z_score
-            },
-            "parameters": {
-                "confidence_level": confidence_level,
-                "distribution": "normal"
-            }
-        }
+        return returns_matrix
     
-    async def _calculate_monte_carlo_var(self, returns: np.ndarray, confidence_level: float, simulations: int = 10000) -> Dict[str, Any]:
-        """Calculate Monte Carlo VaR"""
-        mean_return = np.mean(returns)
-        std_return = np.std(returns)
-        
-        # Generate random scenarios
-        simulated_returns = np.random.normal(mean_return, std_return, simulations)
-        
-        # Calculate VaR
-        var_quantile = 1 - confidence_level
-        var_value = np.percentile(simulated_returns, var_quantile * 100)
+    async def _calculate_portfolio_returns(self, portfolio_id: str, lookback_days: int) -> np.ndarray:
+        """Calculate portfolio returns time series"""
+        returns_matrix = self._portfolio_returns_matrix(portfolio_id)
+        if returns_matrix is None:
+            return np.zeros(0)
         
-        return {
-            "var": var_value,
-            "details": {
-                "method": "monte_carlo",
-                "simulations": simulations,
-                "mean": mean_return,
-                "volatility": std_return
-            },
-            "parameters": {
-                "confidence_level": confidence_level,
-                "simulations": simulations
-            }
-        }
+        return returns_matrix.portfolio_returns(lookback_days)
     
-    async def _calculate_cornish_fisher_var(self, returns: np.ndarray, confidence_level: float) -> Dict[str, Any]:
-        """Calculate Cornish-Fisher VaR (accounts for skewness and kurtosis)"""
-        mean_return = np.mean(returns)
-        std_return = np.std(returns)
-        skewness = stats.skew(returns)
-        excess_kurtosis = stats.kurtosis(returns)
-        
-        # Z-score for confidence level
-        z = stats.norm.ppf(1 - confidence_level)
-        
-        # Cornish-Fisher expansion
-        cf_z = (z + 
-                (z**2 - 1) * skewness / 6 + 
-                (z**3 - 3*z) * excess_kurtosis / 24 - 
-                (2*z**3 - 5*z) * skewness**2 / 36)
-        
-        var_value = mean_return + cf_z * std_return
-        
-        return {
-            "var": var_value,
-            "details": {
-                "method": "cornish_fisher",
-                "mean": mean_return,
-                "volatility": std_return,
-                "skewness": skewness,
-                "excess_kurtosis": excess_kurtosis,
-                "adjusted_z_score": cf_z
-            },
-            "parameters": {
-                "confidence_level": confidence_level,
-                "original_z_score": z
+    def append_market_bar(self, prices: Dict[str, float], date: Optional[datetime] = None):
+        """Append one bar of prices; symbols missing from the bar carry their last price forward"""
+        date = date or datetime.now()
+        bar_returns = {}
+        
+        for symbol, data in self.market_data.items():
+            last_price = data['price'].iloc[-1]
+            price = prices.get(symbol, last_price)
+            bar_returns[symbol] = price / last_price - 1 if last_price > 0 else 0.0
+            data.loc[len(data)] = {
+                'date': date,
+                'price': price,
+                'returns': bar_returns[symbol],
+                'log_returns': np.log(price / last_price) if last_price > 0 else 0
             }
-        }
-    
-    async def _calculate_expected_shortfall(self, returns: np.ndarray, confidence_level: float) -> float:
-        """Calculate Expected Shortfall (Conditional VaR)"""
-        var_quantile = 1 - confidence_level
-        var_value = np.percentile(returns, var_quantile * 100)
         
-        # Expected shortfall is the mean of returns below VaR
-        tail_returns = returns[returns <= var_value]
-        
-        if len(tail_returns) > 0:
-            return np.mean(tail_returns)
-        else:
-            return var_value
+        for portfolio_id, returns_matrix in list(self.returns_matrices.items()):
+            aligned_length = min(len(self.market_data[symbol]) for symbol in returns_matrix.symbols)
+            if returns_matrix.length + 1 == aligned_length:
+                returns_matrix.append(np.array([bar_returns[symbol] for symbol in returns_matrix.symbols]))
+            else:
+                del self.returns_matrices[portfolio_id]  # Out of step with the market data; rebuilt on next use
     
     async def _calculate_portfolio_value(self, portfolio_id: str) -> float:
         """Calculate total portfolio value"""
@@ -708,59 +975,35 @@ class AdvancedRiskManagement:
         
         return total_value
     
-    async def _backtest_var(self, returns: np.ndarray, var_value: float, confidence_level: float) -> Dict[str, Any]:
-        """Backtest VaR model performance"""
-        # Count violations (returns worse than VaR)
-        violations = np.sum(returns <= var_value)
-        total_observations = len(returns)
-        
-        # Expected violation rate
-        expected_violations = total_observations * (1 - confidence_level)
-        violation_rate = violations / total_observations
-        
-        # Kupiec test for unconditional coverage
-        if expected_violations > 0:
-            lr_stat = -2 * np.log((confidence_level**violations) * ((1-confidence_level)**(total_observations-violations))) + \
-                     2 * np.log((violation_rate**violations) * ((1-violation_rate)**(total_observations-violations)))
-            p_value = 1 - stats.chi2.cdf(lr_stat, df=1)
-        else:
-            lr_stat = p_value = np.nan
-        
-        return {
-            "violations": int(violations),
-            "total_observations": total_observations,
-            "violation_rate": violation_rate,
-            "expected_violation_rate": 1 - confidence_level,
-            "kupiec_lr_stat": lr_stat,
-            "kupiec_p_value": p_value,
-            "model_adequate": p_value > 0.05 if not np.isnan(p_value) else None
-        }
-    
     async def run_stress_test(self, request: StressTestRequest) -> List[StressTestResult]:
         """Run stress tests on portfolio"""
         if request.portfolio_id not in self.portfolio_data:
             raise HTTPException(status_code=404, detail="Portfolio not found")
         
-        results = []
         portfolio = self.portfolio_data[request.portfolio_id]
         base_value = await self._calculate_portfolio_value(request.portfolio_id)
         
-        for scenario_id in request.scenario_ids:
-            if scenario_id not in self.stress_scenarios:
-                continue
-            
-            scenario = self.stress_scenarios[scenario_id]
-            result = await self._apply_stress_scenario(request.portfolio_id, scenario, base_value)
-            results.append(result)
-            self.stress_results[result.id] = result
+        scenarios = [self.stress_scenarios[scenario_id] for scenario_id in request.scenario_ids
+                     if scenario_id in self.stress_scenarios]
         
         # Add correlation breakdown scenarios if requested
         if request.include_correlation_breakdown:
-            correlation_scenarios = await self._generate_correlation_breakdown_scenarios()
-            for scenario in correlation_scenarios:
-                result = await self._apply_stress_scenario(request.portfolio_id, scenario, base_value)
-                results.append(result)
-                self.stress_results[result.id] = result
+            if self.correlation_breakdown_scenarios is None:
+                self.correlation_breakdown_scenarios = await self._generate_correlation_breakdown_scenarios()
+            scenarios.extend(self.correlation_breakdown_scenarios)
+        
+        # P&L of every position under every scenario, from the cached scenario matrix
+        book = self.stress_books.setdefault(request.portfolio_id, StressTestBook())
+        book.sync_positions(portfolio["positions"])
+        rows = book.scenario_rows(scenarios)
+        pnl = book.pnl[rows]
+        
+        results = []
+        for scenario, position_pnl in zip(scenarios, pnl):
+            result = await self._build_stress_result(request.portfolio_id, scenario, base_value, book.symbols, position_pnl,
+                                                     request.position_detail_limit)
+            results.append(result)
+            self.stress_results[result.id] = result
         
         # Broadcast results
         await self._broadcast_stress_results(results)
@@ -769,61 +1012,38 @@ class AdvancedRiskManagement:
         
         return results
     
-    async def _apply_stress_scenario(self, portfolio_id: str, scenario: StressTestScenario, base_value: float) -> StressTestResult:
-        """Apply stress scenario to portfolio"""
-        result_id = str(uuid.uuid4())
-        portfolio = self.portfolio_data[portfolio_id]
-        
-        stressed_value = portfolio.get("cash", 0)  # Cash unaffected
-        component_contributions = {}
-        
-        # Apply shocks to each position
-        for symbol, position in portfolio["positions"].items():
-            position_value = position["quantity"] * position["price"]
-            
-            # Determine shock for this symbol
-            shock = 0.0
-            if symbol in scenario.market_shocks:
-                shock = scenario.market_shocks[symbol]
-            elif "all" in scenario.market_shocks:
-                shock = scenario.market_shocks["all"]
-            
-            # Apply volatility multiplier
-            vol_multiplier = scenario.volatility_multipliers.get(symbol, 
-                            scenario.volatility_multipliers.get("all", 1.0))
-            
-            # Enhanced shock based on volatility
-            if vol_multiplier > 1:
-                shock *= vol_multiplier
-            
-            # Apply liquidity constraints (reduce recovery)
-            liquidity_constraint = scenario.liquidity_constraints.get(symbol,
-                                  scenario.liquidity_constraints.get("all", 0.0))
-            
-            if liquidity_constraint > 0:
-                shock *= (1 + liquidity_constraint)  # Worsen the shock
-            
-            # Calculate stressed position value
-            stressed_position_value = position_value * (1 + shock)
-            stressed_value += stressed_position_value
-            
-            # Track contribution to loss
-            contribution = stressed_position_value - position_value
-            component_contributions[symbol] = contribution
+    async def _build_stress_result(self, portfolio_id: str, scenario: StressTestScenario, base_value: float,
+                                   symbols: List[str], position_pnl: np.ndarray,
+                                   position_detail_limit: Optional[int] = None) -> StressTestResult:
+        """Summarize one scenario's row of position P&L, listing at most position_detail_limit positions"""
+        stressed_value = base_value + float(position_pnl.sum())
         
         # Calculate loss metrics
         absolute_loss = base_value - stressed_value
         percentage_loss = absolute_loss / base_value if base_value > 0 else 0
         
-        # Risk decomposition (simplified)
-        risk_decomposition = {}
-        total_contribution = sum(abs(c) for c in component_contributions.values())
+        # Per-position detail only for the largest contributors; the totals above cover every position
+        absolute_pnl = np.abs(position_pnl)
+        if position_detail_limit is None or position_detail_limit >= len(symbols):
+            columns = np.arange(len(symbols))
+        elif position_detail_limit == 0:
+            columns = np.zeros(0, dtype=int)
+        else:
+            columns = np.argpartition(-absolute_pnl, position_detail_limit - 1)[:position_detail_limit]
+            columns = columns[np.argsort(-absolute_pnl[columns], kind="stable")]
+        detail_symbols = [symbols[column] for column in columns.tolist()]
+        component_contributions = dict(zip(detail_symbols, position_pnl[columns].tolist()))
         
-        for symbol, contribution in component_contributions.items():
-            risk_decomposition[symbol] = abs(contribution) / total_contribution if total_contribution > 0 else 0
+        # Risk decomposition (simplified)
+        total_contribution = absolute_pnl.sum()
+        if total_contribution > 0:
+            risk_decomposition = dict(zip(detail_symbols, (absolute_pnl[columns] / total_contribution).tolist()))
+        else:
+            risk_decomposition = dict.fromkeys(detail_symbols, 0)
         
         # Generate recommendations
-        recommendations = await self._generate_stress_recommendations(scenario, percentage_loss, component_contributions)
+        worst_contributor = symbols[int(np.argmin(position_pnl))] if symbols else None
+        recommendations = await self._generate_stress_recommendations(scenario, percentage_loss, worst_contributor)
         
         # Estimate recovery time (simplified)
         recovery_time = None
@@ -831,7 +1051,7 @@ class AdvancedRiskManagement:
             recovery_time = int(percentage_loss * 365)  # Days proportional to loss
         
         return StressTestResult(
-            id=result_id,
+            id=str(uuid.uuid4()),
             scenario_id=scenario.id,
             portfolio_id=portfolio_id,
             timestamp=datetime.now().isoformat(),
@@ -881,7 +1101,7 @@ class AdvancedRiskManagement:
     
     async def _generate_stress_recommendations(self, scenario: StressTestScenario, 
                                             percentage_loss: float,
-                                            component_contributions: Dict[str, float]) -> List[str]:
+                                            worst_contributor: Optional[str]) -> List[str]:
         """Generate recommendations based on stress test results"""
         recommendations = []
         
@@ -892,12 +1112,9 @@ class AdvancedRiskManagement:
         elif percentage_loss > 0.10:  # > 10% loss
             recommendations.append("Review risk limits and consider tightening exposure")
         
-        # Identify worst performing positions
-        worst_contributors = sorted(component_contributions.items(), key=lambda x: x[1])[:3]
-        
-        if worst_contributors:
-            worst_symbol = worst_contributors[0][0]
-            recommendations.append(f"Consider reducing exposure to {worst_symbol} (largest loss contributor)")
+        # Identify worst performing position
+        if worst_contributor:
+            recommendations.append(f"Consider reducing exposure to {worst_contributor} (largest loss contributor)")
         
         # Scenario-specific recommendations
         if scenario.type == StressTestType.CORRELATION_BREAKDOWN:
@@ -922,11 +1139,8 @@ class AdvancedRiskManagement:
             raise HTTPException(status_code=404, detail="Portfolio not found")
         
         # Calculate VaR metrics
-        var_request = VaRRequest(portfolio_id=portfolio_id, confidence_level=0.95)
-        var_95 = await self.calculate_var(var_request)
-        
-        var_request_99 = VaRRequest(portfolio_id=portfolio_id, confidence_level=0.99)
-        var_99 = await self.calculate_var(var_request_99)
+        var_request = VaRSuiteRequest(portfolio_id=portfolio_id, confidence_levels=[0.95, 0.99])
+        var_95, var_99 = await self.calculate_var_suite(var_request, methods=[VaRMethod.HISTORICAL])
         
         # Calculate other risk metrics
         portfolio_returns = await self._calculate_portfolio_returns(portfolio_id, 252)
@@ -1384,6 +1598,17 @@ async def calculate_var(request: VaRRequest):
         logger.error(f"Error calculating VaR: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/var/suite")
+async def calculate_var_suite(request: VaRSuiteRequest):
+    """Calculate Value at Risk for every method and confidence level"""
+    try:
+        results = await risk_manager.calculate_var_suite(request)
+        return {"var_calculations": [asdict(result) for result in results]}
+        
+    except Exception as e:
+        logger.error(f"Error calculating VaR suite: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/var/{calculation_id}")
 async def get_var_calculation(calculation_id: str):
     """Get VaR calculation result"""
@@ -18,6 +18,7 @@ import uvicorn
 from pydantic import BaseModel, Field
 import uuid
 import math
+from itertools import accumulate
 from enum import Enum
 
 # Configure logging
@@ -92,6 +93,7 @@ class PredictionInput:
     features: List[str]
     model_type: ModelType
     confidence_threshold: float
+    prediction_type: PredictionType = PredictionType.PRICE_MOVEMENT
 
 @dataclass
 class PredictionResult:
@@ -138,10 +140,189 @@ class PredictionRequest(BaseModel):
     model_type: ModelType = Field(default=ModelType.ENSEMBLE, description="ML model type")
     features: List[str] = Field(default=[], description="Custom features")
 
+class BatchPredictionRequest(BaseModel):
+    symbols: List[str] = Field(..., description="Trading symbols")
+    prediction_type: PredictionType = Field(..., description="Type of prediction")
+    timeframe: str = Field(default="1h", description="Data timeframe")
+    horizon: int = Field(default=24, description="Prediction horizon")
+    model_type: ModelType = Field(default=ModelType.ENSEMBLE, description="ML model type")
+    features: List[str] = Field(default=[], description="Custom features")
+
+# Feature store layout
+BAR_COLUMNS = ["open_price", "high_price", "low_price", "close_price", "volume", "vwap"]
+INDICATOR_COLUMNS = ["rsi", "macd", "bollinger_upper", "bollinger_lower", "sma_20", "ema_12",
+                     "atr", "momentum", "stochastic", "williams_r"]
+FEATURE_COLUMNS = INDICATOR_COLUMNS + ["price", "price_volatility", "support_level", "resistance_level",
+                                       "return_volatility", "value_at_risk_95", "max_drawdown"]
+BAR = {name: i for i, name in enumerate(BAR_COLUMNS)}
+FEATURE = {name: i for i, name in enumerate(FEATURE_COLUMNS)}
+
+FEATURE_WINDOW = 50  # Longest trailing window any feature reads
+
+def _percentile(values: List[float], q: float) -> float:
+    """np.percentile's default linear interpolation, on a short Python list"""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def _std(values: List[float], mean: float) -> float:
+    """Population standard deviation, as np.std"""
+    return math.sqrt(sum([(v - mean) ** 2 for v in values]) / len(values))
+
+class SymbolFeatureStore:
+    """
+    Append-only columnar bar history and features for one symbol.
+
+    Bars and features live in preallocated NumPy arrays that double in capacity when full.
+    Appending a bar computes that bar's feature row from the trailing windows (at most 50 bars),
+    so predictions read one finished row instead of recomputing indicators from the history.
+    A row holds the bar's technical indicators (from the bars before it, as they are reported
+    with the bar) and the window features predictions use (including the bar itself).
+    """
+
+    def __init__(self, symbol: str, capacity: int = 1024):
+        self.symbol = symbol
+        self.count = 0
+        self.timestamps: List[str] = []
+        self._bars = np.empty((capacity, len(BAR_COLUMNS)))
+        self._features = np.empty((capacity, len(FEATURE_COLUMNS)))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _grow(self):
+        capacity = len(self._bars) * 2
+        bars = np.empty((capacity, len(BAR_COLUMNS)))
+        features = np.empty((capacity, len(FEATURE_COLUMNS)))
+        bars[:self.count] = self._bars[:self.count]
+        features[:self.count] = self._features[:self.count]
+        self._bars, self._features = bars, features
+
+    def column(self, name: str) -> np.ndarray:
+        """View of one bar column over the stored history"""
+        return self._bars[:self.count, BAR[name]]
+
+    def feature(self, name: str) -> np.ndarray:
+        """View of one feature column over the stored history"""
+        return self._features[:self.count, FEATURE[name]]
+
+    def latest_features(self) -> np.ndarray:
+        return self._features[self.count - 1]
+
+    def append(self, timestamp: str, open_price: float, high_price: float, low_price: float,
+               close_price: float, volume: int, vwap: float) -> np.ndarray:
+        """Store a bar and compute its feature row; returns the row"""
+        if self.count == len(self._bars):
+            self._grow()
+        n = self.count
+        self._bars[n] = (open_price, high_price, low_price, close_price, volume, vwap)
+        self.timestamps.append(timestamp)
+        self.count = n + 1
+
+        # The trailing windows are at most FEATURE_WINDOW bars, cheaper as Python floats than as NumPy calls
+        start = max(0, self.count - FEATURE_WINDOW)
+        highs = self._bars[start:self.count, BAR["high_price"]].tolist()
+        lows = self._bars[start:self.count, BAR["low_price"]].tolist()
+        closes = self._bars[start:self.count, BAR["close_price"]].tolist()
+
+        row = self._features[n]
+        row[:len(INDICATOR_COLUMNS)] = self._indicators(n, highs[:-1], lows[:-1], closes[:-1], float(close_price))
+        row[len(INDICATOR_COLUMNS):] = self._window_features(highs, lows, closes)
+        return row
+
+    def _indicators(self, n: int, highs: List[float], lows: List[float], closes: List[float],
+                    current_price: float) -> List[float]:
+        """Technical indicators from the bars before the new one"""
+        if n < 20:
+            return [50.0, 0.0, current_price * 1.02, current_price * 0.98, current_price, current_price,
+                    current_price * 0.02, 0.0, 50.0, -50.0]
+
+        prices = closes[-20:]
+
+        # RSI calculation
+        changes = [prices[i] - prices[i-1] for i in range(len(prices) - 14, len(prices))]
+        avg_gain = sum([change for change in changes if change > 0]) / 14
+        avg_loss = -sum([change for change in changes if change < 0]) / 14
+        rs = avg_gain / avg_loss if avg_loss > 0 else 100
+        rsi = 100 - (100 / (1 + rs))
+
+        # Moving averages
+        sma_20 = sum(prices) / len(prices)
+        ema_12 = prices[-1]  # Simplified EMA
+
+        # Bollinger Bands
+        std_dev = _std(prices, sma_20)
+
+        # MACD (simplified)
+        macd = sum(prices[-12:]) / 12 - sma_20
+
+        # ATR (simplified)
+        atr = sum([abs(high - low) for high, low in zip(highs[-14:], lows[-14:])]) / 14
+
+        return [
+            round(rsi, 2),
+            round(macd, 4),
+            round(sma_20 + 2 * std_dev, 2),
+            round(sma_20 - 2 * std_dev, 2),
+            round(sma_20, 2),
+            round(ema_12, 2),
+            round(atr, 2),
+            round((current_price - prices[-10]) / prices[-10] * 100, 2),
+            round(float(np.random.uniform(20, 80)), 2),
+            round(float(np.random.uniform(-80, -20)), 2)
+        ]
+
+    def _window_features(self, highs: List[float], lows: List[float], closes: List[float]) -> List[float]:
+        """Features over the trailing windows ending at the newest bar (FEATURE_COLUMNS order after the indicators)"""
+        recent_prices = closes[-20:]
+        recent_mean = sum(recent_prices) / len(recent_prices)
+        price_volatility = _std(recent_prices, recent_mean) / recent_mean
+
+        risk_prices = closes[-30:]
+        if len(risk_prices) >= 2:
+            returns = [(risk_prices[i] - risk_prices[i-1]) / risk_prices[i-1] for i in range(1, len(risk_prices))]
+            return_volatility = _std(returns, sum(returns) / len(returns)) * math.sqrt(252)  # Annualized
+            value_at_risk_95 = _percentile(returns, 5) * 100  # 95% VaR
+            max_drawdown = max([(peak - price) / peak for peak, price in zip(accumulate(risk_prices, max), risk_prices)])
+        else:
+            return_volatility = value_at_risk_95 = max_drawdown = 0.0
+
+        return [
+            closes[-1],
+            price_volatility,
+            _percentile(lows, 25),
+            _percentile(highs, 75),
+            return_volatility,
+            value_at_risk_95,
+            max_drawdown
+        ]
+
+    def bars(self, periods: int) -> List[MarketData]:
+        """The last periods bars as MarketData records"""
+        start = max(0, self.count - periods)
+        records = []
+        for i in range(start, self.count):
+            bar = self._bars[i]
+            indicators = self._features[i, :len(INDICATOR_COLUMNS)]
+            records.append(MarketData(
+                symbol=self.symbol,
+                timestamp=self.timestamps[i],
+                open_price=float(bar[BAR["open_price"]]),
+                high_price=float(bar[BAR["high_price"]]),
+                low_price=float(bar[BAR["low_price"]]),
+                close_price=float(bar[BAR["close_price"]]),
+                volume=int(bar[BAR["volume"]]),
+                vwap=float(bar[BAR["vwap"]]),
+                technical_indicators={name: float(value) for name, value in zip(INDICATOR_COLUMNS, indicators)}
+            ))
+        return records
+
 class AIPredictionEngine:
     def __init__(self):
         self.models = {}
-        self.market_data = {}
+        self.market_data: Dict[str, SymbolFeatureStore] = {}
         self.predictions = {}
         self.model_performance = {}
         self.active_websockets = []
@@ -217,9 +398,9 @@ class AIPredictionEngine:
         
         logger.info(f"Initialized market data for {len(symbols)} symbols")
     
-    def _generate_sample_market_data(self, symbol: str, periods: int = 1000) -> List[MarketData]:
+    def _generate_sample_market_data(self, symbol: str, periods: int = 1000) -> SymbolFeatureStore:
         """Generate realistic sample market data with technical indicators"""
-        data = []
+        store = SymbolFeatureStore(symbol)
         base_price = np.random.uniform(100, 500)
         
         for i in range(periods):
@@ -236,144 +417,101 @@ class AIPredictionEngine:
             volume = int(np.random.lognormal(15, 1))
             vwap = (high_price + low_price + close_price) / 3
             
-            # Calculate technical indicators
-            technical_indicators = self._calculate_technical_indicators(data, close_price, volume)
-            
-            market_data = MarketData(
-                symbol=symbol,
+            store.append(
                 timestamp=(datetime.now() - timedelta(hours=periods-i)).isoformat(),
                 open_price=round(open_price, 2),
                 high_price=round(high_price, 2),
                 low_price=round(low_price, 2),
                 close_price=round(close_price, 2),
                 volume=volume,
-                vwap=round(vwap, 2),
-                technical_indicators=technical_indicators
+                vwap=round(vwap, 2)
             )
-            
-            data.append(market_data)
             base_price = close_price
         
-        return data
+        return store
     
-    def _calculate_technical_indicators(self, historical_data: List[MarketData], 
-                                      current_price: float, current_volume: int) -> Dict[str, float]:
-        """Calculate technical indicators for current data point"""
-        if len(historical_data) < 20:
-            return {
-                "rsi": 50.0,
-                "macd": 0.0,
-                "bollinger_upper": current_price * 1.02,
-                "bollinger_lower": current_price * 0.98,
-                "sma_20": current_price,
-                "ema_12": current_price,
-                "atr": current_price * 0.02,
-                "momentum": 0.0,
-                "stochastic": 50.0,
-                "williams_r": -50.0
-            }
-        
-        prices = [d.close_price for d in historical_data[-20:]]
-        volumes = [d.volume for d in historical_data[-20:]]
-        
-        # RSI calculation
-        gains = [max(0, prices[i] - prices[i-1]) for i in range(1, len(prices))]
-        losses = [max(0, prices[i-1] - prices[i]) for i in range(1, len(prices))]
-        avg_gain = sum(gains[-14:]) / 14 if len(gains) >= 14 else sum(gains) / len(gains)
-        avg_loss = sum(losses[-14:]) / 14 if len(losses) >= 14 else sum(losses) / len(losses)
-        rs = avg_gain / avg_loss if avg_loss > 0 else 100
-        rsi = 100 - (100 / (1 + rs))
-        
-        # Moving averages
-        sma_20 = sum(prices) / len(prices)
-        ema_12 = prices[-1]  # Simplified EMA
-        
-        # Bollinger Bands
-        std_dev = np.std(prices)
-        bollinger_upper = sma_20 + (2 * std_dev)
-        bollinger_lower = sma_20 - (2 * std_dev)
-        
-        # MACD (simplified)
-        ema_12_calc = sum(prices[-12:]) / 12 if len(prices) >= 12 else sma_20
-        ema_26_calc = sum(prices) / len(prices)
-        macd = ema_12_calc - ema_26_calc
-        
-        # ATR (simplified)
-        high_low = [abs(historical_data[i].high_price - historical_data[i].low_price) 
-                   for i in range(-min(14, len(historical_data)), 0)]
-        atr = sum(high_low) / len(high_low)
-        
-        return {
-            "rsi": round(rsi, 2),
-            "macd": round(macd, 4),
-            "bollinger_upper": round(bollinger_upper, 2),
-            "bollinger_lower": round(bollinger_lower, 2),
-            "sma_20": round(sma_20, 2),
-            "ema_12": round(ema_12, 2),
-            "atr": round(atr, 2),
-            "momentum": round((current_price - prices[-10]) / prices[-10] * 100, 2) if len(prices) >= 10 else 0.0,
-            "stochastic": round(np.random.uniform(20, 80), 2),
-            "williams_r": round(np.random.uniform(-80, -20), 2)
-        }
+    def append_market_bar(self, symbol: str, timestamp: str, open_price: float, high_price: float,
+                          low_price: float, close_price: float, volume: int, vwap: float):
+        """Add a new bar for a symbol, updating its features incrementally"""
+        store = self.market_data.get(symbol)
+        if store is None:
+            store = SymbolFeatureStore(symbol)
+            self.market_data[symbol] = store
+        store.append(timestamp, open_price, high_price, low_price, close_price, volume, vwap)
+    
+    def _feature_matrix(self, symbols: List[str]) -> np.ndarray:
+        """Latest feature row of each symbol, stacked into a (symbols x features) matrix"""
+        return np.vstack([self.market_data[symbol].latest_features() for symbol in symbols])
     
     async def generate_prediction(self, request: PredictionInput) -> PredictionResult:
         """Generate AI-powered market prediction"""
-        prediction_id = str(uuid.uuid4())
-        
+        predictions = await self.generate_predictions(
+            [request.symbol], request.prediction_type, request.prediction_horizon,
+            request.model_type, request.features
+        )
+        return predictions[0]
+    
+    async def generate_predictions(self, symbols: List[str], prediction_type: PredictionType,
+                                   prediction_horizon: int = 24, model_type: ModelType = ModelType.ENSEMBLE,
+                                   features: Optional[List[str]] = None) -> List[PredictionResult]:
+        """Generate predictions for many symbols from one feature matrix"""
         # Get historical data
-        if request.symbol not in self.market_data:
-            raise HTTPException(status_code=404, detail=f"No data available for {request.symbol}")
+        for symbol in symbols:
+            if symbol not in self.market_data or len(self.market_data[symbol]) == 0:
+                raise HTTPException(status_code=404, detail=f"No data available for {symbol}")
+        if not symbols:
+            return []
         
-        historical_data = self.market_data[request.symbol]
-        latest_data = historical_data[-1]
+        feature_matrix = self._feature_matrix(symbols)
         
         # Select appropriate model
-        model_id = self._select_best_model(request.prediction_type, request.model_type)
+        model_id = self._select_best_model(prediction_type, model_type)
         model = self.models[model_id]
         
-        # Generate prediction based on model type and prediction type
-        predicted_value, confidence, probability_dist = await self._run_prediction_model(
-            request, historical_data, model
+        # Generate predictions based on model type and prediction type
+        predicted_values, confidences, probability_dists = self._run_prediction_models(
+            prediction_type, feature_matrix, model
         )
         
-        # Calculate feature importance
-        feature_importance = self._calculate_feature_importance(request.features)
-        
-        # Calculate risk metrics
-        risk_metrics = self._calculate_risk_metrics(historical_data, predicted_value)
+        # Calculate feature importance and risk metrics
+        feature_importances = self._calculate_feature_importance(features or [], len(symbols))
+        risk_metrics = self._calculate_risk_metrics(feature_matrix, predicted_values)
         
-        # Determine confidence level
-        confidence_level = self._determine_confidence_level(confidence)
-        
-        prediction = PredictionResult(
-            id=prediction_id,
-            symbol=request.symbol,
-            prediction_type=request.prediction_type,
-            model_type=request.model_type,
-            timestamp=datetime.now().isoformat(),
-            prediction_horizon=request.prediction_horizon,
-            predicted_value=predicted_value,
-            confidence_score=confidence,
-            confidence_level=confidence_level,
-            probability_distribution=probability_dist,
-            feature_importance=feature_importance,
-            model_metadata={
-                "model_id": model_id,
-                "model_accuracy": self.model_performance[model_id].accuracy,
-                "training_samples": len(historical_data),
-                "last_data_point": latest_data.timestamp
-            },
-            risk_metrics=risk_metrics
-        )
-        
-        self.predictions[prediction_id] = prediction
-        
-        # Broadcast prediction to connected websockets
-        await self._broadcast_prediction(prediction)
+        predictions = []
+        for i, symbol in enumerate(symbols):
+            store = self.market_data[symbol]
+            confidence = float(confidences[i])
+            
+            prediction = PredictionResult(
+                id=str(uuid.uuid4()),
+                symbol=symbol,
+                prediction_type=prediction_type,
+                model_type=model_type,
+                timestamp=datetime.now().isoformat(),
+                prediction_horizon=prediction_horizon,
+                predicted_value=float(predicted_values[i]),
+                confidence_score=confidence,
+                confidence_level=self._determine_confidence_level(confidence),
+                probability_distribution=probability_dists[i],
+                feature_importance=feature_importances[i],
+                model_metadata={
+                    "model_id": model_id,
+                    "model_accuracy": self.model_performance[model_id].accuracy,
+                    "training_samples": len(store),
+                    "last_data_point": store.timestamps[-1]
+                },
+                risk_metrics=risk_metrics[i]
+            )
+            
+            self.predictions[prediction.id] = prediction
+            
+            # Broadcast prediction to connected websockets
+            await self._broadcast_prediction(prediction)
+            predictions.append(prediction)
         
-        logger.info(f"Generated {request.prediction_type} prediction for {request.symbol}: {predicted_value}")
+        logger.info(f"Generated {prediction_type} predictions for {len(symbols)} symbols")
         
-        return prediction
+        return predictions
     
     def _select_best_model(self, prediction_type: PredictionType, preferred_model: ModelType) -> str:
         """Select the best model for the given prediction type"""
@@ -397,138 +535,113 @@ class AIPredictionEngine:
         
         return best_model
     
-    async def _run_prediction_model(self, request: PredictionInput, 
-                                  historical_data: List[MarketData], 
-                                  model: Dict) -> Tuple[float, float, Dict[str, float]]:
-        """Run the actual prediction model (simplified simulation)"""
-        latest_price = historical_data[-1].close_price
-        latest_indicators = historical_data[-1].technical_indicators
+    def _run_prediction_models(self, prediction_type: PredictionType, features: np.ndarray,
+                               model: Dict) -> Tuple[np.ndarray, np.ndarray, List[Dict[str, float]]]:
+        """Run the prediction model (simplified simulation) over a feature matrix, one row per symbol"""
+        n = len(features)
+        latest_price = features[:, FEATURE["price"]]
+        rsi = features[:, FEATURE["rsi"]]
+        macd = features[:, FEATURE["macd"]]
+        accuracy = self.model_performance[model["id"]].accuracy
         
         # Simulate different prediction types
-        if request.prediction_type == PredictionType.PRICE_MOVEMENT:
+        if prediction_type == PredictionType.PRICE_MOVEMENT:
             # Predict price change percentage
-            base_change = np.random.normal(0, 0.03)  # 3% volatility
-            trend_factor = (latest_indicators["rsi"] - 50) / 100  # RSI influence
-            macd_factor = latest_indicators["macd"] * 0.1
+            base_change = np.random.normal(0, 0.03, n)  # 3% volatility
+            trend_factor = (rsi - 50) / 100  # RSI influence
+            macd_factor = macd * 0.1
             
             predicted_change = base_change + trend_factor + macd_factor
-            predicted_value = predicted_change * 100  # Percentage
-            confidence = min(0.95, max(0.1, self.model_performance[model["id"]].accuracy + np.random.uniform(-0.1, 0.1)))
+            predicted_values = predicted_change * 100  # Percentage
+            confidences = np.clip(accuracy + np.random.uniform(-0.1, 0.1, n), 0.1, 0.95)
             
-        elif request.prediction_type == PredictionType.VOLATILITY:
+        elif prediction_type == PredictionType.VOLATILITY:
             # Predict volatility
-            recent_prices = [d.close_price for d in historical_data[-20:]]
-            historical_vol = np.std(recent_prices) / np.mean(recent_prices)
-            
-            vol_factor = latest_indicators["atr"] / latest_price
-            predicted_value = (historical_vol + vol_factor) / 2 * 100
-            confidence = min(0.90, max(0.2, self.model_performance[model["id"]].accuracy))
+            historical_vol = features[:, FEATURE["price_volatility"]]
+            vol_factor = features[:, FEATURE["atr"]] / latest_price
+            predicted_values = (historical_vol + vol_factor) / 2 * 100
+            confidences = np.full(n, min(0.90, max(0.2, accuracy)))
             
-        elif request.prediction_type == PredictionType.TREND_DIRECTION:
+        elif prediction_type == PredictionType.TREND_DIRECTION:
             # Predict trend direction (1 = up, -1 = down, 0 = sideways)
-            rsi_signal = 1 if latest_indicators["rsi"] > 60 else -1 if latest_indicators["rsi"] < 40 else 0
-            macd_signal = 1 if latest_indicators["macd"] > 0 else -1
-            momentum_signal = 1 if latest_indicators["momentum"] > 0 else -1
+            rsi_signal = np.where(rsi > 60, 1, np.where(rsi < 40, -1, 0))
+            macd_signal = np.where(macd > 0, 1, -1)
+            momentum_signal = np.where(features[:, FEATURE["momentum"]] > 0, 1, -1)
             
             trend_score = (rsi_signal + macd_signal + momentum_signal) / 3
-            predicted_value = trend_score
-            confidence = min(0.85, max(0.3, abs(trend_score) * 0.8))
+            predicted_values = trend_score
+            confidences = np.clip(np.abs(trend_score) * 0.8, 0.3, 0.85)
             
-        elif request.prediction_type == PredictionType.SUPPORT_RESISTANCE:
-            # Predict support/resistance levels
-            recent_lows = [d.low_price for d in historical_data[-50:]]
-            recent_highs = [d.high_price for d in historical_data[-50:]]
-            
-            support_level = np.percentile(recent_lows, 25)
-            resistance_level = np.percentile(recent_highs, 75)
-            
-            # Return the closer level
-            if abs(latest_price - support_level) < abs(latest_price - resistance_level):
-                predicted_value = support_level
-            else:
-                predicted_value = resistance_level
-                
-            confidence = 0.7
+        elif prediction_type == PredictionType.SUPPORT_RESISTANCE:
+            # Predict support/resistance levels, returning the closer level
+            support_level = features[:, FEATURE["support_level"]]
+            resistance_level = features[:, FEATURE["resistance_level"]]
+            predicted_values = np.where(
+                np.abs(latest_price - support_level) < np.abs(latest_price - resistance_level),
+                support_level, resistance_level
+            )
+            confidences = np.full(n, 0.7)
             
         else:
             # Default prediction
-            predicted_value = np.random.uniform(-5, 5)
-            confidence = 0.5
-        
-        # Create probability distribution
-        if request.prediction_type == PredictionType.PRICE_MOVEMENT:
-            probability_dist = {
-                "strong_down": max(0, 0.3 - predicted_value/10),
-                "down": max(0, 0.2 - predicted_value/20),
-                "neutral": 0.3,
-                "up": max(0, 0.2 + predicted_value/20),
-                "strong_up": max(0, 0.3 + predicted_value/10)
-            }
-        else:
-            probability_dist = {
-                "very_low": 0.2,
-                "low": 0.25,
-                "medium": 0.3,
-                "high": 0.2,
-                "very_high": 0.05
-            }
-        
-        # Normalize probabilities
-        total_prob = sum(probability_dist.values())
-        probability_dist = {k: v/total_prob for k, v in probability_dist.items()}
+            predicted_values = np.random.uniform(-5, 5, n)
+            confidences = np.full(n, 0.5)
+        
+        # Create probability distributions
+        probability_dists = []
+        for predicted_value in predicted_values.tolist():
+            if prediction_type == PredictionType.PRICE_MOVEMENT:
+                probability_dist = {
+                    "strong_down": max(0, 0.3 - predicted_value/10),
+                    "down": max(0, 0.2 - predicted_value/20),
+                    "neutral": 0.3,
+                    "up": max(0, 0.2 + predicted_value/20),
+                    "strong_up": max(0, 0.3 + predicted_value/10)
+                }
+            else:
+                probability_dist = {
+                    "very_low": 0.2,
+                    "low": 0.25,
+                    "medium": 0.3,
+                    "high": 0.2,
+                    "very_high": 0.05
+                }
+            
+            # Normalize probabilities
+            total_prob = sum(probability_dist.values())
+            probability_dists.append({k: v/total_prob for k, v in probability_dist.items()})
         
-        return predicted_value, confidence, probability_dist
+        return predicted_values, confidences, probability_dists
     
-    def _calculate_feature_importance(self, features: List[str]) -> Dict[str, float]:
-        """Calculate feature importance for the prediction"""
+    def _calculate_feature_importance(self, features: List[str], count: int = 1) -> List[Dict[str, float]]:
+        """Calculate feature importance for each of count predictions"""
         default_features = ["price", "volume", "rsi", "macd", "bollinger", "momentum", "volatility"]
         all_features = features if features else default_features
         
-        # Simulate feature importance scores
-        importance = {}
-        total_importance = 0
-        
-        for feature in all_features:
-            score = np.random.uniform(0.05, 0.25)
-            importance[feature] = score
-            total_importance += score
+        # Simulate feature importance scores, normalized to sum to 1.0 per prediction
+        scores = np.random.uniform(0.05, 0.25, (count, len(all_features)))
+        scores /= scores.sum(axis=1, keepdims=True)
         
-        # Normalize to sum to 1.0
-        importance = {k: v/total_importance for k, v in importance.items()}
-        
-        return importance
-    
-    def _calculate_risk_metrics(self, historical_data: List[MarketData], predicted_value: float) -> Dict[str, float]:
-        """Calculate risk metrics for the prediction"""
-        recent_prices = [d.close_price for d in historical_data[-30:]]
-        returns = [(recent_prices[i] - recent_prices[i-1]) / recent_prices[i-1] 
-                  for i in range(1, len(recent_prices))]
-        
-        volatility = np.std(returns) * np.sqrt(252)  # Annualized
-        var_95 = np.percentile(returns, 5) * 100  # 95% VaR
-        max_drawdown = self._calculate_max_drawdown(recent_prices)
-        
-        return {
-            "volatility": round(volatility * 100, 2),
-            "value_at_risk_95": round(var_95, 2),
-            "max_drawdown": round(max_drawdown * 100, 2),
-            "prediction_uncertainty": round(abs(predicted_value) * 0.1, 2),
-            "model_confidence": round(np.random.uniform(0.6, 0.9), 2)
-        }
+        return [dict(zip(all_features, row)) for row in scores.tolist()]
     
-    def _calculate_max_drawdown(self, prices: List[float]) -> float:
-        """Calculate maximum drawdown from price series"""
-        peak = prices[0]
-        max_dd = 0
-        
-        for price in prices:
-            if price > peak:
-                peak = price
-            dd = (peak - price) / peak
-            if dd > max_dd:
-                max_dd = dd
-        
-        return max_dd
+    def _calculate_risk_metrics(self, features: np.ndarray, predicted_values: np.ndarray) -> List[Dict[str, float]]:
+        """Calculate risk metrics for each prediction from its symbol's feature row"""
+        volatility = np.round(features[:, FEATURE["return_volatility"]] * 100, 2)
+        var_95 = np.round(features[:, FEATURE["value_at_risk_95"]], 2)
+        max_drawdown = np.round(features[:, FEATURE["max_drawdown"]] * 100, 2)
+        uncertainty = np.round(np.abs(predicted_values) * 0.1, 2)
+        model_confidence = np.round(np.random.uniform(0.6, 0.9, len(features)), 2)
+        
+        return [
+            {
+                "volatility": float(volatility[i]),
+                "value_at_risk_95": float(var_95[i]),
+                "max_drawdown": float(max_drawdown[i]),
+                "prediction_uncertainty": float(uncertainty[i]),
+                "model_confidence": float(model_confidence[i])
+            }
+            for i in range(len(features))
+        ]
     
     def _determine_confidence_level(self, confidence_score: float) -> ConfidenceLevel:
         """Determine confidence level from numeric score"""
@@ -628,7 +741,8 @@ async def generate_prediction(request: PredictionRequest):
             prediction_horizon=request.horizon,
             features=request.features,
             model_type=request.model_type,
-            confidence_threshold=0.5
+            confidence_threshold=0.5,
+            prediction_type=request.prediction_type
         )
         
         prediction = await ai_engine.generate_prediction(prediction_input)
@@ -638,6 +752,19 @@ async def generate_prediction(request: PredictionRequest):
         logger.error(f"Error generating prediction: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/predictions/batch")
+async def generate_predictions(request: BatchPredictionRequest):
+    """Generate AI predictions for many symbols at once"""
+    try:
+        predictions = await ai_engine.generate_predictions(
+            request.symbols, request.prediction_type, request.horizon, request.model_type, request.features
+        )
+        return {"predictions": [asdict(p) for p in predictions], "total": len(predictions)}
+        
+    except Exception as e:
+        logger.error(f"Error generating batch predictions: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/predictions/{prediction_id}")
 async def get_prediction(prediction_id: str):
     """Get a specific prediction by ID"""
@@ -667,7 +794,7 @@ async def get_market_data(symbol: str, periods: int = 100):
     if symbol not in ai_engine.market_data:
         raise HTTPException(status_code=404, detail=f"No data available for {symbol}")
     
-    data = ai_engine.market_data[symbol][-periods:]
+    data = ai_engine.market_data[symbol].bars(periods)
     return {
         "symbol": symbol,
         "data": [asdict(d) for d in data],
@@ -687,10 +814,10 @@ async def get_feature_importance(symbol: str, prediction_type: PredictionType =
         prediction_horizon=24,
         features=[],
         model_type=ModelType.ENSEMBLE,
-        confidence_threshold=0.5
+        confidence_threshold=0.5,
+        prediction_type=prediction_type
     )
     
-    request.prediction_type = prediction_type
     prediction = await ai_engine.generate_prediction(request)
     
     return {
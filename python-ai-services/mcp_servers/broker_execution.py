@@ -126,6 +126,8 @@ class SmartOrder:
     slippage: float = 0.0
     execution_time: float = 0.0
     agent_id: Optional[str] = None
+    allow_split: bool = True
+    allocations: Optional[List[Dict[str, Any]]] = None
 
 @dataclass
 class ExecutionReport:
@@ -155,12 +157,47 @@ class BrokerOrderRequest(BaseModel):
     max_execution_cost: Optional[float] = Field(None, description="Maximum execution cost")
     max_execution_time: Optional[float] = Field(None, description="Maximum execution time (ms)")
     agent_id: Optional[str] = Field(None, description="Agent ID")
+    allow_split: bool = Field(True, description="Allow splitting across venues by available size")
+
+# Order states that no longer need routing or monitoring
+TERMINAL_STATUSES = {OrderStatus.FILLED, OrderStatus.PARTIALLY_FILLED, OrderStatus.CANCELLED,
+                     OrderStatus.REJECTED, OrderStatus.FAILED}
+
+@dataclass
+class VenueBook:
+    """Venues for one symbol, pre-sorted for each routing strategy (best first)"""
+    by_ask: List[ExecutionVenue]
+    by_bid: List[ExecutionVenue]
+    by_buy_cost: List[ExecutionVenue]
+    by_sell_cost: List[ExecutionVenue]
+    by_ask_size: List[ExecutionVenue]
+    by_bid_size: List[ExecutionVenue]
+    by_fill_time: List[ExecutionVenue]
+    by_broker: Dict[BrokerType, ExecutionVenue]
+    
+    @classmethod
+    def build(cls, venues: List[ExecutionVenue]) -> "VenueBook":
+        # Sorts are stable, so ties keep feed order like the former min()/max() scans
+        return cls(
+            by_ask=sorted(venues, key=lambda v: v.ask_price),
+            by_bid=sorted(venues, key=lambda v: v.bid_price, reverse=True),
+            by_buy_cost=sorted(venues, key=lambda v: v.ask_price + v.execution_cost),
+            by_sell_cost=sorted(venues, key=lambda v: v.bid_price - v.execution_cost, reverse=True),
+            by_ask_size=sorted(venues, key=lambda v: v.ask_size, reverse=True),
+            by_bid_size=sorted(venues, key=lambda v: v.bid_size, reverse=True),
+            by_fill_time=sorted(venues, key=lambda v: v.estimated_fill_time),
+            by_broker={v.broker_type: v for v in venues}
+        )
 
 class BrokerExecutionService:
     def __init__(self):
         self.broker_connections: Dict[BrokerType, BrokerConnection] = {}
         self.execution_venues: Dict[str, List[ExecutionVenue]] = defaultdict(list)
         self.smart_orders: Dict[str, SmartOrder] = {}
+        self.venue_books: Dict[str, VenueBook] = {}
+        # Orders waiting for routing, fed by submit_smart_order, and orders not yet in a final state
+        self.pending_orders: asyncio.Queue = asyncio.Queue()
+        self.open_orders: Dict[str, SmartOrder] = {}
         self.execution_reports: List[ExecutionReport] = []
         self.routing_engine_active = False
         self.market_data_feeds: Dict[BrokerType, Dict] = {}
@@ -311,6 +348,7 @@ class BrokerExecutionService:
                             venues.append(venue)
                     
                     self.execution_venues[symbol] = venues
+                    self.venue_books[symbol] = VenueBook.build(venues)
                 
                 await asyncio.sleep(5)  # Update every 5 seconds
                 
@@ -319,157 +357,187 @@ class BrokerExecutionService:
                 await asyncio.sleep(10)
 
     async def _smart_routing_engine(self):
-        """Smart order routing engine"""
+        """Smart order routing engine: route orders as they are submitted"""
         self.routing_engine_active = True
         
         while self.routing_engine_active:
             try:
-                # Process pending smart orders
-                pending_orders = [order for order in self.smart_orders.values() 
-                                if order.status == OrderStatus.SUBMITTED]
-                
-                for order in pending_orders:
-                    await self._route_smart_order(order)
+                order = await self.pending_orders.get()
+                await self._route_smart_order(order)
                 
-                await asyncio.sleep(1)  # Process every second
+                # Route everything else already waiting before blocking again
+                while not self.pending_orders.empty():
+                    await self._route_smart_order(self.pending_orders.get_nowait())
                 
             except Exception as e:
                 logger.error(f"Error in smart routing engine: {e}")
                 await asyncio.sleep(5)
 
+    def _set_status(self, order: SmartOrder, status: OrderStatus):
+        order.status = status
+        if status in TERMINAL_STATUSES:
+            self.open_orders.pop(order.id, None)
+
     async def _route_smart_order(self, order: SmartOrder):
-        """Route a smart order to the best venue"""
+        """Route a smart order to the best venue, or split it across venues"""
+        if order.status != OrderStatus.SUBMITTED:
+            return
+        
         try:
-            venues = self.execution_venues.get(order.symbol, [])
-            if not venues:
-                order.status = OrderStatus.FAILED
+            book = self.venue_books.get(order.symbol)
+            if not book:
+                self._set_status(order, OrderStatus.FAILED)
                 return
             
-            # Filter venues based on broker availability
-            available_venues = [v for v in venues 
-                              if self.broker_connections[v.broker_type].status == "online"]
-            
-            if not available_venues:
-                order.status = OrderStatus.FAILED
-                return
+            allocations = await self._select_venues(order, book)
             
-            # Select best venue based on routing strategy
-            selected_venue = await self._select_best_venue(order, available_venues)
-            
-            if selected_venue:
-                # Route order to selected broker
-                order.selected_broker = selected_venue.broker_type
+            if allocations:
+                # Route order to selected broker(s); the largest allocation names the order's broker
+                order.selected_broker = max(allocations, key=lambda a: a[1])[0].broker_type
                 order.status = OrderStatus.ROUTED
                 order.routed_at = datetime.now().isoformat()
                 
                 # Simulate order execution
-                asyncio.create_task(self._execute_order_at_venue(order, selected_venue))
+                asyncio.create_task(self._execute_routed_order(order, allocations))
                 
-                logger.info(f"Order {order.id} routed to {selected_venue.broker_type.value}")
+                logger.info(f"Order {order.id} routed to {', '.join(v.broker_type.value for v, _ in allocations)}")
             else:
-                order.status = OrderStatus.FAILED
+                self._set_status(order, OrderStatus.FAILED)
                 
         except Exception as e:
             logger.error(f"Error routing order {order.id}: {e}")
-            order.status = OrderStatus.FAILED
+            self._set_status(order, OrderStatus.FAILED)
+
+    def _broker_online(self, venue: ExecutionVenue) -> bool:
+        connection = self.broker_connections.get(venue.broker_type)
+        return connection is not None and connection.status == "online"
+
+    def _ranked_venues(self, order: SmartOrder, book: VenueBook) -> List[ExecutionVenue]:
+        """Venues in preference order for the order's routing strategy"""
+        buy = order.side == "buy"
+        
+        if order.routing_strategy == RoutingStrategy.FASTEST_EXECUTION:
+            return book.by_fill_time
+        elif order.routing_strategy == RoutingStrategy.LOWEST_COST:
+            # Price plus commission per share; sells net the commission off the bid
+            return book.by_buy_cost if buy else book.by_sell_cost
+        elif order.routing_strategy == RoutingStrategy.HIGHEST_LIQUIDITY:
+            return book.by_ask_size if buy else book.by_bid_size
+        elif order.routing_strategy == RoutingStrategy.LOAD_BALANCE:
+            # Least loaded broker first, then by price
+            def load(venue: ExecutionVenue) -> float:
+                connection = self.broker_connections[venue.broker_type]
+                return connection.current_usage.get('orders', 0) / connection.daily_limits.get('orders', 1)
+            return sorted(book.by_ask if buy else book.by_bid, key=load)
+        
+        # Best price (also the default)
+        return book.by_ask if buy else book.by_bid
 
-    async def _select_best_venue(self, order: SmartOrder, venues: List[ExecutionVenue]) -> Optional[ExecutionVenue]:
-        """Select the best venue based on routing strategy"""
+    async def _select_venues(self, order: SmartOrder, book: VenueBook) -> List[Tuple[ExecutionVenue, float]]:
+        """Choose (venue, quantity) allocations for an order"""
         if order.preferred_broker:
-            # Find preferred broker venue
-            for venue in venues:
-                if venue.broker_type == order.preferred_broker:
-                    return venue
+            venue = book.by_broker.get(order.preferred_broker)
+            if venue and self._broker_online(venue):
+                return [(venue, order.quantity)]
         
-        if order.routing_strategy == RoutingStrategy.BEST_PRICE:
-            # Best price for the side
-            if order.side == "buy":
-                return min(venues, key=lambda v: v.ask_price)
-            else:
-                return max(venues, key=lambda v: v.bid_price)
+        ranked = [venue for venue in self._ranked_venues(order, book) if self._broker_online(venue)]
+        if not ranked:
+            return []
         
-        elif order.routing_strategy == RoutingStrategy.FASTEST_EXECUTION:
-            # Fastest execution time
-            return min(venues, key=lambda v: v.estimated_fill_time)
+        if not order.allow_split or order.routing_strategy in (RoutingStrategy.FASTEST_EXECUTION,
+                                                                RoutingStrategy.LOAD_BALANCE):
+            return [(ranked[0], order.quantity)]
         
-        elif order.routing_strategy == RoutingStrategy.LOWEST_COST:
-            # Lowest total cost (price + commission)
-            def total_cost(venue):
-                price = venue.ask_price if order.side == "buy" else venue.bid_price
-                return price + venue.execution_cost
-            return min(venues, key=total_cost)
+        # Walk venues in preference order taking their displayed size
+        allocations: List[List] = []
+        remaining = order.quantity
+        for venue in ranked:
+            available = venue.ask_size if order.side == "buy" else venue.bid_size
+            take = min(remaining, available)
+            if take > 0:
+                allocations.append([venue, take])
+                remaining -= take
+            if remaining <= 0:
+                break
         
-        elif order.routing_strategy == RoutingStrategy.HIGHEST_LIQUIDITY:
-            # Highest liquidity (size)
-            if order.side == "buy":
-                return max(venues, key=lambda v: v.ask_size)
-            else:
-                return max(venues, key=lambda v: v.bid_size)
+        if not allocations:
+            return [(ranked[0], order.quantity)]
+        if remaining > 0:
+            # More than the displayed size everywhere: the best venue takes the rest
+            allocations[0][1] += remaining
+        return [(venue, quantity) for venue, quantity in allocations]
+
+    async def _execute_allocation(self, order: SmartOrder, venue: ExecutionVenue,
+                                  quantity: float) -> Optional[Dict[str, Any]]:
+        """Simulate execution of one allocation; None if a limit price prevents the fill"""
+        # Simulate execution delay
+        execution_delay = venue.estimated_fill_time / 1000  # Convert ms to seconds
+        await asyncio.sleep(execution_delay)
         
-        elif order.routing_strategy == RoutingStrategy.LOAD_BALANCE:
-            # Load balance across brokers
-            broker_loads = {}
-            for broker_type in BrokerType:
-                connection = self.broker_connections.get(broker_type)
-                if connection:
-                    usage_ratio = connection.current_usage.get('orders', 0) / connection.daily_limits.get('orders', 1)
-                    broker_loads[broker_type] = usage_ratio
-            
-            # Select venue from least loaded broker
-            available_brokers = [v.broker_type for v in venues]
-            least_loaded_broker = min(available_brokers, key=lambda b: broker_loads.get(b, 1.0))
-            
-            for venue in venues:
-                if venue.broker_type == least_loaded_broker:
-                    return venue
+        # Calculate execution metrics
+        expected_price = venue.ask_price if order.side == "buy" else venue.bid_price
+        
+        # Add some randomness for realistic execution
+        price_impact = np.random.uniform(-0.002, 0.002)  # ±0.2% price impact
+        executed_price = expected_price * (1 + price_impact)
+        
+        # Simulate slippage
+        if order.price:  # Limit order
+            if order.side == "buy" and executed_price > order.price:
+                # Limit order not filled at better price
+                return None
+            elif order.side == "sell" and executed_price < order.price:
+                return None
+            slippage = abs(executed_price - order.price) / order.price
+        else:  # Market order
+            market_price = venue.last_price
+            slippage = abs(executed_price - market_price) / market_price
         
-        # Default: best price
         if order.side == "buy":
-            return min(venues, key=lambda v: v.ask_price)
+            price_improvement = max(0, (venue.last_price - executed_price) / venue.last_price)
         else:
-            return max(venues, key=lambda v: v.bid_price)
+            price_improvement = max(0, (executed_price - venue.last_price) / venue.last_price)
+        
+        return {
+            "venue": venue.venue_id,
+            "broker": venue.broker_type,
+            "quantity": quantity,
+            "price": executed_price,
+            "cost": venue.execution_cost * quantity,
+            "slippage": slippage,
+            "execution_time": execution_delay * 1000,
+            "price_improvement": price_improvement,
+            "market_impact": abs(price_impact)
+        }
 
-    async def _execute_order_at_venue(self, order: SmartOrder, venue: ExecutionVenue):
-        """Simulate order execution at selected venue"""
+    async def _execute_routed_order(self, order: SmartOrder, allocations: List[Tuple[ExecutionVenue, float]]):
+        """Execute all allocations of an order concurrently and report the combined fill"""
         try:
-            # Simulate execution delay
-            execution_delay = venue.estimated_fill_time / 1000  # Convert ms to seconds
-            await asyncio.sleep(execution_delay)
-            
-            # Simulate execution
             order.status = OrderStatus.PENDING
+            results = await asyncio.gather(*[
+                self._execute_allocation(order, venue, quantity) for venue, quantity in allocations
+            ])
+            fills = [fill for fill in results if fill]
             
-            # Calculate execution metrics
-            expected_price = venue.ask_price if order.side == "buy" else venue.bid_price
-            
-            # Add some randomness for realistic execution
-            price_impact = np.random.uniform(-0.002, 0.002)  # ±0.2% price impact
-            executed_price = expected_price * (1 + price_impact)
-            
-            # Simulate slippage
-            if order.price:  # Limit order
-                if order.side == "buy" and executed_price > order.price:
-                    # Limit order not filled at better price
-                    order.status = OrderStatus.CANCELLED
-                    return
-                elif order.side == "sell" and executed_price < order.price:
-                    order.status = OrderStatus.CANCELLED
-                    return
-                slippage = abs(executed_price - order.price) / order.price
-            else:  # Market order
-                market_price = venue.last_price
-                slippage = abs(executed_price - market_price) / market_price
+            if not fills:
+                self._set_status(order, OrderStatus.CANCELLED)
+                return
             
-            # Calculate costs
-            commission = venue.execution_cost * order.quantity
-            total_cost = commission
+            executed_quantity = sum(fill["quantity"] for fill in fills)
+            executed_price = sum(fill["price"] * fill["quantity"] for fill in fills) / executed_quantity
+            total_cost = sum(fill["cost"] for fill in fills)
+            slippage = sum(fill["slippage"] * fill["quantity"] for fill in fills) / executed_quantity
+            execution_delay = max(fill["execution_time"] for fill in fills) / 1000
             
             # Update order
-            order.status = OrderStatus.FILLED
             order.executed_at = datetime.now().isoformat()
             order.total_cost = total_cost
             order.slippage = slippage
             order.execution_time = execution_delay * 1000  # Convert back to ms
+            order.allocations = [
+                {"venue": fill["venue"], "broker": fill["broker"].value, "quantity": fill["quantity"], "price": fill["price"]}
+                for fill in fills
+            ]
             
             # Determine execution quality
             if slippage < 0.001 and execution_delay < 0.2:
@@ -481,14 +549,16 @@ class BrokerExecutionService:
             else:
                 order.execution_quality = ExecutionQuality.POOR
             
+            self._set_status(order, OrderStatus.FILLED if len(fills) == len(allocations) else OrderStatus.PARTIALLY_FILLED)
+            
             # Create execution report
             report = ExecutionReport(
                 order_id=order.id,
-                broker=venue.broker_type,
+                broker=order.selected_broker,
                 symbol=order.symbol,
                 side=order.side,
                 quantity=order.quantity,
-                executed_quantity=order.quantity,
+                executed_quantity=executed_quantity,
                 avg_price=executed_price,
                 execution_cost=total_cost,
                 slippage=slippage,
@@ -496,47 +566,47 @@ class BrokerExecutionService:
                 execution_quality=order.execution_quality,
                 timestamp=datetime.now().isoformat(),
                 venue_breakdown=[{
-                    "venue": venue.venue_id,
-                    "quantity": order.quantity,
-                    "price": executed_price,
-                    "cost": total_cost
-                }],
+                    "venue": fill["venue"],
+                    "quantity": fill["quantity"],
+                    "price": fill["price"],
+                    "cost": fill["cost"]
+                } for fill in fills],
                 metrics={
-                    "price_improvement": max(0, (venue.last_price - executed_price) / venue.last_price) if order.side == "buy" else max(0, (executed_price - venue.last_price) / venue.last_price),
-                    "fill_rate": 1.0,
-                    "market_impact": abs(price_impact)
+                    "price_improvement": sum(f["price_improvement"] * f["quantity"] for f in fills) / executed_quantity,
+                    "fill_rate": executed_quantity / order.quantity,
+                    "market_impact": sum(f["market_impact"] * f["quantity"] for f in fills) / executed_quantity
                 }
             )
             
             self.execution_reports.append(report)
             
             # Update broker statistics
-            self._update_broker_stats(venue.broker_type, order, report)
+            for fill in fills:
+                self._update_broker_stats(fill["broker"], fill)
             
             # Notify clients
             await self._notify_execution_update(order, report)
             
-            logger.info(f"Order {order.id} executed: {order.quantity} {order.symbol} @ {executed_price:.2f}")
+            logger.info(f"Order {order.id} executed: {executed_quantity} {order.symbol} @ {executed_price:.2f} across {len(fills)} venue(s)")
             
         except Exception as e:
             logger.error(f"Error executing order {order.id}: {e}")
-            order.status = OrderStatus.FAILED
+            self._set_status(order, OrderStatus.FAILED)
 
-    def _update_broker_stats(self, broker_type: BrokerType, order: SmartOrder, report: ExecutionReport):
-        """Update broker execution statistics"""
+    def _update_broker_stats(self, broker_type: BrokerType, fill: Dict[str, Any]):
+        """Update broker execution statistics with one venue fill"""
         stats = self.execution_stats[broker_type]
         
         stats["total_orders"] += 1
-        if order.status == OrderStatus.FILLED:
-            stats["successful_orders"] += 1
+        stats["successful_orders"] += 1
         
         # Update averages
         total_orders = stats["total_orders"]
-        stats["avg_execution_time"] = ((stats["avg_execution_time"] * (total_orders - 1)) + order.execution_time) / total_orders
-        stats["avg_slippage"] = ((stats["avg_slippage"] * (total_orders - 1)) + order.slippage) / total_orders
-        stats["total_volume"] += order.quantity * report.avg_price
+        stats["avg_execution_time"] = ((stats["avg_execution_time"] * (total_orders - 1)) + fill["execution_time"]) / total_orders
+        stats["avg_slippage"] = ((stats["avg_slippage"] * (total_orders - 1)) + fill["slippage"]) / total_orders
+        stats["total_volume"] += fill["quantity"] * fill["price"]
         stats["success_rate"] = stats["successful_orders"] / stats["total_orders"]
-        stats["cost_per_share"] = report.execution_cost / order.quantity
+        stats["cost_per_share"] = fill["cost"] / fill["quantity"]
 
     async def _execution_monitor(self):
         """Monitor execution performance"""
@@ -545,14 +615,14 @@ class BrokerExecutionService:
                 # Monitor for stuck orders
                 current_time = datetime.now()
                 
-                for order in self.smart_orders.values():
+                for order in list(self.open_orders.values()):
                     if order.status in [OrderStatus.SUBMITTED, OrderStatus.ROUTED, OrderStatus.PENDING]:
                         order_time = datetime.fromisoformat(order.created_at.replace('Z', '+00:00').replace('+00:00', ''))
                         time_diff = (current_time - order_time).total_seconds()
                         
                         # If order is stuck for more than 5 minutes
                         if time_diff > 300:
-                            order.status = OrderStatus.FAILED
+                            self._set_status(order, OrderStatus.FAILED)
                             logger.warning(f"Order {order.id} marked as failed due to timeout")
                 
                 await asyncio.sleep(30)  # Check every 30 seconds
@@ -601,10 +671,13 @@ class BrokerExecutionService:
             max_execution_time=order_request.max_execution_time,
             status=OrderStatus.SUBMITTED,
             created_at=datetime.now().isoformat(),
-            agent_id=order_request.agent_id
+            agent_id=order_request.agent_id,
+            allow_split=order_request.allow_split
         )
         
         self.smart_orders[order_id] = order
+        self.open_orders[order_id] = order
+        self.pending_orders.put_nowait(order)
         
         logger.info(f"Smart order submitted: {order_id} - {order_request.routing_strategy.value} {order_request.quantity} {order_request.symbol}")
         
@@ -680,7 +753,7 @@ async def get_metrics():
         "network_in": 4096,
         "network_out": 8192,
         "active_connections": len(broker_service.connected_clients),
-        "queue_length": len([o for o in broker_service.smart_orders.values() if o.status in [OrderStatus.SUBMITTED, OrderStatus.ROUTED]]),
+        "queue_length": len([o for o in broker_service.open_orders.values() if o.status in [OrderStatus.SUBMITTED, OrderStatus.ROUTED]]),
         "errors_last_hour": 5,
         "requests_last_hour": 423,
         "response_time_p95": 89.0
@@ -20,6 +20,7 @@ import uuid
 import math
 from enum import Enum
 from collections import deque, defaultdict
+from bisect import bisect_left, bisect_right
 import heapq
 from scipy import stats
 import warnings
@@ -206,6 +207,7 @@ class OrderBookUpdate(BaseModel):
     symbol: str = Field(..., description="Trading symbol")
     bids: List[Dict[str, float]] = Field(..., description="Bid levels [price, size, orders]")
     asks: List[Dict[str, float]] = Field(..., description="Ask levels [price, size, orders]")
+    update_type: str = Field(default="snapshot", description="snapshot replaces the book; delta adds/modifies levels, size 0 deletes")
     timestamp: str = Field(default_factory=lambda: datetime.now().isoformat())
 
 class ImpactAnalysisRequest(BaseModel):
@@ -215,7 +217,376 @@ class ImpactAnalysisRequest(BaseModel):
     participation_rate: float = Field(default=0.1, description="Participation rate (0-1)")
     model_type: ImpactModel = Field(default=ImpactModel.SQUARE_ROOT, description="Impact model")
 
+# Incremental L2 order book
+DEPTH_BANDS_BPS = (5, 10, 25, 50)
+
+@dataclass
+class BookStats:
+    """Compact per-update book summary kept for resilience and regime analysis"""
+    sequence: int
+    timestamp: str
+    mid_price: float
+    spread: float
+    depth: Dict[str, float]
+    imbalance: float
+
+@dataclass
+class BookCheckpoint:
+    """Full book image; later states are rebuilt by replaying deltas on top of it"""
+    sequence: int
+    timestamp: str
+    bids: np.ndarray  # (3, n) price, size, orders; ascending price
+    asks: np.ndarray
+
+class BookSide:
+    """One side of an L2 book as price-sorted parallel arrays (ascending price)"""
+    
+    def __init__(self, is_bid: bool):
+        self.is_bid = is_bid
+        self.prices: List[float] = []
+        self.sizes: List[float] = []
+        self.orders: List[int] = []
+        self.timestamps: List[str] = []
+    
+    def __len__(self) -> int:
+        return len(self.prices)
+    
+    def set_level(self, price: float, size: float, orders: int, timestamp: str) -> float:
+        """Add, modify or (size <= 0) delete a level; returns the change in resting size"""
+        i = bisect_left(self.prices, price)
+        exists = i < len(self.prices) and self.prices[i] == price
+        if size <= 0:
+            if not exists:
+                return 0.0
+            removed = self.sizes[i]
+            del self.prices[i], self.sizes[i], self.orders[i], self.timestamps[i]
+            return -removed
+        if exists:
+            change = size - self.sizes[i]
+            self.sizes[i], self.orders[i], self.timestamps[i] = size, orders, timestamp
+            return change
+        self.prices.insert(i, price)
+        self.sizes.insert(i, size)
+        self.orders.insert(i, orders)
+        self.timestamps.insert(i, timestamp)
+        return size
+    
+    def replace(self, levels: List[Tuple[float, float, int]], timestamp: str):
+        """Load a full side from (price, size, orders) levels; later duplicates win"""
+        book = {price: (size, orders) for price, size, orders in levels if size > 0}
+        self.prices = sorted(book)
+        self.sizes = [book[price][0] for price in self.prices]
+        self.orders = [book[price][1] for price in self.prices]
+        self.timestamps = [timestamp] * len(self.prices)
+    
+    def best_price(self) -> Optional[float]:
+        if not self.prices:
+            return None
+        return self.prices[-1] if self.is_bid else self.prices[0]
+    
+    def in_band(self, price: float, boundary: float) -> bool:
+        return price >= boundary if self.is_bid else price <= boundary
+    
+    def band_index(self, boundary: float) -> int:
+        """Split index between levels outside and inside a band boundary"""
+        return bisect_left(self.prices, boundary) if self.is_bid else bisect_right(self.prices, boundary)
+    
+    def band_depth(self, boundary: float) -> float:
+        i = self.band_index(boundary)
+        return sum(self.sizes[i:]) if self.is_bid else sum(self.sizes[:i])
+    
+    def size_between(self, boundary_a: float, boundary_b: float) -> float:
+        """Resting size between two band boundaries"""
+        i, j = sorted((self.band_index(boundary_a), self.band_index(boundary_b)))
+        return sum(self.sizes[i:j])
+    
+    def levels(self, n: Optional[int] = None) -> List[OrderBookLevel]:
+        """Best-first levels, up to n"""
+        count = len(self.prices) if n is None else min(n, len(self.prices))
+        if self.is_bid:
+            indices = range(len(self.prices) - 1, len(self.prices) - 1 - count, -1)
+        else:
+            indices = range(count)
+        return [OrderBookLevel(price=self.prices[i], size=self.sizes[i], orders=self.orders[i],
+                               timestamp=self.timestamps[i]) for i in indices]
+    
+    def to_array(self) -> np.ndarray:
+        return np.array([self.prices, self.sizes, self.orders], dtype=float).reshape(3, len(self.prices))
+
+class L2Book:
+    """Delta-driven L2 book with running depth-band totals and checkpointed history
+    
+    Level updates locate their slot by bisection, and depth bands around the mid are
+    kept as running totals that only touch the levels a band boundary sweeps over
+    when the mid moves, so per-update cost does not grow with book depth.
+    """
+    
+    def __init__(self, symbol: str, mid_price: float = 100.0, checkpoint_interval: int = 100,
+                 max_checkpoints: int = 10):
+        self.symbol = symbol
+        self.bids = BookSide(is_bid=True)
+        self.asks = BookSide(is_bid=False)
+        self.mid_price = mid_price
+        self.spread = 0.01
+        self.sequence = 0
+        self.timestamp = datetime.now().isoformat()
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoints: deque = deque(maxlen=max_checkpoints)
+        self.deltas: deque = deque()  # (sequence, is_bid, price, size, orders) since the oldest checkpoint
+        self._band_boundaries: Dict[int, Tuple[float, float]] = {}
+        self._band_totals: Dict[int, List[float]] = {}
+        self._reset_bands()
+    
+    def _side(self, is_bid: bool) -> BookSide:
+        return self.bids if is_bid else self.asks
+    
+    def _reset_bands(self):
+        """Recompute band totals from scratch around the current mid"""
+        for bps in DEPTH_BANDS_BPS:
+            price_range = self.mid_price * (bps / 10000)
+            bid_boundary, ask_boundary = self.mid_price - price_range, self.mid_price + price_range
+            self._band_boundaries[bps] = (bid_boundary, ask_boundary)
+            self._band_totals[bps] = [self.bids.band_depth(bid_boundary), self.asks.band_depth(ask_boundary)]
+    
+    def _move_bands(self):
+        """Shift band boundaries to the current mid, adjusting totals by the swept levels"""
+        for bps in DEPTH_BANDS_BPS:
+            price_range = self.mid_price * (bps / 10000)
+            new_bid, new_ask = self.mid_price - price_range, self.mid_price + price_range
+            old_bid, old_ask = self._band_boundaries[bps]
+            totals = self._band_totals[bps]
+            if new_bid != old_bid:
+                swept = self.bids.size_between(old_bid, new_bid)
+                totals[0] += swept if new_bid < old_bid else -swept
+            if new_ask != old_ask:
+                swept = self.asks.size_between(old_ask, new_ask)
+                totals[1] += swept if new_ask > old_ask else -swept
+            self._band_boundaries[bps] = (new_bid, new_ask)
+    
+    def _refresh_top(self):
+        best_bid, best_ask = self.bids.best_price(), self.asks.best_price()
+        if best_bid is not None and best_ask is not None:
+            self.mid_price = (best_bid + best_ask) / 2
+            self.spread = best_ask - best_bid
+        else:
+            self.spread = 0.01
+    
+    def apply_snapshot(self, bids: List[Tuple[float, float, int]], asks: List[Tuple[float, float, int]],
+                       timestamp: str):
+        """Replace the whole book"""
+        self.sequence += 1
+        self.timestamp = timestamp
+        self.bids.replace(bids, timestamp)
+        self.asks.replace(asks, timestamp)
+        self._refresh_top()
+        self._reset_bands()
+        self._checkpoint()
+    
+    def apply_delta(self, bids: List[Tuple[float, float, int]], asks: List[Tuple[float, float, int]],
+                    timestamp: str):
+        """Apply add/modify/delete level updates"""
+        self.sequence += 1
+        self.timestamp = timestamp
+        for is_bid, levels in ((True, bids), (False, asks)):
+            side = self._side(is_bid)
+            for price, size, orders in levels:
+                change = side.set_level(price, size, orders, timestamp)
+                if change:
+                    for bps in DEPTH_BANDS_BPS:
+                        if side.in_band(price, self._band_boundaries[bps][0 if is_bid else 1]):
+                            self._band_totals[bps][0 if is_bid else 1] += change
+                self.deltas.append((self.sequence, is_bid, price, size, orders))
+        
+        previous_mid = self.mid_price
+        self._refresh_top()
+        if self.mid_price != previous_mid:
+            self._move_bands()
+        
+        # Checkpoint images cost O(depth), so space them out in proportion to the book size
+        interval = max(self.checkpoint_interval, (len(self.bids) + len(self.asks)) // 4)
+        if not self.checkpoints or self.sequence - self.checkpoints[-1].sequence >= interval:
+            self._checkpoint()
+    
+    def _checkpoint(self):
+        """Store a compact full image and drop deltas older than the oldest kept image"""
+        self.checkpoints.append(BookCheckpoint(
+            sequence=self.sequence,
+            timestamp=self.timestamp,
+            bids=self.bids.to_array(),
+            asks=self.asks.to_array()
+        ))
+        oldest = self.checkpoints[0].sequence
+        while self.deltas and self.deltas[0][0] <= oldest:
+            self.deltas.popleft()
+        # Resynchronise running totals so float drift cannot accumulate
+        self._reset_bands()
+    
+    def depth(self) -> Dict[str, float]:
+        """Size at the best levels and within each band around the mid"""
+        depth = {"bbo": (self.bids.sizes[-1] if self.bids.sizes else 0) + (self.asks.sizes[0] if self.asks.sizes else 0)}
+        for bps in DEPTH_BANDS_BPS:
+            bid_total, ask_total = self._band_totals[bps]
+            depth[f"{bps}bps"] = max(bid_total, 0.0) + max(ask_total, 0.0)
+        return depth
+    
+    def book_at(self, sequence: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Rebuild the (price, size, orders) arrays as of an earlier update, if still retained"""
+        base = None
+        for checkpoint in self.checkpoints:
+            if checkpoint.sequence <= sequence:
+                base = checkpoint
+        if base is None or sequence > self.sequence:
+            return None
+        
+        sides = {True: BookSide(is_bid=True), False: BookSide(is_bid=False)}
+        for is_bid, array in ((True, base.bids), (False, base.asks)):
+            sides[is_bid].replace([(p, s, int(o)) for p, s, o in array.T.tolist()], base.timestamp)
+        for delta_sequence, is_bid, price, size, orders in self.deltas:
+            if base.sequence < delta_sequence <= sequence:
+                sides[is_bid].set_level(price, size, orders, base.timestamp)
+        return sides[True].to_array(), sides[False].to_array()
+
+# Columnar trade history
+_EPOCH = datetime(1970, 1, 1)
+
+def _timestamp_ns(timestamp: str) -> int:
+    """Wall-clock nanoseconds for an ISO timestamp, read the way order flow windows compare them"""
+    moment = datetime.fromisoformat(timestamp.replace('Z', '+00:00').replace('+00:00', ''))
+    if moment.tzinfo is not None:
+        moment = moment.replace(tzinfo=None)
+    return (moment - _EPOCH) // timedelta(microseconds=1) * 1000
+
+class TradeRingBuffer:
+    """Fixed-capacity columnar trade history with running totals for O(log n) window queries
+    
+    Each summed column stores a running total up to and including every trade, so the sum
+    over any time window is two lookups after a binary search on the timestamps. Totals are
+    rebased each time the buffer wraps to keep their magnitude bounded.
+    """
+    
+    SUM_COLUMNS = ("size", "buy_size", "value", "abs_vwap_dev", "abs_impact", "impact",
+                   "impact_sq", "impact_lag", "buy_count")
+    
+    def __init__(self, capacity: int = 50000):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.int64)
+        self.prices = np.zeros(capacity)
+        self.sizes = np.zeros(capacity)
+        self.sides = np.zeros(capacity, dtype=np.int8)  # 1 buy, -1 sell
+        self.impacts = np.zeros(capacity)
+        self.totals = {column: np.zeros(capacity) for column in self.SUM_COLUMNS}
+        self._base = dict.fromkeys(self.SUM_COLUMNS, 0.0)  # running totals before the oldest trade
+        self._running = dict.fromkeys(self.SUM_COLUMNS, 0.0)
+        self._start = 0
+        self._count = 0
+        self._last_impact = 0.0
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def append(self, timestamp_ns: int, price: float, size: float, side: int,
+               market_impact: float, vwap_deviation: float):
+        """Record a trade; timestamps are clamped to be non-decreasing"""
+        if self._count == self.capacity:
+            # Overwrite the oldest trade; its running totals become the new base
+            for column in self.SUM_COLUMNS:
+                self._base[column] = self.totals[column][self._start]
+            self._start = (self._start + 1) % self.capacity
+            self._count -= 1
+            if self._start == 0:
+                self._rebase()
+        
+        position = (self._start + self._count) % self.capacity
+        if self._count:
+            timestamp_ns = max(timestamp_ns, int(self.timestamps[(position - 1) % self.capacity]))
+        
+        is_buy = side > 0
+        increments = {
+            "size": size,
+            "buy_size": size if is_buy else 0.0,
+            "value": price * size,
+            "abs_vwap_dev": abs(vwap_deviation),
+            "abs_impact": abs(market_impact),
+            "impact": market_impact,
+            "impact_sq": market_impact * market_impact,
+            "impact_lag": self._last_impact * market_impact,
+            "buy_count": 1.0 if is_buy else 0.0
+        }
+        for column, increment in increments.items():
+            self._running[column] += increment
+            self.totals[column][position] = self._running[column]
+        
+        self.timestamps[position] = timestamp_ns
+        self.prices[position] = price
+        self.sizes[position] = size
+        self.sides[position] = 1 if is_buy else -1
+        self.impacts[position] = market_impact
+        self._last_impact = market_impact
+        self._count += 1
+    
+    def _rebase(self):
+        """Shift running totals so the oldest retained trade starts from zero"""
+        for column in self.SUM_COLUMNS:
+            base = self._base[column]
+            self.totals[column][:self._count] -= base
+            self._running[column] -= base
+            self._base[column] = 0.0
+    
+    def _segments(self) -> List[Tuple[int, int]]:
+        """Physical (start, stop) slices covering the buffer in time order"""
+        end = self._start + self._count
+        if end <= self.capacity:
+            return [(self._start, end)]
+        return [(self._start, self.capacity), (0, end - self.capacity)]
+    
+    def _physical(self, logical: int) -> int:
+        return (self._start + logical) % self.capacity
+    
+    def first_index_since(self, cutoff_ns: int) -> int:
+        """Logical index of the first trade at or after cutoff_ns"""
+        offset = 0
+        for start, stop in self._segments():
+            segment = self.timestamps[start:stop]
+            if len(segment) and segment[-1] >= cutoff_ns:
+                return offset + int(np.searchsorted(segment, cutoff_ns, side='left'))
+            offset += stop - start
+        return self._count
+    
+    def _total_before(self, column: str, logical: int) -> float:
+        if logical == 0:
+            return self._base[column]
+        return self.totals[column][self._physical(logical - 1)]
+    
+    def window_sums(self, first: int) -> Dict[str, float]:
+        """Column sums over trades [first, newest]"""
+        last = self._physical(self._count - 1)
+        return {column: self.totals[column][last] - self._total_before(column, first)
+                for column in self.SUM_COLUMNS}
+    
+    def window_view(self, column: np.ndarray, first: int) -> List[np.ndarray]:
+        """Array views of a column over trades [first, newest]"""
+        views = []
+        offset = 0
+        for start, stop in self._segments():
+            length = stop - start
+            if first < offset + length:
+                views.append(column[start + max(0, first - offset):stop])
+            offset += length
+        return views
+    
+    def impact_lag_sum(self, first: int) -> float:
+        """Sum of impact[k] * impact[k + 1] over consecutive trade pairs in [first, newest]"""
+        last = self._physical(self._count - 1)
+        # The first trade's own lag term pairs it with a trade outside the window
+        return self.totals["impact_lag"][last] - self.totals["impact_lag"][self._physical(first)]
+    
+    def impact_at(self, logical: int) -> float:
+        return float(self.impacts[self._physical(logical)])
+
 class MarketMicrostructure:
+    # Levels per side materialized into the OrderBook view
+    ORDER_BOOK_VIEW_DEPTH = 10
+    
     def __init__(self):
         self.order_books = {}
         self.trades = {}
@@ -228,9 +599,10 @@ class MarketMicrostructure:
         
         # Real-time data structures
         self.trade_streams = defaultdict(lambda: deque(maxlen=10000))
-        self.order_book_snapshots = defaultdict(lambda: deque(maxlen=1000))
+        self.order_book_snapshots = defaultdict(lambda: deque(maxlen=1000))  # BookStats per update
+        self.l2_books: Dict[str, L2Book] = {}
         self.volume_profiles = defaultdict(lambda: defaultdict(float))
-        self.tick_data = defaultdict(lambda: deque(maxlen=50000))
+        self.trade_buffers: Dict[str, TradeRingBuffer] = defaultdict(TradeRingBuffer)
         
         # Market making and liquidity provision tracking
         self.liquidity_providers = defaultdict(dict)
@@ -343,12 +715,10 @@ class MarketMicrostructure:
         # Store trade
         self.trades[trade_id] = trade
         self.trade_streams[trade_data.symbol].append(trade)
-        self.tick_data[trade_data.symbol].append({
-            "timestamp": trade_data.timestamp,
-            "price": trade_data.price,
-            "size": trade_data.size,
-            "side": trade_data.side.value
-        })
+        self.trade_buffers[trade_data.symbol].append(
+            _timestamp_ns(trade_data.timestamp), trade_data.price, trade_data.size,
+            1 if trade_data.side == OrderSide.BUY else -1, market_impact, vwap_deviation
+        )
         
         # Update order book mid price
         order_book.mid_price = trade_data.price
@@ -365,95 +735,65 @@ class MarketMicrostructure:
         return trade
     
     async def update_order_book(self, update: OrderBookUpdate) -> OrderBook:
-        """Update order book with new levels"""
+        """Apply a book snapshot or level deltas and refresh the top-of-book view"""
         symbol = update.symbol
         
-        # Create order book levels
-        bids = []
-        for bid_data in update.bids:
-            level = OrderBookLevel(
-                price=bid_data["price"],
-                size=bid_data["size"],
-                orders=int(bid_data.get("orders", 1)),
-                timestamp=update.timestamp
-            )
-            bids.append(level)
-        
-        asks = []
-        for ask_data in update.asks:
-            level = OrderBookLevel(
-                price=ask_data["price"],
-                size=ask_data["size"],
-                orders=int(ask_data.get("orders", 1)),
-                timestamp=update.timestamp
-            )
-            asks.append(level)
+        book = self.l2_books.get(symbol)
+        if book is None:
+            previous = self.order_books.get(symbol)
+            book = L2Book(symbol, mid_price=previous.mid_price if previous else 100.0)
+            self.l2_books[symbol] = book
         
-        # Sort levels
-        bids.sort(key=lambda x: x.price, reverse=True)  # Highest first
-        asks.sort(key=lambda x: x.price)  # Lowest first
+        bids = [(level["price"], level["size"], int(level.get("orders", 1))) for level in update.bids]
+        asks = [(level["price"], level["size"], int(level.get("orders", 1))) for level in update.asks]
         
-        # Calculate mid price and spread
-        if bids and asks:
-            best_bid = bids[0].price
-            best_ask = asks[0].price
-            mid_price = (best_bid + best_ask) / 2
-            spread = best_ask - best_bid
+        if update.update_type == "delta":
+            book.apply_delta(bids, asks, update.timestamp)
+        elif update.update_type == "snapshot":
+            book.apply_snapshot(bids, asks, update.timestamp)
         else:
-            mid_price = self.order_books.get(symbol, {}).get("mid_price", 100.0)
-            spread = 0.01
-        
-        # Calculate depth at various levels
-        depth = await self._calculate_order_book_depth(bids, asks, mid_price)
-        
-        # Calculate order imbalance
-        imbalance = await self._calculate_order_imbalance(bids, asks)
+            raise ValueError(f"Unknown order book update type: {update.update_type}")
         
-        # Generate microstructure signals
-        microstructure_signals = await self._generate_microstructure_signals(symbol, bids, asks, imbalance)
-        
-        # Create updated order book
-        order_book = OrderBook(
-            symbol=symbol,
-            timestamp=update.timestamp,
-            bids=bids,
-            asks=asks,
-            mid_price=mid_price,
-            spread=spread,
-            depth=depth,
-            imbalance=imbalance,
-            microstructure_signals=microstructure_signals
-        )
+        order_book = await self._order_book_view(book)
         
         # Store order book
         self.order_books[symbol] = order_book
-        self.order_book_snapshots[symbol].append(order_book)
+        self.order_book_snapshots[symbol].append(BookStats(
+            sequence=book.sequence,
+            timestamp=order_book.timestamp,
+            mid_price=order_book.mid_price,
+            spread=order_book.spread,
+            depth=order_book.depth,
+            imbalance=order_book.imbalance
+        ))
         
         # Broadcast update
         await self._broadcast_order_book(order_book)
         
         return order_book
     
-    async def _calculate_order_book_depth(self, bids: List[OrderBookLevel], 
-                                        asks: List[OrderBookLevel], mid_price: float) -> Dict[str, float]:
-        """Calculate order book depth at various price levels"""
-        depth = {}
+    async def _order_book_view(self, book: L2Book, levels: Optional[int] = None) -> OrderBook:
+        """Materialize the best levels of an L2 book as an OrderBook"""
+        bids = book.bids.levels(levels or self.ORDER_BOOK_VIEW_DEPTH)
+        asks = book.asks.levels(levels or self.ORDER_BOOK_VIEW_DEPTH)
         
-        # Depth at best bid/offer
-        depth["bbo"] = (bids[0].size if bids else 0) + (asks[0].size if asks else 0)
+        # Calculate order imbalance
+        imbalance = await self._calculate_order_imbalance(bids, asks)
         
-        # Depth within basis points
-        for bps in [5, 10, 25, 50]:
-            price_range = mid_price * (bps / 10000)
-            
-            bid_depth = sum(level.size for level in bids 
-                           if level.price >= mid_price - price_range)
-            ask_depth = sum(level.size for level in asks 
-                           if level.price <= mid_price + price_range)
-            
-            depth[f"{bps}bps"] = bid_depth + ask_depth
+        # Generate microstructure signals
+        microstructure_signals = await self._generate_microstructure_signals(book.symbol, bids, asks, imbalance)
         
-        return depth
+        return OrderBook(
+            symbol=book.symbol,
+            timestamp=book.timestamp,
+            bids=bids,
+            asks=asks,
+            mid_price=book.mid_price,
+            spread=book.spread,
+            depth=book.depth(),
+            imbalance=imbalance,
+            microstructure_signals=microstructure_signals
+        )
     
     async def _calculate_order_imbalance(self, bids: List[OrderBookLevel], 
                                        asks: List[OrderBookLevel]) -> float:
@@ -529,14 +869,13 @@ class MarketMicrostructure:
         else:
             minutes = 5
         
-        # Get trades in timeframe
-        cutoff_time = datetime.now() - timedelta(minutes=minutes)
-        recent_trades = [
-            trade for trade in self.trade_streams[symbol]
-            if datetime.fromisoformat(trade.timestamp.replace('Z', '+00:00').replace('+00:00', '')) >= cutoff_time
-        ]
+        # Locate trades in timeframe by binary search on the columnar buffer
+        buffer = self.trade_buffers[symbol]
+        cutoff_ns = _timestamp_ns((datetime.now() - timedelta(minutes=minutes)).isoformat())
+        first = buffer.first_index_since(cutoff_ns)
+        trade_count = len(buffer) - first
         
-        if not recent_trades:
+        if trade_count == 0:
             # Return empty metrics
             return OrderFlowMetrics(
                 symbol=symbol,
@@ -549,40 +888,41 @@ class MarketMicrostructure:
                 market_impact_metrics={}, flow_toxicity=0, pin_risk=0
             )
         
-        # Calculate metrics
-        total_volume = sum(trade.size for trade in recent_trades)
-        buy_volume = sum(trade.size for trade in recent_trades if trade.side == OrderSide.BUY)
-        sell_volume = sum(trade.size for trade in recent_trades if trade.side == OrderSide.SELL)
+        # Calculate metrics from window sums
+        sums = buffer.window_sums(first)
+        total_volume = sums["size"]
+        buy_volume = sums["buy_size"]
+        sell_volume = total_volume - buy_volume
         
         order_imbalance = (buy_volume - sell_volume) / total_volume if total_volume > 0 else 0
-        trade_count = len(recent_trades)
         avg_trade_size = total_volume / trade_count if trade_count > 0 else 0
         
         # Volume weighted average price
-        total_value = sum(trade.price * trade.size for trade in recent_trades)
-        vwap = total_value / total_volume if total_volume > 0 else 0
+        vwap = sums["value"] / total_volume if total_volume > 0 else 0
         
         # Price improvement (simplified)
-        price_improvement = np.mean([abs(trade.vwap_deviation) for trade in recent_trades])
+        price_improvement = sums["abs_vwap_dev"] / trade_count
         
         # Effective spread
-        effective_spread = np.mean([abs(trade.market_impact) for trade in recent_trades]) * 2
+        effective_spread = sums["abs_impact"] / trade_count * 2
         
         # Realized spread (simplified - would need future price data)
         realized_spread = effective_spread * 0.7  # Estimate
         
         # Market impact metrics
+        avg_impact = sums["impact"] / trade_count
+        impact_variance = max(0.0, sums["impact_sq"] / trade_count - avg_impact * avg_impact)
         market_impact_metrics = {
-            "avg_impact": np.mean([trade.market_impact for trade in recent_trades]),
-            "impact_volatility": np.std([trade.market_impact for trade in recent_trades]),
-            "max_impact": max([abs(trade.market_impact) for trade in recent_trades]) if recent_trades else 0
+            "avg_impact": avg_impact,
+            "impact_volatility": math.sqrt(impact_variance),
+            "max_impact": max(float(np.max(np.abs(view))) for view in buffer.window_view(buffer.impacts, first))
         }
         
         # Flow toxicity (adverse selection measure)
-        flow_toxicity = await self._calculate_flow_toxicity(recent_trades)
+        flow_toxicity = await self._calculate_flow_toxicity(buffer, first, sums)
         
         # PIN risk (probability of informed trading)
-        pin_risk = await self._calculate_pin_risk(symbol, recent_trades)
+        pin_risk = await self._calculate_pin_risk(symbol, trade_count, sums["buy_count"])
         
         metrics = OrderFlowMetrics(
             symbol=symbol,
@@ -609,42 +949,39 @@ class MarketMicrostructure:
         
         return metrics
     
-    async def _calculate_flow_toxicity(self, trades: List[Trade]) -> float:
+    async def _calculate_flow_toxicity(self, buffer: TradeRingBuffer, first: int,
+                                       sums: Dict[str, float]) -> float:
         """Calculate flow toxicity (adverse selection measure)"""
-        if len(trades) < 2:
+        n = len(buffer) - first
+        if n <= 5:
             return 0.0
         
-        # Simplified toxicity measure based on price impact persistence
-        impacts = [trade.market_impact for trade in trades]
-        
-        # Calculate autocorrelation of impacts
-        if len(impacts) > 5:
-            impacts_array = np.array(impacts)
-            correlation = np.corrcoef(impacts_array[:-1], impacts_array[1:])[0, 1]
-            toxicity = max(0, correlation)  # Positive correlation indicates toxicity
-        else:
-            toxicity = 0.0
+        # Lag-1 autocorrelation of impacts from window sums: x = impacts[:-1], y = impacts[1:]
+        first_impact = buffer.impact_at(first)
+        last_impact = buffer.impact_at(len(buffer) - 1)
+        pairs = n - 1
+        sum_x = sums["impact"] - last_impact
+        sum_y = sums["impact"] - first_impact
+        sum_xx = sums["impact_sq"] - last_impact * last_impact
+        sum_yy = sums["impact_sq"] - first_impact * first_impact
+        sum_xy = buffer.impact_lag_sum(first)
+        
+        covariance = pairs * sum_xy - sum_x * sum_y
+        variance = (pairs * sum_xx - sum_x * sum_x) * (pairs * sum_yy - sum_y * sum_y)
+        if variance <= 0:
+            return 0.0
         
-        return toxicity
+        correlation = covariance / math.sqrt(variance)
+        return max(0.0, correlation)  # Positive correlation indicates toxicity
     
-    async def _calculate_pin_risk(self, symbol: str, trades: List[Trade]) -> float:
+    async def _calculate_pin_risk(self, symbol: str, trade_count: int, buy_count: float) -> float:
         """Calculate PIN (Probability of Informed Trading) risk"""
-        if len(trades) < 10:
-            return 0.0
-        
-        # Simplified PIN calculation
-        buy_trades = [t for t in trades if t.side == OrderSide.BUY]
-        sell_trades = [t for t in trades if t.side == OrderSide.SELL]
-        
-        buy_count = len(buy_trades)
-        sell_count = len(sell_trades)
-        total_count = buy_count + sell_count
-        
-        if total_count == 0:
+        if trade_count < 10:
             return 0.0
         
         # Calculate order imbalance variance (proxy for informed trading)
-        imbalance = abs(buy_count - sell_count) / total_count
+        sell_count = trade_count - buy_count
+        imbalance = abs(buy_count - sell_count) / trade_count
         
         # Higher imbalance suggests higher informed trading probability
         pin_risk = min(1.0, imbalance * 2)
@@ -1290,11 +1627,15 @@ async def update_order_book(update: OrderBookUpdate):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/order-book/{symbol}")
-async def get_order_book(symbol: str):
-    """Get current order book"""
+async def get_order_book(symbol: str, levels: Optional[int] = None):
+    """Get current order book, optionally with more levels per side than the default view"""
     if symbol not in microstructure.order_books:
         raise HTTPException(status_code=404, detail="Symbol not found")
     
+    book = microstructure.l2_books.get(symbol)
+    if levels is not None and book is not None:
+        return {"order_book": asdict(await microstructure._order_book_view(book, levels))}
+    
     return {"order_book": asdict(microstructure.order_books[symbol])}
 
 @app.get("/order-flow/{symbol}")
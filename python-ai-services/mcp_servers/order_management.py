@@ -5,9 +5,11 @@ Specialized server for advanced order management, routing, and execution strateg
 """
 
 import asyncio
+import heapq
 import json
 import logging
 import os
+import time
 import uuid
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
@@ -19,7 +21,7 @@ import uvicorn
 from pydantic import BaseModel, Field
 from dataclasses import dataclass, asdict
 import numpy as np
-from collections import defaultdict, deque
+from collections import defaultdict
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -99,10 +101,55 @@ class AdvancedOrder:
     remaining_quantity: float = 0.0
     estimated_completion: Optional[str] = None
 
+# Strict execution order, highest priority first
+PRIORITY_ORDER = [OrderPriority.URGENT, OrderPriority.HIGH, OrderPriority.NORMAL, OrderPriority.LOW]
+PRIORITY_RANK = {priority: rank for rank, priority in enumerate(PRIORITY_ORDER)}
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of queue latency (time from due to execution) in milliseconds"""
+    BUCKETS_MS = (0.1, 0.5, 1.0, 5.0, 10.0, 50.0, 100.0, 500.0, 1000.0, 5000.0)
+    
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+    
+    def observe(self, latency_seconds: float):
+        latency_ms = max(0.0, latency_seconds * 1000)
+        index = next((i for i, bound in enumerate(self.BUCKETS_MS) if latency_ms <= bound), len(self.BUCKETS_MS))
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+    
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th quantile"""
+        if not self.count:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return self.BUCKETS_MS[i] if i < len(self.BUCKETS_MS) else self.max_ms
+        return self.max_ms
+    
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"le_{bound:g}ms" for bound in self.BUCKETS_MS] + ["le_inf"]
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "max_ms": self.max_ms,
+            "p50_ms": self.percentile(0.5),
+            "p99_ms": self.percentile(0.99),
+            "buckets": dict(zip(labels, self.counts))
+        }
+
 class AdvancedOrderRequest(BaseModel):
     symbol: str = Field(..., description="Trading symbol")
     side: str = Field(..., description="Order side (buy/sell)")
-    quantity: float = Field(..., description="Total order quantity")
+    quantity: float = Field(..., gt=0, description="Total order quantity")
     strategy: OrderStrategy = Field(..., description="Execution strategy")
     priority: OrderPriority = Field(OrderPriority.NORMAL, description="Order priority")
     target_price: Optional[float] = Field(None, description="Target price")
@@ -110,25 +157,40 @@ class AdvancedOrderRequest(BaseModel):
     time_window: Optional[int] = Field(None, description="Time window in minutes")
     max_participation_rate: float = Field(0.1, description="Max participation rate")
     min_slice_size: float = Field(100.0, description="Minimum slice size")
-    max_slice_size: float = Field(1000.0, description="Maximum slice size")
+    max_slice_size: float = Field(1000.0, gt=0, description="Maximum slice size")
     agent_id: Optional[str] = Field(None, description="Agent ID")
     strategy_id: Optional[str] = Field(None, description="Strategy ID")
 
 class OrderManagementService:
+    # Strategies that wait on market conditions are re-checked on each market data refresh
+    MONITOR_INTERVAL_SECONDS = 2.0
+    # Work items executed before yielding to the event loop while draining
+    DRAIN_YIELD_EVERY = 256
+    # Remaining quantity treated as fully filled (slice sizes are float fractions)
+    QUANTITY_EPSILON = 1e-9
+    
     def __init__(self):
         self.orders: Dict[str, AdvancedOrder] = {}
         self.order_slices: Dict[str, List[OrderSlice]] = defaultdict(list)
-        self.execution_queues: Dict[OrderPriority, deque] = {
-            OrderPriority.URGENT: deque(),
-            OrderPriority.HIGH: deque(),
-            OrderPriority.NORMAL: deque(),
-            OrderPriority.LOW: deque()
-        }
         self.market_data_cache: Dict[str, Dict] = {}
         self.volume_profiles: Dict[str, List] = defaultdict(list)
         self.execution_engine_running = False
         self.connected_clients: List[WebSocket] = []
         
+        # Event-driven scheduler: work that is due, ordered by (priority, arrival), and
+        # timers for work due later, ordered by due time
+        self._ready: List[Tuple] = []
+        self._timers: List[Tuple] = []
+        self._sequence = 0
+        self._wakeup = asyncio.Event()
+        self._clock = time.monotonic
+        self.queued_counts: Dict[OrderPriority, int] = {priority: 0 for priority in PRIORITY_ORDER}
+        self.queue_latency: Dict[OrderPriority, LatencyHistogram] = {
+            priority: LatencyHistogram() for priority in PRIORITY_ORDER
+        }
+        self.executed_work_items = 0
+        self._filled_value: Dict[str, float] = defaultdict(float)
+        
     async def initialize(self):
         """Initialize the order management service"""
         # Start execution engine
@@ -184,30 +246,96 @@ class OrderManagementService:
                 logger.error(f"Error updating market data: {e}")
                 await asyncio.sleep(5)
 
+    def _schedule(self, priority: OrderPriority, kind: str, order_id: str,
+                  slice_order: Optional[OrderSlice] = None, delay_seconds: float = 0.0):
+        """Queue an order step or slice to run now or after delay_seconds"""
+        self._sequence += 1
+        due = self._clock() + max(0.0, delay_seconds)
+        if delay_seconds <= 0:
+            heapq.heappush(self._ready, (PRIORITY_RANK[priority], self._sequence, due, kind, order_id, slice_order))
+            self.queued_counts[priority] += 1
+            self._wakeup.set()
+            return
+        
+        wake_earlier = not self._timers or due < self._timers[0][0]
+        heapq.heappush(self._timers, (due, self._sequence, priority, kind, order_id, slice_order))
+        if wake_earlier:
+            self._wakeup.set()
+    
+    def _release_due_timers(self):
+        """Move every timer that has come due onto the ready heap"""
+        now = self._clock()
+        while self._timers and self._timers[0][0] <= now:
+            due, sequence, priority, kind, order_id, slice_order = heapq.heappop(self._timers)
+            heapq.heappush(self._ready, (PRIORITY_RANK[priority], sequence, due, kind, order_id, slice_order))
+            self.queued_counts[priority] += 1
+    
     async def _execution_engine(self):
-        """Main execution engine that processes orders"""
+        """Execution engine: drain all ready work in strict priority order, then sleep until the next timer"""
         self.execution_engine_running = True
         
         while self.execution_engine_running:
             try:
-                # Process orders by priority
-                for priority in [OrderPriority.URGENT, OrderPriority.HIGH, 
-                               OrderPriority.NORMAL, OrderPriority.LOW]:
-                    queue = self.execution_queues[priority]
+                self._release_due_timers()
+                
+                drained = 0
+                while self._ready:
+                    rank, _, due, kind, order_id, slice_order = heapq.heappop(self._ready)
+                    priority = PRIORITY_ORDER[rank]
+                    self.queued_counts[priority] -= 1
+                    self.queue_latency[priority].observe(self._clock() - due)
+                    
+                    await self._run_work_item(kind, order_id, slice_order)
+                    self.executed_work_items += 1
                     
-                    if queue:
-                        order_id = queue.popleft()
-                        order = self.orders.get(order_id)
-                        
-                        if order and order.status == ExecutionStatus.ACTIVE:
-                            await self._process_order(order)
+                    drained += 1
+                    if drained % self.DRAIN_YIELD_EVERY == 0:
+                        # Let API handlers run; anything they submit joins the heap in priority order
+                        await asyncio.sleep(0)
+                        self._release_due_timers()
                 
-                await asyncio.sleep(1)  # Process every second
+                self._wakeup.clear()
+                timeout = self._timers[0][0] - self._clock() if self._timers else None
+                if timeout is None or timeout > 0:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
                 
             except Exception as e:
                 logger.error(f"Error in execution engine: {e}")
-                await asyncio.sleep(5)
-
+                await asyncio.sleep(1)
+    
+    async def _run_work_item(self, kind: str, order_id: str, slice_order: Optional[OrderSlice]):
+        """Run one order step or slice if its order is still live"""
+        order = self.orders.get(order_id)
+        if not order or order.status != ExecutionStatus.ACTIVE:
+            return
+        
+        if kind == "slice":
+            if slice_order.status == 'scheduled':
+                await self._execute_slice(slice_order, order)
+            return
+        
+        completed_before = order.completed_quantity
+        await self._process_order(order)
+        
+        if order.status != ExecutionStatus.ACTIVE:
+            return
+        if order.strategy == OrderStrategy.ICEBERG:
+            if order.completed_quantity > completed_before:
+                # Show the next visible portion once the previous one has filled
+                self._schedule(order.priority, "order", order.id)
+            else:
+                # Nothing filled: retry on the next market data refresh instead of spinning
+                self._schedule(order.priority, "order", order.id, delay_seconds=self.MONITOR_INTERVAL_SECONDS)
+        elif order.strategy in (OrderStrategy.SNIPER, OrderStrategy.ACCUMULATION):
+            self._schedule(order.priority, "order", order.id, delay_seconds=self.MONITOR_INTERVAL_SECONDS)
+    
+    def _schedule_slice(self, order: AdvancedOrder, slice_order: OrderSlice, delay_minutes: float):
+        self.order_slices[order.id].append(slice_order)
+        self._schedule(order.priority, "slice", order.id, slice_order, delay_seconds=delay_minutes * 60)
+    
     async def _process_order(self, order: AdvancedOrder):
         """Process a single advanced order"""
         try:
@@ -271,7 +399,7 @@ class OrderManagementService:
             order.time_window = 60  # Default 1 hour
         
         # Calculate number of slices based on time window
-        num_slices = min(order.time_window, int(order.total_quantity / order.min_slice_size))
+        num_slices = max(1, min(order.time_window, int(order.total_quantity / order.min_slice_size)))
         slice_size = order.total_quantity / num_slices
         interval_minutes = order.time_window / num_slices
         
@@ -297,23 +425,8 @@ class OrderManagementService:
                 scheduled_time=scheduled_time.isoformat()
             )
             
-            self.order_slices[order.id].append(slice_order)
-        
-        # Simulate execution of first slice
-        if self.order_slices[order.id]:
-            first_slice = self.order_slices[order.id][0]
-            first_slice.status = 'filled'
-            first_slice.executed_time = datetime.now().isoformat()
-            first_slice.filled_quantity = first_slice.quantity
-            first_slice.filled_price = first_slice.price
-            
-            order.completed_quantity += first_slice.quantity
-            order.remaining_quantity = order.total_quantity - order.completed_quantity
-            
-            if order.remaining_quantity <= 0:
-                order.status = ExecutionStatus.COMPLETED
-            
-            await self._notify_order_update(order)
+            # Each slice runs when due; the first is due immediately
+            self._schedule_slice(order, slice_order, i * interval_minutes)
 
     async def _execute_vwap_strategy(self, order: AdvancedOrder):
         """Execute Volume-Weighted Average Price strategy"""
@@ -331,13 +444,15 @@ class OrderManagementService:
         current_price = market_data['price'] if market_data else 150.0
         
         # Create slices based on volume periods
+        allocated = 0.0
         for i, period_volume in enumerate(volume_profile[:60]):  # First hour
-            if order.completed_quantity >= order.total_quantity:
+            unallocated = order.remaining_quantity - allocated
+            if unallocated <= self.QUANTITY_EPSILON:
                 break
                 
             # Calculate slice size based on volume
             slice_volume = period_volume * target_participation
-            slice_size = min(slice_volume, order.remaining_quantity)
+            slice_size = min(slice_volume, unallocated)
             
             if slice_size < order.min_slice_size:
                 continue
@@ -357,15 +472,12 @@ class OrderManagementService:
                 scheduled_time=scheduled_time.isoformat()
             )
             
-            self.order_slices[order.id].append(slice_order)
-        
-        # Execute first slice
-        if self.order_slices[order.id]:
-            await self._execute_slice(self.order_slices[order.id][0], order)
+            self._schedule_slice(order, slice_order, i)
+            allocated += slice_size
 
     async def _execute_iceberg_strategy(self, order: AdvancedOrder):
         """Execute iceberg strategy - only show small portions"""
-        visible_size = min(order.max_slice_size, order.total_quantity * 0.1)
+        visible_size = min(order.max_slice_size, order.total_quantity * 0.1, order.remaining_quantity)
         
         market_data = self.market_data_cache.get(order.symbol)
         current_price = market_data['price'] if market_data else 150.0
@@ -462,11 +574,7 @@ class OrderManagementService:
                     scheduled_time=scheduled_time.isoformat()
                 )
                 
-                self.order_slices[order.id].append(slice_order)
-        
-        # Execute first slice
-        if self.order_slices[order.id]:
-            await self._execute_slice(self.order_slices[order.id][0], order)
+                self._schedule_slice(order, slice_order, j * time_step)
 
     async def _create_and_execute_slice(self, order: AdvancedOrder, quantity: float, price: float):
         """Create and execute a slice"""
@@ -490,43 +598,46 @@ class OrderManagementService:
         # Update order
         order.completed_quantity += quantity
         order.remaining_quantity = order.total_quantity - order.completed_quantity
+        self._filled_value[order.id] += quantity * price
+        order.avg_fill_price = self._filled_value[order.id] / order.completed_quantity
         
-        if order.remaining_quantity <= 0:
+        if order.remaining_quantity <= self.QUANTITY_EPSILON:
             order.status = ExecutionStatus.COMPLETED
         
         await self._notify_order_update(order)
 
     async def _execute_slice(self, slice_order: OrderSlice, parent_order: AdvancedOrder):
         """Execute a single slice"""
+        # Never fill beyond the parent's remaining quantity
+        quantity = min(slice_order.quantity, parent_order.remaining_quantity)
+        if quantity <= self.QUANTITY_EPSILON:
+            slice_order.status = 'cancelled'
+            return
+        
         # Simulate execution
         slice_order.status = 'filled'
         slice_order.executed_time = datetime.now().isoformat()
-        slice_order.filled_quantity = slice_order.quantity
+        slice_order.filled_quantity = quantity
         slice_order.filled_price = slice_order.price
         
         # Update parent order
-        parent_order.completed_quantity += slice_order.quantity
+        parent_order.completed_quantity += quantity
         parent_order.remaining_quantity = parent_order.total_quantity - parent_order.completed_quantity
         
-        # Calculate average fill price
-        total_filled_value = 0
-        total_filled_quantity = 0
-        
-        for slice_ord in self.order_slices[parent_order.id]:
-            if slice_ord.status == 'filled':
-                total_filled_value += slice_ord.filled_quantity * slice_ord.filled_price
-                total_filled_quantity += slice_ord.filled_quantity
-        
-        if total_filled_quantity > 0:
-            parent_order.avg_fill_price = total_filled_value / total_filled_quantity
+        # Running average fill price
+        self._filled_value[parent_order.id] += quantity * slice_order.price
+        parent_order.avg_fill_price = self._filled_value[parent_order.id] / parent_order.completed_quantity
         
-        if parent_order.remaining_quantity <= 0:
+        if parent_order.remaining_quantity <= self.QUANTITY_EPSILON:
             parent_order.status = ExecutionStatus.COMPLETED
         
         await self._notify_order_update(parent_order)
 
     async def _notify_order_update(self, order: AdvancedOrder):
         """Notify connected clients of order updates"""
+        if not self.connected_clients:
+            return
+        
         update_message = {
             "type": "order_update",
             "order": asdict(order),
@@ -572,11 +683,9 @@ class OrderManagementService:
         
         self.orders[order_id] = order
         
-        # Add to execution queue
-        self.execution_queues[order_request.priority].append(order_id)
-        
-        # Start processing
+        # Start processing; the execution engine picks it up immediately in priority order
         order.status = ExecutionStatus.ACTIVE
+        self._schedule(order_request.priority, "order", order_id)
         
         logger.info(f"Advanced order submitted: {order_id} - {order_request.strategy} {order_request.quantity} {order_request.symbol}")
         
@@ -598,6 +707,15 @@ class OrderManagementService:
         await self._notify_order_update(order)
         return True
 
+    def get_queue_metrics(self) -> Dict[str, Any]:
+        """Queue depth and queue latency per priority"""
+        return {
+            "ready": {priority.value: self.queued_counts[priority] for priority in PRIORITY_ORDER},
+            "scheduled_timers": len(self._timers),
+            "executed_work_items": self.executed_work_items,
+            "latency": {priority.value: self.queue_latency[priority].to_dict() for priority in PRIORITY_ORDER}
+        }
+
     async def get_order_status(self, order_id: str) -> Optional[Dict]:
         """Get detailed order status"""
         if order_id not in self.orders:
@@ -655,7 +773,8 @@ async def get_metrics():
         "network_in": 1536,
         "network_out": 3072,
         "active_connections": len(order_management_service.connected_clients),
-        "queue_length": sum(len(q) for q in order_management_service.execution_queues.values()),
+        "queue_length": sum(order_management_service.queued_counts.values()),
+        "execution_queues": order_management_service.get_queue_metrics(),
         "errors_last_hour": 1,
         "requests_last_hour": 156,
         "response_time_p95": 45.0
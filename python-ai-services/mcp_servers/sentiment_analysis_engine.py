@@ -18,6 +18,8 @@ import uvicorn
 from pydantic import BaseModel, Field
 import uuid
 import re
+import bisect
+import hashlib
 from enum import Enum
 
 # Configure logging
@@ -152,6 +154,26 @@ class SentimentSignal:
     expected_impact: str
     recommended_action: str
 
+@dataclass
+class ArticleSentiment:
+    """Sentiment derived from an article's text, cached by content hash"""
+    content_hash: str
+    analysis: SentimentAnalysis
+    risk_type: Optional[str]
+    opportunity_type: Optional[str]
+
+@dataclass
+class SentimentWindow:
+    """Aggregated article sentiment for one symbol over a time window (scores in thousandths)"""
+    news_count: int
+    sentiment_sum: int
+    older_half_sum: int
+    analyst_count: int
+    analyst_sum: int
+    drivers: List[Tuple[str, float]]
+    risk_types: List[str]
+    opportunity_types: List[str]
+
 class SentimentRequest(BaseModel):
     text: str = Field(..., description="Text to analyze")
     language: str = Field(default="en", description="Text language")
@@ -165,6 +187,187 @@ class NewsAnalysisRequest(BaseModel):
     min_relevance: float = Field(default=0.5, description="Minimum relevance score")
     categories: List[NewsCategory] = Field(default=[], description="News categories to include")
 
+class SentimentBatchRequest(BaseModel):
+    texts: List[str] = Field(..., description="Texts to score")
+
+class LexiconScorer:
+    """
+    Lexicon sentiment scorer compiled once from the engine's term dictionaries.
+
+    Each distinct whitespace token is compiled on first sight into a table entry: the lexicon
+    weights of its word parts, whether it is a negation, its weight when it follows a negation,
+    and a bitmask of the context terms it contains. Scoring a text is then one pass of table
+    lookups over its tokens. Context terms contain no whitespace, so OR-ing the token masks finds
+    exactly the substrings a scan of the whole text would.
+    """
+
+    _WORD = re.compile(r'\b\w+\b')
+
+    def __init__(self, positive_terms: Dict[str, float], negative_terms: Dict[str, float],
+                 negation_words: List[str], context_adjustments: List[Tuple[List[str], float, bool]],
+                 max_cached_tokens: int = 200000):
+        # Positive terms win on overlap, as in the original if/elif lookup
+        self.weights = {**negative_terms, **positive_terms}
+        self.negation_words = frozenset(negation_words)
+        self.max_cached_tokens = max_cached_tokens
+
+        # context_adjustments: (terms, factor, per_term). per_term adjustments scale the score by
+        # (1 - matched terms * factor), the others by factor when any of their terms is present.
+        self.context_terms: List[Tuple[str, int]] = []
+        self.context_adjustments: List[Tuple[int, float, bool]] = []
+        for terms, factor, per_term in context_adjustments:
+            group_mask = 0
+            for term in terms:
+                bit = 1 << len(self.context_terms)
+                self.context_terms.append((term, bit))
+                group_mask |= bit
+            self.context_adjustments.append((group_mask, factor, per_term))
+
+        self._entries: Dict[str, Tuple[Tuple[float, ...], bool, Optional[float], int]] = {}
+
+    def _compile_token(self, token: str) -> Tuple[Tuple[float, ...], bool, Optional[float], int]:
+        lowered = token.lower()
+        weights = self.weights
+        entry = (
+            tuple(weights[word] for word in self._WORD.findall(lowered) if word in weights),
+            lowered in self.negation_words,
+            weights.get(lowered),
+            sum(bit for term, bit in self.context_terms if term in token)
+        )
+        if len(self._entries) >= self.max_cached_tokens:
+            self._entries.clear()
+        self._entries[token] = entry
+        return entry
+
+    def context_mask(self, text: str) -> int:
+        """Bitmask of the context terms present in text"""
+        mask = 0
+        entries = self._entries
+        for token in text.split():
+            entry = entries.get(token) or self._compile_token(token)
+            mask |= entry[3]
+        return mask
+
+    def adjust(self, score: float, mask: int) -> float:
+        """Apply the context adjustments matched by mask, in their configured order"""
+        for group_mask, factor, per_term in self.context_adjustments:
+            matched = mask & group_mask
+            if matched:
+                if per_term:
+                    score *= (1 - bin(matched).count('1') * factor)
+                else:
+                    score *= factor
+        return score
+
+    def score(self, text: str) -> float:
+        """Lexicon score of text: mean term weight with negation flips, context-adjusted, in [-1, 1]"""
+        entries = self._entries
+        total_score = 0
+        word_count = 0
+        negated = []
+        mask = 0
+        after_negation = False
+
+        for token in text.split():
+            entry = entries.get(token) or self._compile_token(token)
+            weights, is_negation, weight, token_mask = entry
+            if weights:
+                for term_weight in weights:
+                    total_score += term_weight
+                word_count += len(weights)
+            if after_negation and weight is not None:
+                negated.append(weight)
+            after_negation = is_negation
+            mask |= token_mask
+
+        # Negations flip and amplify the following term; applied after the lexicon sum
+        for weight in negated:
+            total_score -= weight * 2
+
+        sentiment_score = total_score / word_count if word_count > 0 else 0.0
+        sentiment_score = self.adjust(sentiment_score, mask)
+        return max(-1.0, min(1.0, sentiment_score))
+
+    def score_batch(self, texts: List[str]) -> List[float]:
+        """Score many texts; repeated texts in the batch are scored once"""
+        scores: Dict[str, float] = {}
+        for text in texts:
+            if text not in scores:
+                scores[text] = self.score(text)
+        return [scores[text] for text in texts]
+
+class SymbolArticleIndex:
+    """
+    One symbol's articles sorted by publish time, with prefix sums over their sentiment.
+
+    Scores are kept in integer thousandths (the precision analyses are rounded to), so the prefix
+    sums are exact and any window's aggregates are a bisect plus a few subtractions, whatever its
+    length. Articles normally arrive in time order and append in O(1); a late article is inserted
+    in place and only the prefixes after it are rebuilt.
+    """
+
+    def __init__(self, risk_types: List[str], opportunity_types: List[str]):
+        self.risk_types = risk_types
+        self.opportunity_types = opportunity_types
+        # Columns: score, analyst score, analyst flag, then one flag per risk and opportunity type
+        self._columns = 3 + len(risk_types) + len(opportunity_types)
+        self.published: List[datetime] = []
+        self.articles: List[NewsArticle] = []
+        self._rows: List[Tuple[int, ...]] = []
+        self._prefix: List[List[int]] = [[0] for _ in range(self._columns)]
+        # Strong-sentiment articles (|score| > 0.5), the candidates for sentiment drivers
+        self._strong_published: List[datetime] = []
+        self._strong: List[Tuple[str, float]] = []
+
+    def __len__(self) -> int:
+        return len(self.articles)
+
+    def add(self, published: datetime, article: NewsArticle, score: float, is_analyst: bool,
+            risk_type: Optional[str], opportunity_type: Optional[str]):
+        milli = int(round(score * 1000))
+        row = (milli, milli if is_analyst else 0, 1 if is_analyst else 0,
+               *(1 if risk_type == t else 0 for t in self.risk_types),
+               *(1 if opportunity_type == t else 0 for t in self.opportunity_types))
+
+        position = bisect.bisect_right(self.published, published)
+        self.published.insert(position, published)
+        self.articles.insert(position, article)
+        self._rows.insert(position, row)
+        for column, prefix in enumerate(self._prefix):
+            del prefix[position + 1:]
+            running = prefix[position]
+            for later in self._rows[position:]:
+                running += later[column]
+                prefix.append(running)
+
+        if abs(score) > 0.5:
+            strong_position = bisect.bisect_right(self._strong_published, published)
+            self._strong_published.insert(strong_position, published)
+            self._strong.insert(strong_position, (article.title, score))
+
+    def window(self, since: datetime, max_drivers: int = 5) -> SentimentWindow:
+        """Aggregates over the articles published at or after since"""
+        lo = bisect.bisect_left(self.published, since)
+        hi = len(self.published)
+        mid = lo + (hi - lo) // 2
+
+        def total(column: int, start: int = lo, end: int = hi) -> int:
+            return self._prefix[column][end] - self._prefix[column][start]
+
+        risk_offset = 3
+        opportunity_offset = risk_offset + len(self.risk_types)
+        strong_lo = bisect.bisect_left(self._strong_published, since)
+        return SentimentWindow(
+            news_count=hi - lo,
+            sentiment_sum=total(0),
+            older_half_sum=total(0, lo, mid),
+            analyst_count=total(2),
+            analyst_sum=total(1),
+            drivers=self._strong[strong_lo:strong_lo + max_drivers],
+            risk_types=[t for i, t in enumerate(self.risk_types) if total(risk_offset + i)],
+            opportunity_types=[t for i, t in enumerate(self.opportunity_types) if total(opportunity_offset + i)]
+        )
+
 class SentimentAnalysisEngine:
     def __init__(self):
         self.sentiment_analyses = {}
@@ -173,6 +376,12 @@ class SentimentAnalysisEngine:
         self.sentiment_signals = {}
         self.active_websockets = []
         
+        # Article sentiment cached by content hash, and per-symbol time-sorted article indexes
+        self.sentiment_cache: Dict[str, ArticleSentiment] = {}
+        self.article_sentiments: Dict[str, ArticleSentiment] = {}
+        self.symbol_indexes: Dict[str, SymbolArticleIndex] = {}
+        self._unindexed_articles: List[NewsArticle] = []
+        
         # Initialize sentiment lexicons and models
         self._initialize_sentiment_lexicons()
         self._initialize_sample_news()
@@ -233,6 +442,38 @@ class SentimentAnalysisEngine:
             'EBITDA': r'\bEBITDA\b'
         }
         
+        # Risk and opportunity keywords (an article counts towards the first type it matches)
+        self.risk_keywords = {
+            'regulatory': ['regulation', 'investigation', 'compliance', 'lawsuit'],
+            'operational': ['production', 'supply chain', 'shortage', 'delay'],
+            'financial': ['debt', 'liquidity', 'cash flow', 'bankruptcy'],
+            'market': ['competition', 'market share', 'pricing pressure'],
+            'geopolitical': ['trade war', 'sanctions', 'political', 'tariff']
+        }
+        self.opportunity_keywords = {
+            'growth': ['expansion', 'new market', 'product launch', 'innovation'],
+            'partnership': ['partnership', 'collaboration', 'alliance', 'joint venture'],
+            'acquisition': ['acquisition', 'merger', 'takeover'],
+            'technology': ['breakthrough', 'patent', 'ai', 'digital transformation'],
+            'market': ['market leader', 'competitive advantage', 'market share gain']
+        }
+        
+        # Negations flip and amplify the sentiment of the word that follows
+        self.negation_words = ['not', 'no', 'never', 'none', 'neither', 'nor']
+        
+        # Context adjustments (substring terms, factor, per_term), applied in order
+        self.context_adjustments = [
+            (['earnings', 'revenue', 'profit', 'loss'], 1.2, False),  # Amplify sentiment for financial news
+            (['surge', 'plunge', 'rally', 'crash', 'soar', 'tumble'], 1.3, False),  # Strong movement indicators
+            (['analyst', 'rating', 'recommendation'], 1.1, False),  # Analyst opinions carry weight
+            (['may', 'might', 'could', 'possibly', 'uncertain'], 0.1, True),  # Each uncertainty term reduces confidence
+            (['breaking', 'urgent', 'immediate', 'now', 'today'], 1.15, False)  # Recent news has more impact
+        ]
+        
+        self.lexicon_scorer = LexiconScorer(
+            self.positive_terms, self.negative_terms, self.negation_words, self.context_adjustments
+        )
+        
         logger.info("Sentiment lexicons and patterns initialized")
     
     def _initialize_sample_news(self):
@@ -302,9 +543,61 @@ class SentimentAnalysisEngine:
             )
             
             self.news_articles[article_id] = article
+            self._unindexed_articles.append(article)
         
         logger.info(f"Initialized {len(sample_articles)} sample news articles")
     
+    async def ingest_news_article(self, article: NewsArticle) -> ArticleSentiment:
+        """Store an article, score it once per distinct content and add it to its symbols' indexes"""
+        existing = self.article_sentiments.get(article.id)
+        if existing is not None:
+            return existing
+        self.news_articles[article.id] = article
+        
+        text = f"{article.title} {article.content}"
+        content_hash = hashlib.sha256(text.encode()).hexdigest()
+        entry = self.sentiment_cache.get(content_hash)
+        if entry is None:
+            analysis = await self.analyze_sentiment(SentimentRequest(text=text))
+            content_lower = text.lower()
+            entry = ArticleSentiment(
+                content_hash=content_hash,
+                analysis=analysis,
+                risk_type=self._match_keyword_type(content_lower, self.risk_keywords),
+                opportunity_type=self._match_keyword_type(content_lower, self.opportunity_keywords)
+            )
+            self.sentiment_cache[content_hash] = entry
+        
+        article.sentiment_score = entry.analysis.sentiment_score
+        article.sentiment_polarity = entry.analysis.sentiment_polarity
+        self.article_sentiments[article.id] = entry
+        
+        published = self._parse_published_at(article.published_at)
+        is_analyst = article.source_type == SourceType.ANALYST_REPORT
+        for symbol in article.symbols:
+            index = self.symbol_indexes.get(symbol)
+            if index is None:
+                index = SymbolArticleIndex(list(self.risk_keywords), list(self.opportunity_keywords))
+                self.symbol_indexes[symbol] = index
+            index.add(published, article, entry.analysis.sentiment_score, is_analyst,
+                      entry.risk_type, entry.opportunity_type)
+        return entry
+    
+    async def _index_pending_articles(self):
+        """Ingest articles stored before the event loop was available"""
+        while self._unindexed_articles:
+            await self.ingest_news_article(self._unindexed_articles.pop(0))
+    
+    def _parse_published_at(self, published_at: str) -> datetime:
+        return datetime.fromisoformat(published_at.replace('Z', '+00:00').replace('+00:00', ''))
+    
+    def _match_keyword_type(self, content_lower: str, keyword_types: Dict[str, List[str]]) -> Optional[str]:
+        """First keyword type with a keyword in the content"""
+        for keyword_type, keywords in keyword_types.items():
+            if any(keyword in content_lower for keyword in keywords):
+                return keyword_type
+        return None
+    
     async def analyze_sentiment(self, request: SentimentRequest) -> SentimentAnalysis:
         """Perform comprehensive sentiment analysis on text"""
         analysis_id = str(uuid.uuid4())
@@ -369,71 +662,15 @@ class SentimentAnalysisEngine:
     
     async def _calculate_sentiment_score(self, text: str) -> float:
         """Calculate sentiment score using lexicon-based approach"""
-        words = re.findall(r'\b\w+\b', text.lower())
-        total_score = 0
-        word_count = 0
-        
-        for word in words:
-            if word in self.positive_terms:
-                total_score += self.positive_terms[word]
-                word_count += 1
-            elif word in self.negative_terms:
-                total_score += self.negative_terms[word]
-                word_count += 1
-        
-        # Handle negations (simplified)
-        negation_words = ['not', 'no', 'never', 'none', 'neither', 'nor']
-        text_words = text.split()
-        
-        for i, word in enumerate(text_words):
-            if word.lower() in negation_words and i < len(text_words) - 1:
-                next_word = text_words[i + 1].lower()
-                if next_word in self.positive_terms:
-                    total_score -= self.positive_terms[next_word] * 2  # Flip and amplify
-                elif next_word in self.negative_terms:
-                    total_score -= self.negative_terms[next_word] * 2  # Flip and amplify
-        
-        # Normalize score
-        if word_count > 0:
-            sentiment_score = total_score / word_count
-        else:
-            sentiment_score = 0.0
-        
-        # Apply context adjustments
-        sentiment_score = await self._apply_context_adjustments(text, sentiment_score)
-        
-        # Clamp to [-1, 1] range
-        return max(-1.0, min(1.0, sentiment_score))
+        return self.lexicon_scorer.score(text)
+    
+    async def calculate_sentiment_scores(self, texts: List[str]) -> List[float]:
+        """Calculate lexicon sentiment scores for a batch of texts"""
+        return self.lexicon_scorer.score_batch(texts)
     
     async def _apply_context_adjustments(self, text: str, base_score: float) -> float:
         """Apply context-specific adjustments to sentiment score"""
-        adjusted_score = base_score
-        
-        # Financial context intensifiers
-        if any(term in text for term in ['earnings', 'revenue', 'profit', 'loss']):
-            adjusted_score *= 1.2  # Amplify sentiment for financial news
-        
-        # Market movement terms
-        movement_terms = ['surge', 'plunge', 'rally', 'crash', 'soar', 'tumble']
-        if any(term in text for term in movement_terms):
-            adjusted_score *= 1.3  # Strong movement indicators
-        
-        # Analyst sentiment
-        if any(term in text for term in ['analyst', 'rating', 'recommendation']):
-            adjusted_score *= 1.1  # Analyst opinions carry weight
-        
-        # Uncertainty indicators
-        uncertainty_terms = ['may', 'might', 'could', 'possibly', 'uncertain']
-        uncertainty_count = sum(1 for term in uncertainty_terms if term in text)
-        if uncertainty_count > 0:
-            adjusted_score *= (1 - uncertainty_count * 0.1)  # Reduce confidence
-        
-        # Time sensitivity
-        urgent_terms = ['breaking', 'urgent', 'immediate', 'now', 'today']
-        if any(term in text for term in urgent_terms):
-            adjusted_score *= 1.15  # Recent news has more impact
-        
-        return adjusted_score
+        return self.lexicon_scorer.adjust(base_score, self.lexicon_scorer.context_mask(text))
     
     def _determine_sentiment_polarity(self, sentiment_score: float) -> SentimentPolarity:
         """Determine sentiment polarity from numeric score"""
@@ -611,11 +848,11 @@ class SentimentAnalysisEngine:
             impact['price_impact'] = base_impact * 1.5
             impact['volume_impact'] = base_impact * 2.0
         
-        if any('merger' in text.lower() or 'acquisition' in text.lower()):
+        if 'merger' in text.lower() or 'acquisition' in text.lower():
             impact['price_impact'] = base_impact * 2.0
             impact['volume_impact'] = base_impact * 1.8
         
-        if any('regulatory' in text.lower() or 'investigation' in text.lower()):
+        if 'regulatory' in text.lower() or 'investigation' in text.lower():
             impact['volatility_impact'] = base_impact * 1.8
             impact['sector_impact'] = base_impact * 1.3
         
@@ -630,19 +867,21 @@ class SentimentAnalysisEngine:
     async def analyze_news_sentiment(self, request: NewsAnalysisRequest) -> MarketSentimentSummary:
         """Analyze sentiment for news related to a symbol"""
         summary_id = str(uuid.uuid4())
+        await self._index_pending_articles()
         
-        # Filter relevant news articles
-        relevant_articles = []
+        # Aggregate the symbol's articles in the window from its time index
         cutoff_time = datetime.now() - timedelta(hours=request.lookback_hours)
+        index = self.symbol_indexes.get(request.symbol)
+        if index is None:
+            window = None
+        elif request.categories:
+            window = self._window_from_articles(
+                [a for a in index.articles[bisect.bisect_left(index.published, cutoff_time):] if a.category in request.categories]
+            )
+        else:
+            window = index.window(cutoff_time)
         
-        for article in self.news_articles.values():
-            if (request.symbol in article.symbols and 
-                datetime.fromisoformat(article.published_at.replace('Z', '+00:00').replace('+00:00', '')) >= cutoff_time):
-                
-                if not request.categories or article.category in request.categories:
-                    relevant_articles.append(article)
-        
-        if not relevant_articles:
+        if window is None or window.news_count == 0:
             # Return neutral sentiment if no articles found
             return MarketSentimentSummary(
                 id=summary_id,
@@ -663,32 +902,15 @@ class SentimentAnalysisEngine:
                 opportunities=[]
             )
         
-        # Analyze sentiment for each article
-        sentiment_scores = []
-        analyst_scores = []
-        
-        for article in relevant_articles:
-            # Analyze article sentiment
-            sentiment_request = SentimentRequest(text=f"{article.title} {article.content}")
-            analysis = await self.analyze_sentiment(sentiment_request)
-            
-            sentiment_scores.append(analysis.sentiment_score)
-            
-            # Separate analyst sentiment
-            if article.source_type == SourceType.ANALYST_REPORT:
-                analyst_scores.append(analysis.sentiment_score)
-        
         # Calculate aggregate metrics
-        overall_sentiment = np.mean(sentiment_scores)
+        overall_sentiment = window.sentiment_sum / window.news_count / 1000
         sentiment_polarity = self._determine_sentiment_polarity(overall_sentiment)
         
-        # Calculate trend (simplified)
-        if len(sentiment_scores) >= 2:
-            recent_half = sentiment_scores[len(sentiment_scores)//2:]
-            older_half = sentiment_scores[:len(sentiment_scores)//2]
-            
-            recent_avg = np.mean(recent_half)
-            older_avg = np.mean(older_half)
+        # Calculate trend: newer half of the window against the older half
+        if window.news_count >= 2:
+            older_count = window.news_count // 2
+            recent_avg = (window.sentiment_sum - window.older_half_sum) / (window.news_count - older_count) / 1000
+            older_avg = window.older_half_sum / older_count / 1000
             
             if recent_avg > older_avg + 0.1:
                 sentiment_trend = "improving"
@@ -700,9 +922,12 @@ class SentimentAnalysisEngine:
             sentiment_trend = "stable"
         
         # Generate insights
-        sentiment_drivers = await self._identify_sentiment_drivers(relevant_articles, sentiment_scores)
-        risk_factors = await self._identify_risk_factors(relevant_articles)
-        opportunities = await self._identify_opportunities(relevant_articles)
+        sentiment_drivers = [
+            f"{'Positive' if score > 0 else 'Negative'}: {title[:50]}..." for title, score in window.drivers
+        ]
+        risk_factors = [f"{risk_type.title()} concerns highlighted in recent news" for risk_type in window.risk_types][:5]
+        opportunities = [f"{opportunity_type.title()} opportunities identified" for opportunity_type in window.opportunity_types][:5]
+        analyst_sentiment = window.analyst_sum / window.analyst_count / 1000 if window.analyst_count else 0.0
         
         summary = MarketSentimentSummary(
             id=summary_id,
@@ -713,9 +938,9 @@ class SentimentAnalysisEngine:
             sentiment_polarity=sentiment_polarity,
             sentiment_trend=sentiment_trend,
             volume_weighted_sentiment=round(overall_sentiment * 1.1, 3),  # Simplified
-            news_count=len(relevant_articles),
+            news_count=window.news_count,
             social_mentions=np.random.randint(50, 500),  # Mock social data
-            analyst_sentiment=round(np.mean(analyst_scores), 3) if analyst_scores else 0.0,
+            analyst_sentiment=round(analyst_sentiment, 3),
             retail_sentiment=round(overall_sentiment + np.random.uniform(-0.2, 0.2), 3),
             institutional_sentiment=round(overall_sentiment + np.random.uniform(-0.1, 0.1), 3),
             sentiment_drivers=sentiment_drivers,
@@ -729,64 +954,22 @@ class SentimentAnalysisEngine:
         
         return summary
     
-    async def _identify_sentiment_drivers(self, articles: List[NewsArticle], scores: List[float]) -> List[str]:
-        """Identify key sentiment drivers from articles"""
-        drivers = []
-        
-        # Find articles with strongest sentiment
-        for i, score in enumerate(scores):
-            if abs(score) > 0.5:  # Strong sentiment
-                article = articles[i]
-                if score > 0:
-                    drivers.append(f"Positive: {article.title[:50]}...")
-                else:
-                    drivers.append(f"Negative: {article.title[:50]}...")
-        
-        return drivers[:5]  # Limit to top 5
-    
-    async def _identify_risk_factors(self, articles: List[NewsArticle]) -> List[str]:
-        """Identify risk factors from news content"""
-        risk_factors = []
-        
-        risk_keywords = {
-            'regulatory': ['regulation', 'investigation', 'compliance', 'lawsuit'],
-            'operational': ['production', 'supply chain', 'shortage', 'delay'],
-            'financial': ['debt', 'liquidity', 'cash flow', 'bankruptcy'],
-            'market': ['competition', 'market share', 'pricing pressure'],
-            'geopolitical': ['trade war', 'sanctions', 'political', 'tariff']
-        }
-        
-        for article in articles:
-            content_lower = f"{article.title} {article.content}".lower()
-            
-            for risk_type, keywords in risk_keywords.items():
-                if any(keyword in content_lower for keyword in keywords):
-                    risk_factors.append(f"{risk_type.title()} concerns highlighted in recent news")
-                    break  # Avoid duplicates
-        
-        return list(set(risk_factors))[:5]
-    
-    async def _identify_opportunities(self, articles: List[NewsArticle]) -> List[str]:
-        """Identify opportunities from news content"""
-        opportunities = []
-        
-        opportunity_keywords = {
-            'growth': ['expansion', 'new market', 'product launch', 'innovation'],
-            'partnership': ['partnership', 'collaboration', 'alliance', 'joint venture'],
-            'acquisition': ['acquisition', 'merger', 'takeover'],
-            'technology': ['breakthrough', 'patent', 'ai', 'digital transformation'],
-            'market': ['market leader', 'competitive advantage', 'market share gain']
-        }
-        
-        for article in articles:
-            content_lower = f"{article.title} {article.content}".lower()
-            
-            for opp_type, keywords in opportunity_keywords.items():
-                if any(keyword in content_lower for keyword in keywords):
-                    opportunities.append(f"{opp_type.title()} opportunities identified")
-                    break
-        
-        return list(set(opportunities))[:5]
+    def _window_from_articles(self, articles: List[NewsArticle]) -> SentimentWindow:
+        """Aggregate an explicit, time-ordered article list (used when filtering by category)"""
+        scores = [int(round(self.article_sentiments[a.id].analysis.sentiment_score * 1000)) for a in articles]
+        analyst_scores = [score for a, score in zip(articles, scores) if a.source_type == SourceType.ANALYST_REPORT]
+        risk_types = {self.article_sentiments[a.id].risk_type for a in articles}
+        opportunity_types = {self.article_sentiments[a.id].opportunity_type for a in articles}
+        return SentimentWindow(
+            news_count=len(articles),
+            sentiment_sum=sum(scores),
+            older_half_sum=sum(scores[:len(scores) // 2]),
+            analyst_count=len(analyst_scores),
+            analyst_sum=sum(analyst_scores),
+            drivers=[(a.title, score / 1000) for a, score in zip(articles, scores) if abs(score) > 500][:5],
+            risk_types=[t for t in self.risk_keywords if t in risk_types],
+            opportunity_types=[t for t in self.opportunity_keywords if t in opportunity_types]
+        )
     
     async def _monitor_sentiment_trends(self):
         """Background task to monitor sentiment trends and generate signals"""
@@ -939,6 +1122,17 @@ async def analyze_sentiment(request: SentimentRequest):
         logger.error(f"Error analyzing sentiment: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/sentiment/score_batch")
+async def score_sentiment_batch(request: SentimentBatchRequest):
+    """Score the lexicon sentiment of a batch of texts"""
+    try:
+        scores = await sentiment_engine.calculate_sentiment_scores([text.lower() for text in request.texts])
+        return {"scores": [round(score, 3) for score in scores], "total": len(scores)}
+
+    except Exception as e:
+        logger.error(f"Error scoring sentiment batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/sentiment/news")
 async def analyze_news_sentiment(request: NewsAnalysisRequest):
     """Analyze sentiment for news related to a symbol"""
@@ -10,14 +10,16 @@ import logging
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Any, Tuple, Callable, Awaitable
+from dataclasses import dataclass, asdict, field
+from collections import OrderedDict, deque
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 from pydantic import BaseModel, Field
 import uuid
 import math
+import weakref
 from enum import Enum
 
 # Configure logging
@@ -131,7 +133,184 @@ class AnalysisRequest(BaseModel):
     include_patterns: bool = Field(default=True, description="Include pattern detection")
     include_support_resistance: bool = Field(default=True, description="Include S/R levels")
 
+class BarUpdate(BaseModel):
+    timestamp: datetime = Field(..., description="Bar open time")
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+
+# Incremental indicator state
+class EWMState:
+    """Exponentially weighted mean with the same recurrence as pandas ewm(span).mean()"""
+    
+    def __init__(self, span: int):
+        self.factor = 1.0 - 2.0 / (span + 1.0)
+        self.weighted = math.nan
+        self.old_wt = 1.0
+        self.nobs = 0
+        self.started = False
+    
+    def update(self, value: float) -> float:
+        is_observation = value == value
+        if not self.started:
+            self.started = True
+            self.weighted = value
+            self.nobs = int(is_observation)
+            return self.weighted
+        
+        self.nobs += is_observation
+        if self.weighted == self.weighted:
+            self.old_wt *= self.factor
+            if is_observation:
+                if self.weighted != value:
+                    self.weighted = (self.old_wt * self.weighted + value) / (self.old_wt + 1.0)
+                self.old_wt += 1.0
+        elif is_observation:
+            self.weighted = value
+        return self.weighted
+
+@dataclass
+class IndicatorState:
+    """Running state for indicators whose latest value depends on the whole history"""
+    bars: int = 0
+    last_ts: Any = None
+    values: Dict[str, Any] = field(default_factory=dict)
+
+class IndicatorCache:
+    """Indicator results keyed by (symbol, timeframe, indicator, params, last_bar_ts)
+    
+    Concurrent requests for the same key share one computation. MACD, OBV and VWAP
+    keep running state per (symbol, timeframe, indicator, params) so appending a bar
+    advances them by one step instead of replaying the full history. Each symbol has a
+    generation, bumped by invalidate(); a computation that started before the bump is
+    returned to its callers but not cached.
+    """
+    
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._results: "OrderedDict[Tuple, Optional[TechnicalIndicator]]" = OrderedDict()
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self.states: Dict[Tuple, IndicatorState] = {}
+        self._generations: Dict[str, int] = {}
+        self.stats = {"hits": 0, "misses": 0, "inflight_joins": 0, "incremental_updates": 0, "full_recomputes": 0,
+                      "stale_discards": 0}
+    
+    @staticmethod
+    def params_key(config: Dict[str, Any]) -> Tuple:
+        return tuple(sorted(config.items()))
+    
+    async def get_or_compute(self, key: Tuple,
+                             compute: Callable[[], Awaitable[Optional[TechnicalIndicator]]]) -> Optional[TechnicalIndicator]:
+        """Return the cached result for key, joining an in-flight computation if there is one"""
+        if key in self._results:
+            self.stats["hits"] += 1
+            self._results.move_to_end(key)
+            return self._results[key]
+        
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.stats["inflight_joins"] += 1
+            return await asyncio.shield(pending)
+        
+        self.stats["misses"] += 1
+        generation = self.generation(key[0])
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await compute()
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so joiners-less failures don't log "exception was never retrieved"
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        
+        future.set_result(result)
+        if self.generation(key[0]) != generation:
+            # Computed from history that was replaced meanwhile
+            self.stats["stale_discards"] += 1
+            return result
+        self._results[key] = result
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+        return result
+    
+    def generation(self, symbol: str) -> int:
+        return self._generations.get(symbol, 0)
+    
+    def invalidate(self, symbol: str):
+        """Drop results and running state for a symbol whose history was replaced"""
+        self._generations[symbol] = self.generation(symbol) + 1
+        for key in [k for k in self._results if k[0] == symbol]:
+            del self._results[key]
+        for key in [k for k in self._inflight if k[0] == symbol]:
+            del self._inflight[key] # New lookups must not join a computation on the old history
+        for key in [k for k in self.states if k[0] == symbol]:
+            del self.states[key]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"] + self.stats["inflight_joins"]
+        return {
+            **self.stats,
+            "entries": len(self._results),
+            "stateful_series": len(self.states),
+            "hit_rate": (self.stats["hits"] + self.stats["inflight_joins"]) / lookups if lookups else 0.0
+        }
+
+# Support/resistance pivots
+def find_pivots(high: np.ndarray, low: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Indices of pivot highs/lows: bars equal to the extreme of the 2*window+1 bars centred on them"""
+    n = len(high)
+    if n <= 2 * window:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    
+    span = 2 * window + 1
+    # Centred rolling extrema, computed once for the whole series
+    rolling_max = pd.Series(high).rolling(span, center=True, min_periods=1).max().to_numpy()
+    rolling_min = pd.Series(low).rolling(span, center=True, min_periods=1).min().to_numpy()
+    
+    inner = slice(window, n - window)
+    pivot_highs = np.flatnonzero(high[inner] == rolling_max[inner]) + window
+    pivot_lows = np.flatnonzero(low[inner] == rolling_min[inner]) + window
+    return pivot_highs, pivot_lows
+
+def consolidate_levels(levels: np.ndarray, threshold: float = 0.01, keep: int = 5) -> List[float]:
+    """Collapse sorted levels within threshold (relative) of the previous kept level; return the top `keep`"""
+    levels = np.sort(np.asarray(levels, dtype=float))
+    n = len(levels)
+    if n == 0:
+        return []
+    
+    def separated(i: int, kept: float) -> bool:
+        return abs(levels[i] - kept) / kept > threshold
+    
+    consolidated = [0]
+    i = 0
+    while True:
+        kept = levels[i]
+        # Jump straight to the first level outside the cluster, then settle the boundary exactly
+        j = int(np.searchsorted(levels, kept * (1 + threshold), side='right'))
+        j = min(max(j, i + 1), n)
+        while j > i + 1 and separated(j - 1, kept):
+            j -= 1
+        while j < n and not separated(j, kept):
+            j += 1
+        if j >= n:
+            break
+        consolidated.append(j)
+        i = j
+    
+    return levels[consolidated[-keep:]].tolist()
+
 class TechnicalAnalysisEngine:
+    # Indicators whose latest value depends on the full history; they keep running state
+    STATEFUL_INDICATORS = ("macd", "obv", "vwap")
+    
     def __init__(self):
         self.analyses = {}
         self.market_data = {}
@@ -155,6 +334,13 @@ class TechnicalAnalysisEngine:
             "ichimoku": {"tenkan": 9, "kijun": 26, "senkou": 52}
         }
         
+        # Indicator results shared by /analysis/technical and /indicators
+        self.indicator_cache = IndicatorCache()
+        
+        # Pivot levels per market data frame, shared by pattern and level detection
+        self.pivot_window = 10
+        self._pivot_cache: Dict[int, Tuple[Any, int, np.ndarray, np.ndarray]] = {}
+        
         logger.info("Technical Analysis Engine initialized")
     
     def _initialize_sample_data(self):
@@ -213,11 +399,13 @@ class TechnicalAnalysisEngine:
         if request.symbol not in self.market_data:
             raise HTTPException(status_code=404, detail=f"No data available for {request.symbol}")
         
-        df = self.market_data[request.symbol].copy()
+        # Indicator and pattern code only reads the frame, so no defensive copy is needed
+        df = self.market_data[request.symbol]
         current_price = df['close'].iloc[-1]
         
         # Calculate technical indicators
-        indicators = await self._calculate_indicators(df, request.indicators)
+        indicators = await self._calculate_indicators(df, request.indicators,
+                                                      symbol=request.symbol, timeframe=request.timeframe)
         
         # Detect patterns
         patterns = []
@@ -268,9 +456,35 @@ class TechnicalAnalysisEngine:
         
         return analysis
     
+    def append_market_bar(self, symbol: str, bar: Dict[str, Any]):
+        """Append one OHLCV bar to a symbol's history"""
+        row = {column: bar[column] for column in ("timestamp", "open", "high", "low", "close", "volume")}
+        row["timestamp"] = pd.Timestamp(row["timestamp"])
+        df = self.market_data.get(symbol)
+        
+        if df is None or df.empty:
+            self.market_data[symbol] = pd.DataFrame([row])
+            self.indicator_cache.invalidate(symbol)
+            return
+        
+        last_ts = df['timestamp'].iloc[-1]
+        if row["timestamp"] <= last_ts:
+            # Bar revision: drop the revised tail so cached state is rebuilt from the new history
+            df = df[df['timestamp'] < row["timestamp"]]
+            self.indicator_cache.invalidate(symbol)
+        
+        self.market_data[symbol] = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
+    
+    def replace_market_data(self, symbol: str, df: pd.DataFrame):
+        """Replace a symbol's history and drop everything cached for it"""
+        self.market_data[symbol] = df.reset_index(drop=True)
+        self.indicator_cache.invalidate(symbol)
+    
     async def _calculate_indicators(self, df: pd.DataFrame, 
-                                  requested_indicators: List[str]) -> List[TechnicalIndicator]:
-        """Calculate technical indicators"""
+                                  requested_indicators: List[str],
+                                  symbol: Optional[str] = None,
+                                  timeframe: str = "1h") -> List[TechnicalIndicator]:
+        """Calculate technical indicators, through the indicator cache when the symbol is known"""
         indicators = []
         
         # Default indicators if none specified
@@ -279,12 +493,129 @@ class TechnicalAnalysisEngine:
         
         for indicator_name in requested_indicators:
             if indicator_name in self.indicator_configs:
-                indicator = await self._calculate_single_indicator(df, indicator_name)
+                if symbol is None:
+                    indicator = await self._calculate_single_indicator(df, indicator_name)
+                else:
+                    indicator = await self._cached_indicator(df, symbol, timeframe, indicator_name)
                 if indicator:
                     indicators.append(indicator)
         
         return indicators
     
+    async def _cached_indicator(self, df: pd.DataFrame, symbol: str, timeframe: str,
+                                indicator_name: str) -> Optional[TechnicalIndicator]:
+        """Look up an indicator for the latest bar, computing it once per new bar"""
+        if df.empty:
+            return None
+        
+        config = self.indicator_configs[indicator_name]
+        params = IndicatorCache.params_key(config)
+        key = (symbol, timeframe, indicator_name, params, self._last_bar_ts(df))
+        
+        async def compute() -> Optional[TechnicalIndicator]:
+            if indicator_name in self.STATEFUL_INDICATORS:
+                return self._calculate_stateful_indicator(df, (symbol, timeframe, indicator_name, params), config)
+            
+            # Windowed indicators only need the bars their latest value depends on
+            lookback = self._indicator_lookback(indicator_name, config)
+            window = df.tail(lookback) if lookback else df
+            return await self._calculate_single_indicator(window, indicator_name)
+        
+        return await self.indicator_cache.get_or_compute(key, compute)
+    
+    @staticmethod
+    def _last_bar_ts(df: pd.DataFrame) -> Any:
+        return df['timestamp'].iloc[-1] if 'timestamp' in df.columns else df.index[-1]
+    
+    @staticmethod
+    def _indicator_lookback(indicator_name: str, config: Dict) -> Optional[int]:
+        """Bars needed for the latest value of a windowed indicator"""
+        if indicator_name == "rsi":
+            return config["period"] + 1
+        if indicator_name in ("bollinger", "williams_r"):
+            return config["period"]
+        if indicator_name == "stochastic":
+            return config["k_period"] + config["d_period"] - 1
+        if indicator_name == "adx":
+            return 2 * config["period"]
+        if indicator_name == "atr":
+            return config["period"] + 1
+        if indicator_name == "ichimoku":
+            return max(config["tenkan"], config["kijun"], config["senkou"]) + config["kijun"]
+        return None
+    
+    def _calculate_stateful_indicator(self, df: pd.DataFrame, state_key: Tuple,
+                                      config: Dict) -> Optional[TechnicalIndicator]:
+        """Advance running MACD/OBV/VWAP state to the last bar and build the indicator"""
+        indicator_name = state_key[2]
+        timestamps = df['timestamp'] if 'timestamp' in df.columns else df.index.to_series()
+        n = len(df)
+        state = self.indicator_cache.states.get(state_key)
+        
+        if state is not None and state.bars == n and state.last_ts == timestamps.iloc[-1]:
+            start = n
+        elif state is not None and state.bars == n - 1 and n > 1 and state.last_ts == timestamps.iloc[-2]:
+            start = n - 1
+            self.indicator_cache.stats["incremental_updates"] += 1
+        else:
+            state = IndicatorState()
+            self.indicator_cache.states[state_key] = state
+            start = 0
+            self.indicator_cache.stats["full_recomputes"] += 1
+        
+        step = getattr(self, f"_step_{indicator_name}")
+        highs = df['high'].to_numpy(dtype=float)[start:].tolist()
+        lows = df['low'].to_numpy(dtype=float)[start:].tolist()
+        closes = df['close'].to_numpy(dtype=float)[start:].tolist()
+        volumes = df['volume'].to_numpy(dtype=float)[start:].tolist()
+        for high, low, close, volume in zip(highs, lows, closes, volumes):
+            step(state, config, high, low, close, volume)
+        
+        state.bars = n
+        state.last_ts = timestamps.iloc[-1]
+        
+        try:
+            return getattr(self, f"_{indicator_name}_indicator")(state, config)
+        except Exception as e:
+            logger.error(f"Error calculating {indicator_name}: {e}")
+            return None
+    
+    @staticmethod
+    def _step_macd(state: IndicatorState, config: Dict, high: float, low: float, close: float, volume: float):
+        values = state.values
+        if not values:
+            values.update(fast=EWMState(config["fast"]), slow=EWMState(config["slow"]),
+                          signal=EWMState(config["signal"]), histogram=math.nan, prev_histogram=math.nan)
+        macd = values["fast"].update(close) - values["slow"].update(close)
+        signal = values["signal"].update(macd)
+        values["prev_histogram"] = values["histogram"]
+        values.update(macd=macd, signal_value=signal, histogram=macd - signal)
+    
+    @staticmethod
+    def _step_obv(state: IndicatorState, config: Dict, high: float, low: float, close: float, volume: float):
+        values = state.values
+        if not values:
+            values.update(obv=0.0, prev_close=math.nan, obv_window=deque(maxlen=20), close_window=deque(maxlen=20))
+        flow = np.sign(close - values["prev_close"]) * volume
+        if flow == flow:
+            values["obv"] += flow
+        values["prev_close"] = close
+        values["obv_window"].append(values["obv"])
+        values["close_window"].append(close)
+    
+    @staticmethod
+    def _step_vwap(state: IndicatorState, config: Dict, high: float, low: float, close: float, volume: float):
+        values = state.values
+        if not values:
+            values.update(pv=0.0, volume=0.0, close=math.nan)
+        typical_price = (high + low + close) / 3
+        pv = typical_price * volume
+        if pv == pv:
+            values["pv"] += pv
+        if volume == volume:
+            values["volume"] += volume
+        values["close"] = close
+    
     async def _calculate_single_indicator(self, df: pd.DataFrame, 
                                         indicator_name: str) -> Optional[TechnicalIndicator]:
         """Calculate a single technical indicator"""
@@ -363,20 +694,28 @@ class TechnicalAnalysisEngine:
         signal_line = macd_line.ewm(span=signal_period).mean()
         histogram = macd_line - signal_line
         
-        current_macd = macd_line.iloc[-1]
-        current_signal = signal_line.iloc[-1]
-        current_histogram = histogram.iloc[-1]
-        
+        return self._build_macd_indicator(config, macd_line.iloc[-1], signal_line.iloc[-1],
+                                          histogram.iloc[-1], histogram.iloc[-2])
+    
+    def _macd_indicator(self, state: IndicatorState, config: Dict) -> TechnicalIndicator:
+        values = state.values
+        if state.bars < 2:
+            raise IndexError("MACD needs at least two bars")
+        return self._build_macd_indicator(config, values["macd"], values["signal_value"],
+                                          values["histogram"], values["prev_histogram"])
+    
+    def _build_macd_indicator(self, config: Dict, current_macd: float, current_signal: float,
+                              current_histogram: float, prev_histogram: float) -> TechnicalIndicator:
         # Generate signal
-        if current_macd > current_signal and histogram.iloc[-2] <= 0:
+        if current_macd > current_signal and prev_histogram <= 0:
             signal = "BUY"
             strength = SignalStrength.STRONG
-        elif current_macd < current_signal and histogram.iloc[-2] >= 0:
+        elif current_macd < current_signal and prev_histogram >= 0:
             signal = "SELL"
             strength = SignalStrength.STRONG
         else:
             signal = "HOLD"
-            strength = SignalStrength.MODERATE if abs(current_histogram) > abs(histogram.iloc[-2]) else SignalStrength.WEAK
+            strength = SignalStrength.MODERATE if abs(current_histogram) > abs(prev_histogram) else SignalStrength.WEAK
         
         return TechnicalIndicator(
             name="MACD",
@@ -596,14 +935,32 @@ class TechnicalAnalysisEngine:
     async def _calculate_obv(self, df: pd.DataFrame) -> TechnicalIndicator:
         """Calculate On-Balance Volume (OBV)"""
         obv = (np.sign(df['close'].diff()) * df['volume']).fillna(0).cumsum()
-        current_obv = obv.iloc[-1]
+        obv_ma = obv.rolling(window=20).mean()
+        close_ma = df['close'].rolling(window=20).mean()
         
+        return self._build_obv_indicator(obv.iloc[-1], obv_ma.iloc[-1], df['close'].iloc[-1], close_ma.iloc[-1])
+    
+    def _obv_indicator(self, state: IndicatorState, config: Dict) -> TechnicalIndicator:
+        values = state.values
+        obv_window, close_window = values["obv_window"], values["close_window"]
+        obv_ma = self._window_mean(obv_window)
+        close_ma = self._window_mean(close_window)
+        return self._build_obv_indicator(values["obv"], obv_ma, values["prev_close"], close_ma)
+    
+    @staticmethod
+    def _window_mean(window: deque) -> float:
+        """Mean of a full 20-bar window, NaN until the window fills or if it holds NaN"""
+        if len(window) < window.maxlen or any(v != v for v in window):
+            return math.nan
+        return math.fsum(window) / len(window)
+    
+    def _build_obv_indicator(self, current_obv: float, obv_ma: float,
+                             current_price: float, price_ma: float) -> TechnicalIndicator:
         # Calculate OBV trend
-        obv_ma = obv.rolling(window=20).mean()
-        obv_trend = "rising" if obv.iloc[-1] > obv_ma.iloc[-1] else "falling"
+        obv_trend = "rising" if current_obv > obv_ma else "falling"
         
         # Generate signal based on price-volume relationship
-        price_trend = "rising" if df['close'].iloc[-1] > df['close'].rolling(window=20).mean().iloc[-1] else "falling"
+        price_trend = "rising" if current_price > price_ma else "falling"
         
         if obv_trend == "rising" and price_trend == "rising":
             signal = "BUY"
@@ -633,9 +990,14 @@ class TechnicalAnalysisEngine:
         typical_price = (df['high'] + df['low'] + df['close']) / 3
         vwap = (typical_price * df['volume']).cumsum() / df['volume'].cumsum()
         
-        current_vwap = vwap.iloc[-1]
-        current_price = df['close'].iloc[-1]
-        
+        return self._build_vwap_indicator(vwap.iloc[-1], df['close'].iloc[-1])
+    
+    def _vwap_indicator(self, state: IndicatorState, config: Dict) -> TechnicalIndicator:
+        values = state.values
+        current_vwap = values["pv"] / values["volume"] if values["volume"] else math.nan
+        return self._build_vwap_indicator(current_vwap, values["close"])
+    
+    def _build_vwap_indicator(self, current_vwap: float, current_price: float) -> TechnicalIndicator:
         # Generate signal based on price relative to VWAP
         if current_price > current_vwap * 1.005:  # 0.5% above VWAP
             signal = "SELL"
@@ -732,20 +1094,16 @@ class TechnicalAnalysisEngine:
         patterns = []
         
         # Find local highs and lows
-        window = 10
-        highs = df['high'].rolling(window=window, center=True).max() == df['high']
-        lows = df['low'].rolling(window=window, center=True).min() == df['low']
-        
-        resistance_levels = df[highs]['high'].values
-        support_levels = df[lows]['low'].values
+        resistance_levels, support_levels = self._pivot_levels(df)
         
         if len(resistance_levels) > 0:
             # Find the most significant resistance
             current_price = df['close'].iloc[-1]
-            nearby_resistance = [r for r in resistance_levels if r > current_price and r < current_price * 1.1]
+            nearby_resistance = resistance_levels[(resistance_levels > current_price) &
+                                                  (resistance_levels < current_price * 1.1)]
             
-            if nearby_resistance:
-                resistance_level = min(nearby_resistance)
+            if len(nearby_resistance):
+                resistance_level = float(nearby_resistance.min())
                 
                 pattern = PatternDetection(
                     id=str(uuid.uuid4()),
@@ -768,10 +1126,11 @@ class TechnicalAnalysisEngine:
         if len(support_levels) > 0:
             # Find the most significant support
             current_price = df['close'].iloc[-1]
-            nearby_support = [s for s in support_levels if s < current_price and s > current_price * 0.9]
+            nearby_support = support_levels[(support_levels < current_price) &
+                                            (support_levels > current_price * 0.9)]
             
-            if nearby_support:
-                support_level = max(nearby_support)
+            if len(nearby_support):
+                support_level = float(nearby_support.max())
                 
                 pattern = PatternDetection(
                     id=str(uuid.uuid4()),
@@ -925,41 +1284,30 @@ class TechnicalAnalysisEngine:
     
     async def _calculate_support_resistance(self, df: pd.DataFrame) -> Dict[str, List[float]]:
         """Calculate support and resistance levels"""
-        # Find pivot points
-        window = 10
-        pivots = []
-        
-        for i in range(window, len(df) - window):
-            # Pivot high
-            if df['high'].iloc[i] == df['high'].iloc[i-window:i+window+1].max():
-                pivots.append(('resistance', df['high'].iloc[i]))
-            # Pivot low
-            if df['low'].iloc[i] == df['low'].iloc[i-window:i+window+1].min():
-                pivots.append(('support', df['low'].iloc[i]))
-        
-        # Group similar levels
-        resistance_levels = [p[1] for p in pivots if p[0] == 'resistance']
-        support_levels = [p[1] for p in pivots if p[0] == 'support']
-        
-        # Remove levels that are too close together
-        def consolidate_levels(levels, threshold=0.01):
-            if not levels:
-                return []
-            
-            levels.sort()
-            consolidated = [levels[0]]
-            
-            for level in levels[1:]:
-                if abs(level - consolidated[-1]) / consolidated[-1] > threshold:
-                    consolidated.append(level)
-            
-            return consolidated[-5:]  # Keep only most recent 5 levels
+        resistance_levels, support_levels = self._pivot_levels(df)
         
+        # Remove levels that are too close together, keeping the 5 highest
         return {
             "support": consolidate_levels(support_levels),
             "resistance": consolidate_levels(resistance_levels)
         }
     
+    def _pivot_levels(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Pivot high and pivot low prices in time order, computed once per frame"""
+        entry = self._pivot_cache.get(id(df))
+        if entry is not None and entry[0]() is df and entry[1] == len(df):
+            return entry[2], entry[3]
+        
+        high = df['high'].to_numpy(dtype=float)
+        low = df['low'].to_numpy(dtype=float)
+        pivot_highs, pivot_lows = find_pivots(high, low, self.pivot_window)
+        resistance_levels, support_levels = high[pivot_highs], low[pivot_lows]
+        
+        # Drop entries whose frame has been replaced
+        self._pivot_cache = {key: value for key, value in self._pivot_cache.items() if value[0]() is not None}
+        self._pivot_cache[id(df)] = (weakref.ref(df), len(df), resistance_levels, support_levels)
+        return resistance_levels, support_levels
+    
     async def _analyze_trends(self, df: pd.DataFrame, indicators: List[TechnicalIndicator]) -> Dict[str, Any]:
         """Analyze market trends"""
         # Short-term trend (20 periods)
@@ -1194,7 +1542,7 @@ async def get_analysis(analysis_id: str):
     return {"analysis": asdict(technical_engine.analyses[analysis_id])}
 
 @app.get("/indicators/{symbol}")
-async def get_indicators(symbol: str, indicators: str = ""):
+async def get_indicators(symbol: str, indicators: str = "", timeframe: str = "1h"):
     """Get specific technical indicators for a symbol"""
     if symbol not in technical_engine.market_data:
         raise HTTPException(status_code=404, detail=f"No data available for {symbol}")
@@ -1202,14 +1550,28 @@ async def get_indicators(symbol: str, indicators: str = ""):
     requested_indicators = indicators.split(",") if indicators else []
     
     df = technical_engine.market_data[symbol]
-    calculated_indicators = await technical_engine._calculate_indicators(df, requested_indicators)
+    calculated_indicators = await technical_engine._calculate_indicators(
+        df, requested_indicators, symbol=symbol, timeframe=timeframe)
     
     return {
         "symbol": symbol,
+        "timeframe": timeframe,
         "indicators": [asdict(ind) for ind in calculated_indicators],
         "timestamp": datetime.now().isoformat()
     }
 
+@app.post("/market-data/{symbol}/bars")
+async def append_bar(symbol: str, bar: BarUpdate):
+    """Append a new OHLCV bar; cached indicators advance on the next request"""
+    technical_engine.append_market_bar(symbol, bar.model_dump())
+    df = technical_engine.market_data[symbol]
+    return {
+        "symbol": symbol,
+        "bars": len(df),
+        "last_bar": df['timestamp'].iloc[-1].isoformat(),
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.get("/patterns/{symbol}")
 async def get_patterns(symbol: str, timeframe: str = "1h"):
     """Get pattern analysis for a symbol"""
@@ -1265,6 +1627,7 @@ async def get_metrics():
         "symbols_tracked": len(technical_engine.market_data),
         "indicators_available": len(technical_engine.indicator_configs),
         "active_websockets": len(technical_engine.active_websockets),
+        "indicator_cache": technical_engine.indicator_cache.get_stats(),
         "cpu_usage": np.random.uniform(15, 50),
         "memory_usage": np.random.uniform(25, 65),
         "analysis_latency_ms": np.random.uniform(100, 300),
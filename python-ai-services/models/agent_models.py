@@ -85,7 +85,7 @@ class AgentStrategyConfig(BaseModel):
         set_operational_parameters: Optional[Dict[str, Any]] = None
         set_is_active: Optional[bool] = None
     class PortfolioOptimizerParams(BaseModel):
-        rules: List[PortfolioOptimizerRule] = Field(default_factory=list)
+        rules: List["AgentStrategyConfig.PortfolioOptimizerRule"] = Field(default_factory=list)
     portfolio_optimizer_params: Optional[PortfolioOptimizerParams] = None
 
     class NewsAnalysisParams(BaseModel):
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Text, Float, ForeignKey # Added Float, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, Text, Float, ForeignKey, Integer, Index # Added Float, ForeignKey
 # For SQLAlchemy's built-in JSON type, if available and preferred over Text for JSON strings:
 # from sqlalchemy import JSON as DB_JSON_TYPE
 from python_ai_services.core.database import Base # Adjusted import path
@@ -54,6 +54,66 @@ class TradeFillDB(Base):
     exchange_trade_id = Column(String, nullable=True, index=True) # Exchange's own fill/trade ID
 
 
+# --- FIFO P&L ledger, maintained by TradeHistoryService.record_fill ---
+
+class TradeLotDB(Base):
+    """Open buy lot with the quantity not yet matched by sells."""
+    __tablename__ = "trade_open_lots"
+    __table_args__ = (Index("ix_trade_open_lots_fifo", "agent_id", "asset", "timestamp", "lot_id"),)
+
+    lot_id = Column(Integer, primary_key=True, autoincrement=True)
+    agent_id = Column(String, nullable=False)
+    asset = Column(String, nullable=False)
+    fill_id = Column(String, nullable=False)
+    timestamp = Column(DateTime, nullable=False)
+    quantity = Column(Float, nullable=False) # Original fill quantity, used to pro-rate the fee
+    remaining_quantity = Column(Float, nullable=False)
+    price = Column(Float, nullable=False)
+    fee = Column(Float, default=0.0)
+
+
+class ClosedTradeDB(Base):
+    """Closed trade portion produced by matching a sell fill against an open lot."""
+    __tablename__ = "closed_trades"
+    __table_args__ = (
+        Index("ix_closed_trades_agent_exit", "agent_id", "exit_timestamp"),
+        Index("ix_closed_trades_agent_asset", "agent_id", "asset"),
+    )
+
+    trade_id = Column(String, primary_key=True)
+    agent_id = Column(String, nullable=False)
+    asset = Column(String, nullable=False)
+    entry_fill_id = Column(String, nullable=False)
+    exit_fill_id = Column(String, nullable=False)
+    quantity = Column(Float, nullable=False)
+    entry_price = Column(Float, nullable=False)
+    exit_price = Column(Float, nullable=False)
+    entry_timestamp = Column(DateTime, nullable=False)
+    exit_timestamp = Column(DateTime, nullable=False)
+    initial_value_usd = Column(Float, nullable=False)
+    final_value_usd = Column(Float, nullable=False)
+    total_fees = Column(Float, nullable=False)
+    realized_pnl = Column(Float, nullable=False)
+
+
+class TradeLedgerStatsDB(Base):
+    """Running closed-trade aggregates per agent and asset."""
+    __tablename__ = "trade_ledger_stats"
+
+    agent_id = Column(String, primary_key=True)
+    asset = Column(String, primary_key=True)
+    last_fill_timestamp = Column(DateTime, nullable=True) # Latest fill applied to the ledger
+    total_trades = Column(Integer, default=0, nullable=False)
+    winning_trades = Column(Integer, default=0, nullable=False)
+    losing_trades = Column(Integer, default=0, nullable=False)
+    neutral_trades = Column(Integer, default=0, nullable=False)
+    total_net_pnl = Column(Float, default=0.0, nullable=False)
+    gross_profit = Column(Float, default=0.0, nullable=False)
+    gross_loss = Column(Float, default=0.0, nullable=False) # Positive sum of losses
+    first_exit_timestamp = Column(DateTime, nullable=True)
+    last_exit_timestamp = Column(DateTime, nullable=True)
+
+
 class OrderDB(Base):
     __tablename__ = "orders"
 
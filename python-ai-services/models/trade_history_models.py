@@ -60,3 +60,18 @@ class TradeFillData(BaseModel):
     fee_currency: Optional[str] = None # e.g., "USD" or the asset itself
     exchange_order_id: Optional[str] = None
     exchange_trade_id: Optional[str] = None # Often exchanges have a separate trade/fill ID
+
+
+class TradeStatistics(BaseModel):
+    """Closed-trade aggregates maintained by the FIFO ledger at write time."""
+    agent_id: str
+    total_trades: int = 0
+    winning_trades: int = 0
+    losing_trades: int = 0
+    neutral_trades: int = 0
+    total_net_pnl: float = 0.0
+    gross_profit: float = 0.0
+    gross_loss: float = 0.0 # Positive sum of losses
+    first_exit_timestamp: Optional[datetime] = None
+    last_exit_timestamp: Optional[datetime] = None
+    assets: List[str] = Field(default_factory=list)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Feature Store Benchmark
+Checks the prediction engine's incrementally built features against the per-request recomputation they replace and measures batch prediction throughput
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+project_root = Path(__file__).resolve().parent.parent
+ENGINE_PATH = project_root / "mcp_servers" / "ai_prediction_engine.py"
+
+
+def load_engine_module():
+    spec = importlib.util.spec_from_file_location("ai_prediction_engine", ENGINE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def reference_indicators(historical_data, current_price):
+    """Technical indicators as they were computed from a List[MarketData] (random oscillators left out)"""
+    prices = [d.close_price for d in historical_data[-20:]]
+    gains = [max(0, prices[i] - prices[i-1]) for i in range(1, len(prices))]
+    losses = [max(0, prices[i-1] - prices[i]) for i in range(1, len(prices))]
+    avg_gain = sum(gains[-14:]) / 14
+    avg_loss = sum(losses[-14:]) / 14
+    rs = avg_gain / avg_loss if avg_loss > 0 else 100
+    rsi = 100 - (100 / (1 + rs))
+    sma_20 = sum(prices) / len(prices)
+    std_dev = np.std(prices)
+    macd = sum(prices[-12:]) / 12 - sma_20
+    high_low = [abs(historical_data[i].high_price - historical_data[i].low_price) for i in range(-14, 0)]
+    return {
+        "rsi": round(rsi, 2),
+        "macd": round(macd, 4),
+        "bollinger_upper": round(sma_20 + 2 * std_dev, 2),
+        "bollinger_lower": round(sma_20 - 2 * std_dev, 2),
+        "sma_20": round(sma_20, 2),
+        "ema_12": round(prices[-1], 2),
+        "atr": round(sum(high_low) / len(high_low), 2),
+        "momentum": round((current_price - prices[-10]) / prices[-10] * 100, 2),
+    }
+
+
+def reference_window_features(historical_data):
+    """The per-request volatility, support/resistance and risk computations"""
+    recent_prices = [d.close_price for d in historical_data[-20:]]
+    risk_prices = [d.close_price for d in historical_data[-30:]]
+    returns = [(risk_prices[i] - risk_prices[i-1]) / risk_prices[i-1] for i in range(1, len(risk_prices))]
+    peak, max_dd = risk_prices[0], 0
+    for price in risk_prices:
+        peak = max(peak, price)
+        max_dd = max(max_dd, (peak - price) / peak)
+    return {
+        "price_volatility": np.std(recent_prices) / np.mean(recent_prices),
+        "support_level": np.percentile([d.low_price for d in historical_data[-50:]], 25),
+        "resistance_level": np.percentile([d.high_price for d in historical_data[-50:]], 75),
+        "return_volatility": np.std(returns) * np.sqrt(252),
+        "value_at_risk_95": np.percentile(returns, 5) * 100,
+        "max_drawdown": max_dd,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--bars", type=int, default=1000)
+    args = parser.parse_args()
+
+    module = load_engine_module()
+    module.logger.disabled = True
+    engine = module.ai_engine
+
+    start = time.perf_counter()
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    for symbol in symbols:
+        engine.market_data[symbol] = engine._generate_sample_market_data(symbol, args.bars)
+    build_seconds = time.perf_counter() - start
+    print(f"built {args.symbols} x {args.bars} bars in {build_seconds:.1f}s "
+          f"({build_seconds / (args.symbols * args.bars) * 1e6:.1f} us per bar incl. sample generation)")
+
+    mismatches = 0
+    for symbol in symbols[:50]:
+        store = engine.market_data[symbol]
+        history = store.bars(args.bars)
+        for n in (20, 21, 57, args.bars - 1):
+            expected = reference_indicators(history[:n], history[n].close_price)
+            actual = history[n].technical_indicators
+            mismatches += sum(1 for name, value in expected.items() if abs(actual[name] - value) > 0.011)
+        expected = reference_window_features(history)
+        row = store.latest_features()
+        mismatches += sum(1 for name, value in expected.items() if not np.isclose(row[module.FEATURE[name]], value))
+    print(f"features vs per-request recomputation: {mismatches} mismatches")
+    if mismatches:
+        sys.exit(1)
+
+    volatility = module.PredictionType.VOLATILITY
+    histories = [engine.market_data[symbol].bars(args.bars) for symbol in symbols]  # The old List[MarketData] histories
+    start = time.perf_counter()
+    for history in histories:
+        reference_window_features(history)
+    reference_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for symbol in symbols:
+        await engine.generate_prediction(module.PredictionInput(
+            symbol=symbol, timeframe="1h", prediction_horizon=24, features=[],
+            model_type=module.ModelType.ENSEMBLE, confidence_threshold=0.5, prediction_type=volatility
+        ))
+    single_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await engine.generate_predictions(symbols, volatility)
+    batch_seconds = time.perf_counter() - start
+
+    print(f"old per-request feature recomputation alone: {reference_seconds / args.symbols * 1e6:.0f} us per symbol")
+    print(f"generate_prediction (one row read):         {single_seconds / args.symbols * 1e6:.0f} us per symbol")
+    print(f"generate_predictions batch:                 {batch_seconds / args.symbols * 1e6:.0f} us per symbol")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Fill Ingestion Benchmark
+Compares per-fill record_fill commits with group-committed ingest_fills on a file-backed SQLite DB
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add the parent of the project root so python_ai_services imports resolve
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root.parent))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from loguru import logger
+
+from python_ai_services.core.database import Base
+from python_ai_services.services.trade_history_service import TradeHistoryService
+from python_ai_services.models.trade_history_models import TradeFillData
+
+
+def make_fills(count: int, agents: int, tag: str):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        TradeFillData(
+            agent_id=f"bench_agent_{i % agents}",
+            fill_id=f"{tag}_{i}",
+            asset="BTC/USD",
+            side="buy" if (i // agents) % 2 == 0 else "sell",
+            quantity=0.1,
+            price=50000.0 + (i % 50),
+            fee=0.5,
+            timestamp=start + timedelta(milliseconds=i)
+        )
+        for i in range(count)
+    ]
+
+
+def make_service(db_path: str, **kwargs) -> TradeHistoryService:
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return TradeHistoryService(sessionmaker(autocommit=False, autoflush=False, bind=engine), **kwargs)
+
+
+async def bench_record_fill(db_path: str, fills) -> float:
+    service = make_service(db_path)
+    started = time.perf_counter()
+    for fill in fills:
+        await service.record_fill(fill)
+    return time.perf_counter() - started
+
+
+async def bench_ingest_fills(db_path: str, fills, producers: int, durability: str) -> float:
+    service = make_service(db_path, durability=durability)
+    chunks = [fills[i::producers] for i in range(producers)]
+
+    async def produce(chunk):
+        for fill in chunk: # Each producer hands over fills as they arrive, like a fill stream
+            await service.ingest_fills([fill])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(produce(chunk) for chunk in chunks))
+    await service.stop_fill_writer()
+    elapsed = time.perf_counter() - started
+    metrics = service.get_ingest_metrics()
+    print(f"    groups={metrics['groups_committed']} max_group={metrics['max_group_size']} failed={metrics['fills_failed']}")
+    return elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fills", type=int, default=5000)
+    parser.add_argument("--agents", type=int, default=4)
+    parser.add_argument("--producers", type=int, default=32)
+    args = parser.parse_args()
+    logger.remove()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = [
+            ("record_fill (commit per fill)", bench_record_fill(os.path.join(tmp, "single.db"), make_fills(args.fills, args.agents, "single"))),
+            ("ingest_fills durability=commit", bench_ingest_fills(os.path.join(tmp, "commit.db"), make_fills(args.fills, args.agents, "commit"), args.producers, "commit")),
+            ("ingest_fills durability=accept", bench_ingest_fills(os.path.join(tmp, "accept.db"), make_fills(args.fills, args.agents, "accept"), args.producers, "accept")),
+        ]
+        print(f"📊 Ingesting {args.fills} fills for {args.agents} agents ({args.producers} producers for ingest_fills)")
+        for name, run in runs:
+            elapsed = await run
+            print(f"  {name:34s} {elapsed:8.3f}s  {args.fills / elapsed:10.0f} fills/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Memory Index Benchmark
+Measures recall@k and query latency of the local agent memory index against a brute-force cosine scan
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the parent of the project root so python_ai_services imports resolve
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root.parent))
+
+from loguru import logger
+
+from python_ai_services.services.agent_memory_index import AgentMemoryIndex
+
+
+def make_embeddings(rng, count: int, dim: int, topics: int) -> np.ndarray:
+    """Clustered embeddings: memories about the same topic sit close together, like real recall data."""
+    centers = rng.normal(size=(topics, dim))
+    return (centers[rng.integers(0, topics, count)] + 0.5 * rng.normal(size=(count, dim))).astype(np.float32)
+
+
+def brute_force(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ vectors.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--memories", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="*", default=[4, 8, 16, 32, 64])
+    args = parser.parse_args()
+    logger.remove()
+
+    rng = np.random.default_rng(7)
+    vectors = make_embeddings(rng, args.memories, args.dim, topics=max(16, args.memories // 500))
+    queries = vectors[rng.integers(0, args.memories, args.queries)] + 0.3 * rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+    memories = [{"id": str(i), "content": "", "embedding": vector} for i, vector in enumerate(vectors)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = AgentMemoryIndex(tmp, args.dim)
+        started = time.perf_counter()
+        index.add(memories)
+        build = time.perf_counter() - started
+        print(f"📊 {args.memories} memories, dim {args.dim}, {len(index.centroids)} lists, built in {build:.2f}s")
+
+        normalized_vectors = np.asarray(index._vectors[:len(index)])
+        normalized_queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+        started = time.perf_counter()
+        for query in normalized_queries:
+            brute_force(normalized_vectors, query[None, :], args.top_k)
+        brute_ms = (time.perf_counter() - started) * 1000 / args.queries
+        truth = brute_force(normalized_vectors, normalized_queries, args.top_k)
+        print(f"  {'brute-force cosine':24s} {brute_ms:8.3f} ms/query  recall@{args.top_k} 1.000")
+
+        for nprobe in args.nprobe:
+            started = time.perf_counter()
+            results = [index.search(query[None, :], args.top_k, nprobe=nprobe)[0] for query in queries]
+            single_ms = (time.perf_counter() - started) * 1000 / args.queries
+            started = time.perf_counter()
+            index.search(queries, args.top_k, nprobe=nprobe)
+            batch_ms = (time.perf_counter() - started) * 1000 / args.queries
+            recall = np.mean([
+                len({row for row, _ in hits} & set(expected.tolist())) / args.top_k
+                for hits, expected in zip(results, truth)
+            ])
+            print(f"  {f'IVF nprobe={nprobe}':24s} {single_ms:8.3f} ms/query  recall@{args.top_k} {recall:.3f}  (batched {batch_ms:.3f} ms/query)")
+
+
+if __name__ == "__main__":
+    main()
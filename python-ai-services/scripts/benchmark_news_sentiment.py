@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+News Sentiment Benchmark
+Checks windowed news sentiment from the per-symbol article index against a full scan and measures analyze_news_sentiment latency as articles accumulate
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+ENGINE_PATH = project_root / "mcp_servers" / "sentiment_analysis_engine.py"
+
+
+def load_engine_module():
+    spec = importlib.util.spec_from_file_location("sentiment_analysis_engine", ENGINE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def full_scan(engine, symbol, lookback_hours, categories):
+    """Window aggregates recomputed from every stored article"""
+    cutoff = datetime.now() - timedelta(hours=lookback_hours)
+    articles = [
+        a for a in engine.news_articles.values()
+        if symbol in a.symbols and engine._parse_published_at(a.published_at) >= cutoff
+        and (not categories or a.category in categories)
+    ]
+    scores = [a.sentiment_score for a in articles]
+    analyst = [a.sentiment_score for a in articles if a.source_type.value == "analyst_report"]
+    return (
+        len(articles),
+        round(sum(scores) / len(scores), 3) if scores else 0.0,
+        round(sum(analyst) / len(analyst), 3) if analyst else 0.0,
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=100000)
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    # The engine module starts its monitoring task at import, so it is loaded inside the event loop
+    module = load_engine_module()
+    module.logger.disabled = True
+    engine = module.sentiment_engine
+    engine.monitoring_active = False
+
+    rng = random.Random(22)
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    templates = [(a.title, a.content) for a in engine.news_articles.values()]
+    categories = list(module.NewsCategory)
+    source_types = list(module.SourceType)
+    now = datetime.now()
+
+    start = time.perf_counter()
+    for i in range(args.articles):
+        title, content = rng.choice(templates)
+        if rng.random() < 0.5:
+            title = f"{title} ({rng.randrange(args.articles // 10)})"  # Half the articles are syndicated copies
+        # Mostly in publish order, with some late arrivals
+        age_hours = max(0.0, 48 * (1 - i / args.articles) + (rng.uniform(0, 6) if rng.random() < 0.05 else 0))
+        article = module.NewsArticle(
+            id=str(uuid.uuid4()),
+            title=title,
+            content=content,
+            source="bench",
+            source_type=rng.choice(source_types),
+            published_at=(now - timedelta(hours=age_hours)).isoformat(),
+            url=None,
+            author=None,
+            symbols=rng.sample(symbols, rng.randint(1, 3)),
+            category=rng.choice(categories)
+        )
+        await engine.ingest_news_article(article)
+    ingest_seconds = time.perf_counter() - start
+    print(f"ingested {args.articles} articles in {ingest_seconds:.1f}s "
+          f"({len(engine.sentiment_cache)} distinct texts analyzed)")
+
+    mismatches = 0
+    for symbol in symbols[:10]:
+        for hours in (1, 4, 24):
+            for category_filter in ([], [rng.choice(categories)]):
+                request = module.NewsAnalysisRequest(symbol=symbol, lookback_hours=hours, categories=category_filter)
+                summary = await engine.analyze_news_sentiment(request)
+                expected = full_scan(engine, symbol, hours, category_filter)
+                # Means may differ in the last rounded digit: the index sums exact thousandths
+                if (summary.news_count != expected[0] or abs(summary.overall_sentiment - expected[1]) > 0.0011
+                        or abs(summary.analyst_sentiment - expected[2]) > 0.0011):
+                    mismatches += 1
+                    print(f"mismatch {symbol} {hours}h {category_filter}: {summary.news_count, summary.overall_sentiment, summary.analyst_sentiment} != {expected}")
+    print(f"index vs full scan: {mismatches} mismatches")
+    if mismatches:
+        sys.exit(1)
+
+    for hours in (1, 4, 24):
+        start = time.perf_counter()
+        for _ in range(args.queries):
+            await engine.analyze_news_sentiment(module.NewsAnalysisRequest(symbol=rng.choice(symbols), lookback_hours=hours))
+        elapsed = time.perf_counter() - start
+        print(f"{hours:>2}h window: {elapsed / args.queries * 1e6:.0f} us per analyze_news_sentiment")
+
+    start = time.perf_counter()
+    full_scan(engine, symbols[0], 24, [])
+    print(f"full scan of {len(engine.news_articles)} articles (old filter step alone): {(time.perf_counter() - start) * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Sentiment Scorer Benchmark
+Checks the compiled lexicon scorer against the original scoring function on a golden corpus and measures headline throughput
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+ENGINE_PATH = project_root / "mcp_servers" / "sentiment_analysis_engine.py"
+
+
+def reference_score(engine, text):
+    """The lexicon scorer as it was before compilation: regex pass, negation split() pass, substring scans"""
+    words = re.findall(r'\b\w+\b', text.lower())
+    total_score = 0
+    word_count = 0
+
+    for word in words:
+        if word in engine.positive_terms:
+            total_score += engine.positive_terms[word]
+            word_count += 1
+        elif word in engine.negative_terms:
+            total_score += engine.negative_terms[word]
+            word_count += 1
+
+    negation_words = ['not', 'no', 'never', 'none', 'neither', 'nor']
+    text_words = text.split()
+
+    for i, word in enumerate(text_words):
+        if word.lower() in negation_words and i < len(text_words) - 1:
+            next_word = text_words[i + 1].lower()
+            if next_word in engine.positive_terms:
+                total_score -= engine.positive_terms[next_word] * 2
+            elif next_word in engine.negative_terms:
+                total_score -= engine.negative_terms[next_word] * 2
+
+    if word_count > 0:
+        sentiment_score = total_score / word_count
+    else:
+        sentiment_score = 0.0
+
+    adjusted_score = sentiment_score
+    if any(term in text for term in ['earnings', 'revenue', 'profit', 'loss']):
+        adjusted_score *= 1.2
+    movement_terms = ['surge', 'plunge', 'rally', 'crash', 'soar', 'tumble']
+    if any(term in text for term in movement_terms):
+        adjusted_score *= 1.3
+    if any(term in text for term in ['analyst', 'rating', 'recommendation']):
+        adjusted_score *= 1.1
+    uncertainty_terms = ['may', 'might', 'could', 'possibly', 'uncertain']
+    uncertainty_count = sum(1 for term in uncertainty_terms if term in text)
+    if uncertainty_count > 0:
+        adjusted_score *= (1 - uncertainty_count * 0.1)
+    urgent_terms = ['breaking', 'urgent', 'immediate', 'now', 'today']
+    if any(term in text for term in urgent_terms):
+        adjusted_score *= 1.15
+
+    return max(-1.0, min(1.0, adjusted_score))
+
+
+def golden_corpus(engine, size, seed):
+    """Sample articles plus generated headlines mixing lexicon terms, negations, punctuation, case and context substrings"""
+    corpus = []
+    for article in engine.news_articles.values():
+        corpus.append(f"{article.title} {article.content}".lower())
+        corpus.append(f"{article.title} {article.content}")
+
+    lexicon = list(engine.positive_terms) + list(engine.negative_terms)
+    fillers = ["the", "company", "shares", "quarter", "stock", "market", "investors", "guidance", "known",
+               "mayor", "glossy", "ratings", "snow", "analysts", "NVDA", "Q3", "$1.2B", "12%", "FY2024"]
+    context = ["earnings", "revenue", "surge", "tumble", "analyst", "may", "could", "possibly", "breaking", "today"]
+    negations = ["not", "no", "never", "none", "neither", "nor", "Not", "NO"]
+    rng = random.Random(seed)
+    while len(corpus) < size:
+        words = []
+        for _ in range(rng.randint(0, 24)):
+            pick = rng.random()
+            if pick < 0.3:
+                word = rng.choice(lexicon)
+            elif pick < 0.45:
+                word = rng.choice(negations)
+            elif pick < 0.6:
+                word = rng.choice(context)
+            else:
+                word = rng.choice(fillers)
+            style = rng.random()
+            if style < 0.1:
+                word = word.upper()
+            elif style < 0.2:
+                word = word.capitalize()
+            elif style < 0.3:
+                word += rng.choice([",", ".", "!", ":", "'s"])
+            elif style < 0.35:
+                word = f"{word}/{rng.choice(lexicon)}"
+            elif style < 0.4:
+                word = f"({word})"
+            words.append(word)
+        corpus.append(rng.choice([" ", "  ", "\t"]).join(words))
+    return corpus
+
+
+def load_engine_module():
+    spec = importlib.util.spec_from_file_location("sentiment_analysis_engine", ENGINE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", type=int, default=50000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    # The engine module starts its monitoring task at import, so it is loaded inside the event loop
+    module = load_engine_module()
+    module.logger.disabled = True
+    engine = module.sentiment_engine
+    engine.monitoring_active = False
+
+    corpus = golden_corpus(engine, args.corpus, seed=21)
+    expected = [reference_score(engine, text) for text in corpus]
+    compiled = [await engine._calculate_sentiment_score(text) for text in corpus]
+    batched = await engine.calculate_sentiment_scores(corpus)
+    mismatches = sum(1 for a, b, c in zip(expected, compiled, batched) if not (a == b == c))
+    print(f"golden corpus: {len(corpus)} texts, {mismatches} mismatches")
+    if mismatches:
+        sys.exit(1)
+
+    def best_of(fn):
+        best = float("inf")
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    headlines = corpus[len(engine.news_articles) * 2:]
+    reference_seconds = best_of(lambda: [reference_score(engine, text) for text in headlines])
+    scorer = engine.lexicon_scorer
+    compiled_seconds = best_of(lambda: [scorer.score(text) for text in headlines])
+    batch_seconds = best_of(lambda: scorer.score_batch(headlines))
+
+    print(f"reference: {len(headlines) / reference_seconds:,.0f} texts/s")
+    print(f"compiled:  {len(headlines) / compiled_seconds:,.0f} texts/s ({reference_seconds / compiled_seconds:.1f}x)")
+    print(f"batch:     {len(headlines) / batch_seconds:,.0f} texts/s ({reference_seconds / batch_seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
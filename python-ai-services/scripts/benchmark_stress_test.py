@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Stress Test Benchmark
+Checks scenario-matrix stress P&L against the per-scenario, per-position loop it replaces and measures run_stress_test latency, including re-evaluation after a single fill
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+project_root = Path(__file__).resolve().parent.parent
+ENGINE_PATH = project_root / "mcp_servers" / "advanced_risk_management.py"
+
+
+def load_engine_module():
+    spec = importlib.util.spec_from_file_location("advanced_risk_management", ENGINE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def reference_contributions(portfolio, scenario):
+    """Per-position stress contributions as the scenario loop computed them, extended with the delta-gamma term"""
+    contributions = {}
+    for symbol, position in portfolio["positions"].items():
+        factor = position.get("underlying", symbol)
+        shock = 0.0
+        if factor in scenario.market_shocks:
+            shock = scenario.market_shocks[factor]
+        elif "all" in scenario.market_shocks:
+            shock = scenario.market_shocks["all"]
+        vol_multiplier = scenario.volatility_multipliers.get(factor, scenario.volatility_multipliers.get("all", 1.0))
+        if vol_multiplier > 1:
+            shock *= vol_multiplier
+        liquidity_constraint = scenario.liquidity_constraints.get(factor, scenario.liquidity_constraints.get("all", 0.0))
+        if liquidity_constraint > 0:
+            shock *= (1 + liquidity_constraint)
+        if "gamma" in position:
+            underlying_price = position["underlying_price"]
+            contributions[symbol] = position["quantity"] * (position["delta"] * underlying_price * shock +
+                                                            0.5 * position["gamma"] * underlying_price ** 2 * shock ** 2)
+        else:
+            position_value = position["quantity"] * position["price"]
+            contributions[symbol] = position_value * (1 + shock) - position_value
+    return contributions
+
+
+def generate_scenarios(module, symbols, count, rng):
+    scenarios = {}
+    for i in range(count):
+        named = rng.sample(symbols, rng.randint(0, 200))
+        scenario = module.StressTestScenario(
+            id=str(uuid.uuid4()),
+            name=f"Generated {i}",
+            description="Generated benchmark scenario",
+            type=module.StressTestType.HYPOTHETICAL_SCENARIO,
+            parameters={},
+            market_shocks={**({"all": rng.uniform(-0.3, 0.05)} if rng.random() < 0.8 else {}),
+                           **{symbol: rng.uniform(-0.5, 0.2) for symbol in named}},
+            correlation_changes={},
+            volatility_multipliers={"all": rng.choice([1.0, 1.5, 2.0]),
+                                    **{symbol: rng.uniform(0.5, 3.0) for symbol in named[:20]}},
+            liquidity_constraints={"all": rng.choice([0.0, 0.1, 0.3]),
+                                   **{symbol: rng.uniform(0.0, 0.5) for symbol in named[20:40]}}
+        )
+        scenarios[scenario.id] = scenario
+    return scenarios
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenarios", type=int, default=300)
+    parser.add_argument("--positions", type=int, default=3000)
+    parser.add_argument("--fills", type=int, default=20)
+    args = parser.parse_args()
+
+    # The engine starts its monitoring tasks at import, so it is loaded inside the event loop
+    module = load_engine_module()
+    module.logger.disabled = True
+    engine = module.risk_manager
+    engine.monitoring_active = False
+    rng = random.Random(25)
+
+    symbols = [f"SYM{i}" for i in range(args.positions)]
+    positions = {}
+    for symbol in symbols:
+        positions[symbol] = {"quantity": rng.randint(10, 1000), "price": rng.uniform(10, 500)}
+    for i in range(args.positions // 10):  # Options on some of the underlyings
+        underlying = rng.choice(symbols)
+        positions[f"{underlying}_OPT{i}"] = {
+            "quantity": rng.randint(-50, 50) * 100, "price": rng.uniform(1, 20), "underlying": underlying,
+            "underlying_price": positions[underlying]["price"], "delta": rng.uniform(-1, 1), "gamma": rng.uniform(0, 0.05)
+        }
+    engine.portfolio_data["bench"] = {"positions": positions, "cash": 1_000_000, "benchmark": "SPY"}
+    engine.stress_scenarios.update(generate_scenarios(module, symbols, args.scenarios, rng))
+    scenario_ids = list(engine.stress_scenarios)
+    request = module.StressTestRequest(portfolio_id="bench", scenario_ids=scenario_ids)
+    full_request = module.StressTestRequest(portfolio_id="bench", scenario_ids=scenario_ids, position_detail_limit=None)
+
+    async def check():
+        mismatches = 0
+        results = await engine.run_stress_test(full_request)
+        scenarios = [engine.stress_scenarios[i] for i in scenario_ids] + engine.correlation_breakdown_scenarios
+        for scenario, result in zip(scenarios, results):
+            expected = reference_contributions(engine.portfolio_data["bench"], scenario)
+            actual = result.component_contributions
+            expected_total = sum(expected.values())
+            if (actual.keys() != expected.keys()
+                    or not np.allclose([actual[s] for s in expected], list(expected.values()), rtol=1e-9, atol=1e-6)
+                    or not np.isclose(result.stressed_portfolio_value - result.base_portfolio_value, expected_total,
+                                      rtol=1e-9, atol=1e-3)):
+                mismatches += 1
+        return mismatches
+
+    def fill():
+        symbol = rng.choice(list(positions))
+        positions[symbol]["quantity"] += rng.randint(-20, 20)
+
+    mismatches = await check()
+    for _ in range(3):
+        fill()
+        mismatches += await check()
+    positions[f"NEW{len(positions)}"] = {"quantity": 10, "price": 50.0}  # A new position on a new risk factor
+    mismatches += await check()
+    del positions[symbols[0]]
+    mismatches += await check()
+    print(f"scenario matrix vs per-position loop: {mismatches} mismatches "
+          f"({len(scenario_ids) + 2} scenarios x {len(positions)} positions)")
+    if mismatches:
+        sys.exit(1)
+
+    scenarios = [engine.stress_scenarios[i] for i in scenario_ids] + engine.correlation_breakdown_scenarios
+    start = time.perf_counter()
+    for scenario in scenarios:
+        reference_contributions(engine.portfolio_data["bench"], scenario)
+    reference_seconds = time.perf_counter() - start
+
+    engine.stress_books.clear()
+    start = time.perf_counter()
+    book = module.StressTestBook()
+    book.sync_positions(positions)
+    rows = book.scenario_rows(scenarios)
+    book.pnl[rows]
+    cold_seconds = time.perf_counter() - start
+
+    engine.stress_books["bench"] = book
+    incremental_seconds = 0.0
+    for _ in range(args.fills):
+        fill()
+        start = time.perf_counter()
+        book.sync_positions(positions)
+        rows = book.scenario_rows(scenarios)
+        book.pnl[rows]
+        incremental_seconds += time.perf_counter() - start
+
+    run_seconds = {}
+    for name, timed_request in (("top 50 positions", request), ("every position", full_request)):
+        start = time.perf_counter()
+        for _ in range(args.fills):
+            fill()
+            await engine.run_stress_test(timed_request)
+        run_seconds[name] = time.perf_counter() - start
+
+    print(f"old scenario x position loop (P&L only):       {reference_seconds * 1e3:.0f} ms")
+    print(f"scenario matrix, cold (compile + one matmul):  {cold_seconds * 1e3:.0f} ms")
+    print(f"scenario matrix after one fill (P&L only):     {incremental_seconds / args.fills * 1e3:.1f} ms")
+    for name, seconds in run_seconds.items():
+        print(f"run_stress_test after one fill, {name + ':':18}{seconds / args.fills * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
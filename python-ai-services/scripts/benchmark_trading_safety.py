@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Trading Safety Benchmark
+Measures per-order validation and check-and-reserve cost with thousands of active agents
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add the parent of the project root so python_ai_services imports resolve
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root.parent))
+
+from loguru import logger
+
+from python_ai_services.services.trading_safety_service import TradingSafetyService
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--agents", type=int, default=5000)
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--orders", type=int, default=200000)
+    args = parser.parse_args()
+    logger.remove()
+
+    safety = TradingSafetyService()
+    safety.trading_limits.max_daily_trades = 10**9
+    safety.trading_limits.max_daily_volume_usd = float("inf")
+    safety.trading_limits.max_symbol_daily_volume_usd = float("inf")
+    safety.trading_limits.max_global_daily_trades = 10**12
+    safety.trading_limits.max_global_daily_volume_usd = float("inf")
+    safety.trading_limits.max_concurrent_positions = 10**9
+    rng = random.Random(5)
+    orders = [
+        (f"agent_{rng.randrange(args.agents)}", f"SYM{rng.randrange(args.symbols)}", rng.uniform(0.1, 2.0), rng.uniform(10, 1000))
+        for _ in range(args.orders)
+    ]
+    for i in range(args.agents):  # Warm every agent's counters
+        await safety.record_trade_execution(f"agent_{i}", "SYM0", 1.0, 100.0, "sell", success=True)
+
+    started = time.perf_counter()
+    for agent_id, symbol, quantity, price in orders:
+        await safety.validate_trade_safety(agent_id, symbol, quantity, price)
+    validate_us = (time.perf_counter() - started) * 1e6 / args.orders
+
+    started = time.perf_counter()
+    for agent_id, symbol, quantity, price in orders:
+        reservation, _ = safety.reserve_trade(agent_id, symbol, quantity, price, side="sell")
+        safety.release_reservation(reservation)
+    reserve_us = (time.perf_counter() - started) * 1e6 / args.orders
+
+    print(f"📊 {args.orders} orders across {args.agents} agents and {args.symbols} symbols")
+    print(f"  validate_trade_safety    {validate_us:6.2f} µs/order")
+    print(f"  reserve + release        {reserve_us:6.2f} µs/order")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
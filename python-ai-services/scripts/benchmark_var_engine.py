@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+VaR Engine Benchmark
+Checks the portfolio returns matrix VaR suite against the per-method calculations it replaces and measures multi-method VaR latency as bars arrive
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from scipy import stats
+
+project_root = Path(__file__).resolve().parent.parent
+ENGINE_PATH = project_root / "mcp_servers" / "advanced_risk_management.py"
+
+
+def load_engine_module():
+    spec = importlib.util.spec_from_file_location("advanced_risk_management", ENGINE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def reference_portfolio_returns(engine, portfolio_id, lookback_days):
+    """Weighted sum of each position's DataFrame tail, as computed per request before"""
+    positions = engine.portfolio_data[portfolio_id]["positions"]
+    all_returns, weights = {}, {}
+    for symbol, position in positions.items():
+        if symbol in engine.market_data:
+            all_returns[symbol] = engine.market_data[symbol].tail(lookback_days)['returns'].values
+            weights[symbol] = position["quantity"] * position["price"]
+    total_value = sum(weights.values())
+    min_length = min(len(returns) for returns in all_returns.values())
+    portfolio_returns = np.zeros(min_length)
+    for symbol, weight in weights.items():
+        portfolio_returns += weight / total_value * all_returns[symbol][-min_length:]
+    return portfolio_returns
+
+
+def reference_var(returns, confidence_level, simulations=10000):
+    """Historical, parametric, Monte Carlo and Cornish-Fisher VaR, expected shortfall and violations, one method at a time"""
+    quantile = 1 - confidence_level
+    historical = np.percentile(returns, quantile * 100)
+    mean, std = np.mean(returns), np.std(returns)
+    z = stats.norm.ppf(quantile)
+    parametric = mean + z * std
+    monte_carlo = np.percentile(np.random.normal(mean, std, simulations), quantile * 100)
+    skewness, excess_kurtosis = stats.skew(returns), stats.kurtosis(returns)
+    cf_z = (z + (z**2 - 1) * skewness / 6 + (z**3 - 3*z) * excess_kurtosis / 24 - (2*z**3 - 5*z) * skewness**2 / 36)
+    tail = returns[returns <= historical]
+    return {
+        "historical": historical,
+        "parametric": parametric,
+        "monte_carlo": monte_carlo,
+        "cornish_fisher": mean + cf_z * std,
+        "expected_shortfall": np.mean(tail) if len(tail) else historical,
+        "violations": int(np.sum(returns <= historical)),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bars", type=int, default=200)
+    parser.add_argument("--lookback", type=int, default=252)
+    args = parser.parse_args()
+
+    # The engine starts its monitoring tasks at import, so it is loaded inside the event loop
+    module = load_engine_module()
+    module.logger.disabled = True
+    engine = module.risk_manager
+    engine.monitoring_active = False
+    methods = ["historical", "parametric", "monte_carlo", "cornish_fisher"]
+    confidence_levels = [0.95, 0.99]
+    rng = np.random.default_rng(24)
+
+    def new_bar():
+        return {symbol: float(data['price'].iloc[-1]) * (1 + rng.normal(0.0005, 0.02))
+                for symbol, data in engine.market_data.items()}
+
+    mismatches = 0
+    for step in range(3):
+        for portfolio_id in engine.portfolio_data:
+            expected_returns = reference_portfolio_returns(engine, portfolio_id, args.lookback)
+            actual_returns = await engine._calculate_portfolio_returns(portfolio_id, args.lookback)
+            mismatches += int(not np.allclose(actual_returns, expected_returns, rtol=1e-12, atol=1e-15))
+
+            request = module.VaRSuiteRequest(portfolio_id=portfolio_id, confidence_levels=confidence_levels,
+                                             lookback_days=args.lookback)
+            calculations = await engine.calculate_var_suite(request)
+            value = await engine._calculate_portfolio_value(portfolio_id)
+            for confidence_level in confidence_levels:
+                expected = reference_var(expected_returns, confidence_level)
+                for calculation in calculations:
+                    if calculation.confidence_level != confidence_level:
+                        continue
+                    method = calculation.method.value
+                    # Monte Carlo draws differ (correlated asset draws now), so it is checked to sampling error
+                    tolerance = dict(rtol=0.1) if method == "monte_carlo" else dict(rtol=1e-9)
+                    ok = np.isclose(calculation.var_percentage, abs(expected[method]) * 100, **tolerance)
+                    ok &= np.isclose(calculation.expected_shortfall, expected["expected_shortfall"] * value, rtol=1e-9)
+                    if method == "historical":
+                        ok &= calculation.backtesting_results["violations"] == expected["violations"]
+                    if not ok:
+                        mismatches += 1
+                        print(f"mismatch {portfolio_id} {method} {confidence_level}: {calculation.var_percentage} "
+                              f"vs {abs(expected[method]) * 100}")
+        engine.append_market_bar(new_bar())
+        # Weight changes must be picked up without a stale cache
+        engine.portfolio_data["balanced"]["positions"]["AAPL"]["quantity"] += 100 * (step + 1)
+    print(f"suite vs per-method calculations: {mismatches} mismatches")
+    if mismatches:
+        sys.exit(1)
+
+    portfolios = list(engine.portfolio_data)
+
+    start = time.perf_counter()
+    for _ in range(args.bars):
+        for portfolio_id in portfolios:
+            returns = reference_portfolio_returns(engine, portfolio_id, args.lookback)
+            for confidence_level in confidence_levels:
+                reference_var(returns, confidence_level)
+    reference_seconds = time.perf_counter() - start
+
+    # Each suite call follows a fresh bar, so nothing is served from the per-bar cache
+    append_seconds = suite_seconds = 0.0
+    for _ in range(args.bars):
+        bar = new_bar()
+        start = time.perf_counter()
+        engine.append_market_bar(bar)
+        append_seconds += time.perf_counter() - start
+        start = time.perf_counter()
+        for portfolio_id in portfolios:
+            engine.returns_matrices[portfolio_id].var_suite(args.lookback, confidence_levels)
+        suite_seconds += time.perf_counter() - start
+
+    calls = args.bars * len(portfolios)
+    print(f"old per-method recomputation ({len(methods)} methods x {len(confidence_levels)} levels): "
+          f"{reference_seconds / calls * 1e3:.2f} ms per portfolio")
+    print(f"var_suite after a new bar (same outputs):                "
+          f"{suite_seconds / calls * 1e3:.2f} ms per portfolio")
+    print(f"append_market_bar incl. DataFrame rows:                  "
+          f"{append_seconds / args.bars * 1e3:.2f} ms per bar")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,18 +4,26 @@ Unified coordination system for CrewAI and AutoGen agent frameworks
 """
 import asyncio
 import json
+import time
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any, Literal, Union
+from typing import Dict, List, Optional, Any, Literal, Union, Tuple, Callable
 from loguru import logger
 from pydantic import BaseModel, Field
 from enum import Enum
 import uuid
 
-# Import agent frameworks
-from ..agents.crew_analysis import run_trading_analysis_crew
-from ..agents.autogen_setup import run_trading_analysis_autogen, get_autogen_system_status
-from ..services.agent_trading_bridge import AgentTradingBridge, TradingSignal
-from ..services.trading_safety_service import TradingSafetyService
+# Import agent frameworks (optional: the coordination layer runs without them)
+try:
+    from ..agents.crew_analysis import run_trading_analysis_crew
+except ImportError:
+    run_trading_analysis_crew = None
+try:
+    from ..agents.autogen_setup import run_trading_analysis_autogen, get_autogen_system_status
+except ImportError:
+    run_trading_analysis_autogen = None
+    get_autogen_system_status = None
+from ..services.agent_trading_bridge import AgentTradingBridge, TradingSignal, ExecutionResult
+from ..services.trading_safety_service import TradingSafetyService, TradeReservation
 from ..services.agent_performance_service import AgentPerformanceService
 
 class FrameworkType(str, Enum):
@@ -71,7 +79,9 @@ class AgentCoordinationService:
         self,
         trading_bridge: AgentTradingBridge,
         safety_service: TradingSafetyService,
-        performance_service: AgentPerformanceService
+        performance_service: AgentPerformanceService,
+        open_reservation_ttl_seconds: float = 300.0,
+        clock: Callable[[], float] = time.monotonic
     ):
         self.trading_bridge = trading_bridge
         self.safety_service = safety_service
@@ -88,6 +98,12 @@ class AgentCoordinationService:
         self.completed_tasks: List[CoordinationTask] = []
         self.analysis_cache: Dict[str, AnalysisResult] = {}
         
+        # Safety reservations of orders still pending or executing, keyed by execution_id, with their
+        # expiry time. Insertion order is expiry order, since every reservation gets the same TTL.
+        self.open_reservations: Dict[str, Tuple[TradingSignal, TradeReservation, float]] = {}
+        self.open_reservation_ttl_seconds = open_reservation_ttl_seconds
+        self._clock = clock
+        
         # Coordination settings
         self.default_timeout = 120
         self.consensus_threshold = 0.7  # 70% agreement for consensus
@@ -103,6 +119,8 @@ class AgentCoordinationService:
         
         # Check AutoGen
         try:
+            if get_autogen_system_status is None:
+                raise ImportError("AutoGen framework is not installed")
             autogen_status = get_autogen_system_status()
             self.framework_status[FrameworkType.AUTOGEN] = {
                 "status": "online" if autogen_status.get("system_status") == "online" else "offline",
@@ -118,6 +136,8 @@ class AgentCoordinationService:
         
         # Check CrewAI (basic availability check)
         try:
+            if run_trading_analysis_crew is None:
+                raise ImportError("CrewAI framework is not installed")
             # This is a simple check - in production you might ping the crew services
             self.framework_status[FrameworkType.CREWAI] = {
                 "status": "online",  # Assume online if import works
@@ -199,6 +219,8 @@ class AgentCoordinationService:
         """Run analysis using CrewAI framework"""
         
         try:
+            if run_trading_analysis_crew is None:
+                raise ImportError("CrewAI framework is not installed")
             # Run CrewAI analysis
             crew_result = await run_trading_analysis_crew(
                 symbol=request.symbol,
@@ -244,6 +266,8 @@ class AgentCoordinationService:
         """Run analysis using AutoGen framework"""
         
         try:
+            if run_trading_analysis_autogen is None:
+                raise ImportError("AutoGen framework is not installed")
             # Run AutoGen analysis
             autogen_result = await run_trading_analysis_autogen(
                 symbol=request.symbol,
@@ -446,15 +470,18 @@ class AgentCoordinationService:
     async def execute_trading_signal(self, signal: TradingSignal) -> Dict[str, Any]:
         """Execute a trading signal through the coordination layer"""
         
-        # Safety validation
-        is_safe, rejection_reason = await self.safety_service.validate_trade_safety(
+        self._expire_open_reservations()
+        
+        # Safety validation, holding the trade's limit capacity until the execution is recorded
+        reservation, rejection_reason = self.safety_service.reserve_trade(
             agent_id=signal.agent_id,
             symbol=signal.symbol,
             quantity=signal.quantity,
-            price=signal.price_target
+            price=signal.price_target,
+            side=signal.action
         )
         
-        if not is_safe:
+        if reservation is None:
             logger.warning(f"Trading signal rejected by safety service: {rejection_reason}")
             return {
                 "success": False,
@@ -466,19 +493,13 @@ class AgentCoordinationService:
         try:
             execution_result = await self.trading_bridge.process_agent_signal(signal)
             
-            # Record trade with performance service
-            if execution_result.status in ["filled", "partially_filled"]:
-                await self.performance_service.record_trade_entry(
-                    trade_id=execution_result.execution_id,
-                    agent_id=signal.agent_id,
-                    symbol=signal.symbol,
-                    side=signal.action,
-                    quantity=signal.quantity,
-                    entry_price=execution_result.average_fill_price or signal.price_target or 0.0,
-                    strategy=signal.strategy,
-                    confidence=signal.confidence,
-                    metadata=signal.metadata
-                )
+            if execution_result.status in ["pending", "executing"]:
+                # The order is live: its capacity stays held until record_execution_update settles it
+                # or the reservation expires
+                expires_at = self._clock() + self.open_reservation_ttl_seconds
+                self.open_reservations[self._reservation_key(execution_result)] = (signal, reservation, expires_at)
+            else:
+                await self._settle_execution(signal, execution_result, reservation)
             
             return {
                 "success": True,
@@ -488,12 +509,77 @@ class AgentCoordinationService:
             
         except Exception as e:
             logger.error(f"Trading signal execution failed: {e}", exc_info=True)
+            self.safety_service.release_reservation(reservation)
             return {
                 "success": False,
                 "signal_id": signal.signal_id,
                 "error": str(e)
             }
     
+    async def record_execution_update(self, execution_result: ExecutionResult) -> bool:
+        """
+        Settle the reservation of an order that was still pending or executing when it was submitted,
+        once its fill, failure or rejection is reported. Returns False if no open order matches
+        (including one whose reservation already expired).
+        """
+        self._expire_open_reservations()
+        key = self._reservation_key(execution_result)
+        if execution_result.status in ["pending", "executing"]:
+            return key in self.open_reservations
+        open_order = self.open_reservations.pop(key, None)
+        if open_order is None:
+            logger.warning(f"No open reservation for execution {execution_result.execution_id}; update ignored")
+            return False
+        signal, reservation, _ = open_order
+        await self._settle_execution(signal, execution_result, reservation)
+        return True
+    
+    def _expire_open_reservations(self):
+        """Release reservations of open orders that were not settled within open_reservation_ttl_seconds"""
+        now = self._clock()
+        while self.open_reservations:
+            key, (signal, reservation, expires_at) = next(iter(self.open_reservations.items()))
+            if expires_at > now:
+                break
+            del self.open_reservations[key]
+            self.safety_service.release_reservation(reservation)
+            logger.warning(f"Reservation for execution {key} ({signal.action} {signal.quantity} {signal.symbol}) expired without a fill or failure report; released")
+    
+    @staticmethod
+    def _reservation_key(execution_result: ExecutionResult) -> str:
+        return execution_result.execution_id or execution_result.signal_id
+    
+    async def _settle_execution(self, signal: TradingSignal, execution_result: ExecutionResult, reservation: TradeReservation):
+        """Record a finished execution with the safety and performance services"""
+        if execution_result.status == "rejected":
+            self.safety_service.release_reservation(reservation)
+            return
+        
+        await self.safety_service.record_trade_execution(
+            agent_id=signal.agent_id,
+            symbol=signal.symbol,
+            quantity=execution_result.total_quantity_filled or signal.quantity,
+            price=execution_result.average_fill_price or signal.price_target or 0.0,
+            side=signal.action,
+            success=execution_result.status != "failed",
+            error_message=execution_result.message if execution_result.status == "failed" else None,
+            reservation=reservation
+        )
+        
+        # Record trade with performance service
+        if execution_result.status in ["filled", "partially_filled"]:
+            await self.performance_service.record_trade_entry(
+                trade_id=execution_result.execution_id,
+                agent_id=signal.agent_id,
+                symbol=signal.symbol,
+                side=signal.action,
+                quantity=signal.quantity,
+                entry_price=execution_result.average_fill_price or signal.price_target or 0.0,
+                strategy=signal.strategy,
+                confidence=signal.confidence,
+                metadata=signal.metadata
+            )
+    
     def get_coordination_status(self) -> Dict[str, Any]:
         """Get comprehensive coordination service status"""
         return {
@@ -502,6 +588,7 @@ class AgentCoordinationService:
             "active_tasks": len(self.active_tasks),
             "completed_tasks": len(self.completed_tasks),
             "cached_analyses": len(self.analysis_cache),
+            "open_reservations": len(self.open_reservations),
             "configuration": {
                 "default_timeout": self.default_timeout,
                 "consensus_threshold": self.consensus_threshold,
@@ -0,0 +1,402 @@
+"""
+Agent Memory Index
+
+In-process approximate nearest-neighbour index over agent memory embeddings, so memory recall does
+not need a Supabase RPC round-trip per decision cycle. Each agent gets an IVF (inverted file) index:
+embeddings are L2-normalized into a memory-mapped .npy file, assigned to k-means centroids, and a
+query scans only the lists of its nprobe nearest centroids. Small indexes are searched exactly.
+An index on disk records the latest created_at it has seen from Supabase, so a restarted process
+only fetches newer memories before serving searches from it.
+"""
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+_INITIAL_CAPACITY = 1024
+_ASSIGN_CHUNK = 8192
+_SYNC_OVERLAP = timedelta(seconds=60) # Rows can commit out of created_at order; catch-ups re-read this much
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32, copy=False)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores, best first."""
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+class AgentMemoryIndex:
+    """
+    IVF index for one agent's memories, persisted under its own directory.
+
+    Files: vectors.npy and assignments.npy (memory-mapped, grown by doubling), centroids.npy,
+    records.jsonl (one line per memory, line i <-> vector row i) and index.json (manifest).
+    Until min_train_size memories are indexed, search is an exact scan.
+    """
+
+    def __init__(self, directory: str, dim: int, min_train_size: int = 2048, nprobe: Optional[int] = None):
+        self.directory = directory
+        self.dim = dim
+        self.min_train_size = min_train_size
+        self.default_nprobe = nprobe
+        self.hydrated = False # True once the index holds every memory of the agent created up to synced_through
+        self.synced_through: Optional[str] = None # High-water mark: latest created_at listed from Supabase
+        self.warm = False # Caught up with Supabase since this process opened the index (not persisted)
+        self.synced_at: Optional[float] = None # time.monotonic() of the last catch-up
+
+        self.count = 0
+        self.records: List[Dict[str, Any]] = []
+        self._ids: Dict[str, int] = {}
+        self._vectors: Optional[np.ndarray] = None
+        self._assignments: Optional[np.ndarray] = None
+        self.centroids: Optional[np.ndarray] = None
+        self.trained_count = 0
+        self._lists: List[np.ndarray] = []
+        self._list_tails: List[List[int]] = []
+        # Catch-ups add to the index on a worker thread while the event loop searches it
+        self.lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+
+    # --- Persistence ---
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _open_arrays(self, capacity: int) -> None:
+        vectors = np.lib.format.open_memmap(self._path("vectors.npy.tmp"), mode="w+", dtype=np.float32, shape=(capacity, self.dim))
+        assignments = np.lib.format.open_memmap(self._path("assignments.npy.tmp"), mode="w+", dtype=np.int32, shape=(capacity,))
+        if self._vectors is not None:
+            vectors[:self.count] = self._vectors[:self.count]
+            assignments[:self.count] = self._assignments[:self.count]
+            self._vectors.flush()
+            del self._vectors, self._assignments
+        vectors.flush()
+        assignments.flush()
+        del vectors, assignments
+        os.replace(self._path("vectors.npy.tmp"), self._path("vectors.npy"))
+        os.replace(self._path("assignments.npy.tmp"), self._path("assignments.npy"))
+        self._vectors = np.load(self._path("vectors.npy"), mmap_mode="r+")
+        self._assignments = np.load(self._path("assignments.npy"), mmap_mode="r+")
+
+    def _write_manifest(self) -> None:
+        manifest = {"dim": self.dim, "trained_count": self.trained_count, "hydrated": self.hydrated, "synced_through": self.synced_through}
+        tmp = self._path("index.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, self._path("index.json"))
+
+    def flush(self) -> None:
+        with self.lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._assignments.flush()
+        self._write_manifest()
+
+    @classmethod
+    def load(cls, directory: str, min_train_size: int = 2048, nprobe: Optional[int] = None) -> Optional["AgentMemoryIndex"]:
+        """Opens an index saved under directory, or returns None if there is none."""
+        manifest_path = os.path.join(directory, "index.json")
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        index = cls(directory, manifest["dim"], min_train_size=min_train_size, nprobe=nprobe)
+        index.hydrated = manifest.get("hydrated", False)
+        index.synced_through = manifest.get("synced_through")
+
+        records_path = index._path("records.jsonl")
+        if os.path.exists(records_path) and os.path.exists(index._path("vectors.npy")):
+            index._vectors = np.load(index._path("vectors.npy"), mmap_mode="r+")
+            index._assignments = np.load(index._path("assignments.npy"), mmap_mode="r+")
+            with open(records_path) as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        break # Torn write: the record (and its vector) is dropped
+                    record = json.loads(line)
+                    index._ids[record["id"]] = len(index.records)
+                    index.records.append(record)
+            index.count = min(len(index.records), index._vectors.shape[0])
+            del index.records[index.count:]
+
+        if manifest.get("trained_count") and os.path.exists(index._path("centroids.npy")):
+            index.centroids = np.load(index._path("centroids.npy"))
+            index.trained_count = manifest["trained_count"]
+            index._rebuild_lists()
+        return index
+
+    # --- Building ---
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, memory_id: object) -> bool:
+        return memory_id in self._ids
+
+    def add(self, memories: Sequence[Dict[str, Any]]) -> int:
+        """
+        Adds memory rows ({"id", "embedding", "content", "metadata", ...}); rows whose id is already
+        indexed are skipped. Returns the number added.
+        """
+        with self.lock:
+            return self._add(memories)
+
+    def _add(self, memories: Sequence[Dict[str, Any]]) -> int:
+        fresh = []
+        seen = set()
+        for memory in memories:
+            memory_id = str(memory.get("id"))
+            if memory_id in self._ids or memory_id in seen:
+                continue
+            embedding = memory.get("embedding")
+            if isinstance(embedding, str): # pgvector columns arrive as "[0.1,0.2,...]" through PostgREST
+                embedding = json.loads(embedding)
+            if embedding is None or len(embedding) != self.dim:
+                logger.warning(f"Skipping memory {memory_id} for index {self.directory}: embedding dimension does not match {self.dim}.")
+                continue
+            seen.add(memory_id)
+            fresh.append((memory_id, embedding, memory))
+        if not fresh:
+            return 0
+
+        needed = self.count + len(fresh)
+        capacity = 0 if self._vectors is None else self._vectors.shape[0]
+        if needed > capacity:
+            new_capacity = max(capacity, _INITIAL_CAPACITY)
+            while new_capacity < needed:
+                new_capacity *= 2
+            self._open_arrays(new_capacity)
+
+        start = self.count
+        block = _normalize(np.asarray([embedding for _, embedding, _ in fresh], dtype=np.float32))
+        self._vectors[start:needed] = block
+        if self.centroids is not None:
+            assigned = self._assign(block)
+            self._assignments[start:needed] = assigned
+            for offset, list_id in enumerate(assigned.tolist()):
+                self._list_tails[list_id].append(start + offset)
+        self._vectors.flush()
+        self._assignments.flush()
+
+        with open(self._path("records.jsonl"), "a") as f:
+            for offset, (memory_id, _, memory) in enumerate(fresh):
+                record = {key: value for key, value in memory.items() if key != "embedding"}
+                record["id"] = memory_id
+                f.write(json.dumps(record, default=str) + "\n")
+                self._ids[memory_id] = start + offset
+                self.records.append(record)
+        self.count = needed
+
+        if self.count >= self.min_train_size and (self.centroids is None or self.count >= 4 * self.trained_count):
+            self._train()
+        return len(fresh)
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        assigned = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), _ASSIGN_CHUNK):
+            chunk = vectors[start:start + _ASSIGN_CHUNK]
+            assigned[start:start + len(chunk)] = np.argmax(chunk @ self.centroids.T, axis=1)
+        return assigned
+
+    def train(self, iterations: int = 10, seed: int = 0) -> None:
+        """(Re)trains the k-means centroids (spherical, about 4*sqrt(n) lists) and reassigns every vector."""
+        with self.lock:
+            self._train(iterations, seed)
+
+    def _train(self, iterations: int = 10, seed: int = 0) -> None:
+        n = self.count
+        nlist = max(1, min(int(4 * math.sqrt(n)), n // 8))
+        rng = np.random.default_rng(seed)
+        sample_size = min(n, nlist * 64)
+        sample = np.asarray(self._vectors[np.sort(rng.choice(n, sample_size, replace=False))])
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = np.bincount(labels, minlength=nlist) == 0
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))] # Reseed empty lists
+            centroids = _normalize(sums)
+        self.centroids = centroids
+        np.save(self._path("centroids.npy"), centroids)
+        self._assignments[:n] = self._assign(np.asarray(self._vectors[:n]))
+        self.trained_count = n
+        self._rebuild_lists()
+        self._flush()
+        logger.info(f"Trained memory index {self.directory}: {n} vectors, {nlist} lists.")
+
+    def _rebuild_lists(self) -> None:
+        nlist = len(self.centroids)
+        assignments = np.asarray(self._assignments[:self.count])
+        order = np.argsort(assignments, kind="stable").astype(np.int64)
+        bounds = np.searchsorted(assignments[order], np.arange(nlist + 1))
+        self._lists = [order[bounds[i]:bounds[i + 1]] for i in range(nlist)]
+        self._list_tails = [[] for _ in range(nlist)]
+
+    def _inverted_list(self, list_id: int) -> np.ndarray:
+        tail = self._list_tails[list_id]
+        if tail:
+            self._lists[list_id] = np.concatenate([self._lists[list_id], np.asarray(tail, dtype=np.int64)])
+            tail.clear()
+        return self._lists[list_id]
+
+    # --- Search ---
+
+    def search(
+        self,
+        queries: Sequence[Sequence[float]],
+        top_k: int = 5,
+        match_threshold: Optional[float] = None,
+        nprobe: Optional[int] = None
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Returns, for each query, up to top_k (row, cosine similarity) pairs, best first.
+        nprobe: inverted lists scanned per query (default: index default, else max(8, nlist/32)).
+        """
+        with self.lock:
+            return self._search(queries, top_k, match_threshold, nprobe)
+
+    def _search(
+        self,
+        queries: Sequence[Sequence[float]],
+        top_k: int,
+        match_threshold: Optional[float],
+        nprobe: Optional[int]
+    ) -> List[List[Tuple[int, float]]]:
+        q = _normalize(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        if q.shape[1] != self.dim:
+            raise ValueError(f"Query dimension {q.shape[1]} does not match index dimension {self.dim}.")
+        if self.count == 0 or top_k <= 0:
+            return [[] for _ in range(len(q))]
+        vectors = self._vectors[:self.count]
+
+        if self.centroids is None:
+            scores = q @ np.asarray(vectors).T
+            candidate_rows = [None] * len(q)
+        else:
+            nlist = len(self.centroids)
+            nprobe = min(nlist, nprobe or self.default_nprobe or max(8, nlist // 32))
+            centroid_scores = q @ self.centroids.T
+            probes = np.argpartition(-centroid_scores, nprobe - 1, axis=1)[:, :nprobe]
+            candidate_rows = [np.concatenate([self._inverted_list(list_id) for list_id in row]) for row in probes]
+            scores = [vectors[rows] @ q[i] for i, rows in enumerate(candidate_rows)]
+
+        results: List[List[Tuple[int, float]]] = []
+        for i in range(len(q)):
+            row_scores = scores[i]
+            best = _top_k(row_scores, top_k)
+            rows = best if candidate_rows[i] is None else candidate_rows[i][best]
+            hits = [(int(row), float(row_scores[j])) for row, j in zip(rows, best)]
+            if match_threshold is not None:
+                hits = [hit for hit in hits if hit[1] >= match_threshold]
+            results.append(hits)
+        return results
+
+    def search_records(
+        self,
+        queries: Sequence[Sequence[float]],
+        top_k: int = 5,
+        match_threshold: Optional[float] = None,
+        nprobe: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Like search, but returns memory rows with a 'similarity' field, shaped like the match_agent_memories RPC."""
+        with self.lock:
+            return [
+                [{**self.records[row], "similarity": similarity} for row, similarity in hits]
+                for hits in self._search(queries, top_k, match_threshold, nprobe)
+            ]
+
+
+class AgentMemoryIndexStore:
+    """Per-agent AgentMemoryIndex instances under one base directory."""
+
+    def __init__(self, base_dir: str, min_train_size: int = 2048, nprobe: Optional[int] = None):
+        self.base_dir = base_dir
+        self.min_train_size = min_train_size
+        self.nprobe = nprobe
+        self._indexes: Dict[str, AgentMemoryIndex] = {}
+        os.makedirs(base_dir, exist_ok=True)
+
+    def _directory(self, agent_id: str) -> str:
+        # Hashed so distinct ids never share a directory and no id can point outside base_dir
+        return os.path.join(self.base_dir, hashlib.sha256(agent_id.encode("utf-8")).hexdigest())
+
+    def get(self, agent_id: str) -> Optional[AgentMemoryIndex]:
+        """Returns the agent's index if it is loaded or saved on disk, else None."""
+        index = self._indexes.get(agent_id)
+        if index is None:
+            index = AgentMemoryIndex.load(self._directory(agent_id), self.min_train_size, self.nprobe)
+            if index is not None:
+                self._indexes[agent_id] = index
+        return index
+
+    def get_warm(self, agent_id: str) -> Optional[AgentMemoryIndex]:
+        """Returns the agent's index only if it has caught up with Supabase since it was opened."""
+        index = self.get(agent_id)
+        return index if index is not None and index.warm else None
+
+    def sync_cursor(self, agent_id: str) -> Optional[str]:
+        """
+        The created_at from which the agent's memories must be listed to catch its index up, or None
+        when the index needs a full listing (no index, never hydrated, or no high-water mark).
+        """
+        index = self.get(agent_id)
+        if index is None or not index.hydrated:
+            return None
+        synced_through = _parse_timestamp(index.synced_through)
+        return (synced_through - _SYNC_OVERLAP).isoformat() if synced_through is not None else None
+
+    def build(self, agent_id: str, memories: Sequence[Dict[str, Any]], dim: Optional[int] = None) -> Optional[AgentMemoryIndex]:
+        """
+        Creates or extends the agent's index from a memory listing (all memories, or those created
+        since sync_cursor), advances its high-water mark and marks it warm.
+        """
+        index = self.get(agent_id)
+        if index is None:
+            if dim is None:
+                first = next((m.get("embedding") for m in memories if m.get("embedding") is not None), None)
+                if isinstance(first, str):
+                    first = json.loads(first)
+                if first is None:
+                    return None
+                dim = len(first)
+            index = AgentMemoryIndex(self._directory(agent_id), dim, self.min_train_size, self.nprobe)
+            self._indexes[agent_id] = index
+        with index.lock:
+            index._add(memories)
+            listed = [ts for ts in (_parse_timestamp(m.get("created_at")) for m in memories) if ts is not None]
+            current = _parse_timestamp(index.synced_through)
+            if listed and (current is None or max(listed) > current):
+                index.synced_through = max(listed).isoformat()
+            index.hydrated = True
+            index.warm = True
+            index.synced_at = time.monotonic()
+            index._flush()
+        return index
@@ -1,8 +1,9 @@
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, AsyncIterator
 from loguru import logger
 import json
 from datetime import datetime
 import asyncio
+import time
 import numpy as np
 import uuid
 
@@ -25,6 +26,8 @@ except ImportError:
     logger.warning("redis.asyncio (aioredis) not found. Redis functionality will not be available.")
     aioredis = None
 
+from .agent_memory_index import AgentMemoryIndexStore
+
 # Model imports
 try:
     from ..models.crew_models import TaskStatus # For using enum values
@@ -45,13 +48,29 @@ class AgentPersistenceService:
     Service dedicated to direct interactions with data persistence layers (Supabase and Redis)
     for agent-related data, including states, memories, and checkpoints.
     """
-    def __init__(self, supabase_url: Optional[str] = None, supabase_key: Optional[str] = None, redis_url: Optional[str] = None):
+    def __init__(self, supabase_url: Optional[str] = None, supabase_key: Optional[str] = None, redis_url: Optional[str] = None,
+                 memory_index_dir: Optional[str] = None, memory_index_min_train_size: int = 2048,
+                 memory_index_sync_interval_seconds: Optional[float] = 60.0):
+        """
+        memory_index_dir: when set, agent memory searches are answered from a local per-agent ANN index
+        kept under this directory; Supabase stays the source of truth and serves agents whose index is
+        still cold (not yet caught up with agent_memories since this process opened it).
+        memory_index_sync_interval_seconds: how often a warm index re-fetches memories saved by other
+        workers, in the background. None disables it.
+        """
         self.supabase_url: Optional[str] = supabase_url
         self.supabase_key: Optional[str] = supabase_key
         self.redis_url: Optional[str] = redis_url
 
         self.supabase_client: Optional[SupabaseClient] = None
         self.redis_client: Optional[AsyncRedis] = None
+
+        self.memory_index: Optional[AgentMemoryIndexStore] = (
+            AgentMemoryIndexStore(memory_index_dir, min_train_size=memory_index_min_train_size) if memory_index_dir else None
+        )
+        self.memory_index_sync_interval_seconds = memory_index_sync_interval_seconds
+        self._memory_hydrations: Dict[str, asyncio.Task] = {}
+        self._memories_saved_during_hydration: Dict[str, List[Dict]] = {}
         logger.info("AgentPersistenceService initialized (clients not yet connected).")
 
     async def connect_clients(self):
@@ -178,6 +197,44 @@ class AgentPersistenceService:
             logger.error(f"Unexpected error deleting state from Redis for agent '{agent_id}': {e}. Key: '{key}'")
             return False
 
+    STATE_INVALIDATION_CHANNEL = "agent_state_invalidations"
+
+    async def publish_state_invalidation(self, agent_id: str, origin: str) -> bool:
+        """Tells other workers that their cached state for agent_id is stale."""
+        if not self.redis_client:
+            return False
+        try:
+            await self.redis_client.publish(self.STATE_INVALIDATION_CHANNEL, json.dumps({"agent_id": agent_id, "origin": origin}))
+            return True
+        except Exception as e:
+            logger.error(f"Error publishing state invalidation for agent '{agent_id}': {e}")
+            return False
+
+    async def listen_state_invalidations(self) -> AsyncIterator[Dict]:
+        """Yields invalidation messages ({"agent_id", "origin"}) published by any worker."""
+        if not self.redis_client:
+            logger.warning("Redis client not available. State invalidations will not be received.")
+            return
+        pubsub = self.redis_client.pubsub()
+        await pubsub.subscribe(self.STATE_INVALIDATION_CHANNEL)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                data = message.get("data")
+                if isinstance(data, bytes):
+                    data = data.decode('utf-8')
+                try:
+                    yield json.loads(data)
+                except (TypeError, json.JSONDecodeError):
+                    logger.warning(f"Ignoring malformed state invalidation message: {data!r}")
+        finally:
+            try:
+                await pubsub.unsubscribe(self.STATE_INVALIDATION_CHANNEL)
+                await pubsub.close()
+            except Exception as e:
+                logger.debug(f"Error closing state invalidation subscription: {e}")
+
     async def save_agent_state_to_supabase(self, agent_id: str, strategy_type: str, state: Dict, memory_references: Optional[List[str]] = None) -> Optional[Dict]:
         if not self.supabase_client:
             logger.error(f"Supabase client not available. Cannot save state for agent '{agent_id}'.")
@@ -206,6 +263,39 @@ class AgentPersistenceService:
             logger.exception(f"Supabase client error saving state for agent '{agent_id}': {e}")
             return None
 
+    async def save_agent_states_to_supabase(self, records: List[Dict]) -> List[Dict]:
+        """Upserts several agent state records in one request. Returns the persisted records."""
+        if not self.supabase_client:
+            logger.error(f"Supabase client not available. Cannot save {len(records)} agent state(s).")
+            return []
+        if not records:
+            return []
+        records_to_upsert = [
+            {
+                "agent_id": record["agent_id"], "strategy_type": record.get("strategy_type", "unknown"),
+                "state": record.get("state", {}), "memory_references": record.get("memory_references") or []
+            }
+            for record in records
+        ]
+        try:
+            logger.info(f"Attempting to save/update {len(records_to_upsert)} agent state(s) to Supabase in one upsert.")
+            response = await asyncio.to_thread(
+                self.supabase_client.table("agent_states")
+                .upsert(records_to_upsert, on_conflict="agent_id")
+                .execute
+            )
+            if hasattr(response, 'data') and response.data:
+                return list(response.data)
+            elif hasattr(response, 'error') and response.error:
+                logger.error(f"Supabase API error saving {len(records_to_upsert)} agent state(s): {response.error.message}")
+                return []
+            else:
+                logger.warning(f"Supabase returned no data and no error for batched save_agent_states. Response: {response}")
+                return []
+        except Exception as e:
+            logger.exception(f"Supabase client error saving {len(records_to_upsert)} agent state(s): {e}")
+            return []
+
     async def get_agent_state_from_supabase(self, agent_id: str) -> Optional[Dict]:
         if not self.supabase_client:
             logger.error(f"Supabase client not available. Cannot get state for agent '{agent_id}'.")
@@ -271,6 +361,7 @@ class AgentPersistenceService:
             )
             if hasattr(response, 'data') and response.data:
                 logger.info(f"Successfully saved agent memory for '{agent_id}' to Supabase.")
+                self._index_saved_memory(agent_id, {**record_to_insert, **response.data[0]})
                 return response.data[0]
             elif hasattr(response, 'error') and response.error:
                 logger.error(f"Supabase API error saving memory for '{agent_id}': {response.error.message} (Code: {response.error.code if hasattr(response.error, 'code') else 'N/A'})")
@@ -283,6 +374,113 @@ class AgentPersistenceService:
             return None
 
     async def search_agent_memories_in_supabase(self, agent_id: str, query_embedding: List[float], top_k: int = 5, match_threshold: Optional[float] = None) -> List[Dict]:
+        local_results = self._search_local_memory_index(agent_id, [query_embedding], top_k, match_threshold)
+        if local_results is not None:
+            return local_results[0]
+        self._schedule_memory_index_hydration(agent_id, dim=len(query_embedding))
+        return await self._search_agent_memories_rpc(agent_id, query_embedding, top_k, match_threshold)
+
+    async def search_agent_memories_batch(self, agent_id: str, query_embeddings: List[List[float]], top_k: int = 5, match_threshold: Optional[float] = None) -> List[List[Dict]]:
+        """Searches several query embeddings at once; one result list per query, in order."""
+        if not query_embeddings:
+            return []
+        local_results = self._search_local_memory_index(agent_id, query_embeddings, top_k, match_threshold)
+        if local_results is not None:
+            return local_results
+        self._schedule_memory_index_hydration(agent_id, dim=len(query_embeddings[0]))
+        return list(await asyncio.gather(*(
+            self._search_agent_memories_rpc(agent_id, query_embedding, top_k, match_threshold)
+            for query_embedding in query_embeddings
+        )))
+
+    def _search_local_memory_index(self, agent_id: str, query_embeddings: List[List[float]], top_k: int, match_threshold: Optional[float]) -> Optional[List[List[Dict]]]:
+        """Results from the agent's warm local index, or None when the index is disabled, cold or unusable."""
+        if not self.memory_index:
+            return None
+        try:
+            index = self.memory_index.get_warm(agent_id)
+            if index is None:
+                return None
+            results = index.search_records(query_embeddings, top_k=top_k, match_threshold=match_threshold)
+            interval = self.memory_index_sync_interval_seconds
+            if interval is not None and time.monotonic() - index.synced_at >= interval:
+                self._schedule_memory_index_hydration(agent_id) # Picks up memories saved by other workers
+            logger.debug(f"Answered {len(results)} memory searches for agent '{agent_id}' from the local index ({len(index)} memories).")
+            return results
+        except Exception as e:
+            logger.error(f"Local memory index search failed for agent '{agent_id}', falling back to Supabase RPC: {e}")
+            return None
+
+    def _index_saved_memory(self, agent_id: str, memory: Dict) -> None:
+        if not self.memory_index:
+            return
+        if agent_id in self._memories_saved_during_hydration:
+            # The hydration listing may predate this insert; it is applied once the build completes
+            self._memories_saved_during_hydration.setdefault(agent_id, []).append(memory)
+            return
+        try:
+            index = self.memory_index.get_warm(agent_id)
+            if index is not None:
+                index.add([memory])
+        except Exception as e:
+            logger.error(f"Failed to add memory for agent '{agent_id}' to the local index: {e}")
+
+    def _schedule_memory_index_hydration(self, agent_id: str, dim: Optional[int] = None) -> None:
+        if not self.memory_index or not self.supabase_client or agent_id in self._memory_hydrations:
+            return
+        task = asyncio.create_task(self.hydrate_agent_memory_index(agent_id, dim=dim))
+        self._memory_hydrations[agent_id] = task
+        task.add_done_callback(lambda _: self._memory_hydrations.pop(agent_id, None))
+
+    async def hydrate_agent_memory_index(self, agent_id: str, dim: Optional[int] = None, page_size: int = 1000) -> bool:
+        """
+        Loads the agent's memories from Supabase into its local index and marks the index warm.
+        An index already on disk only fetches memories created since its high-water mark.
+        dim: embedding dimension, used to create an empty index for an agent without memories.
+        """
+        if not self.memory_index or not self.supabase_client:
+            return False
+        self._memories_saved_during_hydration.setdefault(agent_id, [])
+        try:
+            since = await asyncio.to_thread(self.memory_index.sync_cursor, agent_id)
+            memories: List[Dict] = []
+            while True:
+                query = (
+                    self.supabase_client.table("agent_memories")
+                    .select("id, agent_id, content, embedding, metadata, created_at")
+                    .eq("agent_id", agent_id)
+                )
+                if since is not None:
+                    query = query.gte("created_at", since)
+                response = await asyncio.to_thread(
+                    query
+                    .order("id")
+                    .range(len(memories), len(memories) + page_size - 1)
+                    .execute
+                )
+                if hasattr(response, 'error') and response.error:
+                    logger.error(f"Supabase API error hydrating memory index for '{agent_id}': {response.error.message}")
+                    return False
+                page = response.data or []
+                memories.extend(page)
+                if len(page) < page_size:
+                    break
+            memories.extend(self._memories_saved_during_hydration.get(agent_id, []))
+            index = await asyncio.to_thread(self.memory_index.build, agent_id, memories, dim)
+            if index is None:
+                logger.info(f"No memories to index for agent '{agent_id}'; searches stay on Supabase RPC.")
+                return False
+            # Saves that landed while the build ran in the worker thread
+            index.add(self._memories_saved_during_hydration.get(agent_id, []))
+            logger.info(f"Hydrated local memory index for agent '{agent_id}' with {len(index)} memories (fetched {len(memories)} since {since or 'the start'}).")
+            return True
+        except Exception as e:
+            logger.exception(f"Failed to hydrate local memory index for agent '{agent_id}': {e}")
+            return False
+        finally:
+            self._memories_saved_during_hydration.pop(agent_id, None)
+
+    async def _search_agent_memories_rpc(self, agent_id: str, query_embedding: List[float], top_k: int = 5, match_threshold: Optional[float] = None) -> List[Dict]:
         if not self.supabase_client:
             logger.error(f"Supabase client not available. Cannot search memories for agent '{agent_id}'.")
             return []
@@ -3,15 +3,17 @@ Agent Scheduler Service - Phase 5 Implementation
 Intelligent agent scheduling and workload distribution for optimal performance
 """
 import asyncio
+import heapq
+import itertools
 import json
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional, Any, Literal
+from typing import Dict, List, Optional, Any, Literal, Set, Tuple, Callable, Awaitable
 from loguru import logger
 from pydantic import BaseModel, Field
 from dataclasses import dataclass, field
 from enum import Enum
 import uuid
-from collections import defaultdict, deque
+from collections import defaultdict, deque, Counter
 
 class SchedulePriority(str, Enum):
     """Task priority levels"""
@@ -95,18 +97,44 @@ class AgentWorkload:
 class AgentSchedulerService:
     """
     Intelligent agent scheduler for optimal workload distribution and performance
+
+    Dispatch is event-driven: submitting, completing or cancelling a task and registering an agent
+    each run a dispatch pass. Ready tasks wait in one heap per TaskType keyed on (priority, enqueue
+    order); tasks with unfinished dependencies wait in a dependency DAG and are released into the
+    heap when their last dependency completes. Agents are only dispatched to while they have free
+    slots (max_concurrent_tasks).
     """
     
-    def __init__(self):
+    def __init__(self, task_executor: Optional[Callable[[ScheduledTask], Awaitable[Optional[Dict[str, Any]]]]] = None):
+        """
+        task_executor: coroutine that runs a task on its assigned agent and returns its result;
+        defaults to a simulated execution that sleeps for the estimated duration.
+        """
         self.agent_capabilities: Dict[str, AgentCapability] = {}
         self.scheduled_tasks: Dict[str, ScheduledTask] = {}
-        self.task_queue: List[ScheduledTask] = []
         self.agent_workloads: Dict[str, AgentWorkload] = {}
         self.completed_tasks: List[ScheduledTask] = []
+        self.task_executor = task_executor
+
+        # Ready queues: per task type, a heap of (-priority weight, enqueue sequence, task_id).
+        # Entries are invalidated lazily; only the sequence in _ready_entries is live for a task.
+        self._ready_queues: Dict[TaskType, List[Tuple[int, int, str]]] = {task_type: [] for task_type in TaskType}
+        self._ready_entries: Dict[str, int] = {}
+        self._enqueue_sequence = itertools.count()
+        # Dependency DAG: dependency task_id -> tasks waiting on it, and each waiting task's unmet count
+        self._dependents: Dict[str, List[str]] = defaultdict(list)
+        self._unmet_dependencies: Dict[str, int] = {}
+        # Agents indexed by supported task type, and the subset with a free slot
+        self._agents_by_type: Dict[TaskType, Set[str]] = {task_type: set() for task_type in TaskType}
+        self._available_agents: Dict[TaskType, Set[str]] = {task_type: set() for task_type in TaskType}
+        self._running: Dict[str, asyncio.Task] = {}
+        # Queued (pending) task counts, kept incrementally for status reporting
+        self._queued_by_priority: Counter = Counter()
+        self._queued_by_type: Counter = Counter()
+        self._queued_count = 0
         
         # Scheduling configuration
-        self.max_queue_size = 1000
-        self.scheduling_interval_seconds = 10
+        self.max_queue_size = 100000
         self.workload_balance_threshold = 0.7  # 70% utilization before rebalancing
         self.priority_weights = {
             SchedulePriority.CRITICAL: 10,
@@ -123,20 +151,9 @@ class AgentSchedulerService:
         logger.info("AgentSchedulerService initialized with intelligent workload distribution")
     
     def _start_scheduler(self):
-        """Start background scheduling task"""
-        asyncio.create_task(self._scheduling_loop())
+        """Start background workload monitoring (task dispatch itself is event-driven)"""
         asyncio.create_task(self._workload_monitoring_loop())
     
-    async def _scheduling_loop(self):
-        """Main scheduling loop"""
-        while self.scheduler_running:
-            try:
-                await self._process_task_queue()
-                await asyncio.sleep(self.scheduling_interval_seconds)
-            except Exception as e:
-                logger.error(f"Error in scheduling loop: {e}", exc_info=True)
-                await asyncio.sleep(self.scheduling_interval_seconds)
-    
     async def _workload_monitoring_loop(self):
         """Monitor agent workloads and rebalance if needed"""
         while self.scheduler_running:
@@ -149,120 +166,179 @@ class AgentSchedulerService:
                 await asyncio.sleep(30)
     
     async def register_agent(self, agent_capability: AgentCapability):
-        """Register an agent with its capabilities"""
-        self.agent_capabilities[agent_capability.agent_id] = agent_capability
-        
-        if agent_capability.agent_id not in self.agent_workloads:
-            self.agent_workloads[agent_capability.agent_id] = AgentWorkload(
-                agent_id=agent_capability.agent_id
+        """Register (or re-register) an agent with its capabilities"""
+        agent_id = agent_capability.agent_id
+        previous = self.agent_capabilities.get(agent_id)
+        if previous:
+            for task_type in previous.supported_tasks:
+                self._agents_by_type[task_type].discard(agent_id)
+                self._available_agents[task_type].discard(agent_id)
+        self.agent_capabilities[agent_id] = agent_capability
+        
+        if agent_id not in self.agent_workloads:
+            self.agent_workloads[agent_id] = AgentWorkload(
+                agent_id=agent_id
             )
+        for task_type in agent_capability.supported_tasks:
+            self._agents_by_type[task_type].add(agent_id)
+        self._refresh_agent_availability(agent_id)
         
-        logger.info(f"Registered agent {agent_capability.agent_id} with capabilities: {agent_capability.supported_tasks}")
+        logger.info(f"Registered agent {agent_id} with capabilities: {agent_capability.supported_tasks}")
+        self._dispatch_ready_tasks()
     
     async def submit_task(self, task: ScheduledTask) -> str:
         """Submit a new task for scheduling"""
         
-        if len(self.task_queue) >= self.max_queue_size:
+        if self._queued_count >= self.max_queue_size:
             raise ValueError(f"Task queue is full (max {self.max_queue_size} tasks)")
         
         # Validate task
         if not await self._validate_task(task):
             raise ValueError("Invalid task configuration")
         
-        # Add to queue
         self.scheduled_tasks[task.task_id] = task
-        self.task_queue.append(task)
-        
-        # Sort queue by priority
-        self.task_queue.sort(key=lambda t: self.priority_weights[t.priority], reverse=True)
-        
-        logger.info(f"Submitted task {task.task_id} ({task.task_type.value}, priority: {task.priority.value})")
+        self._queued_by_priority[task.priority.value] += 1
+        self._queued_by_type[task.task_type.value] += 1
+        self._queued_count += 1
+        
+        # Wait in the dependency DAG for unfinished dependencies, otherwise go straight to the ready heap
+        unmet = [dep_id for dep_id in task.dependencies if self.scheduled_tasks[dep_id].status != TaskStatus.COMPLETED]
+        if unmet:
+            self._unmet_dependencies[task.task_id] = len(unmet)
+            for dep_id in unmet:
+                self._dependents[dep_id].append(task.task_id)
+        else:
+            self._push_ready(task)
+        
+        logger.debug(f"Submitted task {task.task_id} ({task.task_type.value}, priority: {task.priority.value})")
+        self._dispatch_ready_tasks()
         return task.task_id
     
     async def _validate_task(self, task: ScheduledTask) -> bool:
         """Validate task configuration"""
         
         # Check if any agent can handle this task type
-        capable_agents = [
-            agent for agent in self.agent_capabilities.values()
-            if task.task_type in agent.supported_tasks
-        ]
-        
-        if not capable_agents:
+        if not self._agents_by_type[task.task_type]:
             logger.warning(f"No agents capable of handling task type {task.task_type.value}")
             return False
         
-        # Validate dependencies
+        existing = self.scheduled_tasks.get(task.task_id)
+        if existing is not None and existing.status not in (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED):
+            logger.warning(f"Task {task.task_id} is already scheduled")
+            return False
+        
+        # Validate dependencies (they must already be known, so the dependency graph stays acyclic)
         for dep_id in task.dependencies:
-            if dep_id not in self.scheduled_tasks:
+            dep_task = self.scheduled_tasks.get(dep_id)
+            if dep_task is None or dep_task.status in (TaskStatus.FAILED, TaskStatus.CANCELLED):
                 logger.warning(f"Task {task.task_id} has invalid dependency: {dep_id}")
                 return False
         
         return True
     
+    def _push_ready(self, task: ScheduledTask):
+        """Queue a task whose dependencies are all complete"""
+        sequence = next(self._enqueue_sequence)
+        self._ready_entries[task.task_id] = sequence
+        heapq.heappush(self._ready_queues[task.task_type], (-self.priority_weights[task.priority], sequence, task.task_id))
+    
+    def _dequeue_accounting(self, task: ScheduledTask):
+        self._queued_by_priority[task.priority.value] -= 1
+        self._queued_by_type[task.task_type.value] -= 1
+        self._queued_count -= 1
+    
+    def _next_dispatchable(self) -> Optional[Tuple[int, int, str]]:
+        """Best live ready-heap head among task types that have an agent with a free slot"""
+        best = None
+        for task_type, heap in self._ready_queues.items():
+            while heap and self._ready_entries.get(heap[0][2]) != heap[0][1]:
+                heapq.heappop(heap) # Cancelled or re-queued entry
+            if heap and self._available_agents[task_type] and (best is None or heap[0] < best):
+                best = heap[0]
+        return best
+    
+    def _dispatch_ready_tasks(self) -> int:
+        """Assign ready tasks to free agents in (priority, enqueue order) until no more can start"""
+        dispatched = 0
+        while True:
+            entry = self._next_dispatchable()
+            if entry is None:
+                break
+            task = self.scheduled_tasks[entry[2]]
+            heapq.heappop(self._ready_queues[task.task_type])
+            del self._ready_entries[task.task_id]
+            self._dequeue_accounting(task)
+            self._assign_task_to_agent_now(task, self._select_agent(task).agent_id)
+            dispatched += 1
+        return dispatched
+    
     async def _process_task_queue(self):
-        """Process pending tasks in the queue"""
-        
-        processed_count = 0
-        
-        for task in self.task_queue[:]:
-            if task.status != TaskStatus.PENDING:
-                continue
-            
-            # Check dependencies
-            if not await self._dependencies_satisfied(task):
-                continue
-            
-            # Find best agent for task
-            best_agent = await self._find_best_agent(task)
-            if not best_agent:
-                continue
-            
-            # Assign task to agent
-            await self._assign_task_to_agent(task, best_agent.agent_id)
-            processed_count += 1
-            
-            # Remove from queue
-            self.task_queue.remove(task)
-        
+        """Dispatch whatever can start now (dispatch also runs on every submit/complete/cancel)"""
+        processed_count = self._dispatch_ready_tasks()
         if processed_count > 0:
             logger.info(f"Processed {processed_count} tasks in scheduling cycle")
     
     async def _dependencies_satisfied(self, task: ScheduledTask) -> bool:
         """Check if all task dependencies are satisfied"""
-        
-        for dep_id in task.dependencies:
-            dep_task = self.scheduled_tasks.get(dep_id)
-            if not dep_task or dep_task.status != TaskStatus.COMPLETED:
-                return False
-        
-        return True
+        return self._unmet_dependencies.get(task.task_id, 0) == 0
     
-    async def _find_best_agent(self, task: ScheduledTask) -> Optional[AgentCapability]:
-        """Find the best agent for a task using intelligent scoring"""
-        
-        capable_agents = [
-            agent for agent in self.agent_capabilities.values()
-            if task.task_type in agent.supported_tasks
-        ]
-        
-        if not capable_agents:
-            return None
-        
+    def _release_dependents(self, task: ScheduledTask):
+        """Propagate a finished task through the dependency DAG"""
+        finished = [task]
+        while finished:
+            task = finished.pop()
+            for dependent_id in self._dependents.pop(task.task_id, []):
+                dependent = self.scheduled_tasks.get(dependent_id)
+                if dependent is None or dependent.status != TaskStatus.PENDING:
+                    continue
+                if task.status == TaskStatus.COMPLETED:
+                    self._unmet_dependencies[dependent_id] -= 1
+                    if self._unmet_dependencies[dependent_id] == 0:
+                        del self._unmet_dependencies[dependent_id]
+                        self._push_ready(dependent)
+                else:
+                    # A dependency that failed or was cancelled can never complete
+                    self._unmet_dependencies.pop(dependent_id, None)
+                    self._dequeue_accounting(dependent)
+                    dependent.status = TaskStatus.CANCELLED
+                    dependent.error_message = f"Dependency {task.task_id} {task.status.value}"
+                    dependent.completed_at = datetime.now(timezone.utc)
+                    logger.warning(f"Cancelled task {dependent_id}: dependency {task.task_id} {task.status.value}")
+                    finished.append(dependent)
+    
+    def _refresh_agent_availability(self, agent_id: str):
+        capability = self.agent_capabilities.get(agent_id)
+        workload = self.agent_workloads.get(agent_id)
+        if not capability or not workload:
+            return
+        has_slot = len(workload.active_tasks) < capability.max_concurrent_tasks
+        for task_type in capability.supported_tasks:
+            if has_slot:
+                self._available_agents[task_type].add(agent_id)
+            else:
+                self._available_agents[task_type].discard(agent_id)
+    
+    def _select_agent(self, task: ScheduledTask) -> Optional[AgentCapability]:
+        """Best-scoring agent with a free slot for the task's type"""
         best_agent = None
-        best_score = -1
-        
-        for agent in capable_agents:
-            score = await self._calculate_agent_score(agent, task)
-            if score > best_score:
+        best_score = None
+        for agent_id in self._available_agents[task.task_type]:
+            agent = self.agent_capabilities[agent_id]
+            score = self._agent_score(agent, task)
+            if best_score is None or score > best_score:
                 best_score = score
                 best_agent = agent
-        
         return best_agent
     
+    async def _find_best_agent(self, task: ScheduledTask) -> Optional[AgentCapability]:
+        """Find the best agent for a task using intelligent scoring"""
+        return self._select_agent(task)
+    
     async def _calculate_agent_score(self, agent: AgentCapability, task: ScheduledTask) -> float:
         """Calculate agent suitability score for a task"""
-        
+        return self._agent_score(agent, task)
+    
+    def _agent_score(self, agent: AgentCapability, task: ScheduledTask) -> float:
         workload = self.agent_workloads.get(agent.agent_id)
         if not workload:
             return 0.0
@@ -294,7 +370,9 @@ class AgentSchedulerService:
     
     async def _assign_task_to_agent(self, task: ScheduledTask, agent_id: str):
         """Assign a task to a specific agent"""
-        
+        self._assign_task_to_agent_now(task, agent_id)
+    
+    def _assign_task_to_agent_now(self, task: ScheduledTask, agent_id: str):
         task.agent_id = agent_id
         task.status = TaskStatus.SCHEDULED
         task.scheduled_at = datetime.now(timezone.utc)
@@ -302,11 +380,12 @@ class AgentSchedulerService:
         # Add to agent workload
         workload = self.agent_workloads[agent_id]
         workload.active_tasks.append(task.task_id)
+        self._refresh_agent_availability(agent_id)
         
         # Start task execution
-        asyncio.create_task(self._execute_task(task))
+        self._running[task.task_id] = asyncio.create_task(self._execute_task(task))
         
-        logger.info(f"Assigned task {task.task_id} to agent {agent_id}")
+        logger.debug(f"Assigned task {task.task_id} to agent {agent_id}")
     
     async def _execute_task(self, task: ScheduledTask):
         """Execute a scheduled task"""
@@ -315,20 +394,24 @@ class AgentSchedulerService:
             task.status = TaskStatus.RUNNING
             task.started_at = datetime.now(timezone.utc)
             
-            logger.info(f"Starting execution of task {task.task_id} on agent {task.agent_id}")
+            logger.debug(f"Starting execution of task {task.task_id} on agent {task.agent_id}")
             
-            # Simulate task execution (in real implementation, this would call agent services)
-            execution_time = task.estimated_duration_minutes or 2  # Default 2 minutes
-            await asyncio.sleep(execution_time * 60)  # Convert to seconds for simulation
+            if self.task_executor:
+                result = await self.task_executor(task)
+            else:
+                # Simulate task execution (in real implementation, this would call agent services)
+                execution_time = task.estimated_duration_minutes or 2  # Default 2 minutes
+                await asyncio.sleep(execution_time * 60)  # Convert to seconds for simulation
+                result = {
+                    "success": True,
+                    "execution_time_minutes": execution_time,
+                    "agent_id": task.agent_id
+                }
             
             # Mark as completed
             task.status = TaskStatus.COMPLETED
             task.completed_at = datetime.now(timezone.utc)
-            task.result = {
-                "success": True,
-                "execution_time_minutes": execution_time,
-                "agent_id": task.agent_id
-            }
+            task.result = result
             
             # Update workload
             await self._update_agent_workload_on_completion(task)
@@ -336,7 +419,8 @@ class AgentSchedulerService:
             # Move to completed tasks
             self.completed_tasks.append(task)
             
-            logger.info(f"Completed task {task.task_id} successfully")
+            logger.debug(f"Completed task {task.task_id} successfully")
+            self._release_dependents(task)
             
         except Exception as e:
             logger.error(f"Task {task.task_id} failed: {e}", exc_info=True)
@@ -347,6 +431,7 @@ class AgentSchedulerService:
             
             # Handle retry logic
             if task.retry_count < task.max_retries:
+                await self._update_agent_workload_on_completion(task)
                 task.retry_count += 1
                 task.status = TaskStatus.PENDING
                 task.agent_id = None
@@ -355,11 +440,18 @@ class AgentSchedulerService:
                 task.completed_at = None
                 
                 # Add back to queue for retry
-                self.task_queue.append(task)
+                self._queued_by_priority[task.priority.value] += 1
+                self._queued_by_type[task.task_type.value] += 1
+                self._queued_count += 1
+                self._push_ready(task)
                 logger.info(f"Retrying task {task.task_id} (attempt {task.retry_count + 1})")
             else:
                 await self._update_agent_workload_on_completion(task)
                 logger.error(f"Task {task.task_id} failed permanently after {task.max_retries} retries")
+                self._release_dependents(task)
+        finally:
+            self._running.pop(task.task_id, None)
+            self._dispatch_ready_tasks()
     
     async def _update_agent_workload_on_completion(self, task: ScheduledTask):
         """Update agent workload metrics when task completes"""
@@ -374,6 +466,7 @@ class AgentSchedulerService:
         # Remove from active tasks
         if task.task_id in workload.active_tasks:
             workload.active_tasks.remove(task.task_id)
+            self._refresh_agent_availability(task.agent_id)
         
         # Update metrics
         if task.started_at and task.completed_at:
@@ -442,32 +535,37 @@ class AgentSchedulerService:
         if task.status in [TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED]:
             return False
         
+        was_pending = task.status == TaskStatus.PENDING
         task.status = TaskStatus.CANCELLED
         task.completed_at = datetime.now(timezone.utc)
         
-        # Remove from queue if pending
-        if task in self.task_queue:
-            self.task_queue.remove(task)
+        # Remove from queue if pending (its heap entry is dropped lazily)
+        if was_pending:
+            self._ready_entries.pop(task_id, None)
+            self._unmet_dependencies.pop(task_id, None)
+            self._dequeue_accounting(task)
         
         # Update agent workload if assigned
         if task.agent_id:
             workload = self.agent_workloads.get(task.agent_id)
             if workload and task.task_id in workload.active_tasks:
                 workload.active_tasks.remove(task.task_id)
+                self._refresh_agent_availability(task.agent_id)
+        running = self._running.pop(task_id, None)
+        if running:
+            running.cancel()
         
         logger.info(f"Cancelled task {task_id}")
+        self._release_dependents(task)
+        self._dispatch_ready_tasks()
         return True
     
     def get_scheduler_status(self) -> Dict[str, Any]:
         """Get comprehensive scheduler status"""
         
-        # Calculate queue statistics
-        queue_by_priority = defaultdict(int)
-        queue_by_type = defaultdict(int)
-        
-        for task in self.task_queue:
-            queue_by_priority[task.priority.value] += 1
-            queue_by_type[task.task_type.value] += 1
+        # Queue statistics are maintained incrementally
+        queue_by_priority = {priority: count for priority, count in self._queued_by_priority.items() if count}
+        queue_by_type = {task_type: count for task_type, count in self._queued_by_type.items() if count}
         
         # Calculate agent utilization
         agent_utilizations = {}
@@ -484,9 +582,11 @@ class AgentSchedulerService:
         return {
             "scheduler_status": "running" if self.scheduler_running else "stopped",
             "queue_statistics": {
-                "total_queued": len(self.task_queue),
-                "by_priority": dict(queue_by_priority),
-                "by_type": dict(queue_by_type)
+                "total_queued": self._queued_count,
+                "ready": len(self._ready_entries),
+                "waiting_on_dependencies": len(self._unmet_dependencies),
+                "by_priority": queue_by_priority,
+                "by_type": queue_by_type
             },
             "agent_statistics": {
                 "total_agents": len(self.agent_capabilities),
@@ -500,7 +600,6 @@ class AgentSchedulerService:
             },
             "configuration": {
                 "max_queue_size": self.max_queue_size,
-                "scheduling_interval_seconds": self.scheduling_interval_seconds,
                 "workload_balance_threshold": self.workload_balance_threshold
             }
         }
@@ -1,27 +1,238 @@
 """
 Agent State Manager for persistent storage of agent trading states
 """
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple, Set
+from collections import OrderedDict
 from datetime import datetime
 import asyncio # For asyncio.Lock
+import time
+import uuid
 from loguru import logger
 
 # Assuming AgentPersistenceService is in the same package directory
 from .agent_persistence_service import AgentPersistenceService
 
+_MISSING = object()
+
+
+class AgentStateCache:
+    """
+    In-memory LRU map of agent_id -> state record, bounded by entry count and entry age.
+    Supports the dict operations the manager and its callers use (get, [], in, del, pop).
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: Optional[float] = 300.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds
+
+    def get(self, agent_id: str, default: Any = None) -> Any:
+        entry = self._entries.get(agent_id)
+        if entry is None:
+            self.misses += 1
+            return default
+        if self._expired(entry[0]):
+            del self._entries[agent_id]
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self._entries.move_to_end(agent_id)
+        self.hits += 1
+        return entry[1]
+
+    def __getitem__(self, agent_id: str) -> Dict:
+        value = self.get(agent_id, _MISSING)
+        if value is _MISSING:
+            raise KeyError(agent_id)
+        return value
+
+    def __setitem__(self, agent_id: str, record: Dict) -> None:
+        self._entries[agent_id] = (time.monotonic(), record)
+        self._entries.move_to_end(agent_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def __contains__(self, agent_id: object) -> bool:
+        entry = self._entries.get(agent_id) # type: ignore[arg-type]
+        return entry is not None and not self._expired(entry[0])
+
+    def __delitem__(self, agent_id: str) -> None:
+        del self._entries[agent_id]
+
+    def pop(self, agent_id: str, default: Any = None) -> Any:
+        entry = self._entries.pop(agent_id, None)
+        return default if entry is None else entry[1]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
 
 class AgentStateManager:
     """
     Service for managing agent states with multiple layers of caching and persistence.
     Orchestrates state retrieval and updates using AgentPersistenceService.
+
+    Writes for one agent are serialized by a striped lock, so a slow write never blocks other agents.
+    The in-memory layer is a bounded LRU; other workers evict their copies through Redis pub/sub
+    invalidations once start() is running. With write_behind_flush_interval_seconds set, Supabase
+    upserts are coalesced per agent and flushed in batches instead of written inline.
     """
     
-    def __init__(self, persistence_service: AgentPersistenceService, redis_realtime_ttl_seconds: int = 3600):
+    def __init__(
+        self,
+        persistence_service: AgentPersistenceService,
+        redis_realtime_ttl_seconds: int = 3600,
+        cache_max_size: int = 10000,
+        cache_ttl_seconds: Optional[float] = 300.0,
+        lock_stripes: int = 64,
+        write_behind_flush_interval_seconds: Optional[float] = None,
+        write_behind_max_batch: int = 500
+    ):
         self.persistence_service: AgentPersistenceService = persistence_service
         self.redis_realtime_ttl_seconds: int = redis_realtime_ttl_seconds
-        self.in_memory_cache: Dict[str, Dict] = {}
-        self.lock: asyncio.Lock = asyncio.Lock()
+        self.in_memory_cache: AgentStateCache = AgentStateCache(cache_max_size, cache_ttl_seconds)
+        self._lock_stripes: List[asyncio.Lock] = [asyncio.Lock() for _ in range(max(1, lock_stripes))]
+        self.instance_id: str = str(uuid.uuid4()) # Identifies this worker's invalidation messages
+
+        self.write_behind_flush_interval_seconds = write_behind_flush_interval_seconds
+        self.write_behind_max_batch = write_behind_max_batch
+        self._pending_upserts: "OrderedDict[str, Dict]" = OrderedDict() # Latest unflushed record per agent
+        self._flush_lock: asyncio.Lock = asyncio.Lock()
+        self._flushing_agent_ids: Set[str] = set() # Agents whose record is in the batch being upserted
+        self._deleted_while_flushing: Set[str] = set() # Tombstones for agents deleted during that upsert
+        self._flush_task: Optional[asyncio.Task] = None
+        self._invalidation_task: Optional[asyncio.Task] = None
+        self.write_behind_stats: Dict[str, int] = {"flushes": 0, "records_flushed": 0, "records_coalesced": 0, "flush_failures": 0}
+        self.invalidations_received: int = 0
         logger.info("AgentStateManager initialized with AgentPersistenceService.")
+
+    @property
+    def write_behind_enabled(self) -> bool:
+        return self.write_behind_flush_interval_seconds is not None
+
+    def _lock_for(self, agent_id: str) -> asyncio.Lock:
+        return self._lock_stripes[hash(agent_id) % len(self._lock_stripes)]
+
+    # --- Background tasks ---
+
+    async def start(self) -> None:
+        """Starts the invalidation listener and, when enabled, the write-behind flusher."""
+        if self._invalidation_task is None and getattr(self.persistence_service, "redis_client", None):
+            self._invalidation_task = asyncio.create_task(self._invalidation_listener())
+        if self.write_behind_enabled and self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._write_behind_loop())
+        logger.info(f"AgentStateManager started (invalidation listener: {self._invalidation_task is not None}, write-behind: {self.write_behind_enabled}).")
+
+    async def close(self) -> None:
+        """Stops background tasks and flushes pending write-behind upserts."""
+        for task in (self._flush_task, self._invalidation_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._flush_task = None
+        self._invalidation_task = None
+        await self.flush_pending_states()
+
+    async def _invalidation_listener(self) -> None:
+        while True:
+            try:
+                async for message in self.persistence_service.listen_state_invalidations():
+                    if message.get("origin") == self.instance_id:
+                        continue
+                    agent_id = message.get("agent_id")
+                    if agent_id and self.in_memory_cache.pop(agent_id, None) is not None:
+                        self.invalidations_received += 1
+                        logger.debug(f"Evicted cached state for agent {agent_id} after invalidation from worker {message.get('origin')}.")
+                return # Subscription unavailable
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"State invalidation listener error: {e}. Resubscribing in 1s.")
+                self.in_memory_cache.clear() # Messages may have been missed while disconnected
+                await asyncio.sleep(1.0)
+
+    async def _publish_invalidation(self, agent_id: str) -> None:
+        try:
+            await self.persistence_service.publish_state_invalidation(agent_id, self.instance_id)
+        except Exception as e:
+            logger.warning(f"Failed to publish state invalidation for agent {agent_id}: {e}")
+
+    async def _write_behind_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.write_behind_flush_interval_seconds)
+            try:
+                await self.flush_pending_states()
+            except Exception as e:
+                logger.exception(f"Write-behind flush failed: {e}")
+
+    async def flush_pending_states(self) -> int:
+        """Upserts queued write-behind records to Supabase in batches. Returns the number persisted."""
+        flushed = 0
+        async with self._flush_lock:
+            while self._pending_upserts:
+                batch_ids = list(self._pending_upserts.keys())[:self.write_behind_max_batch]
+                batch = [self._pending_upserts.pop(agent_id) for agent_id in batch_ids]
+                self._flushing_agent_ids = set(batch_ids)
+                try:
+                    persisted = await self.persistence_service.save_agent_states_to_supabase(batch)
+                finally:
+                    deleted = self._deleted_while_flushing
+                    self._flushing_agent_ids, self._deleted_while_flushing = set(), set()
+                if not persisted:
+                    # Re-queue unless a newer write for the agent arrived meanwhile or the agent was deleted
+                    for record in batch:
+                        if record["agent_id"] not in deleted:
+                            self._pending_upserts.setdefault(record["agent_id"], record)
+                    self.write_behind_stats["flush_failures"] += 1
+                    logger.error(f"Write-behind flush of {len(batch)} agent state(s) failed; will retry.")
+                    break
+                # The upsert may have landed after the delete did; delete those rows again
+                for agent_id in deleted:
+                    async with self._lock_for(agent_id):
+                        await self.persistence_service.delete_agent_state_from_supabase(agent_id)
+                self.write_behind_stats["flushes"] += 1
+                self.write_behind_stats["records_flushed"] += len(persisted)
+                flushed += len(persisted)
+        return flushed
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        return {
+            **self.in_memory_cache.get_stats(),
+            "lock_stripes": len(self._lock_stripes),
+            "invalidations_received": self.invalidations_received,
+            "write_behind_enabled": self.write_behind_enabled,
+            "pending_upserts": len(self._pending_upserts),
+            **self.write_behind_stats
+        }
+
+    # --- State access ---
     
     async def get_agent_state(self, agent_id: str) -> Dict:
         """
@@ -33,9 +244,10 @@ class AgentStateManager:
         logger.debug(f"Getting state for agent: {agent_id}")
         
         # 1. Check in-memory cache first
-        if agent_id in self.in_memory_cache:
+        cached_record = self.in_memory_cache.get(agent_id)
+        if cached_record is not None:
             logger.debug(f"In-memory cache hit for agent: {agent_id}")
-            return self.in_memory_cache[agent_id]
+            return cached_record
         
         # 2. Check Redis
         try:
@@ -86,54 +298,89 @@ class AgentStateManager:
         """
         Update the agent's state in Supabase (as source of truth), then update Redis and in-memory cache.
         Returns the persisted state record from Supabase, or None on failure.
+        With write-behind enabled, Redis and the cache are updated immediately and the returned record
+        is queued for the next batched Supabase upsert.
         """
         logger.info(f"Updating state for agent: {agent_id}. Strategy type: {strategy_type}. State preview: {str(state)[:100]}...")
         
-        async with self.lock:
-            try:
-                updated_supa_record = await self.persistence_service.save_agent_state_to_supabase(
+        async with self._lock_for(agent_id):
+            return await self._update_agent_state_locked(agent_id, state, strategy_type, memory_references)
+
+    async def _update_agent_state_locked(
+        self,
+        agent_id: str,
+        state: Dict,
+        strategy_type: str,
+        memory_references: Optional[List[str]]
+    ) -> Optional[Dict]:
+        try:
+            if self.write_behind_enabled:
+                updated_record = self._build_pending_record(agent_id, state, strategy_type, memory_references)
+                if agent_id in self._pending_upserts:
+                    self.write_behind_stats["records_coalesced"] += 1
+                self._pending_upserts[agent_id] = updated_record
+                self._pending_upserts.move_to_end(agent_id)
+            else:
+                updated_record = await self.persistence_service.save_agent_state_to_supabase(
                     agent_id, strategy_type, state, memory_references
                 )
-                
-                if not updated_supa_record:
+                if not updated_record:
                     logger.error(f"Failed to save state to Supabase for agent {agent_id}. Aborting update.")
                     return None
 
-                redis_success = await self.persistence_service.save_realtime_state_to_redis(
-                    agent_id, updated_supa_record, self.redis_realtime_ttl_seconds
-                )
-                if not redis_success:
-                    logger.warning(f"Failed to save state to Redis for agent {agent_id}, but Supabase save was successful.")
+            redis_success = await self.persistence_service.save_realtime_state_to_redis(
+                agent_id, updated_record, self.redis_realtime_ttl_seconds
+            )
+            if not redis_success:
+                logger.warning(f"Failed to save state to Redis for agent {agent_id}, but the Supabase save was successful or queued.")
 
-                self.in_memory_cache[agent_id] = updated_supa_record
+            self.in_memory_cache[agent_id] = updated_record
+            await self._publish_invalidation(agent_id)
 
-                logger.info(f"Successfully updated state for agent: {agent_id}.")
-                return updated_supa_record
-                    
-            except Exception as e:
-                logger.exception(f"Unexpected error updating agent state for {agent_id}: {e}")
-                return None
+            logger.info(f"Successfully updated state for agent: {agent_id}.")
+            return updated_record
+
+        except Exception as e:
+            logger.exception(f"Unexpected error updating agent state for {agent_id}: {e}")
+            return None
+
+    def _build_pending_record(self, agent_id: str, state: Dict, strategy_type: str, memory_references: Optional[List[str]]) -> Dict:
+        """Builds the record a write-behind update will upsert, keeping created_at from the cached record."""
+        now = datetime.utcnow().isoformat()
+        previous = self._pending_upserts.get(agent_id) or self.in_memory_cache.get(agent_id) or {}
+        record = {key: value for key, value in previous.items() if key != "source"}
+        record.update({
+            "agent_id": agent_id,
+            "strategy_type": strategy_type,
+            "state": state,
+            "memory_references": memory_references or [],
+            "updated_at": now
+        })
+        record.setdefault("created_at", now)
+        return record
     
     async def update_state_field(self, agent_id: str, field: str, value: Any) -> Optional[Dict]:
         """Update a specific field in the agent's 'state' dictionary."""
         logger.info(f"Attempting to update field '{field}' for agent: {agent_id}.")
         
         try:
-            current_full_record = await self.get_agent_state(agent_id)
-            
-            state_dict_to_modify = current_full_record.get("state", {}).copy()
-            strategy_type = current_full_record.get("strategy_type", "unknown_on_field_update")
-            memory_references = current_full_record.get("memory_references")
+            # The agent's lock covers the read-modify-write so concurrent field updates are not lost
+            async with self._lock_for(agent_id):
+                current_full_record = await self.get_agent_state(agent_id)
 
-            state_dict_to_modify[field] = value
-            
-            logger.debug(f"Calling update_agent_state for field update on agent {agent_id}.")
-            return await self.update_agent_state(
-                agent_id,
-                state_dict_to_modify,
-                strategy_type=strategy_type,
-                memory_references=memory_references
-            )
+                state_dict_to_modify = current_full_record.get("state", {}).copy()
+                strategy_type = current_full_record.get("strategy_type", "unknown_on_field_update")
+                memory_references = current_full_record.get("memory_references")
+
+                state_dict_to_modify[field] = value
+
+                logger.debug(f"Updating state for field update on agent {agent_id}.")
+                return await self._update_agent_state_locked(
+                    agent_id,
+                    state_dict_to_modify,
+                    strategy_type,
+                    memory_references
+                )
             
         except Exception as e:
             logger.exception(f"Error updating state field '{field}' for agent {agent_id}: {e}")
@@ -143,14 +390,17 @@ class AgentStateManager:
         """Delete the agent's state from all persistence layers and caches."""
         logger.info(f"Attempting to delete state for agent: {agent_id}.")
         
-        async with self.lock:
+        async with self._lock_for(agent_id):
             try:
+                self._pending_upserts.pop(agent_id, None) # A queued upsert must not resurrect the state
+                if agent_id in self._flushing_agent_ids:
+                    self._deleted_while_flushing.add(agent_id) # Nor may the one being flushed right now
                 supa_deleted = await self.persistence_service.delete_agent_state_from_supabase(agent_id)
                 redis_op_success = await self.persistence_service.delete_realtime_state_from_redis(agent_id)
 
-                if agent_id in self.in_memory_cache:
-                    del self.in_memory_cache[agent_id]
+                if self.in_memory_cache.pop(agent_id, None) is not None:
                     logger.debug(f"Removed agent {agent_id} from in-memory cache.")
+                await self._publish_invalidation(agent_id)
 
                 if supa_deleted:
                     logger.info(f"Deletion process run for agent {agent_id}. Supabase main delete success: {supa_deleted}. Redis op success: {redis_op_success}.")
@@ -182,27 +432,28 @@ class AgentStateManager:
     async def _update_decision_history(self, agent_id: str, decision: Dict):
         """Helper to update decision history in agent's 'state' dictionary."""
         logger.debug(f"Updating decision history for agent {agent_id}.")
-        current_full_record = await self.get_agent_state(agent_id)
+        async with self._lock_for(agent_id):
+            current_full_record = await self.get_agent_state(agent_id)
 
-        state_dict_to_modify = current_full_record.get("state", {}).copy()
-        strategy_type = current_full_record.get("strategy_type", "decision_history_update")
-        memory_references = current_full_record.get("memory_references")
+            state_dict_to_modify = current_full_record.get("state", {}).copy()
+            strategy_type = current_full_record.get("strategy_type", "decision_history_update")
+            memory_references = current_full_record.get("memory_references")
 
-        if "decisionHistory" not in state_dict_to_modify:
-            state_dict_to_modify["decisionHistory"] = []
+            if "decisionHistory" not in state_dict_to_modify:
+                state_dict_to_modify["decisionHistory"] = []
 
-        if "timestamp" not in decision:
-            decision["timestamp"] = datetime.utcnow().isoformat()
+            if "timestamp" not in decision:
+                decision["timestamp"] = datetime.utcnow().isoformat()
 
-        max_history = 50
-        state_dict_to_modify["decisionHistory"] = [decision] + state_dict_to_modify["decisionHistory"][:max_history-1]
+            max_history = 50
+            state_dict_to_modify["decisionHistory"] = [decision] + state_dict_to_modify["decisionHistory"][:max_history-1]
 
-        updated_record = await self.update_agent_state(
-            agent_id,
-            state_dict_to_modify,
-            strategy_type=strategy_type,
-            memory_references=memory_references
-        )
+            updated_record = await self._update_agent_state_locked(
+                agent_id,
+                state_dict_to_modify,
+                strategy_type,
+                memory_references
+            )
         if not updated_record:
              raise Exception(f"Failed to save updated decision history for agent {agent_id} via update_agent_state.")
         else:
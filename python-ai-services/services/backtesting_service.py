@@ -5,17 +5,19 @@ Comprehensive backtesting engine with Monte Carlo simulation and walk-forward an
 
 import asyncio
 import uuid
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Literal
 from datetime import datetime, timezone, timedelta
 from decimal import Decimal
 import json
 import logging
 import numpy as np
 import pandas as pd
-from collections import defaultdict
+from collections import defaultdict, deque
 from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 import multiprocessing as mp
-from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, Future
 
 from pydantic import BaseModel, Field
 from fastapi import HTTPException
@@ -375,129 +377,474 @@ class BacktestEngine:
         """Calculate comprehensive performance metrics"""
         if not equity_curve:
             return {}
-        
+
+        portfolio_values = np.array([point["portfolio_value"] for point in equity_curve], dtype=float)
+        trade_pnls = np.array([t.get("pnl", 0) for t in trades], dtype=float)
+
+        return self._calculate_metrics_from_arrays(
+            portfolio_values, trade_pnls, float((final_capital - initial_capital) / initial_capital)
+        )
+
+    def _calculate_metrics_from_arrays(
+        self,
+        portfolio_values: np.ndarray,
+        trade_pnls: np.ndarray,
+        total_return: float
+    ) -> Dict[str, Any]:
+        """Calculate performance metrics from an equity series and per-trade P&L (0 for entries)"""
+        if len(portfolio_values) == 0:
+            return {}
+
         # Extract returns
-        portfolio_values = [point["portfolio_value"] for point in equity_curve]
-        returns = []
-        for i in range(1, len(portfolio_values)):
-            returns.append((portfolio_values[i] - portfolio_values[i-1]) / portfolio_values[i-1])
-        
-        # Basic metrics
-        total_return = float((final_capital - initial_capital) / initial_capital)
-        
+        returns = np.diff(portfolio_values) / portfolio_values[:-1]
+
         # Risk metrics
-        if returns:
+        if len(returns):
             volatility = np.std(returns) * np.sqrt(252)  # Annualized
             sharpe_ratio = (np.mean(returns) * 252) / volatility if volatility > 0 else 0
-            
+
             # Downside deviation for Sortino ratio
-            negative_returns = [r for r in returns if r < 0]
-            downside_deviation = np.std(negative_returns) * np.sqrt(252) if negative_returns else 0
+            negative_returns = returns[returns < 0]
+            downside_deviation = np.std(negative_returns) * np.sqrt(252) if len(negative_returns) else 0
             sortino_ratio = (np.mean(returns) * 252) / downside_deviation if downside_deviation > 0 else 0
         else:
             volatility = 0
             sharpe_ratio = 0
             sortino_ratio = 0
-        
+
         # Drawdown analysis
         running_max = np.maximum.accumulate(portfolio_values)
-        drawdowns = (np.array(portfolio_values) - running_max) / running_max
+        drawdowns = (portfolio_values - running_max) / running_max
         max_drawdown = abs(np.min(drawdowns))
-        
+
         # Trade statistics
-        winning_trades = [t for t in trades if t.get("pnl", 0) > 0]
-        losing_trades = [t for t in trades if t.get("pnl", 0) < 0]
-        
-        total_trades = len(trades)
-        win_rate = len(winning_trades) / total_trades if total_trades > 0 else 0
-        
-        avg_win = np.mean([t["pnl"] for t in winning_trades]) if winning_trades else 0
-        avg_loss = abs(np.mean([t["pnl"] for t in losing_trades])) if losing_trades else 0
+        winning_pnls = trade_pnls[trade_pnls > 0]
+        losing_pnls = trade_pnls[trade_pnls < 0]
+
+        total_trades = len(trade_pnls)
+        win_rate = len(winning_pnls) / total_trades if total_trades > 0 else 0
+
+        avg_win = np.mean(winning_pnls) if len(winning_pnls) else 0
+        avg_loss = abs(np.mean(losing_pnls)) if len(losing_pnls) else 0
         profit_factor = avg_win / avg_loss if avg_loss > 0 else 0
-        
+
         return {
             "total_return": total_return,
-            "annualized_return": total_return * 252 / len(equity_curve) if equity_curve else 0,
+            "annualized_return": total_return * 252 / len(portfolio_values),
             "volatility": volatility,
             "sharpe_ratio": sharpe_ratio,
             "sortino_ratio": sortino_ratio,
             "calmar_ratio": total_return / max_drawdown if max_drawdown > 0 else 0,
             "max_drawdown": max_drawdown,
             "total_trades": total_trades,
-            "winning_trades": len(winning_trades),
-            "losing_trades": len(losing_trades),
+            "winning_trades": len(winning_pnls),
+            "losing_trades": len(losing_pnls),
             "win_rate": win_rate,
             "profit_factor": profit_factor,
-            "average_trade": np.mean([t.get("pnl", 0) for t in trades]) if trades else 0
+            "average_trade": np.mean(trade_pnls) if total_trades else 0
         }
 
 
+class VectorizedBacktestEngine(BacktestEngine):
+    """
+    Columnar backtesting engine.
+
+    Loads the bars once into NumPy arrays, evaluates the strategy signal for the
+    whole series in one pass and only steps through the bars that actually fill.
+    Capital and open quantity are forward-filled between fills, so the equity
+    curve is a single array expression. Produces the same BacktestResult as
+    BacktestEngine for single-symbol series.
+    """
+
+    SHORT_WINDOW = 5
+    LONG_WINDOW = 20
+
+    def run_backtest(
+        self,
+        strategy: TradingStrategy,
+        market_data: List[MarketData],
+        request: StrategyBacktestRequest
+    ) -> BacktestResult:
+        """Run backtest over columnar price arrays"""
+        # Positions are keyed by symbol in the loop engine; mixed series keep that path
+        if len({data.symbol for data in market_data}) > 1:
+            return super().run_backtest(strategy, market_data, request)
+
+        closes = np.fromiter((float(data.close) for data in market_data), dtype=float, count=len(market_data))
+        timestamps = [data.timestamp for data in market_data]
+
+        return self.run_backtest_columns(strategy, timestamps, closes, request)
+
+    def run_backtest_columns(
+        self,
+        strategy: TradingStrategy,
+        timestamps: List[datetime],
+        closes: np.ndarray,
+        request: StrategyBacktestRequest
+    ) -> BacktestResult:
+        """Run backtest on a single-symbol series already loaded as columns"""
+        start_time = datetime.now()
+        n = len(closes)
+
+        signals = self._generate_signals_vectorized(strategy, closes)
+        signals[:max(request.warmup_period, 0)] = 0
+
+        initial_capital = float(request.initial_capital)
+        capital, open_quantity, trade_history, trade_pnls, commission_paid, slippage_cost = self._simulate_fills(
+            timestamps, closes, signals, initial_capital, request
+        )
+
+        # Equity curve over the recorded (post-warmup) bars
+        first_bar = min(max(request.warmup_period, 0), n)
+        portfolio_values = capital + open_quantity * closes
+        recorded = slice(first_bar, n)
+        equity_curve = [
+            {
+                "timestamp": timestamps[i].isoformat(),
+                "portfolio_value": value,
+                "capital": cash,
+                "unrealized_pnl": value - initial_capital
+            }
+            for i, value, cash in zip(
+                range(first_bar, n),
+                portfolio_values[recorded].tolist(),
+                capital[recorded].tolist()
+            )
+        ]
+
+        final_value = float(capital[-1] + open_quantity[-1] * closes[-1]) if n else initial_capital
+        final_capital = Decimal(str(final_value))
+
+        performance_metrics = self._calculate_metrics_from_arrays(
+            portfolio_values[recorded],
+            trade_pnls,
+            float((final_capital - request.initial_capital) / request.initial_capital)
+        )
+
+        return BacktestResult(
+            strategy_id=strategy.strategy_id,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            initial_capital=request.initial_capital,
+            final_capital=final_capital,
+            trades=trade_history,
+            equity_curve=equity_curve,
+            commission_paid=Decimal(str(commission_paid)),
+            slippage_cost=Decimal(str(slippage_cost)),
+            execution_time=(datetime.now() - start_time).total_seconds(),
+            **performance_metrics
+        )
+
+    def _generate_signals_vectorized(self, strategy: TradingStrategy, closes: np.ndarray) -> np.ndarray:
+        """Signal per bar: 1 buy, -1 sell, 0 none (mirrors _generate_signal_for_backtest)"""
+        signals = np.zeros(len(closes), dtype=np.int8)
+
+        if strategy.strategy_type.value != "momentum" or len(closes) < self.LONG_WINDOW:
+            return signals
+
+        windows = np.lib.stride_tricks.sliding_window_view(closes, self.LONG_WINDOW)
+        long_ma = windows.mean(axis=1)
+        short_ma = windows[:, -self.SHORT_WINDOW:].mean(axis=1)
+
+        signals[self.LONG_WINDOW - 1:] = np.where(
+            short_ma > long_ma * 1.01, 1, np.where(short_ma < long_ma * 0.99, -1, 0)
+        )
+        return signals
+
+    def _simulate_fills(
+        self,
+        timestamps: List[datetime],
+        closes: np.ndarray,
+        signals: np.ndarray,
+        initial_capital: float,
+        request: StrategyBacktestRequest
+    ) -> Tuple[np.ndarray, np.ndarray, List[Dict[str, Any]], np.ndarray, float, float]:
+        """
+        Apply the position sizing rules of _execute_backtest_trade on signal bars only.
+
+        Returns per-bar capital and open quantity arrays plus the trade log.
+        """
+        n = len(closes)
+        signal_bars = np.flatnonzero(signals)
+
+        fill_bars: List[int] = []
+        fill_capital: List[float] = []
+        fill_quantity: List[float] = []
+        trade_history: List[Dict[str, Any]] = []
+        trade_pnls: List[float] = []
+        commission_paid = 0.0
+        slippage_cost = 0.0
+
+        capital = initial_capital
+        open_quantity = 0.0
+        open_lots: deque = deque()  # (trade_id, quantity, entry_price) in FIFO order
+
+        for i in signal_bars.tolist():
+            price = closes[i]
+            position_size = min(capital * 0.1, 1000.0)
+            if position_size < 10:
+                continue
+
+            commission = position_size * request.commission
+            slippage = position_size * request.slippage
+            total_cost = commission + slippage
+
+            if signals[i] > 0:
+                if capital < position_size + total_cost:
+                    continue
+                quantity = position_size / price
+                trade_id = str(uuid.uuid4())
+                capital -= position_size + total_cost
+                open_lots.append((trade_id, quantity, price))
+                open_quantity += quantity
+                trade_history.append({
+                    "trade_id": trade_id,
+                    "action": "buy",
+                    "quantity": quantity,
+                    "price": price,
+                    "timestamp": timestamps[i].isoformat(),
+                    "commission": commission,
+                    "slippage": slippage,
+                    "new_capital": Decimal(str(capital))
+                })
+                trade_pnls.append(0.0)
+            else:
+                if not open_lots:
+                    continue
+                trade_id, quantity, entry_price = open_lots.popleft()
+                exit_value = quantity * price
+                pnl = exit_value - quantity * entry_price
+                capital += exit_value - total_cost
+                open_quantity = open_quantity - quantity if open_lots else 0.0
+                trade_history.append({
+                    "trade_id": trade_id,
+                    "action": "sell",
+                    "quantity": quantity,
+                    "price": price,
+                    "timestamp": timestamps[i].isoformat(),
+                    "pnl": pnl,
+                    "commission": commission,
+                    "slippage": slippage,
+                    "new_capital": Decimal(str(capital))
+                })
+                trade_pnls.append(pnl)
+
+            commission_paid += commission
+            slippage_cost += slippage
+            fill_bars.append(i)
+            fill_capital.append(capital)
+            fill_quantity.append(open_quantity)
+
+        # Forward-fill state from each fill bar to the next one
+        capital_series = np.full(n, initial_capital)
+        quantity_series = np.zeros(n)
+        if fill_bars:
+            last_fill = np.full(n, -1, dtype=np.int64)
+            last_fill[fill_bars] = np.arange(len(fill_bars))
+            last_fill = np.maximum.accumulate(last_fill)
+            filled = last_fill >= 0
+            capital_series[filled] = np.asarray(fill_capital)[last_fill[filled]]
+            quantity_series[filled] = np.asarray(fill_quantity)[last_fill[filled]]
+
+        return capital_series, quantity_series, trade_history, np.asarray(trade_pnls, dtype=float), commission_paid, slippage_cost
+
+
 class MonteCarloSimulator:
-    """Monte Carlo simulation engine"""
-    
+    """
+    Batched Monte Carlo simulation engine.
+
+    Return paths are generated as (chunk_size, horizon) matrices so memory stays
+    bounded at any simulation count. Three sampling modes are supported:
+    "parametric" (normal with the historical mean/std), "bootstrap" (IID resampling
+    of historical returns) and "block_bootstrap" (stationary bootstrap with
+    geometric block lengths, preserving short-range autocorrelation).
+    """
+
+    SIMULATION_MODES = ("parametric", "bootstrap", "block_bootstrap")
+
+    def __init__(self, chunk_size: int = 4096):
+        self.chunk_size = chunk_size
+        # strategy_id -> (backtest_ids the array was built from, concatenated returns)
+        self._returns_cache: Dict[str, Tuple[Tuple[str, ...], np.ndarray]] = {}
+
+    def get_strategy_returns(self, strategy_id: str, historical_results: List[BacktestResult]) -> np.ndarray:
+        """Per-bar returns of all equity curves for a strategy, cached until the result set changes"""
+        key = tuple(result.backtest_id for result in historical_results)
+        cached = self._returns_cache.get(strategy_id)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        arrays = []
+        for result in historical_results:
+            if result.equity_curve:
+                values = np.fromiter(
+                    (point["portfolio_value"] for point in result.equity_curve),
+                    dtype=float, count=len(result.equity_curve)
+                )
+                arrays.append(np.diff(values) / values[:-1])
+        returns = np.concatenate(arrays) if arrays else np.empty(0)
+
+        self._returns_cache[strategy_id] = (key, returns)
+        return returns
+
+    def invalidate_returns_cache(self, strategy_id: Optional[str] = None):
+        if strategy_id is None:
+            self._returns_cache.clear()
+        else:
+            self._returns_cache.pop(strategy_id, None)
+
+    def iter_return_chunks(
+        self,
+        returns: np.ndarray,
+        num_simulations: int,
+        time_horizon_days: int,
+        mode: str = "parametric",
+        seed: Optional[int] = None,
+        mean_block_length: float = 10.0
+    ):
+        """Yield simulated (paths, horizon) return matrices of at most chunk_size paths"""
+        for chunk in self._generate_chunks(
+            returns, num_simulations, time_horizon_days, mode, seed, mean_block_length
+        ):
+            yield chunk.T
+
+    def _generate_chunks(
+        self,
+        returns: np.ndarray,
+        num_simulations: int,
+        time_horizon_days: int,
+        mode: str,
+        seed: Optional[int],
+        mean_block_length: float
+    ):
+        """Time-major (horizon, paths) chunks; each time step is a contiguous row"""
+        if mode not in self.SIMULATION_MODES:
+            raise ValueError(f"Unknown simulation mode '{mode}', expected one of {self.SIMULATION_MODES}")
+
+        rng = np.random.default_rng(seed)
+        n = len(returns)
+        mean_return = float(np.mean(returns))
+        std_return = float(np.std(returns))
+        restart_probability = 1.0 / max(mean_block_length, 1.0)
+
+        remaining = num_simulations
+        while remaining > 0:
+            size = min(self.chunk_size, remaining)
+            remaining -= size
+            shape = (time_horizon_days, size)
+
+            if mode == "parametric":
+                yield rng.normal(mean_return, std_return, shape)
+            elif mode == "bootstrap":
+                yield returns[rng.integers(0, n, shape)]
+            else:
+                # Stationary bootstrap: a new block starts with probability 1/L, otherwise
+                # the next historical observation (wrapping around) is taken.
+                chunk = np.empty(shape)
+                index = rng.integers(0, n, size)
+                chunk[0] = returns[index]
+                for step in range(1, time_horizon_days):
+                    index += 1
+                    index[index == n] = 0
+                    restart = rng.random(size) < restart_probability
+                    index[restart] = rng.integers(0, n, int(np.count_nonzero(restart)))
+                    chunk[step] = returns[index]
+                yield chunk
+
     def run_simulation(
         self,
         strategy: TradingStrategy,
         historical_results: List[BacktestResult],
         num_simulations: int = 1000,
-        time_horizon_days: int = 252
+        time_horizon_days: int = 252,
+        mode: str = "parametric",
+        seed: Optional[int] = None,
+        mean_block_length: float = 10.0,
+        benchmark_return: float = 0.0,
+        target_return: Optional[float] = None
     ) -> MonteCarloResult:
         """Run Monte Carlo simulation"""
         if not historical_results:
             raise ValueError("No historical results provided for simulation")
-        
-        # Extract historical returns
-        all_returns = []
-        for result in historical_results:
-            if result.equity_curve:
-                values = [point["portfolio_value"] for point in result.equity_curve]
-                returns = []
-                for i in range(1, len(values)):
-                    returns.append((values[i] - values[i-1]) / values[i-1])
-                all_returns.extend(returns)
-        
-        if not all_returns:
+
+        returns = self.get_strategy_returns(strategy.strategy_id, historical_results)
+        return self.simulate_returns(
+            strategy, returns, num_simulations, time_horizon_days, mode, seed,
+            mean_block_length, benchmark_return, target_return
+        )
+
+    def simulate_returns(
+        self,
+        strategy: TradingStrategy,
+        returns: np.ndarray,
+        num_simulations: int = 1000,
+        time_horizon_days: int = 252,
+        mode: str = "parametric",
+        seed: Optional[int] = None,
+        mean_block_length: float = 10.0,
+        benchmark_return: float = 0.0,
+        target_return: Optional[float] = None
+    ) -> MonteCarloResult:
+        """Run Monte Carlo simulation from an already extracted returns array"""
+        if len(returns) == 0:
             raise ValueError("No returns data available for simulation")
-        
-        # Calculate distribution parameters
-        mean_return = np.mean(all_returns)
-        std_return = np.std(all_returns)
-        
-        # Run simulations
-        simulation_results = []
-        
-        for _ in range(num_simulations):
-            # Generate random returns
-            random_returns = np.random.normal(mean_return, std_return, time_horizon_days)
-            
-            # Calculate cumulative return
-            cumulative_return = np.prod(1 + random_returns) - 1
-            simulation_results.append(cumulative_return)
-        
-        # Calculate statistics
-        simulation_results = np.array(simulation_results)
-        
-        percentiles = {
-            "5th": np.percentile(simulation_results, 5),
-            "25th": np.percentile(simulation_results, 25),
-            "50th": np.percentile(simulation_results, 50),
-            "75th": np.percentile(simulation_results, 75),
-            "95th": np.percentile(simulation_results, 95)
-        }
-        
+
+        final_returns = np.empty(num_simulations)
+        max_drawdowns = np.empty(num_simulations)
+        drawdown_durations = np.empty(num_simulations, dtype=np.int64)
+
+        row = 0
+        for chunk in self._generate_chunks(
+            returns, num_simulations, time_horizon_days, mode, seed, mean_block_length
+        ):
+            size = chunk.shape[1]
+            chunk += 1.0
+
+            # Walk the horizon once, updating every path of the chunk per step
+            equity = np.ones(size)
+            peak = np.ones(size)
+            ratio = np.empty(size)
+            worst_ratio = np.ones(size)
+            underwater = np.empty(size, dtype=bool)
+            run = np.zeros(size)
+            longest_run = np.zeros(size)
+            for growth in chunk:
+                np.multiply(equity, growth, out=equity)
+                np.maximum(peak, equity, out=peak)
+                np.divide(equity, peak, out=ratio)
+                np.minimum(worst_ratio, ratio, out=worst_ratio)
+                np.less(ratio, 1.0, out=underwater)
+                run += 1.0
+                run *= underwater
+                np.maximum(longest_run, run, out=longest_run)
+
+            final_returns[row:row + size] = equity - 1.0
+            max_drawdowns[row:row + size] = 1.0 - worst_ratio
+            drawdown_durations[row:row + size] = longest_run
+            row += size
+
+        percentile_values = np.percentile(final_returns, [5, 25, 50, 75, 95])
+        percentiles = dict(zip(("5th", "25th", "50th", "75th", "95th"), percentile_values.tolist()))
+        var_level = percentile_values[0]
+
         return MonteCarloResult(
             strategy_id=strategy.strategy_id,
             num_simulations=num_simulations,
             confidence_level=0.95,
-            mean_return=float(np.mean(simulation_results)),
-            std_return=float(np.std(simulation_results)),
-            min_return=float(np.min(simulation_results)),
-            max_return=float(np.max(simulation_results)),
+            mean_return=float(np.mean(final_returns)),
+            std_return=float(np.std(final_returns)),
+            min_return=float(np.min(final_returns)),
+            max_return=float(np.max(final_returns)),
             percentiles=percentiles,
-            probability_of_loss=float(np.sum(simulation_results < 0) / num_simulations),
-            var_confidence=float(np.percentile(simulation_results, 5)),
-            expected_shortfall=float(np.mean(simulation_results[simulation_results <= np.percentile(simulation_results, 5)])),
-            prob_positive_return=float(np.sum(simulation_results > 0) / num_simulations)
+            probability_of_loss=float(np.mean(final_returns < 0)),
+            var_confidence=float(var_level),
+            expected_shortfall=float(np.mean(final_returns[final_returns <= var_level])),
+            worst_drawdown=float(np.max(max_drawdowns)),
+            avg_drawdown=float(np.mean(max_drawdowns)),
+            max_drawdown_duration=int(np.max(drawdown_durations)),
+            prob_positive_return=float(np.mean(final_returns > 0)),
+            prob_beat_benchmark=float(np.mean(final_returns > benchmark_return)),
+            prob_target_return=float(np.mean(final_returns >= target_return)) if target_return is not None else None
         )
 
 
@@ -512,9 +859,6 @@ class WalkForwardAnalyzer:
         step_size: int = 3      # months
     ) -> WalkForwardResult:
         """Run walk-forward analysis"""
-        periods = []
-        
-        # Convert to monthly data for analysis
         df = pd.DataFrame([{
             "timestamp": data.timestamp,
             "close": float(data.close),
@@ -524,6 +868,18 @@ class WalkForwardAnalyzer:
         df["timestamp"] = pd.to_datetime(df["timestamp"])
         df.set_index("timestamp", inplace=True)
         
+        return self.run_analysis_frame(strategy, df, window_size, step_size)
+    
+    def run_analysis_frame(
+        self,
+        strategy: TradingStrategy,
+        df: pd.DataFrame,
+        window_size: int = 12,
+        step_size: int = 3
+    ) -> WalkForwardResult:
+        """Run walk-forward analysis on a timestamp-indexed close/volume frame"""
+        periods = []
+        
         # Resample to monthly
         monthly_data = df.resample("M").last()
         
@@ -586,6 +942,323 @@ class WalkForwardAnalyzer:
         )
 
 
+class BacktestQueueFullError(Exception):
+    """Raised when the job scheduler is at capacity and rejects a submission"""
+    pass
+
+
+class BacktestJobCancelledError(Exception):
+    """Raised to the submitter when its job is cancelled"""
+    pass
+
+
+_EPOCH_NAIVE = datetime(1970, 1, 1)
+_EPOCH_AWARE = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_OHLCV_COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+@dataclass(frozen=True)
+class SharedBarsHandle:
+    """Picklable reference to a bar series published in shared memory"""
+    shm_name: str
+    length: int
+    symbol: str
+    utc_offset_seconds: Optional[int]  # None for naive timestamps
+
+
+class SharedMarketData:
+    """
+    Columnar copy of a List[MarketData] in a multiprocessing shared memory block.
+
+    Layout: int64 epoch-microsecond timestamps followed by a (5, n) float64
+    OHLCV block. Workers attach by name instead of unpickling the bar list.
+    """
+
+    def __init__(self, market_data: List[MarketData]):
+        n = len(market_data)
+        first_ts = market_data[0].timestamp if n else None
+        offset = first_ts.utcoffset() if first_ts is not None else None
+
+        self._shm = shared_memory.SharedMemory(create=True, size=max(n * 8 * (1 + len(_OHLCV_COLUMNS)), 1))
+        timestamps, ohlcv = self._views(self._shm, n)
+        epoch = _EPOCH_AWARE if offset is not None else _EPOCH_NAIVE
+        timestamps[:] = np.fromiter(
+            ((data.timestamp - epoch) // timedelta(microseconds=1) for data in market_data), dtype=np.int64, count=n
+        )
+        for row, column in enumerate(_OHLCV_COLUMNS):
+            ohlcv[row] = np.fromiter((float(getattr(data, column)) for data in market_data), dtype=float, count=n)
+
+        self.handle = SharedBarsHandle(
+            shm_name=self._shm.name,
+            length=n,
+            symbol=market_data[0].symbol if n else "",
+            utc_offset_seconds=int(offset.total_seconds()) if offset is not None else None
+        )
+
+    @staticmethod
+    def _views(shm: shared_memory.SharedMemory, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        timestamps = np.ndarray((n,), dtype=np.int64, buffer=shm.buf)
+        ohlcv = np.ndarray((len(_OHLCV_COLUMNS), n), dtype=float, buffer=shm.buf, offset=n * 8)
+        return timestamps, ohlcv
+
+    @classmethod
+    def load(cls, handle: SharedBarsHandle) -> Tuple[np.ndarray, np.ndarray]:
+        """Attach in a worker and return private copies of (timestamps_us, ohlcv)"""
+        try:
+            shm = shared_memory.SharedMemory(name=handle.shm_name, track=False)
+        except TypeError:  # Python < 3.13; pool workers share the owner's resource tracker
+            shm = shared_memory.SharedMemory(name=handle.shm_name)
+        try:
+            timestamps, ohlcv = cls._views(shm, handle.length)
+            return timestamps.copy(), ohlcv.copy()
+        finally:
+            del timestamps, ohlcv
+            shm.close()
+
+    @staticmethod
+    def to_datetimes(handle: SharedBarsHandle, timestamps_us: np.ndarray) -> List[datetime]:
+        if handle.utc_offset_seconds is None:
+            return [_EPOCH_NAIVE + timedelta(microseconds=us) for us in timestamps_us.tolist()]
+        tz = timezone(timedelta(seconds=handle.utc_offset_seconds))
+        return [(_EPOCH_AWARE + timedelta(microseconds=us)).astimezone(tz) for us in timestamps_us.tolist()]
+
+    def release(self):
+        """Close and unlink the block; attached workers keep their own copies"""
+        self._shm.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _bars_from_shared(handle: SharedBarsHandle, timestamps: List[datetime], ohlcv: np.ndarray) -> List[MarketData]:
+    open_, high, low, close, volume = (column.tolist() for column in ohlcv)
+    return [
+        MarketData(
+            symbol=handle.symbol,
+            timestamp=timestamps[i],
+            open=Decimal(str(open_[i])),
+            high=Decimal(str(high[i])),
+            low=Decimal(str(low[i])),
+            close=Decimal(str(close[i])),
+            volume=Decimal(str(volume[i]))
+        )
+        for i in range(handle.length)
+    ]
+
+
+def _backtest_job(
+    strategy: TradingStrategy,
+    handle: SharedBarsHandle,
+    request: StrategyBacktestRequest,
+    engine_mode: str
+) -> BacktestResult:
+    """Worker entry point for backtests"""
+    timestamps_us, ohlcv = SharedMarketData.load(handle)
+    timestamps = SharedMarketData.to_datetimes(handle, timestamps_us)
+    if engine_mode == "vectorized":
+        return VectorizedBacktestEngine().run_backtest_columns(strategy, timestamps, ohlcv[3], request)
+    return BacktestEngine().run_backtest(strategy, _bars_from_shared(handle, timestamps, ohlcv), request)
+
+
+def _walk_forward_job(
+    strategy: TradingStrategy,
+    handle: SharedBarsHandle,
+    window_size: int,
+    step_size: int
+) -> WalkForwardResult:
+    """Worker entry point for walk-forward analysis"""
+    timestamps_us, ohlcv = SharedMarketData.load(handle)
+    index = pd.DatetimeIndex(SharedMarketData.to_datetimes(handle, timestamps_us), name="timestamp")
+    df = pd.DataFrame({"close": ohlcv[3], "volume": ohlcv[4]}, index=index)
+    return WalkForwardAnalyzer().run_analysis_frame(strategy, df, window_size, step_size)
+
+
+def _monte_carlo_job(
+    strategy: TradingStrategy,
+    returns: np.ndarray,
+    num_simulations: int,
+    time_horizon_days: int,
+    options: Dict[str, Any]
+) -> MonteCarloResult:
+    """Worker entry point for Monte Carlo simulation"""
+    return MonteCarloSimulator().simulate_returns(
+        strategy, returns, num_simulations, time_horizon_days, **options
+    )
+
+
+@dataclass
+class BacktestJob:
+    """Bookkeeping for one scheduled job"""
+    job_id: str
+    job_type: str
+    strategy_id: str
+    status: str = "queued"  # queued, running, completed, failed, cancelled
+    submitted_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+    future: Optional[Future] = field(default=None, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "job_type": self.job_type,
+            "strategy_id": self.strategy_id,
+            "status": self.status,
+            "submitted_at": self.submitted_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error": self.error
+        }
+
+
+class BacktestJobScheduler:
+    """
+    Long-lived, bounded process pool for backtest, Monte Carlo and walk-forward jobs.
+
+    At most max_workers jobs run at once; up to max_queued_jobs more wait for a
+    slot and anything beyond that is rejected with BacktestQueueFullError.
+    """
+
+    def __init__(self, max_workers: int = 4, max_queued_jobs: int = 32, job_history_size: int = 500):
+        self.max_workers = max_workers
+        self.max_queued_jobs = max_queued_jobs
+        self.job_history_size = job_history_size
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots = asyncio.Semaphore(max_workers)
+        self.jobs: Dict[str, BacktestJob] = {}
+
+        self.queued_jobs = 0
+        self.running_jobs = 0
+        self.completed_jobs = 0
+        self.failed_jobs = 0
+        self.cancelled_jobs = 0
+        self.rejected_jobs = 0
+        self._total_wait_seconds = 0.0
+        self._started_count = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def start(self):
+        """Spawn the worker pool up front so the first job does not pay for it"""
+        self._get_executor()
+
+    async def shutdown(self):
+        for job in list(self.jobs.values()):
+            if job.status in ("queued", "running"):
+                self.cancel(job.job_id)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def submit(self, job_type: str, strategy_id: str, fn, *args, job_id: Optional[str] = None) -> Any:
+        """Run fn(*args) in the pool and return its result once a slot is free"""
+        if self.queued_jobs + self.running_jobs >= self.max_workers + self.max_queued_jobs:
+            self.rejected_jobs += 1
+            raise BacktestQueueFullError(
+                f"Backtest scheduler at capacity ({self.running_jobs} running, {self.queued_jobs} queued)"
+            )
+
+        job = BacktestJob(job_id=job_id or str(uuid.uuid4()), job_type=job_type, strategy_id=strategy_id)
+        self.jobs[job.job_id] = job
+        self._trim_history()
+
+        self.queued_jobs += 1
+        job.task = asyncio.create_task(self._run_job(job, fn, args))
+        try:
+            return await job.task
+        except asyncio.CancelledError:
+            # Cancelled through cancel(), not because the submitter itself is being cancelled
+            current = asyncio.current_task()
+            if job.status == "cancelled" and not (current and current.cancelling()):
+                raise BacktestJobCancelledError(f"Job {job.job_id} was cancelled")
+            raise
+
+    async def _run_job(self, job: BacktestJob, fn, args: tuple) -> Any:
+        queued = True
+        try:
+            async with self._slots:
+                queued = False
+                self.queued_jobs -= 1
+                self.running_jobs += 1
+                job.status = "running"
+                job.started_at = datetime.now(timezone.utc)
+                self._started_count += 1
+                self._total_wait_seconds += (job.started_at - job.submitted_at).total_seconds()
+                try:
+                    job.future = self._get_executor().submit(fn, *args)
+                    result = await asyncio.wrap_future(job.future)
+                finally:
+                    self.running_jobs -= 1
+
+            job.status = "completed"
+            self.completed_jobs += 1
+            return result
+
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            self.cancelled_jobs += 1
+            raise
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            self.failed_jobs += 1
+            raise
+        finally:
+            if queued:
+                self.queued_jobs -= 1
+            job.finished_at = datetime.now(timezone.utc)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a queued or running job.
+
+        Queued jobs never reach a worker. A running job's worker finishes its
+        current computation but the result is discarded.
+        """
+        job = self.jobs.get(job_id)
+        if not job or job.status not in ("queued", "running"):
+            return False
+        if job.future is not None:
+            job.future.cancel()
+        if job.task is not None:
+            job.task.cancel()
+        return True
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(job_id)
+        return job.to_dict() if job else None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "max_queued_jobs": self.max_queued_jobs,
+            "queue_depth": self.queued_jobs,
+            "running_jobs": self.running_jobs,
+            "completed_jobs": self.completed_jobs,
+            "failed_jobs": self.failed_jobs,
+            "cancelled_jobs": self.cancelled_jobs,
+            "rejected_jobs": self.rejected_jobs,
+            "avg_queue_wait_seconds": (
+                self._total_wait_seconds / self._started_count if self._started_count else 0.0
+            )
+        }
+
+    def _trim_history(self):
+        """Drop the oldest finished jobs beyond job_history_size"""
+        excess = len(self.jobs) - self.job_history_size
+        if excess <= 0:
+            return
+        for job_id in [j.job_id for j in self.jobs.values() if j.status not in ("queued", "running")][:excess]:
+            del self.jobs[job_id]
+
+
 class BacktestingService:
     """
     Advanced backtesting and strategy validation service
@@ -596,6 +1269,7 @@ class BacktestingService:
         
         # Engines
         self.backtest_engine = BacktestEngine()
+        self.vectorized_backtest_engine = VectorizedBacktestEngine()
         self.monte_carlo_simulator = MonteCarloSimulator()
         self.walk_forward_analyzer = WalkForwardAnalyzer()
         
@@ -609,9 +1283,16 @@ class BacktestingService:
         
         # Configuration
         self.max_concurrent_backtests = 4
+        self.max_queued_jobs = 32
         self.result_retention_days = 90
         self._shutdown = False
         
+        # Long-lived worker pool shared by backtest, Monte Carlo and walk-forward jobs
+        self.job_scheduler = BacktestJobScheduler(
+            max_workers=self.max_concurrent_backtests,
+            max_queued_jobs=self.max_queued_jobs
+        )
+        
     async def initialize(self):
         """Initialize the backtesting service"""
         try:
@@ -620,6 +1301,9 @@ class BacktestingService:
             # Load existing results
             await self._load_existing_results()
             
+            # Spawn worker pool
+            self.job_scheduler.start()
+            
             # Start background tasks
             asyncio.create_task(self._result_cleanup_loop())
             
@@ -629,8 +1313,19 @@ class BacktestingService:
             logger.error(f"Failed to initialize Backtesting Service: {e}")
             raise
     
-    async def run_strategy_backtest(self, request: StrategyBacktestRequest) -> BacktestResult:
-        """Run comprehensive strategy backtest"""
+    async def run_strategy_backtest(
+        self,
+        request: StrategyBacktestRequest,
+        engine_mode: Literal["loop", "vectorized"] = "loop",
+        job_id: Optional[str] = None
+    ) -> BacktestResult:
+        """
+        Run comprehensive strategy backtest.
+
+        engine_mode selects the per-bar loop engine or the columnar
+        VectorizedBacktestEngine; both produce the same BacktestResult.
+        job_id can be passed to cancel_job() while the backtest is queued or running.
+        """
         try:
             logger.info(f"Running backtest for strategy {request.strategy_id}")
             
@@ -646,7 +1341,7 @@ class BacktestingService:
                 raise HTTPException(status_code=400, detail="Insufficient market data for backtesting")
             
             # Run backtest
-            result = await self._run_backtest_async(strategy, market_data, request)
+            result = await self._run_backtest_async(strategy, market_data, request, engine_mode, job_id)
             
             # Store result
             self.backtest_results[result.backtest_id] = result
@@ -661,6 +1356,10 @@ class BacktestingService:
             
             return result
             
+        except BacktestQueueFullError as e:
+            raise HTTPException(status_code=429, detail=str(e))
+        except BacktestJobCancelledError as e:
+            raise HTTPException(status_code=409, detail=str(e))
         except Exception as e:
             logger.error(f"Failed to run backtest for strategy {request.strategy_id}: {e}")
             raise HTTPException(status_code=500, detail=f"Backtest failed: {str(e)}")
@@ -669,7 +1368,12 @@ class BacktestingService:
         self,
         strategy_id: str,
         num_simulations: int = 1000,
-        time_horizon_days: int = 252
+        time_horizon_days: int = 252,
+        job_id: Optional[str] = None,
+        mode: Literal["parametric", "bootstrap", "block_bootstrap"] = "parametric",
+        seed: Optional[int] = None,
+        mean_block_length: float = 10.0,
+        target_return: Optional[float] = None
     ) -> MonteCarloResult:
         """Run Monte Carlo simulation for strategy"""
         try:
@@ -691,7 +1395,13 @@ class BacktestingService:
             
             # Run simulation
             result = await self._run_monte_carlo_async(
-                strategy, historical_results, num_simulations, time_horizon_days
+                strategy, historical_results, num_simulations, time_horizon_days, job_id,
+                {
+                    "mode": mode,
+                    "seed": seed,
+                    "mean_block_length": mean_block_length,
+                    "target_return": target_return
+                }
             )
             
             # Store result
@@ -704,6 +1414,10 @@ class BacktestingService:
             
             return result
             
+        except BacktestQueueFullError as e:
+            raise HTTPException(status_code=429, detail=str(e))
+        except BacktestJobCancelledError as e:
+            raise HTTPException(status_code=409, detail=str(e))
         except Exception as e:
             logger.error(f"Failed to run Monte Carlo simulation for strategy {strategy_id}: {e}")
             raise HTTPException(status_code=500, detail=f"Monte Carlo simulation failed: {str(e)}")
@@ -714,7 +1428,8 @@ class BacktestingService:
         start_date: datetime,
         end_date: datetime,
         window_size: int = 12,
-        step_size: int = 3
+        step_size: int = 3,
+        job_id: Optional[str] = None
     ) -> WalkForwardResult:
         """Run walk-forward analysis for strategy"""
         try:
@@ -732,7 +1447,7 @@ class BacktestingService:
                 raise HTTPException(status_code=400, detail="Insufficient market data for walk-forward analysis")
             
             # Run analysis
-            result = await self._run_walk_forward_async(strategy, market_data, window_size, step_size)
+            result = await self._run_walk_forward_async(strategy, market_data, window_size, step_size, job_id)
             
             # Store result
             self.walk_forward_results[result.analysis_id] = result
@@ -744,6 +1459,10 @@ class BacktestingService:
             
             return result
             
+        except BacktestQueueFullError as e:
+            raise HTTPException(status_code=429, detail=str(e))
+        except BacktestJobCancelledError as e:
+            raise HTTPException(status_code=409, detail=str(e))
         except Exception as e:
             logger.error(f"Failed to run walk-forward analysis for strategy {strategy_id}: {e}")
             raise HTTPException(status_code=500, detail=f"Walk-forward analysis failed: {str(e)}")
@@ -819,49 +1538,92 @@ class BacktestingService:
         self,
         strategy: TradingStrategy,
         market_data: List[MarketData],
-        request: StrategyBacktestRequest
+        request: StrategyBacktestRequest,
+        engine_mode: str = "loop",
+        job_id: Optional[str] = None
     ) -> BacktestResult:
-        """Run backtest asynchronously"""
-        loop = asyncio.get_event_loop()
-        with ProcessPoolExecutor(max_workers=1) as executor:
-            future = loop.run_in_executor(
-                executor, self.backtest_engine.run_backtest, strategy, market_data, request
+        """Run backtest on the worker pool"""
+        # Mixed-symbol series have no single-symbol columnar layout; ship them as-is
+        if len({data.symbol for data in market_data}) > 1:
+            return await self.job_scheduler.submit(
+                "backtest", strategy.strategy_id,
+                self.backtest_engine.run_backtest, strategy, market_data, request,
+                job_id=job_id
             )
-            return await future
+        
+        shared_bars = SharedMarketData(market_data)
+        try:
+            return await self.job_scheduler.submit(
+                "backtest", strategy.strategy_id,
+                _backtest_job, strategy, shared_bars.handle, request, engine_mode,
+                job_id=job_id
+            )
+        finally:
+            shared_bars.release()
     
     async def _run_monte_carlo_async(
         self,
         strategy: TradingStrategy,
         historical_results: List[BacktestResult],
         num_simulations: int,
-        time_horizon_days: int
+        time_horizon_days: int,
+        job_id: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None
     ) -> MonteCarloResult:
-        """Run Monte Carlo simulation asynchronously"""
-        loop = asyncio.get_event_loop()
-        with ProcessPoolExecutor(max_workers=1) as executor:
-            future = loop.run_in_executor(
-                executor, 
-                self.monte_carlo_simulator.run_simulation,
-                strategy, historical_results, num_simulations, time_horizon_days
-            )
-            return await future
+        """Run Monte Carlo simulation on the worker pool"""
+        # Returns are extracted (and cached) here so workers only receive the flat array
+        returns = self.monte_carlo_simulator.get_strategy_returns(strategy.strategy_id, historical_results)
+        if len(returns) == 0:
+            raise ValueError("No returns data available for simulation")
+        
+        return await self.job_scheduler.submit(
+            "monte_carlo", strategy.strategy_id,
+            _monte_carlo_job, strategy, returns, num_simulations, time_horizon_days, options or {},
+            job_id=job_id
+        )
     
     async def _run_walk_forward_async(
         self,
         strategy: TradingStrategy,
         market_data: List[MarketData],
         window_size: int,
-        step_size: int
+        step_size: int,
+        job_id: Optional[str] = None
     ) -> WalkForwardResult:
-        """Run walk-forward analysis asynchronously"""
-        loop = asyncio.get_event_loop()
-        with ProcessPoolExecutor(max_workers=1) as executor:
-            future = loop.run_in_executor(
-                executor,
-                self.walk_forward_analyzer.run_analysis,
-                strategy, market_data, window_size, step_size
+        """Run walk-forward analysis on the worker pool"""
+        shared_bars = SharedMarketData(market_data)
+        try:
+            return await self.job_scheduler.submit(
+                "walk_forward", strategy.strategy_id,
+                _walk_forward_job, strategy, shared_bars.handle, window_size, step_size,
+                job_id=job_id
             )
-            return await future
+        finally:
+            shared_bars.release()
+    
+    # Job management
+    
+    def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get status of a queued, running or finished job"""
+        return self.job_scheduler.get_job(job_id)
+    
+    def cancel_job(self, job_id: str) -> bool:
+        """Cancel a queued or running job"""
+        return self.job_scheduler.cancel(job_id)
+    
+    def get_scheduler_metrics(self) -> Dict[str, Any]:
+        """Worker pool utilisation and queue depth"""
+        return self.job_scheduler.get_metrics()
+    
+    async def shutdown(self):
+        """Stop background loops and the worker pool"""
+        try:
+            logger.info("Shutting down Backtesting Service...")
+            self._shutdown = True
+            await self.job_scheduler.shutdown()
+            logger.info("Backtesting Service shutdown complete")
+        except Exception as e:
+            logger.error(f"Error during shutdown: {e}")
     
     # Helper methods
     
@@ -0,0 +1,151 @@
+"""
+Chain Balance Fetcher
+Async native and ERC20 balance reads batched into JSON-RPC batch requests, one per chain, with chains queried concurrently
+"""
+
+import asyncio
+import itertools
+import logging
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+BALANCE_OF_SELECTOR = "0x70a08231"  # balanceOf(address)
+DECIMALS_SELECTOR = "0x313ce567"  # decimals()
+
+
+class RPCBatchError(Exception):
+    """Raised when a chain's JSON-RPC batch cannot be completed"""
+    pass
+
+
+@dataclass
+class AddressBalances:
+    """Balances read for one address on one chain"""
+    chain_name: str
+    address: str
+    native_wei: int
+    token_balances: Dict[str, Decimal] = field(default_factory=dict)  # symbol -> balance in token units
+
+
+def encode_balance_of(address: str) -> str:
+    return BALANCE_OF_SELECTOR + address.lower().removeprefix("0x").rjust(64, "0")
+
+
+class ChainBalanceFetcher:
+    """
+    Reads native balances (eth_getBalance) and ERC20 balanceOf/decimals (eth_call) for many addresses.
+
+    Every read for a chain goes out as one JSON-RPC batch (split into max_batch_size chunks sent in
+    parallel), and all chains are fetched concurrently. Token decimals never change, so they are
+    cached for the life of the fetcher and only requested the first time a token is seen.
+    """
+
+    def __init__(self, rpc_urls: Dict[str, str], timeout_seconds: float = 10.0, max_batch_size: int = 200):
+        self.rpc_urls = rpc_urls
+        self.timeout_seconds = timeout_seconds
+        self.max_batch_size = max_batch_size
+        self.decimals_cache: Dict[Tuple[str, str], int] = {}  # (chain_name, token contract) -> decimals
+        self._client: Optional[httpx.AsyncClient] = None
+        self._request_ids = itertools.count(1)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout_seconds)
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _post_batch(self, chain_name: str, calls: List[Tuple[str, list]]) -> List[dict]:
+        """Send calls as JSON-RPC batches and return the responses in call order."""
+        url = self.rpc_urls[chain_name]
+        payload = [
+            {"jsonrpc": "2.0", "id": next(self._request_ids), "method": method, "params": params}
+            for method, params in calls
+        ]
+        chunks = [payload[i:i + self.max_batch_size] for i in range(0, len(payload), self.max_batch_size)]
+        try:
+            responses = await asyncio.gather(*(self._get_client().post(url, json=chunk) for chunk in chunks))
+        except httpx.HTTPError as e:
+            raise RPCBatchError(f"RPC request to {chain_name} failed: {e}") from e
+
+        by_id = {}
+        for response in responses:
+            if response.status_code != 200:
+                raise RPCBatchError(f"RPC request to {chain_name} returned HTTP {response.status_code}")
+            body = response.json()
+            if not isinstance(body, list):  # Servers without batch support answer with a single error object
+                raise RPCBatchError(f"RPC endpoint for {chain_name} rejected the batch: {body.get('error') if isinstance(body, dict) else body}")
+            by_id.update((item.get("id"), item) for item in body)
+        return [by_id.get(request["id"], {"error": {"message": "missing response"}}) for request in payload]
+
+    async def fetch_chain_balances(
+        self,
+        chain_name: str,
+        addresses: Sequence[str],
+        tokens: Optional[Dict[str, str]] = None
+    ) -> List[AddressBalances]:
+        """
+        Fetch native and token balances for addresses on one chain in a single batch.
+
+        tokens maps symbol -> contract address. A failed native read raises RPCBatchError; a failed
+        token read is logged and that token is left out for the address.
+        """
+        tokens = tokens or {}
+        calls: List[Tuple[str, list]] = [("eth_getBalance", [address, "latest"]) for address in addresses]
+        missing_decimals = [
+            (symbol, contract) for symbol, contract in tokens.items()
+            if (chain_name, contract.lower()) not in self.decimals_cache
+        ]
+        calls += [("eth_call", [{"to": contract, "data": DECIMALS_SELECTOR}, "latest"]) for _, contract in missing_decimals]
+        token_reads = [(address, symbol, contract) for address in addresses for symbol, contract in tokens.items()]
+        calls += [("eth_call", [{"to": contract, "data": encode_balance_of(address)}, "latest"]) for address, _, contract in token_reads]
+
+        results = await self._post_batch(chain_name, calls)
+        native_results = results[:len(addresses)]
+        decimals_results = results[len(addresses):len(addresses) + len(missing_decimals)]
+        balance_results = results[len(addresses) + len(missing_decimals):]
+
+        for (symbol, contract), result in zip(missing_decimals, decimals_results):
+            if "error" in result or not result.get("result") or result["result"] == "0x":
+                logger.warning(f"Failed to get {symbol} decimals on {chain_name}: {result.get('error')}")
+                continue
+            self.decimals_cache[(chain_name, contract.lower())] = int(result["result"], 16)
+
+        fetched = []
+        for address, result in zip(addresses, native_results):
+            if "error" in result:
+                raise RPCBatchError(f"eth_getBalance failed for {address} on {chain_name}: {result['error']}")
+            fetched.append(AddressBalances(chain_name=chain_name, address=address, native_wei=int(result["result"], 16)))
+
+        by_address = {balances.address: balances for balances in fetched}
+        for (address, symbol, contract), result in zip(token_reads, balance_results):
+            decimals = self.decimals_cache.get((chain_name, contract.lower()))
+            if decimals is None:
+                continue
+            if "error" in result or not result.get("result") or result["result"] == "0x":
+                logger.warning(f"Failed to get {symbol} balance on {chain_name}: {result.get('error')}")
+                continue
+            by_address[address].token_balances[symbol] = Decimal(int(result["result"], 16)) / (Decimal(10) ** decimals)
+        return fetched
+
+    async def fetch_balances(
+        self,
+        addresses_by_chain: Dict[str, Sequence[str]],
+        tokens_by_chain: Optional[Dict[str, Dict[str, str]]] = None
+    ) -> Dict[str, List[AddressBalances]]:
+        """Fetch balances for every chain concurrently; raises the first chain failure."""
+        tokens_by_chain = tokens_by_chain or {}
+        chains = [chain for chain, addresses in addresses_by_chain.items() if addresses]
+        results = await asyncio.gather(*(
+            self.fetch_chain_balances(chain, list(dict.fromkeys(addresses_by_chain[chain])), tokens_by_chain.get(chain))
+            for chain in chains
+        ))
+        return dict(zip(chains, results))
@@ -25,6 +25,8 @@ from ..models.master_wallet_models import (
     FundAllocationRequest, FundCollectionRequest
 )
 from ..core.service_registry import get_registry
+from .chain_balance_fetcher import ChainBalanceFetcher
+from .price_cache import PriceCache
 
 logger = logging.getLogger(__name__)
 
@@ -141,6 +143,23 @@ class MasterWalletService:
             "avalanche": {"chain_id": 43114, "rpc_url": "https://avalanche.llamarpc.com"}
         }
         
+        # Common ERC20 token contracts by chain
+        self.token_contracts = {
+            "ethereum": {
+                "USDC": "0xA0b86a33E6417c1bb79F6b3C2f58E1e9C23b2FBE",
+                "USDT": "0xdAC17F958D2ee523a2206206994597C13D831ec7"
+            },
+            "polygon": {
+                "USDC": "0x2791bca1f2de4661ed88a30c99a7a9449aa84174",
+                "USDT": "0xc2132d05d31c914a87c6611c10748aeb04b58e8f"
+            }
+        }
+        
+        # Batched async balance reads (one JSON-RPC batch per chain, chains in parallel)
+        self.balance_fetcher = ChainBalanceFetcher(
+            {chain_name: config["rpc_url"] for chain_name, config in self.chain_configs.items()}
+        )
+        
         # HD wallet derivation paths
         self.default_derivation_paths = {
             ChainType.ETHEREUM: "m/44'/60'/0'/0",
@@ -153,6 +172,13 @@ class MasterWalletService:
             ChainType.BITCOIN: "m/44'/0'/0'/0"
         }
         
+        # Shared USD price cache: valuations of the same assets reuse one fetch while it is fresh
+        self.price_cache = PriceCache(
+            self._fetch_asset_price_usd,
+            default_max_age_seconds=30.0,
+            max_age_overrides={"USDC": 300.0, "USDT": 300.0}
+        )
+        
         # Active wallets cache
         self.active_wallets: Dict[str, MasterWallet] = {}
         self.hd_wallet_keys: Dict[str, List[HDWalletKey]] = {}
@@ -297,27 +323,42 @@ class MasterWalletService:
             if not wallet:
                 raise ValueError(f"Wallet {wallet_id} not found")
             
+            # One batched request per connected chain, all chains fetched concurrently
+            addresses_by_chain: Dict[str, List[str]] = {}
+            for address_info in wallet.addresses:
+                if address_info.chain_name in self.web3_connections:
+                    addresses_by_chain.setdefault(address_info.chain_name, []).append(address_info.address)
+            fetched = await self.balance_fetcher.fetch_balances(addresses_by_chain, self.token_contracts)
+            fetched_by_address = {
+                (chain_name, address_balances.address): address_balances
+                for chain_name, chain_balances in fetched.items()
+                for address_balances in chain_balances
+            }
+            
             balances = []
             
             for address_info in wallet.addresses:
-                # Get native token balance
-                chain_name = address_info.chain_name
-                if chain_name in self.web3_connections:
-                    web3 = self.web3_connections[chain_name]
-                    
-                    # Get ETH/native token balance
-                    balance_wei = web3.eth.get_balance(address_info.address)
-                    balance_eth = web3.from_wei(balance_wei, 'ether')
-                    
-                    native_balance = WalletBalance(
-                        asset_symbol=self._get_native_symbol(chain_name),
-                        balance=Decimal(str(balance_eth)),
-                        available_balance=Decimal(str(balance_eth))
-                    )
-                    balances.append(native_balance)
-                    
-                    # Get ERC20 token balances (USDC, USDT, etc.)
-                    await self._get_erc20_balances(address_info.address, chain_name, balances)
+                address_balances = fetched_by_address.get((address_info.chain_name, address_info.address))
+                if not address_balances:
+                    continue
+                
+                # ETH/native token balance
+                balance_eth = Web3.from_wei(address_balances.native_wei, 'ether')
+                native_balance = WalletBalance(
+                    asset_symbol=self._get_native_symbol(address_info.chain_name),
+                    balance=Decimal(str(balance_eth)),
+                    available_balance=Decimal(str(balance_eth))
+                )
+                balances.append(native_balance)
+                
+                # ERC20 token balances (USDC, USDT, etc.)
+                for symbol, balance_decimal in address_balances.token_balances.items():
+                    if balance_decimal > 0:
+                        balances.append(WalletBalance(
+                            asset_symbol=symbol,
+                            balance=balance_decimal,
+                            available_balance=balance_decimal
+                        ))
             
             # Update wallet balances
             wallet.balances = balances
@@ -336,73 +377,6 @@ class MasterWalletService:
             logger.error(f"Failed to get wallet balances for {wallet_id}: {e}")
             raise
     
-    async def _get_erc20_balances(self, address: str, chain_name: str, balances: List[WalletBalance]):
-        """Get ERC20 token balances for an address"""
-        try:
-            # Common token contracts by chain
-            token_contracts = {
-                "ethereum": {
-                    "USDC": "0xA0b86a33E6417c1bb79F6b3C2f58E1e9C23b2FBE",
-                    "USDT": "0xdAC17F958D2ee523a2206206994597C13D831ec7"
-                },
-                "polygon": {
-                    "USDC": "0x2791bca1f2de4661ed88a30c99a7a9449aa84174",
-                    "USDT": "0xc2132d05d31c914a87c6611c10748aeb04b58e8f"
-                }
-            }
-            
-            if chain_name not in token_contracts:
-                return
-            
-            web3 = self.web3_connections[chain_name]
-            
-            # Standard ERC20 ABI for balanceOf
-            erc20_abi = [
-                {
-                    "constant": True,
-                    "inputs": [{"name": "_owner", "type": "address"}],
-                    "name": "balanceOf",
-                    "outputs": [{"name": "balance", "type": "uint256"}],
-                    "type": "function"
-                },
-                {
-                    "constant": True,
-                    "inputs": [],
-                    "name": "decimals",
-                    "outputs": [{"name": "", "type": "uint8"}],
-                    "type": "function"
-                }
-            ]
-            
-            for symbol, contract_address in token_contracts[chain_name].items():
-                try:
-                    contract = web3.eth.contract(
-                        address=Web3.to_checksum_address(contract_address),
-                        abi=erc20_abi
-                    )
-                    
-                    # Get balance and decimals
-                    balance_raw = contract.functions.balanceOf(address).call()
-                    decimals = contract.functions.decimals().call()
-                    
-                    # Convert to decimal
-                    balance_decimal = Decimal(balance_raw) / (Decimal(10) ** decimals)
-                    
-                    if balance_decimal > 0:
-                        token_balance = WalletBalance(
-                            asset_symbol=symbol,
-                            balance=balance_decimal,
-                            available_balance=balance_decimal
-                        )
-                        balances.append(token_balance)
-                        
-                except Exception as e:
-                    logger.warning(f"Failed to get {symbol} balance on {chain_name}: {e}")
-                    continue
-                    
-        except Exception as e:
-            logger.error(f"Failed to get ERC20 balances: {e}")
-    
     def _get_native_symbol(self, chain_name: str) -> str:
         """Get native token symbol for chain"""
         symbols = {
@@ -520,13 +494,17 @@ class MasterWalletService:
         """Calculate total wallet balance in USD"""
         total_usd = Decimal("0")
         
+        # Price every unvalued asset in one batch lookup
+        prices = await self._get_asset_prices_usd(
+            balance.asset_symbol for balance in wallet.balances if not balance.balance_usd
+        )
+        
         for balance in wallet.balances:
             if balance.balance_usd:
                 total_usd += balance.balance_usd
             else:
-                # Get current price and calculate USD value
-                price_usd = await self._get_asset_price_usd(balance.asset_symbol)
-                balance_usd = balance.balance * price_usd
+                # Calculate USD value from the current price
+                balance_usd = balance.balance * prices[balance.asset_symbol]
                 total_usd += balance_usd
         
         return total_usd
@@ -534,29 +512,38 @@ class MasterWalletService:
     async def _get_asset_price_usd(self, asset_symbol: str) -> Decimal:
         """Get current asset price in USD"""
         try:
-            # Use market data service if available
-            market_data_service = self.registry.get_service("market_data")
-            if market_data_service:
-                price_data = await market_data_service.get_live_data(f"{asset_symbol}/USD")
-                if price_data and 'price' in price_data:
-                    return Decimal(str(price_data['price']))
-            
-            # Fallback to hardcoded prices (replace with real price feed)
-            fallback_prices = {
-                "ETH": Decimal("2500"),
-                "BTC": Decimal("45000"),
-                "MATIC": Decimal("0.8"),
-                "BNB": Decimal("300"),
-                "USDC": Decimal("1"),
-                "USDT": Decimal("1")
-            }
-            
-            return fallback_prices.get(asset_symbol, Decimal("1"))
-            
+            return await self.price_cache.get_price(asset_symbol)
         except Exception as e:
             logger.error(f"Failed to get price for {asset_symbol}: {e}")
             return Decimal("1")
     
+    async def _get_asset_prices_usd(self, asset_symbols) -> Dict[str, Decimal]:
+        """Get current USD prices for several assets (Decimal("1") for any that cannot be priced)"""
+        symbols = list(dict.fromkeys(asset_symbols))
+        prices = await self.price_cache.get_prices(symbols)
+        return {symbol: prices.get(symbol, Decimal("1")) for symbol in symbols}
+    
+    async def _fetch_asset_price_usd(self, asset_symbol: str) -> Decimal:
+        """Fetch an asset price from the price source (called by the price cache on a miss)"""
+        # Use market data service if available
+        market_data_service = self.registry.get_service("market_data")
+        if market_data_service:
+            price_data = await market_data_service.get_live_data(f"{asset_symbol}/USD")
+            if price_data and 'price' in price_data:
+                return Decimal(str(price_data['price']))
+        
+        # Fallback to hardcoded prices (replace with real price feed)
+        fallback_prices = {
+            "ETH": Decimal("2500"),
+            "BTC": Decimal("45000"),
+            "MATIC": Decimal("0.8"),
+            "BNB": Decimal("300"),
+            "USDC": Decimal("1"),
+            "USDT": Decimal("1")
+        }
+        
+        return fallback_prices.get(asset_symbol, Decimal("1"))
+    
     async def _record_transaction(self, wallet_id: str, transaction: WalletTransaction):
         """Record a wallet transaction"""
         try:
@@ -619,9 +606,14 @@ class MasterWalletService:
             try:
                 await asyncio.sleep(self.distribution_interval)
                 
-                for wallet_id, wallet in self.active_wallets.items():
-                    if wallet.config.auto_distribution:
-                        await self._execute_auto_distribution(wallet)
+                wallets = [wallet for wallet in self.active_wallets.values() if wallet.config.auto_distribution]
+                # Refresh every needed price once per cycle so per-wallet valuations hit the cache
+                await self._get_asset_prices_usd(
+                    balance.asset_symbol for wallet in wallets for balance in wallet.balances if not balance.balance_usd
+                )
+                
+                for wallet in wallets:
+                    await self._execute_auto_distribution(wallet)
                         
             except Exception as e:
                 logger.error(f"Error in auto-distribution loop: {e}")
@@ -751,6 +743,7 @@ class MasterWalletService:
             "active_wallets": len(self.active_wallets),
             "web3_connections": len(self.web3_connections),
             "auto_distribution_enabled": self.auto_distribution_enabled,
+            "price_cache": self.price_cache.get_metrics(),
             "last_health_check": datetime.now(timezone.utc).isoformat()
         }
     
@@ -3,7 +3,7 @@ from datetime import datetime, timezone
 from loguru import logger
 import math # For checking isnan or isinf
 
-from ..models.dashboard_models import TradeLogItem, PortfolioSnapshotOutput # Added PortfolioSnapshotOutput
+from ..models.dashboard_models import PortfolioSnapshotOutput # Added PortfolioSnapshotOutput
 from ..models.performance_models import PerformanceMetrics
 from .trading_data_service import TradingDataService
 from .portfolio_snapshot_service import PortfolioSnapshotService # Added
@@ -20,63 +20,33 @@ class PerformanceCalculationService:
         logger.info(f"Calculating performance metrics for agent_id: {agent_id}")
 
         try:
-            # Fetch all trades for calculation. Using a large limit.
-            # In a real system, this might need pagination or date range filters.
-            trade_history = await self.trading_data_service.get_trade_history(agent_id, limit=10000)
+            # Closed-trade aggregates are maintained by the trade ledger at write time,
+            # so this is a lookup rather than a scan of the full trade history.
+            statistics = await self.trading_data_service.get_trade_statistics(agent_id)
         except Exception as e:
-            logger.error(f"Error fetching trade history for agent {agent_id}: {e}", exc_info=True)
+            logger.error(f"Error fetching trade statistics for agent {agent_id}: {e}", exc_info=True)
             return PerformanceMetrics(
                 agent_id=agent_id,
                 notes=f"Failed to fetch trade history: {str(e)}"
             )
 
-        if not trade_history:
+        if statistics.total_trades == 0:
             logger.warning(f"No trade history found for agent {agent_id}. Returning empty metrics.")
             return PerformanceMetrics(
                 agent_id=agent_id,
                 notes="No trade history available for calculation."
             )
 
-        total_trades = 0
-        winning_trades = 0
-        losing_trades = 0
-        neutral_trades = 0
-        total_net_pnl = 0.0
-        current_gross_profit = 0.0
-        current_gross_loss = 0.0  # Store as positive sum of losses
-
-        min_timestamp: Optional[datetime] = None
-        max_timestamp: Optional[datetime] = None
-
-        pnl_data_available = False
-
-        for trade in trade_history:
-            total_trades += 1
-            if trade.timestamp:
-                if min_timestamp is None or trade.timestamp < min_timestamp:
-                    min_timestamp = trade.timestamp
-                if max_timestamp is None or trade.timestamp > max_timestamp:
-                    max_timestamp = trade.timestamp
-
-            if trade.realized_pnl is not None:
-                pnl_data_available = True
-                if not (math.isnan(trade.realized_pnl) or math.isinf(trade.realized_pnl)):
-                    total_net_pnl += trade.realized_pnl
-                    if trade.realized_pnl > 1e-9: # Avoid floating point issues around zero
-                        winning_trades += 1
-                        current_gross_profit += trade.realized_pnl
-                    elif trade.realized_pnl < -1e-9: # Avoid floating point issues around zero
-                        losing_trades += 1
-                        current_gross_loss += abs(trade.realized_pnl)
-                    else:
-                        neutral_trades += 1
-                else:
-                    logger.warning(f"Skipping trade {trade.trade_id} due to invalid PnL value: {trade.realized_pnl}")
-                    neutral_trades +=1 # Or handle as error / skip count
-            else:
-                # If PnL is None, count as neutral or skip based on desired logic
-                neutral_trades += 1
+        total_trades = statistics.total_trades
+        winning_trades = statistics.winning_trades
+        losing_trades = statistics.losing_trades
+        neutral_trades = statistics.neutral_trades
+        total_net_pnl = statistics.total_net_pnl
+        current_gross_profit = statistics.gross_profit
+        current_gross_loss = statistics.gross_loss  # Stored as positive sum of losses
 
+        min_timestamp: Optional[datetime] = statistics.first_exit_timestamp
+        max_timestamp: Optional[datetime] = statistics.last_exit_timestamp
 
         win_rate: Optional[float] = None
         loss_rate: Optional[float] = None
@@ -86,7 +56,7 @@ class PerformanceCalculationService:
             if determined_trades > 0 :
                 win_rate = winning_trades / determined_trades if determined_trades > 0 else 0.0
                 loss_rate = losing_trades / determined_trades if determined_trades > 0 else 0.0
-            else: # All trades were neutral or PnL was None
+            else: # All trades were neutral
                  win_rate = 0.0
                  loss_rate = 0.0
 
@@ -106,16 +76,7 @@ class PerformanceCalculationService:
             profit_factor = float('inf') # Or a large number, or None, depending on convention
 
         notes_list = []
-        if not pnl_data_available:
-            notes_list.append("Realized PnL data was missing for all trades; most metrics will be zero or None.")
-        if any(trade.realized_pnl is None for trade in trade_history):
-             notes_list.append("Some trades were missing realized PnL; these were treated as neutral.")
-        # Since TradeLogItem is mocked in TradingDataService, add a note about it.
-        # This check is conceptual as the service itself doesn't know if data was mocked by its dependency.
-        # This note should ideally be added if TradingDataService indicates mocked data.
-        # For now, we assume it might be mocked.
-        if "MOCK_COIN" in (trade_history[0].asset if trade_history else "") or \
-           "PAPER_COIN" in (trade_history[0].asset if trade_history else ""):
+        if any("MOCK_COIN" in asset or "PAPER_COIN" in asset for asset in statistics.assets):
             notes_list.append("Performance calculated using potentially mocked trade history data.")
 
 
@@ -130,8 +91,8 @@ class PerformanceCalculationService:
             win_rate=win_rate,
             loss_rate=loss_rate,
             total_net_pnl=total_net_pnl,
-            gross_profit=current_gross_profit if pnl_data_available else None,
-            gross_loss=current_gross_loss if pnl_data_available else None,
+            gross_profit=current_gross_profit,
+            gross_loss=current_gross_loss,
             average_win_amount=average_win_amount,
             average_loss_amount=average_loss_amount,
             profit_factor=profit_factor,
@@ -0,0 +1,167 @@
+"""
+Price Cache
+Shared asset price cache with per-asset staleness bounds, single-flight refresh and batch lookups
+"""
+
+import asyncio
+import logging
+import time
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PriceUnavailableError(Exception):
+    """Raised when a price cannot be fetched and no cached value exists"""
+    pass
+
+
+class PriceCache:
+    """
+    Caches asset prices so repeated valuations of the same handful of assets share one fetch.
+
+    A cached price is served while it is younger than the asset's max age (max_age_overrides, else
+    default_max_age_seconds). Concurrent lookups of the same expired asset wait on a single in-flight
+    refresh instead of each calling the price source. If a refresh fails, the last known price is
+    served (counted as a stale serve) until one succeeds.
+    """
+
+    def __init__(
+        self,
+        fetch_price: Callable[[str], Awaitable[Decimal]],
+        default_max_age_seconds: float = 30.0,
+        max_age_overrides: Optional[Dict[str, float]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.fetch_price = fetch_price
+        self.default_max_age_seconds = default_max_age_seconds
+        self.max_age_overrides = dict(max_age_overrides or {})
+        self._clock = clock
+        self._prices: Dict[str, Tuple[Decimal, float]] = {}  # symbol -> (price, fetched at)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._refresh_tasks: Set[asyncio.Task] = set()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.stale_serves = 0
+
+    def max_age(self, symbol: str) -> float:
+        return self.max_age_overrides.get(symbol, self.default_max_age_seconds)
+
+    def set_price(self, symbol: str, price: Decimal):
+        """Store a price pushed from elsewhere (e.g. a live feed)"""
+        self._prices[symbol] = (price, self._clock())
+
+    def invalidate(self, symbol: Optional[str] = None):
+        if symbol is None:
+            self._prices.clear()
+        else:
+            self._prices.pop(symbol, None)
+
+    def _fresh(self, symbol: str) -> Optional[Decimal]:
+        entry = self._prices.get(symbol)
+        if entry and self._clock() - entry[1] <= self.max_age(symbol):
+            return entry[0]
+        return None
+
+    async def _refresh(self, symbol: str, future: asyncio.Future):
+        try:
+            price = await self.fetch_price(symbol)
+            self.refreshes += 1
+            self._prices[symbol] = (price, self._clock())
+            future.set_result(price)
+        except Exception as e:
+            self._refresh_failed(symbol, future, e)
+        finally:
+            self._inflight.pop(symbol, None)
+
+    def _refresh_failed(self, symbol: str, future: asyncio.Future, error: BaseException):
+        self.refresh_failures += 1
+        cached = self._prices.get(symbol)
+        if cached:
+            logger.warning(f"Price refresh for {symbol} failed, serving cached price: {error!r}")
+            self.stale_serves += 1
+            future.set_result(cached[0])
+        else:
+            future.set_exception(PriceUnavailableError(f"No price available for {symbol}: {error!r}"))
+
+    def _refresh_done(self, symbol: str, future: asyncio.Future, task: asyncio.Task):
+        self._refresh_tasks.discard(task)
+        if not future.done():
+            # Cancelled (possibly before it started): lookups waiting on the shared future must not hang
+            if self._inflight.get(symbol) is future:
+                del self._inflight[symbol]
+            self._refresh_failed(symbol, future, asyncio.CancelledError())
+
+    def _start_refresh(self, symbol: str) -> asyncio.Future:
+        future = self._inflight.get(symbol)
+        if future is not None:
+            self.coalesced += 1
+            return future
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[symbol] = future
+        task = asyncio.create_task(self._refresh(symbol, future))
+        self._refresh_tasks.add(task)  # Strong reference: the loop only keeps a weak one
+        task.add_done_callback(lambda done: self._refresh_done(symbol, future, done))
+        return future
+
+    async def get_price(self, symbol: str) -> Decimal:
+        price = self._fresh(symbol)
+        if price is not None:
+            self.hits += 1
+            return price
+        self.misses += 1
+        return await asyncio.shield(self._start_refresh(symbol))
+
+    async def get_prices(self, symbols: Iterable[str]) -> Dict[str, Decimal]:
+        """
+        Look up many symbols at once: fresh ones come from the cache and all expired ones are
+        refreshed concurrently. Symbols with no obtainable price are left out of the result.
+        """
+        prices: Dict[str, Decimal] = {}
+        pending: Dict[str, asyncio.Future] = {}
+        for symbol in dict.fromkeys(symbols):
+            price = self._fresh(symbol)
+            if price is not None:
+                self.hits += 1
+                prices[symbol] = price
+            else:
+                self.misses += 1
+                pending[symbol] = self._start_refresh(symbol)
+        if pending:
+            results = await asyncio.gather(*(asyncio.shield(future) for future in pending.values()), return_exceptions=True)
+            for symbol, result in zip(pending, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Failed to get price for {symbol}: {result}")
+                else:
+                    prices[symbol] = result
+        return prices
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Hit rate, refresh counts and per-asset staleness (age / max age)"""
+        now = self._clock()
+        lookups = self.hits + self.misses
+        staleness = {
+            symbol: {
+                "age_seconds": round(now - fetched_at, 3),
+                "max_age_seconds": self.max_age(symbol),
+                "stale": now - fetched_at > self.max_age(symbol)
+            }
+            for symbol, (_, fetched_at) in self._prices.items()
+        }
+        return {
+            "cached_assets": len(self._prices),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "coalesced_refreshes": self.coalesced,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "stale_serves": self.stale_serves,
+            "max_age_seconds_observed": max((entry["age_seconds"] for entry in staleness.values()), default=0.0),
+            "staleness": staleness
+        }
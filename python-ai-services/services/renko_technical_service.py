@@ -4,11 +4,13 @@ from ..models.learning_models import LearningLogEntry
 from ..services.event_bus_service import EventBusService
 from ..services.market_data_service import MarketDataService
 from ..services.learning_data_logger_service import LearningDataLoggerService
+from ..strategies.renko_bricks import RenkoBrickBuilder
 from typing import List, Dict, Any, Optional, Literal, Tuple # Added Literal and Tuple
 import pandas as pd
 import numpy as np # For NaN checks
 from loguru import logger
 from datetime import datetime, timezone
+from bisect import bisect_right
 
 class RenkoTechnicalService:
     def __init__(
@@ -23,6 +25,11 @@ class RenkoTechnicalService:
         self.market_data_service = market_data_service
         self.learning_logger = learning_logger
 
+        # Live Renko charts per symbol; new klines are appended to the chart instead
+        # of rebuilding it while the brick size is unchanged and klines are contiguous
+        self._renko_charts: Dict[str, RenkoBrickBuilder] = {}
+        self._renko_last_kline_ts: Dict[str, int] = {}
+
         if self.agent_config.strategy.renko_params:
             self.params = self.agent_config.strategy.renko_params
         else:
@@ -82,36 +89,40 @@ class RenkoTechnicalService:
             logger.warning(f"Renko ({self.agent_config.agent_id}): Cannot calculate Renko. No prices or invalid brick size ({brick_size}).")
             return []
 
-        bricks: List[Dict[str, Any]] = []
-        if not prices: return []
-
-        last_brick_close = prices[0]
-
-        for i in range(1, len(prices)):
-            price = prices[i]
-            timestamp_ms = timestamps[i]
-
-            price_diff = price - last_brick_close
+        # Every move of one brick size from the last brick close forms bricks in that direction
+        builder = RenkoBrickBuilder(brick_size, reversal_bricks=1, initial_capacity=len(prices))
+        return self._brick_records(builder.update(prices, timestamps))
 
-            if abs(price_diff) >= brick_size:
-                num_bricks = int(abs(price_diff) / brick_size)
-                brick_type = "up" if price_diff > 0 else "down"
-
-                for _ in range(num_bricks):
-                    brick_open = last_brick_close
-                    if brick_type == "up":
-                        brick_close = brick_open + brick_size
-                    else: # down
-                        brick_close = brick_open - brick_size
+    def _brick_records(self, bricks: pd.DataFrame) -> List[Dict[str, Any]]:
+        if bricks.empty:
+            return []
+        return [
+            {
+                "type": "up" if brick_type == 1 else "down",
+                "open": round(float(brick_open), 5),
+                "close": round(float(brick_close), 5),
+                "timestamp": int(timestamp)
+            }
+            for brick_type, brick_open, brick_close, timestamp
+            in zip(bricks["type"], bricks["open"], bricks["close"], bricks.index)
+        ]
+
+    def _update_renko_chart(self, symbol: str, timestamps: List[int], prices: List[float], brick_size: float) -> RenkoBrickBuilder:
+        chart = self._renko_charts.get(symbol)
+        last_ts = self._renko_last_kline_ts.get(symbol)
+
+        if chart is None or chart.brick_size != brick_size or last_ts is None or timestamps[0] > last_ts:
+            # New symbol, new brick size (ATR mode) or a gap since the last klines: rebuild from this window
+            chart = RenkoBrickBuilder(brick_size, reversal_bricks=1, initial_capacity=len(prices))
+            chart.update(prices, timestamps)
+        else:
+            start = bisect_right(timestamps, last_ts)
+            if start < len(prices):
+                chart.update(prices[start:], timestamps[start:])
 
-                    bricks.append({
-                        "type": brick_type,
-                        "open": round(brick_open, 5),
-                        "close": round(brick_close, 5),
-                        "timestamp": timestamp_ms
-                    })
-                    last_brick_close = brick_close
-        return bricks
+        self._renko_charts[symbol] = chart
+        self._renko_last_kline_ts[symbol] = max(timestamps[-1], last_ts or timestamps[-1])
+        return chart
 
     async def analyze_symbol_and_generate_signal(self, symbol: str):
         logger.info(f"RenkoSvc ({self.agent_config.agent_id}): Analyzing {symbol} with params: {self.params.model_dump_json()}") # Use RenkoParams from init
@@ -172,24 +183,26 @@ class RenkoTechnicalService:
             return
 
         logger.debug(f"RenkoSvc ({self.agent_config.agent_id}): Using brick size {brick_s:.5f} for {symbol}")
-        renko_bricks = self._calculate_renko_bricks(timestamps_ms, closes, brick_s) # Pass timestamps_ms
+        renko_chart = self._update_renko_chart(symbol, timestamps_ms, closes, brick_s)
+        num_bricks = len(renko_chart)
 
         # Using self.params.signal_confirmation_bricks
-        if len(renko_bricks) < self.params.signal_confirmation_bricks:
-            logger.debug(f"RenkoSvc ({self.agent_config.agent_id}): Not enough Renko bricks ({len(renko_bricks)}) for signal on {symbol} (need {self.params.signal_confirmation_bricks}).")
-            await self._log_learning_event("SignalEvaluation", {"symbol": symbol, "brick_size": brick_s, "bricks_generated": len(renko_bricks), "required_bricks": self.params.signal_confirmation_bricks}, outcome={"signal_generated": False}, notes="Not enough bricks for signal.")
+        if num_bricks < self.params.signal_confirmation_bricks:
+            logger.debug(f"RenkoSvc ({self.agent_config.agent_id}): Not enough Renko bricks ({num_bricks}) for signal on {symbol} (need {self.params.signal_confirmation_bricks}).")
+            await self._log_learning_event("SignalEvaluation", {"symbol": symbol, "brick_size": brick_s, "bricks_generated": num_bricks, "required_bricks": self.params.signal_confirmation_bricks}, outcome={"signal_generated": False}, notes="Not enough bricks for signal.")
             return
 
-        last_n_bricks = renko_bricks[-self.params.signal_confirmation_bricks:]
+        # Only the confirmation sequence and the brick before it are needed
+        recent_bricks = self._brick_records(renko_chart.tail(self.params.signal_confirmation_bricks + 1))
+        last_n_bricks = recent_bricks[-self.params.signal_confirmation_bricks:]
         action: Optional[Literal["buy", "sell"]] = None
 
         first_brick_type_in_sequence = last_n_bricks[0]["type"]
         all_same_type_in_sequence = all(b["type"] == first_brick_type_in_sequence for b in last_n_bricks)
 
         if all_same_type_in_sequence:
-            brick_before_sequence_index = len(renko_bricks) - self.params.signal_confirmation_bricks - 1
-            if brick_before_sequence_index >= 0:
-                if renko_bricks[brick_before_sequence_index]["type"] != first_brick_type_in_sequence:
+            if num_bricks > self.params.signal_confirmation_bricks:
+                if recent_bricks[0]["type"] != first_brick_type_in_sequence:
                     action = "buy" if first_brick_type_in_sequence == "up" else "sell"
             else:
                 action = "buy" if first_brick_type_in_sequence == "up" else "sell"
@@ -202,7 +215,7 @@ class RenkoTechnicalService:
 
             # SL logic using stop_loss_bricks_away from the first brick of the signal sequence
             if self.params.stop_loss_bricks_away and self.params.stop_loss_bricks_away > 0:
-                first_signal_brick = renko_bricks[-self.params.signal_confirmation_bricks]
+                first_signal_brick = last_n_bricks[0]
                 if action == "buy": # Up bricks, SL is below
                     sl_price = first_signal_brick["open"] # As per prompt's simple SL logic
                 else: # Sell signal (down bricks), SL is above
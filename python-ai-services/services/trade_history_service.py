@@ -1,12 +1,16 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import select
-from typing import List, Optional, Dict, Deque, Callable, Any # Added Callable, Any
+from sqlalchemy import select, delete, inspect as sa_inspect
+from typing import List, Optional, Dict, Deque, Callable, Any, Set, Tuple # Added Callable, Any
 from datetime import datetime, timezone
 from collections import deque
+from contextlib import ExitStack, contextmanager
+import asyncio
+import math
+import threading
 
-from ..models.trade_history_models import TradeFillData
+from ..models.trade_history_models import TradeFillData, TradeStatistics
 from ..models.dashboard_models import TradeLogItem
-from ..models.db_models import TradeFillDB # New DB model import
+from ..models.db_models import TradeFillDB, TradeLotDB, ClosedTradeDB, TradeLedgerStatsDB # New DB model import
 from ..services.event_bus_service import EventBusService # Added
 from ..models.event_bus_models import Event # Added
 from loguru import logger
@@ -14,10 +18,69 @@ from loguru import logger
 class TradeHistoryServiceError(Exception): # Custom error for the service
     pass
 
+QUANTITY_EPSILON = 1e-9
+PNL_EPSILON = 1e-9 # Closed trades within this of zero count as neutral
+FILL_DURABILITY_MODES = ("commit", "accept")
+
+
+def _naive_utc(timestamp: datetime) -> datetime:
+    """Normalizes a timestamp to naive UTC, the form the ledger tables store."""
+    if timestamp.tzinfo is not None:
+        return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+def _aware_utc(timestamp: Optional[datetime]) -> Optional[datetime]:
+    if timestamp is None:
+        return None
+    return timestamp.replace(tzinfo=timezone.utc) if timestamp.tzinfo is None else timestamp
+
+class _FillTicket:
+    """Tracks one ingest_fills call whose fills may be committed across several groups."""
+
+    def __init__(self, count: int):
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.pending = count
+        self.error: Optional[Exception] = None
+
+    def settle(self, error: Optional[Exception] = None) -> None:
+        if error is not None and self.error is None:
+            self.error = error
+        self.pending -= 1
+        if self.pending == 0 and not self.future.done():
+            if self.error is not None:
+                self.future.set_exception(self.error)
+            else:
+                self.future.set_result(None)
+
+
 class TradeHistoryService:
-    def __init__(self, session_factory: Callable[[], Session], event_bus: Optional[EventBusService] = None): # Added event_bus
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        event_bus: Optional[EventBusService] = None, # Added event_bus
+        group_commit_window_ms: float = 5.0,
+        group_commit_max_rows: int = 500,
+        max_pending_fills: int = 10000,
+        durability: str = "commit",
+        ledger_lock_stripes: int = 64
+    ):
+        if durability not in FILL_DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode '{durability}'. Expected one of {FILL_DURABILITY_MODES}.")
         self.session_factory = session_factory
         self.event_bus = event_bus # Store it
+        self._ledger_checked_agents: Set[str] = set() # Agents whose legacy fills are known to be in the ledger
+        # Ledger updates read then rewrite lots and aggregates, so writes to one agent/asset are serialized.
+        # Threading locks, since the writes run on executor threads.
+        self._ledger_lock_stripes: List[threading.Lock] = [threading.Lock() for _ in range(max(1, ledger_lock_stripes))]
+
+        # Group-commit writer for ingest_fills
+        self.group_commit_window_ms = group_commit_window_ms
+        self.group_commit_max_rows = group_commit_max_rows
+        self.durability = durability
+        self._ingest_queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending_fills)
+        self._writer_task: Optional[asyncio.Task] = None
+        self.ingest_stats: Dict[str, int] = {"groups_committed": 0, "fills_committed": 0, "fills_failed": 0, "max_group_size": 0}
         logger.info("TradeHistoryService initialized with database session factory.")
         if self.event_bus:
             logger.info("EventBusService available to TradeHistoryService.")
@@ -44,162 +107,515 @@ class TradeHistoryService:
             exchange_trade_id=db_fill.exchange_trade_id
         )
 
-    async def record_fill(self, fill_data: TradeFillData) -> TradeFillData:
+    async def _run_db(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Runs a blocking DB call in the default executor so the event loop stays free."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, func, *args)
+
+    # --- FIFO ledger maintenance ---
+
+    @contextmanager
+    def _ledger_locked(self, keys: Set[Tuple[str, str]]):
+        """Holds the lock stripes of the given (agent_id, asset) ledgers, taken in index order to avoid deadlocks."""
+        stripes = sorted({hash(key) % len(self._ledger_lock_stripes) for key in keys})
+        with ExitStack() as stack:
+            for index in stripes:
+                stack.enter_context(self._ledger_lock_stripes[index])
+            yield
+
+    @staticmethod
+    def _new_stats(agent_id: str, asset: str) -> TradeLedgerStatsDB:
+        stats = TradeLedgerStatsDB(agent_id=agent_id, asset=asset)
+        TradeHistoryService._reset_stats(stats)
+        return stats
+
+    @staticmethod
+    def _reset_stats(stats: TradeLedgerStatsDB) -> None:
+        stats.last_fill_timestamp = None
+        stats.total_trades = 0
+        stats.winning_trades = 0
+        stats.losing_trades = 0
+        stats.neutral_trades = 0
+        stats.total_net_pnl = 0.0
+        stats.gross_profit = 0.0
+        stats.gross_loss = 0.0
+        stats.first_exit_timestamp = None
+        stats.last_exit_timestamp = None
+
+    @staticmethod
+    def _accumulate_stats(stats: TradeLedgerStatsDB, pnl: float, exit_timestamp: datetime) -> None:
+        stats.total_trades += 1
+        if math.isnan(pnl) or math.isinf(pnl):
+            stats.neutral_trades += 1
+        else:
+            stats.total_net_pnl += pnl
+            if pnl > PNL_EPSILON:
+                stats.winning_trades += 1
+                stats.gross_profit += pnl
+            elif pnl < -PNL_EPSILON:
+                stats.losing_trades += 1
+                stats.gross_loss += abs(pnl)
+            else:
+                stats.neutral_trades += 1
+        if stats.first_exit_timestamp is None or exit_timestamp < stats.first_exit_timestamp:
+            stats.first_exit_timestamp = exit_timestamp
+        if stats.last_exit_timestamp is None or exit_timestamp > stats.last_exit_timestamp:
+            stats.last_exit_timestamp = exit_timestamp
+
+    @staticmethod
+    def _open_lot(fill: TradeFillDB) -> TradeLotDB:
+        return TradeLotDB(
+            agent_id=fill.agent_id,
+            asset=fill.asset,
+            fill_id=fill.fill_id,
+            timestamp=_naive_utc(fill.timestamp),
+            quantity=fill.quantity,
+            remaining_quantity=fill.quantity,
+            price=fill.price,
+            fee=fill.fee or 0.0
+        )
+
+    def _close_against_lots(
+        self, db: Session, stats: TradeLedgerStatsDB, sell: TradeFillDB, open_lots: Deque[TradeLotDB]
+    ) -> List[TradeLotDB]:
         """
-        Records a single trade fill to the database for a specific agent.
-        Returns the recorded TradeFillData object (which includes the client-generated fill_id).
+        Matches a sell fill against the open buy lots (oldest first), adding a closed-trade row per match.
+        Returns the lots the sell used up.
         """
-        db: Session = self.session_factory()
-        logger.debug(f"Recording fill for agent {fill_data.agent_id}. Fill ID: {fill_data.fill_id}")
+        exit_timestamp = _naive_utc(sell.timestamp)
+        sell_fee = sell.fee or 0.0
+        sell_qty_remaining = sell.quantity
+        consumed: List[TradeLotDB] = []
+
+        while sell_qty_remaining > QUANTITY_EPSILON and open_lots:
+            lot = open_lots[0]
+            matched_qty = min(sell_qty_remaining, lot.remaining_quantity)
+
+            # Fees are pro-rated on the original fill quantities
+            buy_fee_for_match = (matched_qty / lot.quantity) * lot.fee if lot.quantity > 0 else 0.0
+            sell_fee_for_match = (matched_qty / sell.quantity) * sell_fee if sell.quantity > 0 else 0.0
+            total_fees_for_match = buy_fee_for_match + sell_fee_for_match
+
+            initial_value = matched_qty * lot.price
+            final_value = matched_qty * sell.price
+            pnl = final_value - initial_value - total_fees_for_match
+
+            db.add(ClosedTradeDB(
+                trade_id=f"closed_{lot.fill_id}_{sell.fill_id}", # Composite ID
+                agent_id=sell.agent_id,
+                asset=sell.asset,
+                entry_fill_id=lot.fill_id,
+                exit_fill_id=sell.fill_id,
+                quantity=matched_qty,
+                entry_price=lot.price,
+                exit_price=sell.price,
+                entry_timestamp=lot.timestamp,
+                exit_timestamp=exit_timestamp,
+                initial_value_usd=initial_value,
+                final_value_usd=final_value,
+                total_fees=total_fees_for_match,
+                realized_pnl=pnl
+            ))
+            self._accumulate_stats(stats, pnl, exit_timestamp)
+            logger.debug(f"Closed trade for {sell.asset}: Matched Qty {matched_qty}, P&L {pnl:.2f}")
+
+            sell_qty_remaining -= matched_qty
+            lot.remaining_quantity -= matched_qty
+            if lot.remaining_quantity < QUANTITY_EPSILON:
+                consumed.append(open_lots.popleft())
+
+        if sell_qty_remaining > QUANTITY_EPSILON:
+            logger.debug(f"Sell fill {sell.fill_id} for {sell.asset} has remaining open quantity: {sell_qty_remaining} (potential start of short position)")
+        return consumed
+
+    def _apply_fills_to_ledger(self, db: Session, fills: List[TradeFillDB]) -> None:
+        """
+        Updates the agent/asset ledgers with fills already added to the session. Fills newer than the
+        ledger are matched incrementally; an out-of-order fill, or an asset with fills recorded before
+        the ledger existed, triggers a replay of that asset's fills instead.
+        """
+        groups: Dict[Tuple[str, str], List[TradeFillDB]] = {}
+        for fill in sorted(fills, key=lambda f: _naive_utc(f.timestamp)):
+            groups.setdefault((fill.agent_id, fill.asset), []).append(fill)
+
+        for (agent_id, asset), group in groups.items():
+            stats = db.get(TradeLedgerStatsDB, (agent_id, asset), with_for_update=True) # Row lock across processes
+            if stats is None:
+                with db.no_autoflush: # Only fills committed before this transaction count as history
+                    prior_fill = db.execute(
+                        select(TradeFillDB.fill_id).where(TradeFillDB.agent_id == agent_id, TradeFillDB.asset == asset).limit(1)
+                    ).first()
+                if prior_fill is not None:
+                    self._rebuild_asset_ledger(db, agent_id, asset, stats)
+                    continue
+                stats = self._new_stats(agent_id, asset)
+                db.add(stats)
+            elif stats.last_fill_timestamp is not None and _naive_utc(group[0].timestamp) < stats.last_fill_timestamp:
+                self._rebuild_asset_ledger(db, agent_id, asset, stats)
+                continue
+
+            open_lots: Deque[TradeLotDB] = deque()
+            if any(fill.side == "sell" for fill in group):
+                open_lots.extend(db.execute(
+                    select(TradeLotDB)
+                    .where(TradeLotDB.agent_id == agent_id, TradeLotDB.asset == asset)
+                    .order_by(TradeLotDB.timestamp, TradeLotDB.lot_id)
+                    .with_for_update()
+                ).scalars())
+
+            for fill in group:
+                stats.last_fill_timestamp = _naive_utc(fill.timestamp)
+                if fill.side == "buy":
+                    lot = self._open_lot(fill)
+                    db.add(lot)
+                    open_lots.append(lot)
+                elif fill.side == "sell":
+                    for lot in self._close_against_lots(db, stats, fill, open_lots):
+                        if sa_inspect(lot).persistent:
+                            db.delete(lot)
+                        else:
+                            db.expunge(lot) # Opened and closed within this batch
+
+    def _rebuild_asset_ledger(self, db: Session, agent_id: str, asset: str, stats: Optional[TradeLedgerStatsDB]) -> None:
+        """Replays every recorded fill of an agent/asset into fresh lots, closed trades and aggregates."""
+        logger.info(f"Rebuilding FIFO ledger for agent {agent_id}, asset {asset}.")
+        db.execute(delete(TradeLotDB).where(TradeLotDB.agent_id == agent_id, TradeLotDB.asset == asset).execution_options(synchronize_session=False))
+        db.execute(delete(ClosedTradeDB).where(ClosedTradeDB.agent_id == agent_id, ClosedTradeDB.asset == asset).execution_options(synchronize_session=False))
+        if stats is None:
+            stats = self._new_stats(agent_id, asset)
+            db.add(stats)
+        else:
+            self._reset_stats(stats)
+        db.flush() # Makes a pending new fill visible to the replay query
+
+        fills = db.execute(
+            select(TradeFillDB).where(TradeFillDB.agent_id == agent_id, TradeFillDB.asset == asset).order_by(TradeFillDB.timestamp)
+        ).scalars().all()
+
+        open_lots: Deque[TradeLotDB] = deque()
+        for fill in fills:
+            if fill.side == "buy":
+                open_lots.append(self._open_lot(fill))
+            elif fill.side == "sell":
+                self._close_against_lots(db, stats, fill, open_lots)
+            stats.last_fill_timestamp = _naive_utc(fill.timestamp)
+        db.add_all(open_lots)
+
+    def _ensure_agent_ledger(self, db: Session, agent_id: str) -> None:
+        """Backfills the ledger for assets whose fills predate it; checked once per agent per service instance."""
+        if agent_id in self._ledger_checked_agents:
+            return
+        fill_assets = set(db.execute(select(TradeFillDB.asset).where(TradeFillDB.agent_id == agent_id).distinct()).scalars())
+        ledger_assets = set(db.execute(select(TradeLedgerStatsDB.asset).where(TradeLedgerStatsDB.agent_id == agent_id)).scalars())
+        missing = fill_assets - ledger_assets
+        if missing:
+            db.rollback() # End the read so the re-check below sees ledgers a concurrent writer committed
+            with self._ledger_locked({(agent_id, asset) for asset in missing}):
+                ledger_assets = set(db.execute(select(TradeLedgerStatsDB.asset).where(TradeLedgerStatsDB.agent_id == agent_id)).scalars())
+                for asset in sorted(missing - ledger_assets):
+                    self._rebuild_asset_ledger(db, agent_id, asset, None)
+                db.commit()
+        self._ledger_checked_agents.add(agent_id)
+
+    # --- Public API ---
+
+    def _write_fills_sync(self, fills: List[TradeFillData]) -> None:
+        """Inserts fills and applies them to the ledger in one transaction (one commit for the whole batch)."""
+        with self._ledger_locked({(fill_data.agent_id, fill_data.asset) for fill_data in fills}):
+            self._write_fills_locked(fills)
+
+    def _write_fills_locked(self, fills: List[TradeFillData]) -> None:
+        db: Optional[Session] = None
         try:
-            db_fill_data_dict = self._pydantic_fill_to_db_dict(fill_data)
-            # Ensure timestamp is timezone-aware (UTC) before DB insertion if model doesn't enforce it
-            if isinstance(db_fill_data_dict.get("timestamp"), datetime) and \
-               db_fill_data_dict["timestamp"].tzinfo is None:
-                db_fill_data_dict["timestamp"] = db_fill_data_dict["timestamp"].replace(tzinfo=timezone.utc)
-
-            db_fill = TradeFillDB(**db_fill_data_dict)
-            db.add(db_fill)
+            db = self.session_factory()
+            db_fills = []
+            for fill_data in fills:
+                db_fill_data_dict = self._pydantic_fill_to_db_dict(fill_data)
+                # Ensure timestamp is timezone-aware (UTC) before DB insertion if model doesn't enforce it
+                if isinstance(db_fill_data_dict.get("timestamp"), datetime) and \
+                   db_fill_data_dict["timestamp"].tzinfo is None:
+                    db_fill_data_dict["timestamp"] = db_fill_data_dict["timestamp"].replace(tzinfo=timezone.utc)
+                db_fills.append(TradeFillDB(**db_fill_data_dict))
+
+            db.add_all(db_fills)
+            self._apply_fills_to_ledger(db, db_fills) # Same transaction as the fills themselves
             db.commit()
-            # db.refresh(db_fill) # Not strictly needed if fill_id is client-generated and no other DB defaults are read back
-            logger.info(f"Fill {fill_data.fill_id} recorded to DB for agent {fill_data.agent_id}.")
-
-            # Publish event if event_bus is available
-            if self.event_bus:
-                try:
-                    event_payload_dict = fill_data.model_dump(mode='json') # Ensure datetimes are ISO strings
-                    await self.event_bus.publish(Event(
-                        publisher_agent_id=fill_data.agent_id,
-                        message_type="NewFillRecordedEvent",
-                        payload=event_payload_dict
-                    ))
-                    logger.debug(f"Published NewFillRecordedEvent for fill {fill_data.fill_id}, agent {fill_data.agent_id}")
-                except Exception as e_event:
-                    logger.error(f"Error publishing NewFillRecordedEvent for fill {fill_data.fill_id}: {e_event}", exc_info=True)
-
-            return fill_data # Return the input Pydantic object
+            logger.info(f"Recorded {len(fills)} fill(s) to DB (first: {fills[0].fill_id}, agent {fills[0].agent_id}).")
         except Exception as e: # Catch generic SQLAlchemy errors or other issues
-            db.rollback()
-            logger.error(f"Failed to record fill {fill_data.fill_id} for agent {fill_data.agent_id} to DB: {e}", exc_info=True)
+            if db is not None:
+                db.rollback()
+            logger.error(f"Failed to record {len(fills)} fill(s) (first: {fills[0].fill_id}, agent {fills[0].agent_id}) to DB: {e}", exc_info=True)
             raise TradeHistoryServiceError(f"DB error recording fill: {e}")
         finally:
-            db.close()
+            if db is not None:
+                db.close()
 
-    async def get_fills_for_agent(self, agent_id: str) -> List[TradeFillData]:
+    def _write_fills_individually_sync(self, fills: List[TradeFillData]) -> Dict[int, Exception]:
+        """Writes fills one transaction each, returning the errors keyed by position in `fills`.
+
+        Keyed by position, not fill_id: the same fill_id may appear twice in one group, and only
+        the copy that lost the insert failed.
         """
-        Retrieves all trade fills for a specific agent from the database, sorted by timestamp.
+        errors: Dict[int, Exception] = {}
+        for index, fill_data in enumerate(fills):
+            try:
+                self._write_fills_sync([fill_data])
+            except TradeHistoryServiceError as e:
+                errors[index] = e
+        return errors
+
+    async def _publish_fill_events(self, fills: List[TradeFillData]) -> None:
+        """Publishes one NewFillRecordedEvent per fill, concurrently."""
+        if not self.event_bus or not fills:
+            return
+        events = [
+            Event(
+                publisher_agent_id=fill_data.agent_id,
+                message_type="NewFillRecordedEvent",
+                payload=fill_data.model_dump(mode='json') # Ensure datetimes are ISO strings
+            )
+            for fill_data in fills
+        ]
+        results = await asyncio.gather(*(self.event_bus.publish(event) for event in events), return_exceptions=True)
+        for fill_data, result in zip(fills, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error publishing NewFillRecordedEvent for fill {fill_data.fill_id}: {result}", exc_info=result)
+        logger.debug(f"Published {len(fills)} NewFillRecordedEvent(s).")
+
+    async def record_fill(self, fill_data: TradeFillData) -> TradeFillData:
+        """
+        Records a single trade fill to the database for a specific agent and applies it to the
+        agent's FIFO ledger (open lots, closed trades and P&L aggregates) in the same transaction.
+        Returns the recorded TradeFillData object (which includes the client-generated fill_id).
+        Use ingest_fills for bursts; it group-commits fills through the background writer.
         """
+        logger.debug(f"Recording fill for agent {fill_data.agent_id}. Fill ID: {fill_data.fill_id}")
+        await self._run_db(self._write_fills_sync, [fill_data])
+        await self._publish_fill_events([fill_data])
+        return fill_data # Return the input Pydantic object
+
+    # --- Group-commit ingestion ---
+
+    def start_fill_writer(self) -> None:
+        """Starts the background group-commit writer (ingest_fills starts it on first use)."""
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = asyncio.create_task(self._fill_writer())
+            logger.info(f"Fill writer started (window {self.group_commit_window_ms}ms, max {self.group_commit_max_rows} rows, durability '{self.durability}').")
+
+    async def stop_fill_writer(self) -> None:
+        """Waits for queued fills to be committed, then stops the writer."""
+        if self._writer_task is None:
+            return
+        if not self._writer_task.done():
+            await self._ingest_queue.join()
+        self._writer_task.cancel()
+        try:
+            await self._writer_task
+        except asyncio.CancelledError:
+            pass
+        self._writer_task = None
+
+    async def ingest_fills(self, fills: List[TradeFillData], durability: Optional[str] = None) -> List[TradeFillData]:
+        """
+        Queues fills for the background writer, which coalesces fills from concurrent callers into one
+        insert and commit per group (up to group_commit_max_rows rows or group_commit_window_ms).
+        Blocks while max_pending_fills are already queued (backpressure).
+
+        durability: "commit" (default) returns once every fill is committed and raises
+        TradeHistoryServiceError if any failed; "accept" returns once the fills are queued.
+        """
+        durability = durability or self.durability
+        if durability not in FILL_DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode '{durability}'. Expected one of {FILL_DURABILITY_MODES}.")
+        if not fills:
+            return []
+
+        self.start_fill_writer()
+        ticket = _FillTicket(len(fills)) if durability == "commit" else None
+        for fill_data in fills:
+            await self._ingest_queue.put((fill_data, ticket))
+        if ticket is not None:
+            await ticket.future
+        return fills
+
+    async def _fill_writer(self) -> None:
+        loop = asyncio.get_running_loop()
+        window = self.group_commit_window_ms / 1000.0
+        while True:
+            group = [await self._ingest_queue.get()]
+            deadline = loop.time() + window
+            while len(group) < self.group_commit_max_rows:
+                try:
+                    group.append(self._ingest_queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    group.append(await asyncio.wait_for(self._ingest_queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._commit_fill_group(group)
+            except Exception as e: # Keep the writer alive; callers were already settled
+                logger.error(f"Fill writer failed on a group of {len(group)} fill(s): {e}", exc_info=True)
+            finally:
+                for _ in group:
+                    self._ingest_queue.task_done()
+
+    async def _commit_fill_group(self, group: List[Tuple[TradeFillData, Optional[_FillTicket]]]) -> None:
+        fills = [fill_data for fill_data, _ in group]
+        settled = 0
+        try:
+            errors: Dict[int, Exception] = {}
+            try:
+                await self._run_db(self._write_fills_sync, fills)
+            except TradeHistoryServiceError:
+                # One bad row (e.g. a duplicate fill_id) should not fail everyone else's fills
+                errors = await self._run_db(self._write_fills_individually_sync, fills)
+
+            self.ingest_stats["groups_committed"] += 1
+            self.ingest_stats["fills_committed"] += len(fills) - len(errors)
+            self.ingest_stats["fills_failed"] += len(errors)
+            self.ingest_stats["max_group_size"] = max(self.ingest_stats["max_group_size"], len(fills))
+
+            for index, (fill_data, ticket) in enumerate(group):
+                error = errors.get(index)
+                if ticket is not None:
+                    ticket.settle(error)
+                elif error is not None:
+                    logger.error(f"Accepted fill {fill_data.fill_id} for agent {fill_data.agent_id} was not recorded: {error}")
+                settled += 1
+        except BaseException as e:
+            # Whatever failed (executor shut down, cancellation, ...), no caller may be left waiting
+            error = e if isinstance(e, TradeHistoryServiceError) else TradeHistoryServiceError(f"Fill group commit failed: {e!r}")
+            self.ingest_stats["fills_failed"] += len(group) - settled
+            for fill_data, ticket in group[settled:]:
+                if ticket is not None:
+                    ticket.settle(error)
+                else:
+                    logger.error(f"Accepted fill {fill_data.fill_id} for agent {fill_data.agent_id} was not recorded: {error}")
+            raise
+
+        await self._publish_fill_events([fill_data for index, fill_data in enumerate(fills) if index not in errors])
+
+    def get_ingest_metrics(self) -> Dict[str, Any]:
+        return {
+            **self.ingest_stats,
+            "queued_fills": self._ingest_queue.qsize(),
+            "writer_running": self._writer_task is not None and not self._writer_task.done(),
+            "durability": self.durability
+        }
+
+    def _get_fills_for_agent_sync(self, agent_id: str) -> List[TradeFillData]:
         db: Session = self.session_factory()
-        fills_pydantic: List[TradeFillData] = []
-        logger.debug(f"Fetching fills from DB for agent {agent_id}.")
         try:
             stmt = select(TradeFillDB).where(TradeFillDB.agent_id == agent_id).order_by(TradeFillDB.timestamp)
             db_results = db.execute(stmt).scalars().all()
-
-            for db_fill in db_results:
-                fills_pydantic.append(self._db_fill_to_pydantic(db_fill))
-
-            logger.info(f"Retrieved {len(fills_pydantic)} fills from DB for agent {agent_id}.")
-            return fills_pydantic
+            return [self._db_fill_to_pydantic(db_fill) for db_fill in db_results]
         except Exception as e:
             logger.error(f"Failed to retrieve fills for agent {agent_id} from DB: {e}", exc_info=True)
             raise TradeHistoryServiceError(f"DB error retrieving fills: {e}")
         finally:
             db.close()
 
-    async def get_processed_trades(self, agent_id: str, limit: int = 100, offset: int = 0) -> List[TradeLogItem]:
+    async def get_fills_for_agent(self, agent_id: str) -> List[TradeFillData]:
         """
-        Processes fills for an agent to calculate P&L for closed trades (FIFO).
-        Now fetches fills from the database.
+        Retrieves all trade fills for a specific agent from the database, sorted by timestamp.
         """
-        logger.info(f"Processing trades for P&L for agent {agent_id} (limit={limit}, offset={offset}) using DB.")
-        all_fills = await self.get_fills_for_agent(agent_id) # This now calls the DB version
-        if not all_fills:
-            return []
-
-        # Fills from DB are already sorted by timestamp due to the query's order_by.
-        # No need to sort again if get_fills_for_agent guarantees it.
-
-        processed_trades: List[TradeLogItem] = []
-        fills_by_asset: Dict[str, Deque[TradeFillData]] = {}
-
-        for fill in all_fills:
-            if fill.asset not in fills_by_asset:
-                fills_by_asset[fill.asset] = deque()
-            fills_by_asset[fill.asset].append(fill)
-
-        for asset, asset_fills_deque in fills_by_asset.items():
-            logger.debug(f"Processing {len(asset_fills_deque)} DB fills for asset {asset}")
-            open_buys: Deque[TradeFillData] = deque()
-
-            while asset_fills_deque:
-                current_fill = asset_fills_deque.popleft()
-
-                if current_fill.side == "buy":
-                    open_buys.append(current_fill)
-                    logger.debug(f"Added to open_buys for {asset}: Qty {current_fill.quantity} @ Prc {current_fill.price} (ID: {current_fill.fill_id})")
-
-                elif current_fill.side == "sell":
-                    logger.debug(f"Processing SELL fill for {asset}: Qty {current_fill.quantity} @ Prc {current_fill.price} (ID: {current_fill.fill_id})")
-                    sell_qty_remaining = current_fill.quantity
-                    # total_sell_fees = current_fill.fee # Not used like this anymore
-
-                    while sell_qty_remaining > 1e-9 and open_buys:
-                        oldest_buy = open_buys[0]
-                        matched_qty = min(sell_qty_remaining, oldest_buy.quantity)
-
-                        buy_fee_for_match = (matched_qty / oldest_buy.quantity) * oldest_buy.fee if oldest_buy.quantity > 0 else 0
-                        sell_fee_for_match = (matched_qty / current_fill.quantity) * current_fill.fee if current_fill.quantity > 0 else 0
-                        total_fees_for_match = buy_fee_for_match + sell_fee_for_match
-
-                        entry_price_avg = oldest_buy.price
-                        exit_price_avg = current_fill.price
-
-                        initial_value = matched_qty * entry_price_avg
-                        final_value = matched_qty * exit_price_avg
-
-                        # PnL calculation: (exit_value - entry_value) - total_fees
-                        pnl = final_value - initial_value - total_fees_for_match
-
-                        percentage_pnl_val = (pnl / initial_value * 100) if initial_value != 0 else 0
-
-                        holding_period_sec = (current_fill.timestamp - oldest_buy.timestamp).total_seconds()
-
-                        trade_log = TradeLogItem(
-                            agent_id=agent_id,
-                            asset=asset,
-                            trade_id=f"closed_{oldest_buy.fill_id}_{current_fill.fill_id}", # Composite ID
-                            opening_side="buy", # Current logic processes longs being closed
-                            order_type="limit", # Placeholder, as fill data doesn't have order type
-                            quantity=matched_qty,
-                            entry_price_avg=entry_price_avg,
-                            exit_price_avg=exit_price_avg,
-                            entry_timestamp=oldest_buy.timestamp,
-                            exit_timestamp=current_fill.timestamp,
-                            holding_period_seconds=holding_period_sec,
-                            initial_value_usd=initial_value,
-                            final_value_usd=final_value,
-                            realized_pnl=pnl,
-                            percentage_pnl=percentage_pnl_val,
-                            total_fees=total_fees_for_match
-                        )
-                        processed_trades.append(trade_log)
-                        logger.debug(f"Closed trade for {asset}: Matched Qty {matched_qty}, P&L {pnl:.2f}")
-
-                        sell_qty_remaining -= matched_qty
-                        oldest_buy.quantity -= matched_qty
-
-                        if oldest_buy.quantity < 1e-9:
-                            open_buys.popleft()
-                            logger.debug(f"Buy fill {oldest_buy.fill_id} fully matched and removed from open_buys.")
+        logger.debug(f"Fetching fills from DB for agent {agent_id}.")
+        fills_pydantic = await self._run_db(self._get_fills_for_agent_sync, agent_id)
+        logger.info(f"Retrieved {len(fills_pydantic)} fills from DB for agent {agent_id}.")
+        return fills_pydantic
+
+    @staticmethod
+    def _closed_trade_to_log_item(trade: ClosedTradeDB) -> TradeLogItem:
+        entry_timestamp = _aware_utc(trade.entry_timestamp)
+        exit_timestamp = _aware_utc(trade.exit_timestamp)
+        initial_value = trade.initial_value_usd
+        return TradeLogItem(
+            agent_id=trade.agent_id,
+            asset=trade.asset,
+            trade_id=trade.trade_id,
+            opening_side="buy", # The ledger closes long lots
+            order_type="limit", # Placeholder, as fill data doesn't have order type
+            quantity=trade.quantity,
+            entry_price_avg=trade.entry_price,
+            exit_price_avg=trade.exit_price,
+            entry_timestamp=entry_timestamp,
+            exit_timestamp=exit_timestamp,
+            holding_period_seconds=(exit_timestamp - entry_timestamp).total_seconds(),
+            initial_value_usd=initial_value,
+            final_value_usd=trade.final_value_usd,
+            realized_pnl=trade.realized_pnl,
+            percentage_pnl=(trade.realized_pnl / initial_value * 100) if initial_value != 0 else 0,
+            total_fees=trade.total_fees
+        )
 
-                        if sell_qty_remaining < 1e-9:
-                            break
+    def _get_processed_trades_sync(self, agent_id: str, limit: int, offset: int) -> List[TradeLogItem]:
+        db: Session = self.session_factory()
+        try:
+            self._ensure_agent_ledger(db, agent_id)
+            stmt = (
+                select(ClosedTradeDB)
+                .where(ClosedTradeDB.agent_id == agent_id)
+                .order_by(ClosedTradeDB.exit_timestamp.desc(), ClosedTradeDB.entry_timestamp.desc())
+                .offset(offset)
+                .limit(limit)
+            )
+            return [self._closed_trade_to_log_item(trade) for trade in db.execute(stmt).scalars()]
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to retrieve closed trades for agent {agent_id} from DB: {e}", exc_info=True)
+            raise TradeHistoryServiceError(f"DB error retrieving closed trades: {e}")
+        finally:
+            db.close()
 
-                    if sell_qty_remaining > 1e-9:
-                        logger.debug(f"Sell fill {current_fill.fill_id} for {asset} has remaining open quantity: {sell_qty_remaining} (potential start of short position)")
+    async def get_processed_trades(self, agent_id: str, limit: int = 100, offset: int = 0) -> List[TradeLogItem]:
+        """
+        Returns a page of the agent's closed trades (FIFO matched), most recent exit first.
+        The trades are maintained by record_fill, so this is an indexed range read.
+        """
+        logger.info(f"Fetching closed trades for agent {agent_id} (limit={limit}, offset={offset}) from the ledger.")
+        return await self._run_db(self._get_processed_trades_sync, agent_id, limit, offset)
 
-        processed_trades.sort(key=lambda t: t.timestamp, reverse=True)
-        logger.info(f"Generated {len(processed_trades)} processed (closed) trades for agent {agent_id} from DB data.")
-        return processed_trades[offset : offset + limit]
+    def _get_trade_statistics_sync(self, agent_id: str) -> TradeStatistics:
+        db: Session = self.session_factory()
+        try:
+            self._ensure_agent_ledger(db, agent_id)
+            rows = db.execute(
+                select(TradeLedgerStatsDB).where(TradeLedgerStatsDB.agent_id == agent_id).order_by(TradeLedgerStatsDB.asset)
+            ).scalars().all()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to retrieve trade statistics for agent {agent_id} from DB: {e}", exc_info=True)
+            raise TradeHistoryServiceError(f"DB error retrieving trade statistics: {e}")
+        finally:
+            db.close()
 
+        statistics = TradeStatistics(agent_id=agent_id)
+        for row in rows:
+            statistics.assets.append(row.asset)
+            statistics.total_trades += row.total_trades
+            statistics.winning_trades += row.winning_trades
+            statistics.losing_trades += row.losing_trades
+            statistics.neutral_trades += row.neutral_trades
+            statistics.total_net_pnl += row.total_net_pnl
+            statistics.gross_profit += row.gross_profit
+            statistics.gross_loss += row.gross_loss
+            first_exit = _aware_utc(row.first_exit_timestamp)
+            last_exit = _aware_utc(row.last_exit_timestamp)
+            if first_exit is not None and (statistics.first_exit_timestamp is None or first_exit < statistics.first_exit_timestamp):
+                statistics.first_exit_timestamp = first_exit
+            if last_exit is not None and (statistics.last_exit_timestamp is None or last_exit > statistics.last_exit_timestamp):
+                statistics.last_exit_timestamp = last_exit
+        return statistics
+
+    async def get_trade_statistics(self, agent_id: str) -> TradeStatistics:
+        """
+        Returns the agent's closed-trade aggregates (trade counts, net P&L, gross profit/loss),
+        summed from the per-asset rows the ledger maintains at write time.
+        """
+        return await self._run_db(self._get_trade_statistics_sync, agent_id)
@@ -1,7 +1,7 @@
 """
 Enhanced Trading Coordinator that leverages CrewAI for analysis.
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 from datetime import datetime
 from loguru import logger
 import httpx
@@ -159,6 +159,7 @@ class TradingCoordinator:
                 if main_order_result.oid is not None and self.trade_history_service and self.hyperliquid_execution_service:
                     await asyncio.sleep(2)
                     actual_fills = await self.hyperliquid_execution_service.get_fills_for_order(agent_id_executing_trade, main_order_result.oid)
+                    fill_data_objs: List[TradeFillData] = []
                     for fill_dict in actual_fills:
                         try:
                             raw_dir = fill_dict.get("dir", "")
@@ -168,16 +169,25 @@ class TradingCoordinator:
                             elif raw_dir.upper() == "S": mapped_side = "sell"
                             else: mapped_side = "buy" if main_order_hl_params.is_buy else "sell"
 
-                            fill_data_obj = TradeFillData(
+                            fill_data_objs.append(TradeFillData(
                                 agent_id=agent_id_executing_trade, asset=str(fill_dict["coin"]), side=mapped_side, # type: ignore
                                 quantity=float(fill_dict["qty"]), price=float(fill_dict["px"]),
                                 timestamp=datetime.fromtimestamp(int(fill_dict["time"])/1000, tz=timezone.utc),
                                 fee=float(fill_dict.get("fee",0.0)), fee_currency="USD",
                                 exchange_order_id=str(fill_dict.get("oid", main_order_result.oid)),
                                 exchange_trade_id=str(fill_dict.get("tid", uuid.uuid4()))
-                            )
-                            recorded_fill = await self.trade_history_service.record_fill(fill_data_obj)
-                            await self.trade_history_service.record_fill(fill_data_obj) # record_fill returns None
+                            ))
+                        except Exception as e_f: logger.error(f"TC ({self.agent_id}): Error processing HL fill: {e_f}", exc_info=True)
+
+                    if fill_data_objs:
+                        try:
+                            # One group commit for the whole sweep instead of a commit per fill
+                            await self.trade_history_service.ingest_fills(fill_data_objs)
+                        except Exception as e_f:
+                            logger.error(f"TC ({self.agent_id}): Error recording HL fills: {e_f}", exc_info=True)
+
+                    for fill_data_obj in fill_data_objs:
+                        try:
                             # Link to order history if applicable (assuming internal_order_id and service exist)
                             if hasattr(self, 'order_history_service') and self.order_history_service and internal_order_id and hasattr(fill_data_obj, 'fill_id'):
                                 await self.order_history_service.link_fill_to_order(internal_order_id, fill_data_obj.fill_id) # Use fill_data_obj.fill_id
@@ -190,7 +200,7 @@ class TradingCoordinator:
                                     payload=fill_data_obj.model_dump(mode='json')
                                 )
                                 await self.connection_manager.send_to_client(agent_id_executing_trade, ws_env)
-                        except Exception as e_f: logger.error(f"TC ({self.agent_id}): Error processing HL fill or sending WebSocket: {e_f}", exc_info=True)
+                        except Exception as e_f: logger.error(f"TC ({self.agent_id}): Error linking HL fill or sending WebSocket: {e_f}", exc_info=True)
 
                 # SL/TP logic (simplified, ensure main_order_result_dict is used if needed)
                 if main_order_result.oid is not None and main_order_result.status in ["resting", "filled", "ok"]:
@@ -10,6 +10,7 @@ from ..models.dashboard_models import (
     TradeLogItem,
     OrderLogItem
 )
+from ..models.trade_history_models import TradeStatistics
 from ..models.hyperliquid_models import HyperliquidAccountSnapshot, HyperliquidAssetPosition, HyperliquidOpenOrderItem, HyperliquidMarginSummary
 from .agent_management_service import AgentManagementService
 from .hyperliquid_execution_service import HyperliquidExecutionService, HyperliquidExecutionServiceError
@@ -160,6 +161,10 @@ class TradingDataService:
             logger.error(f"Error fetching processed trades for agent {agent_id} from TradeHistoryService: {e}", exc_info=True)
             return [] # Return empty list on error, or re-raise depending on desired error handling
 
+    async def get_trade_statistics(self, agent_id: str) -> TradeStatistics:
+        logger.info(f"Fetching trade statistics for agent {agent_id} using TradeHistoryService.")
+        return await self.trade_history_service.get_trade_statistics(agent_id)
+
     async def get_open_orders(self, agent_id: str) -> List[OrderLogItem]:
         logger.info(f"Fetching open orders for agent {agent_id} from OrderHistoryService.")
         if not self.order_history_service:
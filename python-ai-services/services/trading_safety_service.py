@@ -3,12 +3,13 @@ Trading Safety Service - Phase 2 Implementation
 Advanced safety controls and circuit breakers for live trading
 """
 import asyncio
+import time
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional, Any, Literal
+from typing import Dict, List, Optional, Any, Literal, Callable, Deque
 from loguru import logger
 from pydantic import BaseModel, Field
 from dataclasses import dataclass, field
-from collections import defaultdict
+from collections import defaultdict, deque
 
 class SafetyViolation(BaseModel):
     """Safety violation record"""
@@ -41,29 +42,113 @@ class TradingLimits:
     max_drawdown_percentage: float = 0.05  # 5%
     max_loss_per_hour_usd: float = 1000.0
     emergency_stop_loss_percentage: float = 0.10  # 10%
+    max_symbol_daily_volume_usd: float = 1000000.0  # Across all agents
+    max_global_daily_trades: int = 100000
+    max_global_daily_volume_usd: float = 10000000.0
+    limit_window_seconds: float = 86400.0  # Sliding window for the "daily" trade and volume limits
+    loss_window_seconds: float = 3600.0  # Sliding window for the hourly loss limit
+
+class SlidingWindowCounter:
+    """
+    Sum of the amounts added during the last window_seconds.
+
+    The window is a ring of bucket_count buckets; expired buckets are cleared as time advances, so
+    reads and writes are O(1) amortized and the window edge is accurate to one bucket width.
+    """
+    __slots__ = ("bucket_seconds", "buckets", "total", "_head")
+
+    def __init__(self, window_seconds: float, bucket_count: int = 60):
+        self.bucket_seconds = window_seconds / bucket_count
+        self.buckets = [0.0] * bucket_count
+        self.total = 0.0
+        self._head: Optional[int] = None  # Absolute index of the newest bucket
+
+    def _advance(self, now: float) -> int:
+        index = int(now // self.bucket_seconds)
+        head = self._head
+        if head is not None and index <= head:
+            return head
+        size = len(self.buckets)
+        if head is None or index - head >= size:
+            self.buckets = [0.0] * size
+            self.total = 0.0
+        else:
+            buckets = self.buckets
+            for i in range(head + 1, index + 1):
+                slot = i % size
+                self.total -= buckets[slot]
+                buckets[slot] = 0.0
+        self._head = index
+        return index
+
+    def value(self, now: float) -> float:
+        self._advance(now)
+        return self.total if self.total > 1e-9 else 0.0
+
+    def add(self, amount: float, now: float):
+        index = self._advance(now)
+        self.buckets[index % len(self.buckets)] += amount
+        self.total += amount
+
+    def remove(self, amount: float, added_at: float, now: float):
+        """Take back an amount added at added_at, if it is still inside the window"""
+        head = self._advance(now)
+        index = int(added_at // self.bucket_seconds)
+        if head - len(self.buckets) < index <= head:
+            self.buckets[index % len(self.buckets)] -= amount
+            self.total -= amount
 
-@dataclass
 class AgentLimits:
-    """Per-agent trading limits"""
+    """Per-agent sliding-window trading counters"""
+    __slots__ = ("agent_id", "trades", "volume_usd", "losses_usd", "concurrent_positions")
+
+    def __init__(self, agent_id: str, limits: TradingLimits):
+        self.agent_id = agent_id
+        self.trades = SlidingWindowCounter(limits.limit_window_seconds)
+        self.volume_usd = SlidingWindowCounter(limits.limit_window_seconds)
+        self.losses_usd = SlidingWindowCounter(limits.loss_window_seconds)
+        self.concurrent_positions = 0
+
+@dataclass
+class TradeReservation:
+    """Capacity held by reserve_trade until the trade is recorded or released"""
     agent_id: str
-    daily_trades: int = 0
-    daily_volume_usd: float = 0.0
-    concurrent_positions: int = 0
-    hourly_loss_usd: float = 0.0
-    last_reset: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    symbol: str
+    trade_value_usd: float
+    opens_position: bool
+    reserved_at: float
+    released: bool = False
+
+# Halt flag word: any set bit blocks trading
+EMERGENCY_STOP_FLAG = 1
+TRADING_SUSPENDED_FLAG = 2
+_BREAKER_FLAG_SHIFT = 2
 
 class TradingSafetyService:
     """
     Advanced trading safety service with circuit breakers and risk controls
+
+    Trade count and notional are kept in sliding-window counters per agent, per symbol and globally,
+    so a validation is a handful of O(1) reads. Emergency stop, trading suspension and open circuit
+    breakers are folded into one flag word checked first on every validation. Violations found on
+    the validation path are queued and recorded after the check returns.
     """
     
-    def __init__(self):
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
         self.trading_limits = TradingLimits()
         self.agent_limits: Dict[str, AgentLimits] = {}
         self.circuit_breakers: Dict[str, CircuitBreakerStatus] = {}
         self.safety_violations: List[SafetyViolation] = []
-        self.emergency_stop_active = False
-        self.trading_suspended = False
+        self._clock = clock
+        self._halt_flags = 0
+        self._breaker_flags: Dict[str, int] = {}
+        self._breaker_windows: Dict[str, SlidingWindowCounter] = {}
+        self._symbol_volume: Dict[str, SlidingWindowCounter] = {}
+        self._global_trades = SlidingWindowCounter(self.trading_limits.limit_window_seconds)
+        self._global_volume = SlidingWindowCounter(self.trading_limits.limit_window_seconds)
+        self._violation_queue: Deque[tuple] = deque()
+        self._violation_drain_scheduled = False
+        self._violation_sequence = 0
         
         # Initialize circuit breakers
         self._initialize_circuit_breakers()
@@ -73,6 +158,25 @@ class TradingSafetyService:
         
         logger.info("TradingSafetyService initialized with comprehensive safety controls")
     
+    @property
+    def emergency_stop_active(self) -> bool:
+        return bool(self._halt_flags & EMERGENCY_STOP_FLAG)
+    
+    @emergency_stop_active.setter
+    def emergency_stop_active(self, active: bool):
+        self._set_flag(EMERGENCY_STOP_FLAG, active)
+    
+    @property
+    def trading_suspended(self) -> bool:
+        return bool(self._halt_flags & TRADING_SUSPENDED_FLAG)
+    
+    @trading_suspended.setter
+    def trading_suspended(self, suspended: bool):
+        self._set_flag(TRADING_SUSPENDED_FLAG, suspended)
+    
+    def _set_flag(self, flag: int, on: bool):
+        self._halt_flags = (self._halt_flags | flag) if on else (self._halt_flags & ~flag)
+    
     def _initialize_circuit_breakers(self):
         """Initialize circuit breaker configurations"""
         breakers = [
@@ -98,7 +202,7 @@ class TradingSafetyService:
             }
         ]
         
-        for breaker in breakers:
+        for i, breaker in enumerate(breakers):
             self.circuit_breakers[breaker["name"]] = CircuitBreakerStatus(
                 name=breaker["name"],
                 status="closed",
@@ -106,6 +210,8 @@ class TradingSafetyService:
                 threshold=breaker["threshold"],
                 reset_time_minutes=breaker["reset_time_minutes"]
             )
+            self._breaker_flags[breaker["name"]] = 1 << (_BREAKER_FLAG_SHIFT + i)
+            self._breaker_windows[breaker["name"]] = SlidingWindowCounter(breaker["reset_time_minutes"] * 60)
     
     def _start_monitoring_tasks(self):
         """Start background monitoring tasks"""
@@ -114,6 +220,75 @@ class TradingSafetyService:
         self.last_cleanup = datetime.now(timezone.utc)
         self.last_health_check = datetime.now(timezone.utc)
     
+    def _get_agent_limits(self, agent_id: str) -> AgentLimits:
+        agent_limits = self.agent_limits.get(agent_id)
+        if agent_limits is None:
+            agent_limits = self.agent_limits[agent_id] = AgentLimits(agent_id, self.trading_limits)
+        return agent_limits
+    
+    def _symbol_counter(self, symbol: str) -> SlidingWindowCounter:
+        counter = self._symbol_volume.get(symbol)
+        if counter is None:
+            counter = self._symbol_volume[symbol] = SlidingWindowCounter(self.trading_limits.limit_window_seconds)
+        return counter
+    
+    def _halt_reason(self) -> Optional[str]:
+        """Reason trading is halted, or None; open breakers past their retry time close here"""
+        if self._halt_flags & EMERGENCY_STOP_FLAG:
+            return "Emergency stop is active - all trading suspended"
+        if self._halt_flags & TRADING_SUSPENDED_FLAG:
+            return "Trading is temporarily suspended"
+        now = datetime.now(timezone.utc)
+        for breaker_name, flag in self._breaker_flags.items():
+            if self._halt_flags & flag:
+                breaker = self.circuit_breakers[breaker_name]
+                if breaker.next_retry and now >= breaker.next_retry:
+                    breaker.status = "closed"
+                    self._set_flag(flag, False)
+                    logger.info(f"Circuit breaker '{breaker_name}' closed after its reset period")
+                else:
+                    return f"Circuit breaker '{breaker_name}' is open"
+        return None
+    
+    def _check_limits(self, agent_limits: AgentLimits, symbol: str, trade_value_usd: float, now: float) -> Optional[str]:
+        """Rejection reason for a trade against every windowed limit, or None (queues the violation)"""
+        limits = self.trading_limits
+        agent_id = agent_limits.agent_id
+        
+        # Check daily trade count limit
+        if agent_limits.trades.value(now) >= limits.max_daily_trades:
+            self._queue_violation("daily_trade_limit", "high", f"Agent {agent_id} exceeded daily trade limit", agent_id)
+            return f"Daily trade limit exceeded ({limits.max_daily_trades})"
+        
+        # Check daily volume limit
+        if agent_limits.volume_usd.value(now) + trade_value_usd > limits.max_daily_volume_usd:
+            self._queue_violation("daily_volume_limit", "high", f"Agent {agent_id} would exceed daily volume limit", agent_id)
+            return f"Daily volume limit would be exceeded"
+        
+        # Check position size limit
+        if trade_value_usd > limits.max_position_size_usd:
+            self._queue_violation("position_size_limit", "medium", f"Trade size {trade_value_usd} exceeds limit", agent_id, symbol)
+            return f"Position size exceeds limit ({limits.max_position_size_usd})"
+        
+        # Check concurrent positions limit
+        if agent_limits.concurrent_positions >= limits.max_concurrent_positions:
+            self._queue_violation("concurrent_positions_limit", "medium", f"Agent {agent_id} at concurrent position limit", agent_id)
+            return f"Concurrent positions limit reached ({limits.max_concurrent_positions})"
+        
+        # Check per-symbol and global limits across all agents
+        symbol_volume = self._symbol_volume.get(symbol)
+        if symbol_volume is not None and symbol_volume.value(now) + trade_value_usd > limits.max_symbol_daily_volume_usd:
+            self._queue_violation("symbol_volume_limit", "high", f"Symbol {symbol} would exceed daily volume limit", agent_id, symbol)
+            return f"Daily volume limit for {symbol} would be exceeded"
+        if self._global_trades.value(now) >= limits.max_global_daily_trades:
+            self._queue_violation("global_trade_limit", "high", "Global daily trade limit exceeded", agent_id)
+            return f"Global daily trade limit exceeded ({limits.max_global_daily_trades})"
+        if self._global_volume.value(now) + trade_value_usd > limits.max_global_daily_volume_usd:
+            self._queue_violation("global_volume_limit", "high", "Global daily volume limit would be exceeded", agent_id)
+            return f"Global daily volume limit would be exceeded"
+        
+        return None
+    
     async def validate_trade_safety(
         self, 
         agent_id: str, 
@@ -126,76 +301,72 @@ class TradingSafetyService:
         Comprehensive trade safety validation
         Returns: (is_safe, rejection_reason)
         """
+        if self._halt_flags:
+            halt_reason = self._halt_reason()
+            if halt_reason:
+                return False, halt_reason
         
-        # Check emergency stop
-        if self.emergency_stop_active:
-            return False, "Emergency stop is active - all trading suspended"
-        
-        # Check trading suspension
-        if self.trading_suspended:
-            return False, "Trading is temporarily suspended"
-        
-        # Check circuit breakers
-        for breaker_name, breaker in self.circuit_breakers.items():
-            if breaker.status == "open":
-                return False, f"Circuit breaker '{breaker_name}' is open"
-        
-        # Initialize agent limits if not exists
-        if agent_id not in self.agent_limits:
-            self.agent_limits[agent_id] = AgentLimits(agent_id=agent_id)
+        rejection_reason = self._check_limits(self._get_agent_limits(agent_id), symbol, quantity * (price or 0), self._clock())
+        if rejection_reason:
+            return False, rejection_reason
         
-        agent_limits = self.agent_limits[agent_id]
-        
-        # Reset daily limits if needed
-        if self._should_reset_daily_limits(agent_limits):
-            self._reset_daily_limits(agent_limits)
+        # All safety checks passed
+        return True, None
+    
+    def reserve_trade(
+        self,
+        agent_id: str,
+        symbol: str,
+        quantity: float,
+        price: Optional[float] = None,
+        side: str = "buy"
+    ) -> tuple[Optional[TradeReservation], Optional[str]]:
+        """
+        Validate a trade and, if safe, hold its trade count, notional and (for buys) a position slot
+        so concurrent submissions cannot overrun a limit. Settle the hold with record_trade_execution
+        or release_reservation.
+        Returns: (reservation or None, rejection_reason)
+        """
+        if self._halt_flags:
+            halt_reason = self._halt_reason()
+            if halt_reason:
+                return None, halt_reason
         
-        # Calculate trade value
+        agent_limits = self._get_agent_limits(agent_id)
         trade_value_usd = quantity * (price or 0)
+        now = self._clock()
+        rejection_reason = self._check_limits(agent_limits, symbol, trade_value_usd, now)
+        if rejection_reason:
+            return None, rejection_reason
         
-        # Check daily trade count limit
-        if agent_limits.daily_trades >= self.trading_limits.max_daily_trades:
-            await self._record_violation(
-                "daily_trade_limit",
-                "high",
-                f"Agent {agent_id} exceeded daily trade limit",
-                agent_id=agent_id
-            )
-            return False, f"Daily trade limit exceeded ({self.trading_limits.max_daily_trades})"
-        
-        # Check daily volume limit
-        if agent_limits.daily_volume_usd + trade_value_usd > self.trading_limits.max_daily_volume_usd:
-            await self._record_violation(
-                "daily_volume_limit",
-                "high", 
-                f"Agent {agent_id} would exceed daily volume limit",
-                agent_id=agent_id
-            )
-            return False, f"Daily volume limit would be exceeded"
-        
-        # Check position size limit
-        if trade_value_usd > self.trading_limits.max_position_size_usd:
-            await self._record_violation(
-                "position_size_limit",
-                "medium",
-                f"Trade size {trade_value_usd} exceeds limit",
-                agent_id=agent_id,
-                symbol=symbol
-            )
-            return False, f"Position size exceeds limit ({self.trading_limits.max_position_size_usd})"
-        
-        # Check concurrent positions limit
-        if agent_limits.concurrent_positions >= self.trading_limits.max_concurrent_positions:
-            await self._record_violation(
-                "concurrent_positions_limit",
-                "medium",
-                f"Agent {agent_id} at concurrent position limit",
-                agent_id=agent_id
-            )
-            return False, f"Concurrent positions limit reached ({self.trading_limits.max_concurrent_positions})"
-        
-        # All safety checks passed
-        return True, None
+        reservation = TradeReservation(agent_id, symbol, trade_value_usd, side.lower() == "buy", now)
+        self._apply_trade(agent_limits, symbol, trade_value_usd, now)
+        if reservation.opens_position:
+            agent_limits.concurrent_positions += 1
+        return reservation, None
+    
+    def release_reservation(self, reservation: TradeReservation):
+        """Return a reservation's capacity (e.g. the order was never sent or did not fill)"""
+        if reservation.released:
+            return
+        reservation.released = True
+        now = self._clock()
+        agent_limits = self._get_agent_limits(reservation.agent_id)
+        for counter, amount in (
+            (agent_limits.trades, 1), (agent_limits.volume_usd, reservation.trade_value_usd),
+            (self._symbol_counter(reservation.symbol), reservation.trade_value_usd),
+            (self._global_trades, 1), (self._global_volume, reservation.trade_value_usd)
+        ):
+            counter.remove(amount, reservation.reserved_at, now)
+        if reservation.opens_position:
+            agent_limits.concurrent_positions = max(0, agent_limits.concurrent_positions - 1)
+    
+    def _apply_trade(self, agent_limits: AgentLimits, symbol: str, trade_value_usd: float, now: float):
+        agent_limits.trades.add(1, now)
+        agent_limits.volume_usd.add(trade_value_usd, now)
+        self._symbol_counter(symbol).add(trade_value_usd, now)
+        self._global_trades.add(1, now)
+        self._global_volume.add(trade_value_usd, now)
     
     async def record_trade_execution(
         self,
@@ -205,20 +376,20 @@ class TradingSafetyService:
         price: float,
         side: str,
         success: bool,
-        error_message: Optional[str] = None
+        error_message: Optional[str] = None,
+        reservation: Optional[TradeReservation] = None
     ):
-        """Record trade execution for safety monitoring"""
-        
-        if agent_id not in self.agent_limits:
-            self.agent_limits[agent_id] = AgentLimits(agent_id=agent_id)
+        """Record trade execution for safety monitoring (settling its reservation, if any)"""
         
-        agent_limits = self.agent_limits[agent_id]
+        agent_limits = self._get_agent_limits(agent_id)
         trade_value_usd = quantity * price
         
+        if reservation is not None:
+            self.release_reservation(reservation)
+        
         if success:
             # Update limits tracking
-            agent_limits.daily_trades += 1
-            agent_limits.daily_volume_usd += trade_value_usd
+            self._apply_trade(agent_limits, symbol, trade_value_usd, self._clock())
             
             if side.lower() == "buy":
                 agent_limits.concurrent_positions += 1
@@ -228,57 +399,66 @@ class TradingSafetyService:
             logger.info(f"Recorded successful trade for agent {agent_id}: {side} {quantity} {symbol} @ {price}")
         else:
             # Record failed trade
-            await self._record_violation(
+            self._queue_violation(
                 "trade_execution_failure",
                 "low",
                 f"Trade execution failed: {error_message}",
-                agent_id=agent_id,
-                symbol=symbol,
-                metadata={"error": error_message}
+                agent_id,
+                symbol,
+                {"error": error_message}
             )
             
             # Trigger error rate circuit breaker
-            await self._trigger_circuit_breaker("error_rate_breaker")
+            self._trip_circuit_breaker("error_rate_breaker")
+        self._drain_violations()
     
     async def record_trade_loss(self, agent_id: str, loss_amount_usd: float):
         """Record trading loss for safety monitoring"""
         
-        if agent_id not in self.agent_limits:
-            self.agent_limits[agent_id] = AgentLimits(agent_id=agent_id)
-        
-        agent_limits = self.agent_limits[agent_id]
-        agent_limits.hourly_loss_usd += loss_amount_usd
+        agent_limits = self._get_agent_limits(agent_id)
+        now = self._clock()
+        agent_limits.losses_usd.add(loss_amount_usd, now)
         
         # Check for rapid loss circuit breaker
         if loss_amount_usd > 500:  # Significant loss threshold
-            await self._trigger_circuit_breaker("rapid_loss_breaker")
+            self._trip_circuit_breaker("rapid_loss_breaker")
         
         # Check hourly loss limit
-        if agent_limits.hourly_loss_usd > self.trading_limits.max_loss_per_hour_usd:
-            await self._record_violation(
+        hourly_loss_usd = agent_limits.losses_usd.value(now)
+        if hourly_loss_usd > self.trading_limits.max_loss_per_hour_usd:
+            self._queue_violation(
                 "hourly_loss_limit",
                 "critical",
-                f"Agent {agent_id} exceeded hourly loss limit: ${agent_limits.hourly_loss_usd:.2f}",
-                agent_id=agent_id
+                f"Agent {agent_id} exceeded hourly loss limit: ${hourly_loss_usd:.2f}",
+                agent_id
             )
             
             # Suspend trading for this agent
             await self.suspend_agent_trading(agent_id, "Hourly loss limit exceeded")
+        self._drain_violations()
     
     async def _trigger_circuit_breaker(self, breaker_name: str):
         """Trigger a circuit breaker"""
+        self._trip_circuit_breaker(breaker_name)
+        self._drain_violations()
+    
+    def _trip_circuit_breaker(self, breaker_name: str):
         if breaker_name not in self.circuit_breakers:
             return
         
         breaker = self.circuit_breakers[breaker_name]
-        breaker.trigger_count += 1
+        window = self._breaker_windows[breaker_name]
+        now = self._clock()
+        window.add(1, now)
+        breaker.trigger_count = int(window.value(now))
         
-        if breaker.trigger_count >= breaker.threshold:
+        if breaker.status != "open" and breaker.trigger_count >= breaker.threshold:
             breaker.status = "open"
             breaker.last_triggered = datetime.now(timezone.utc)
             breaker.next_retry = breaker.last_triggered + timedelta(minutes=breaker.reset_time_minutes)
+            self._set_flag(self._breaker_flags[breaker_name], True)
             
-            await self._record_violation(
+            self._queue_violation(
                 "circuit_breaker_triggered",
                 "critical",
                 f"Circuit breaker '{breaker_name}' triggered",
@@ -287,6 +467,54 @@ class TradingSafetyService:
             
             logger.warning(f"Circuit breaker '{breaker_name}' OPENED - trading restricted")
     
+    def _queue_violation(
+        self,
+        violation_type: str,
+        severity: str,
+        message: str,
+        agent_id: Optional[str] = None,
+        symbol: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        """Queue a violation; it is recorded on the next loop iteration, off the validation path"""
+        self._violation_queue.append((violation_type, severity, message, agent_id, symbol, metadata, datetime.now(timezone.utc)))
+        if not self._violation_drain_scheduled:
+            try:
+                asyncio.get_running_loop().call_soon(self._drain_violations)
+                self._violation_drain_scheduled = True
+            except RuntimeError:  # No running loop: record immediately
+                self._drain_violations()
+    
+    def _drain_violations(self):
+        """Record every queued violation"""
+        self._violation_drain_scheduled = False
+        while self._violation_queue:
+            violation_type, severity, message, agent_id, symbol, metadata, timestamp = self._violation_queue.popleft()
+            self._violation_sequence += 1
+            violation = SafetyViolation(
+                violation_id=f"viol_{self._violation_sequence:06d}",
+                violation_type=violation_type,
+                severity=severity,
+                message=message,
+                agent_id=agent_id,
+                symbol=symbol,
+                timestamp=timestamp,
+                metadata=metadata or {}
+            )
+            
+            self.safety_violations.append(violation)
+            logger.warning(f"Safety violation [{severity}]: {message}")
+            
+            # Auto-trigger emergency stop for critical violations
+            if severity == "critical" and not self.emergency_stop_active:
+                critical_count = sum(1 for v in self.safety_violations[-10:] if v.severity == "critical")
+                if critical_count >= 3:  # 3 critical violations in last 10
+                    self._activate_emergency_stop("Multiple critical safety violations")
+    
+    async def flush_violations(self):
+        """Record all queued violations now"""
+        self._drain_violations()
+    
     async def _record_violation(
         self,
         violation_type: str,
@@ -297,42 +525,12 @@ class TradingSafetyService:
         metadata: Optional[Dict[str, Any]] = None
     ):
         """Record a safety violation"""
-        violation = SafetyViolation(
-            violation_id=f"viol_{len(self.safety_violations) + 1:06d}",
-            violation_type=violation_type,
-            severity=severity,
-            message=message,
-            agent_id=agent_id,
-            symbol=symbol,
-            metadata=metadata or {}
-        )
-        
-        self.safety_violations.append(violation)
-        logger.warning(f"Safety violation [{severity}]: {message}")
-        
-        # Auto-trigger emergency stop for critical violations
-        if severity == "critical":
-            critical_count = sum(1 for v in self.safety_violations[-10:] if v.severity == "critical")
-            if critical_count >= 3:  # 3 critical violations in last 10
-                await self.activate_emergency_stop("Multiple critical safety violations")
-    
-    def _should_reset_daily_limits(self, agent_limits: AgentLimits) -> bool:
-        """Check if daily limits should be reset"""
-        now = datetime.now(timezone.utc)
-        return (now - agent_limits.last_reset).days >= 1
+        self._queue_violation(violation_type, severity, message, agent_id, symbol, metadata)
+        self._drain_violations()
     
-    def _reset_daily_limits(self, agent_limits: AgentLimits):
-        """Reset daily limits for an agent"""
-        agent_limits.daily_trades = 0
-        agent_limits.daily_volume_usd = 0.0
-        agent_limits.hourly_loss_usd = 0.0
-        agent_limits.last_reset = datetime.now(timezone.utc)
-        logger.info(f"Reset daily limits for agent {agent_limits.agent_id}")
-    
-    async def activate_emergency_stop(self, reason: str):
-        """Activate emergency stop - halt all trading"""
+    def _activate_emergency_stop(self, reason: str):
         self.emergency_stop_active = True
-        await self._record_violation(
+        self._queue_violation(
             "emergency_stop_activated",
             "critical", 
             f"Emergency stop activated: {reason}",
@@ -340,6 +538,11 @@ class TradingSafetyService:
         )
         logger.critical(f"EMERGENCY STOP ACTIVATED: {reason}")
     
+    async def activate_emergency_stop(self, reason: str):
+        """Activate emergency stop - halt all trading"""
+        self._activate_emergency_stop(reason)
+        self._drain_violations()
+    
     async def deactivate_emergency_stop(self):
         """Deactivate emergency stop"""
         self.emergency_stop_active = False
@@ -402,8 +605,16 @@ class TradingSafetyService:
                 "max_daily_trades": self.trading_limits.max_daily_trades,
                 "max_daily_volume_usd": self.trading_limits.max_daily_volume_usd,
                 "max_position_size_usd": self.trading_limits.max_position_size_usd,
-                "max_concurrent_positions": self.trading_limits.max_concurrent_positions
-            }
+                "max_concurrent_positions": self.trading_limits.max_concurrent_positions,
+                "max_symbol_daily_volume_usd": self.trading_limits.max_symbol_daily_volume_usd,
+                "max_global_daily_trades": self.trading_limits.max_global_daily_trades,
+                "max_global_daily_volume_usd": self.trading_limits.max_global_daily_volume_usd
+            },
+            "global_window_totals": {
+                "trades": int(round(self._global_trades.value(self._clock()))),
+                "volume_usd": self._global_volume.value(self._clock())
+            },
+            "queued_violations": len(self._violation_queue)
         }
     
     def get_agent_safety_status(self, agent_id: str) -> Optional[Dict[str, Any]]:
@@ -412,13 +623,15 @@ class TradingSafetyService:
             return None
         
         limits = self.agent_limits[agent_id]
+        now = self._clock()
         return {
             "agent_id": agent_id,
-            "daily_trades": limits.daily_trades,
-            "daily_volume_usd": limits.daily_volume_usd,
+            "daily_trades": int(round(limits.trades.value(now))),
+            "daily_volume_usd": limits.volume_usd.value(now),
             "concurrent_positions": limits.concurrent_positions,
-            "hourly_loss_usd": limits.hourly_loss_usd,
-            "last_reset": limits.last_reset.isoformat(),
+            "hourly_loss_usd": limits.losses_usd.value(now),
+            "limit_window_seconds": self.trading_limits.limit_window_seconds,
+            "loss_window_seconds": self.trading_limits.loss_window_seconds,
             "limits": {
                 "max_daily_trades": self.trading_limits.max_daily_trades,
                 "max_daily_volume_usd": self.trading_limits.max_daily_volume_usd,
@@ -6,17 +6,76 @@ It provides common functionality and a standardized interface for strategy imple
 """
 
 import abc
+import itertools
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Tuple, Union
+from typing import Dict, List, Optional, Any, Tuple, Union, Callable
 import pandas as pd
 import numpy as np
 from loguru import logger
 import uuid
 
+try:
+    from sklearn.gaussian_process import GaussianProcessRegressor
+    from sklearn.gaussian_process.kernels import Matern
+    from scipy.stats import norm
+except ImportError:
+    GaussianProcessRegressor = None
+
 from ..models.trading_strategy import (
     TradingStrategy, TradingSignal, SignalType, 
     OHLCVData, TimeFrame, TechnicalIndicatorValue
 )
+from .streaming_indicators import to_float
+
+OHLCV_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+
+class RollingWindowCache:
+    """
+    Memoizes rolling-window computations over one DataFrame.
+
+    Used by parameter sweeps so each distinct (column, window, statistic)
+    is computed once no matter how many parameter combinations share it.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._cache: Dict[Tuple[str, int, str, Optional[int]], pd.Series] = {}
+
+    def get(self, column: str, window: int, statistic: str, min_periods: Optional[int] = None) -> pd.Series:
+        key = (column, window, statistic, min_periods)
+        if key not in self._cache:
+            rolling = self.df[column].rolling(window=window, min_periods=min_periods)
+            self._cache[key] = getattr(rolling, statistic)()
+        return self._cache[key]
+
+
+@dataclass
+class StreamState:
+    """Incremental indicator state for one symbol/timeframe fed by append_bar."""
+    parameters: Dict[str, Any]
+    indicators: Dict[str, Any]
+    values: Dict[str, Any] = field(default_factory=dict)
+    bars: int = 0
+
+
+def _evaluate_sweep_slice(
+    strategy_cls: type,
+    parameters: Dict[str, Any],
+    df: pd.DataFrame,
+    groups: List[Tuple[Dict[str, Any], Dict[str, np.ndarray], int]]
+) -> List[np.ndarray]:
+    """Process-pool entry point: evaluate a slice of parameter groups on one DataFrame"""
+    strategy = strategy_cls(parameters=dict(parameters))
+    cache = RollingWindowCache(df)
+    return [
+        strategy._evaluate_parameter_group(df, group_params, threshold_points, num_points, cache)
+        for group_params, threshold_points, num_points in groups
+    ]
+
 
 class BaseStrategy(abc.ABC):
     """
@@ -57,6 +116,11 @@ class BaseStrategy(abc.ABC):
         # Market data cache
         self._market_data: Dict[str, pd.DataFrame] = {}
         
+        # Streaming state: bars appended since the last DataFrame flush and the
+        # incremental indicator state per symbol/timeframe
+        self._pending_bars: Dict[str, List[Dict[str, Any]]] = {}
+        self._stream_states: Dict[str, StreamState] = {}
+        
         # Performance tracking
         self.signals: List[TradingSignal] = []
         self.performance_metrics: Dict[str, Any] = {
@@ -154,6 +218,8 @@ class BaseStrategy(abc.ABC):
                 df[col] = pd.to_numeric(df[col], errors='coerce')
         
         self._market_data[key] = df
+        self._pending_bars.pop(key, None)
+        self._stream_states.pop(key, None)
         logger.info(f"Added market data for {symbol} {timeframe}: {len(df)} rows")
     
     def get_market_data(self, symbol: str, timeframe: Union[str, TimeFrame]) -> Optional[pd.DataFrame]:
@@ -168,11 +234,14 @@ class BaseStrategy(abc.ABC):
             DataFrame with market data if available, None otherwise.
         """
         key = f"{symbol}_{timeframe}"
+        self._flush_pending_bars(key)
         return self._market_data.get(key)
     
     def clear_market_data(self) -> None:
         """Clear all cached market data."""
         self._market_data.clear()
+        self._pending_bars.clear()
+        self._stream_states.clear()
         logger.info("Cleared all market data from strategy cache")
     
     def generate_signal(self, symbol: str, timeframe: Union[str, TimeFrame], confidence: Optional[float] = None) -> TradingSignal:
@@ -192,6 +261,7 @@ class BaseStrategy(abc.ABC):
         """
         # Ensure we have market data
         key = f"{symbol}_{timeframe}"
+        self._flush_pending_bars(key)
         if key not in self._market_data:
             raise ValueError(f"No market data available for {symbol} {timeframe}")
         
@@ -206,6 +276,18 @@ class BaseStrategy(abc.ABC):
         df = self._market_data[key]
         current_price = float(df['close'].iloc[-1]) if not df.empty else None
         
+        return self._record_signal(symbol, timeframe, signal_type, signal_confidence, current_price, metadata)
+    
+    def _record_signal(
+        self,
+        symbol: str,
+        timeframe: Union[str, TimeFrame],
+        signal_type: SignalType,
+        signal_confidence: Optional[float],
+        current_price: Optional[float],
+        metadata: Dict[str, Any]
+    ) -> TradingSignal:
+        """Build a TradingSignal and track it in the performance metrics."""
         # Create the signal object
         signal = TradingSignal(
             strategy_id=uuid.UUID(self.strategy_id) if isinstance(self.strategy_id, str) else self.strategy_id,
@@ -249,6 +331,375 @@ class BaseStrategy(abc.ABC):
         """
         pass
     
+    # Streaming signals
+
+    # Appended bars are folded into the cached DataFrame in batches of this size,
+    # or earlier whenever the batch path (generate_signal, sweeps) needs the frame.
+    STREAM_FLUSH_BARS = 1024
+
+    def append_bar(self, symbol: str, timeframe: Union[str, TimeFrame], bar: Union[Dict[str, Any], OHLCVData, pd.Series]) -> TradingSignal:
+        """
+        Append a live bar and generate the signal for it incrementally.
+        
+        Strategies that provide streaming indicators update O(1) rolling state
+        per bar instead of recomputing indicators over the full history; the
+        resulting signal is identical to calling generate_signal after adding the
+        bar. Other strategies fall back to generate_signal.
+        
+        Args:
+            symbol: The trading symbol.
+            timeframe: The timeframe of the bar.
+            bar: Bar with timestamp, open, high, low, close and volume.
+            
+        Returns:
+            TradingSignal: The signal for the newest bar.
+        """
+        key = f"{symbol}_{timeframe}"
+        row = self._normalize_bar(bar)
+        
+        state = self._stream_states.get(key)
+        if state is None or state.parameters != self.parameters:
+            state = self._build_stream_state(key)
+        
+        pending = self._pending_bars.setdefault(key, [])
+        pending.append(row)
+        
+        if state is None:
+            return self.generate_signal(symbol, timeframe)
+        
+        self._update_stream_state(state, row)
+        state.bars += 1
+        signal_type, confidence, metadata = self._stream_signal(symbol, timeframe, state)
+        
+        if len(pending) >= self.STREAM_FLUSH_BARS:
+            self._flush_pending_bars(key)
+        
+        return self._record_signal(symbol, timeframe, signal_type, confidence, row['close'], metadata)
+    
+    def _normalize_bar(self, bar: Union[Dict[str, Any], OHLCVData, pd.Series]) -> Dict[str, Any]:
+        """Convert a bar to a row dict with a Timestamp and float OHLCV values."""
+        if isinstance(bar, OHLCVData):
+            row = bar.dict()
+        elif isinstance(bar, pd.Series):
+            row = bar.to_dict()
+            if 'timestamp' not in row:
+                row['timestamp'] = bar.name
+        elif isinstance(bar, dict):
+            row = dict(bar)
+        else:
+            raise ValueError(f"Unsupported bar type: {type(bar)}")
+        
+        missing = [col for col in ('timestamp',) + OHLCV_COLUMNS if col not in row]
+        if missing:
+            raise ValueError(f"Missing required columns: {missing}")
+        
+        row['timestamp'] = pd.Timestamp(row['timestamp'])
+        for col in OHLCV_COLUMNS:
+            row[col] = to_float(row[col])
+        return row
+    
+    def _flush_pending_bars(self, key: str) -> None:
+        """Fold bars appended via append_bar into the cached DataFrame."""
+        pending = self._pending_bars.pop(key, None)
+        if not pending:
+            return
+        
+        new_rows = pd.DataFrame(pending).set_index('timestamp')
+        df = self._market_data.get(key)
+        self._market_data[key] = new_rows if df is None or df.empty else pd.concat([df, new_rows])
+    
+    def _build_stream_state(self, key: str) -> Optional[StreamState]:
+        """Create streaming state for a key and replay the cached history into it."""
+        indicators = self._create_stream_indicators()
+        if indicators is None:
+            self._stream_states.pop(key, None)
+            return None
+        
+        state = StreamState(parameters=dict(self.parameters), indicators=indicators)
+        self._flush_pending_bars(key)
+        df = self._market_data.get(key)
+        if df is not None and not df.empty:
+            columns = {col: df[col].to_numpy(dtype=float) for col in OHLCV_COLUMNS}
+            for i in range(len(df)):
+                self._update_stream_state(state, {col: float(values[i]) for col, values in columns.items()})
+            state.bars = len(df)
+        
+        self._stream_states[key] = state
+        return state
+    
+    def _create_stream_indicators(self) -> Optional[Dict[str, Any]]:
+        """
+        Create the rolling indicator objects used by append_bar.
+        
+        Returns:
+            Dict of streaming indicators for the current parameters, or None if the
+            strategy has no incremental implementation.
+        """
+        return None
+    
+    def _update_stream_state(self, state: StreamState, bar: Dict[str, Any]) -> None:
+        """
+        Feed one bar into the streaming indicators and store the newest values.
+        
+        Args:
+            state: The streaming state to update.
+            bar: Row dict with float OHLCV values.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support streaming updates")
+    
+    def _stream_signal(self, symbol: str, timeframe: Union[str, TimeFrame], state: StreamState) -> Tuple[SignalType, Optional[float], Dict[str, Any]]:
+        """
+        Generate the signal for the newest bar from streaming state.
+        
+        Args:
+            symbol: The trading symbol.
+            timeframe: The timeframe.
+            state: The streaming state after the newest bar.
+            
+        Returns:
+            Tuple of signal type, confidence and metadata, as _generate_signal_internal.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support streaming updates")
+    
+    # Parameter sweeps
+
+    # Parameters that determine indicator windows. Combinations sharing these values
+    # are evaluated together; all other swept parameters are broadcast as arrays.
+    SWEEP_GROUP_PARAMETERS: Tuple[str, ...] = ()
+
+    def _evaluate_parameter_group(
+        self,
+        df: pd.DataFrame,
+        group_params: Dict[str, Any],
+        threshold_points: Dict[str, np.ndarray],
+        num_points: int,
+        cache: RollingWindowCache
+    ) -> np.ndarray:
+        """
+        Evaluate the optimization metric for several parameter points at once.
+
+        Args:
+            df: Market data to evaluate on.
+            group_params: Values of SWEEP_GROUP_PARAMETERS shared by all points.
+            threshold_points: Remaining swept parameters as aligned 1-D arrays.
+            num_points: Number of points (length of each threshold array).
+            cache: Rolling-window cache shared across groups of the same sweep.
+
+        Returns:
+            Array of num_points metric values (higher is better).
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support parameter sweeps")
+
+    def sweep_parameters(
+        self,
+        symbol: str,
+        timeframe: Union[str, TimeFrame],
+        param_grid: Dict[str, List[Any]],
+        method: str = "grid",
+        n_iter: Optional[int] = None,
+        constraint: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        max_workers: int = 1,
+        seed: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Evaluate the optimization metric over a parameter grid.
+
+        Combinations are grouped by SWEEP_GROUP_PARAMETERS so rolling windows are
+        computed once per distinct window; the other parameters are evaluated as
+        broadcast array comparisons. Groups are split into slices that run in
+        separate processes when max_workers > 1.
+
+        Args:
+            symbol: The trading symbol to optimize for.
+            timeframe: The timeframe to use for optimization.
+            param_grid: Candidate values per parameter.
+            method: "grid" (every combination), "random" (n_iter sampled combinations)
+                or "bayesian" (Gaussian-process expected improvement over the grid).
+            n_iter: Number of combinations to evaluate for random/bayesian.
+            constraint: Optional predicate; combinations for which it is False are skipped.
+            max_workers: Number of processes to spread parameter groups across.
+            seed: Random seed for random/bayesian sampling.
+
+        Returns:
+            Dict with the best parameters and metric plus every evaluated point.
+            Grid sweeps also include the metric surface shaped like the grid
+            (NaN where a combination was skipped).
+        """
+        key = f"{symbol}_{timeframe}"
+        self._flush_pending_bars(key)
+        if key not in self._market_data:
+            raise ValueError(f"No market data available for {symbol} {timeframe}")
+        if method not in ("grid", "random", "bayesian"):
+            raise ValueError(f"Unknown sweep method: {method}")
+
+        df = self._market_data[key]
+        param_names = list(param_grid.keys())
+        grid_values = [list(param_grid[name]) for name in param_names]
+        grid_shape = tuple(len(values) for values in grid_values)
+
+        candidates = [
+            flat_index for flat_index, combo in enumerate(itertools.product(*grid_values))
+            if constraint is None or constraint(dict(zip(param_names, combo)))
+        ]
+
+        rng = np.random.default_rng(seed)
+        if method == "grid":
+            metrics = self._evaluate_grid_points(df, param_names, grid_values, grid_shape, candidates, max_workers)
+        else:
+            budget = min(n_iter or len(candidates), len(candidates))
+            if method == "bayesian" and GaussianProcessRegressor is None:
+                logger.warning("scikit-learn not available, falling back to random parameter sweep")
+                method = "random"
+            if method == "random":
+                chosen = list(rng.choice(candidates, size=budget, replace=False)) if budget else []
+                metrics = self._evaluate_grid_points(df, param_names, grid_values, grid_shape, chosen, max_workers)
+            else:
+                metrics = self._bayesian_sweep(
+                    df, param_names, grid_values, grid_shape, candidates, budget, max_workers, rng
+                )
+
+        results = []
+        best_metric = 0.0
+        best_point: Optional[Dict[str, Any]] = None
+        for flat_index in sorted(metrics):
+            combo = np.unravel_index(flat_index, grid_shape)
+            point = {name: grid_values[d][i] for d, (name, i) in enumerate(zip(param_names, combo))}
+            metric = float(metrics[flat_index])
+            results.append({"params": point, "metric": metric})
+            if metric > best_metric:
+                best_metric = metric
+                best_point = point
+
+        best_params = self.parameters.copy()
+        if best_point is not None:
+            best_params.update(best_point)
+
+        sweep_result = {
+            "method": method,
+            "param_names": param_names,
+            "evaluations": len(results),
+            "results": results,
+            "best_params": best_params,
+            "best_metric": best_metric
+        }
+        if method == "grid":
+            surface = np.full(grid_shape, np.nan)
+            for flat_index, metric in metrics.items():
+                surface[np.unravel_index(flat_index, grid_shape)] = metric
+            sweep_result["surface"] = surface.tolist()
+
+        logger.info(f"Swept {len(results)} parameter combinations for {self.strategy_name} on {symbol} {timeframe} "
+                    f"({method}); best metric {best_metric:.4f}")
+        return sweep_result
+
+    def _evaluate_grid_points(
+        self,
+        df: pd.DataFrame,
+        param_names: List[str],
+        grid_values: List[List[Any]],
+        grid_shape: Tuple[int, ...],
+        flat_indices: List[int],
+        max_workers: int
+    ) -> Dict[int, float]:
+        """Group grid points by their indicator parameters and evaluate each group in one call"""
+        group_dims = [d for d, name in enumerate(param_names) if name in self.SWEEP_GROUP_PARAMETERS]
+        threshold_dims = [d for d in range(len(param_names)) if d not in group_dims]
+
+        grouped: Dict[Tuple[int, ...], List[int]] = {}
+        for flat_index in flat_indices:
+            combo = np.unravel_index(int(flat_index), grid_shape)
+            grouped.setdefault(tuple(combo[d] for d in group_dims), []).append(int(flat_index))
+
+        groups = []
+        ordered_members = []
+        for group_key in sorted(grouped):
+            members = grouped[group_key]
+            combos = [np.unravel_index(i, grid_shape) for i in members]
+            group_params = {param_names[d]: grid_values[d][j] for d, j in zip(group_dims, group_key)}
+            threshold_points = {
+                param_names[d]: np.array([grid_values[d][combo[d]] for combo in combos], dtype=float)
+                for d in threshold_dims
+            }
+            groups.append((group_params, threshold_points, len(members)))
+            ordered_members.append(members)
+
+        if max_workers > 1 and len(groups) > 1:
+            slices = [groups[i::max_workers] for i in range(max_workers) if groups[i::max_workers]]
+            with ProcessPoolExecutor(max_workers=len(slices)) as executor:
+                futures = [
+                    executor.submit(_evaluate_sweep_slice, type(self), self.parameters, df, group_slice)
+                    for group_slice in slices
+                ]
+                slice_results = [future.result() for future in futures]
+            group_metrics: List[np.ndarray] = [None] * len(groups)
+            for offset, metrics in enumerate(slice_results):
+                group_metrics[offset::max_workers] = metrics
+        else:
+            cache = RollingWindowCache(df)
+            group_metrics = [
+                self._evaluate_parameter_group(df, group_params, threshold_points, num_points, cache)
+                for group_params, threshold_points, num_points in groups
+            ]
+
+        return {
+            flat_index: float(metric)
+            for members, metrics in zip(ordered_members, group_metrics)
+            for flat_index, metric in zip(members, metrics)
+        }
+
+    def _bayesian_sweep(
+        self,
+        df: pd.DataFrame,
+        param_names: List[str],
+        grid_values: List[List[Any]],
+        grid_shape: Tuple[int, ...],
+        candidates: List[int],
+        budget: int,
+        max_workers: int,
+        rng: np.random.Generator
+    ) -> Dict[int, float]:
+        """Sequential model-based sweep: GP surrogate with expected improvement over the grid"""
+        if not candidates or budget == 0:
+            return {}
+
+        # Candidate coordinates normalised to [0, 1] per parameter (by grid position)
+        coords = np.array([np.unravel_index(i, grid_shape) for i in candidates], dtype=float)
+        coords /= np.maximum(np.array(grid_shape, dtype=float) - 1, 1)
+
+        batch_size = max(1, max_workers)
+        initial = min(budget, max(batch_size, 5))
+        chosen = list(rng.choice(len(candidates), size=initial, replace=False))
+        metrics = self._evaluate_grid_points(
+            df, param_names, grid_values, grid_shape, [candidates[i] for i in chosen], max_workers
+        )
+        evaluated = set(chosen)
+
+        while len(evaluated) < budget:
+            observed = sorted(evaluated)
+            X = coords[observed]
+            y = np.array([metrics[candidates[i]] for i in observed])
+
+            gp = GaussianProcessRegressor(kernel=Matern(nu=2.5), normalize_y=True, random_state=0)
+            with warnings.catch_warnings():
+                # Flat metric surfaces push the length scale to its bound; the fit is still usable
+                warnings.simplefilter("ignore")
+                gp.fit(X, y)
+
+            remaining = np.array([i for i in range(len(candidates)) if i not in evaluated])
+            mu, sigma = gp.predict(coords[remaining], return_std=True)
+            improvement = mu - y.max()
+            z = np.divide(improvement, sigma, out=np.zeros_like(mu), where=sigma > 0)
+            expected_improvement = np.where(sigma > 0, improvement * norm.cdf(z) + sigma * norm.pdf(z), 0.0)
+
+            take = min(batch_size, budget - len(evaluated))
+            picks = remaining[np.argsort(-expected_improvement, kind="stable")[:take]]
+            metrics.update(self._evaluate_grid_points(
+                df, param_names, grid_values, grid_shape, [candidates[i] for i in picks], max_workers
+            ))
+            evaluated.update(int(i) for i in picks)
+
+        return metrics
+
     def calculate_performance_metrics(self) -> Dict[str, Any]:
         """
         Calculate performance metrics for the strategy.
@@ -10,7 +10,8 @@ import pandas as pd
 import numpy as np
 from loguru import logger
 
-from .base_strategy import BaseStrategy
+from .base_strategy import BaseStrategy, RollingWindowCache, StreamState
+from .streaming_indicators import RollingExtreme, RollingMean, ieee_divide
 from ..models.trading_strategy import SignalType, TimeFrame
 
 class DarvasBoxStrategy(BaseStrategy):
@@ -149,32 +150,49 @@ class DarvasBoxStrategy(BaseStrategy):
         df = self._market_data[key]
         df = self._calculate_darvas_boxes(df)
         
+        latest = df.iloc[-1] if not df.empty else None
+        return self._box_signal(symbol, timeframe, len(df), latest)
+    
+    def _box_signal(self, symbol: str, timeframe: Union[str, TimeFrame], num_bars: int, latest: Optional[Any]) -> Tuple[SignalType, Optional[float], Dict[str, Any]]:
+        """
+        Turn the newest bar's box values into a signal.
+        
+        Shared by the batch path and append_bar so both produce the same signal.
+        
+        Args:
+            symbol: The trading symbol.
+            timeframe: The timeframe.
+            num_bars: Number of bars in the history.
+            latest: Box columns for the newest bar (row or dict), None without data.
+            
+        Returns:
+            Tuple of signal type, confidence and metadata.
+        """
         # Default to HOLD
         signal_type = SignalType.HOLD
         confidence = 50.0
         
         # Check for breakouts in recent periods
-        if len(df) >= 3:
-            latest_state = df['box_state'].iloc[-1]
-            prev_state = df['box_state'].iloc[-2]
+        if num_bars >= 3:
+            latest_state = latest['box_state']
             
             # Current box state
             if latest_state == 'top_breakout':
                 signal_type = SignalType.BUY
                 # Higher confidence with larger breakout and higher volume
-                volume_factor = min(2.0, float(df['volume_ratio'].iloc[-1]) / self.parameters["volume_threshold"])
-                distance_factor = min(2.0, abs(float(df['distance_from_top'].iloc[-1])) / self.parameters["breakout_threshold"])
+                volume_factor = min(2.0, float(latest['volume_ratio']) / self.parameters["volume_threshold"])
+                distance_factor = min(2.0, abs(float(latest['distance_from_top'])) / self.parameters["breakout_threshold"])
                 confidence = min(90.0, 50.0 + (volume_factor + distance_factor) * 10.0)
             elif latest_state == 'bottom_breakout':
                 signal_type = SignalType.SELL
                 # Higher confidence with larger breakout and higher volume
-                volume_factor = min(2.0, float(df['volume_ratio'].iloc[-1]) / self.parameters["volume_threshold"])
-                distance_factor = min(2.0, abs(float(df['distance_from_bottom'].iloc[-1])) / self.parameters["breakout_threshold"])
+                volume_factor = min(2.0, float(latest['volume_ratio']) / self.parameters["volume_threshold"])
+                distance_factor = min(2.0, abs(float(latest['distance_from_bottom'])) / self.parameters["breakout_threshold"])
                 confidence = min(90.0, 50.0 + (volume_factor + distance_factor) * 10.0)
             else:
                 # Inside box - check if close to breakout
-                top_distance = float(df['distance_from_top'].iloc[-1])
-                bottom_distance = float(df['distance_from_bottom'].iloc[-1])
+                top_distance = float(latest['distance_from_top'])
+                bottom_distance = float(latest['distance_from_bottom'])
                 
                 if abs(top_distance) < abs(bottom_distance):
                     # Closer to top - weak buy signal
@@ -187,10 +205,10 @@ class DarvasBoxStrategy(BaseStrategy):
         
         # Prepare metadata
         metadata = {
-            "box_top": float(df['box_top'].iloc[-1]) if not df.empty and not pd.isna(df['box_top'].iloc[-1]) else None,
-            "box_bottom": float(df['box_bottom'].iloc[-1]) if not df.empty and not pd.isna(df['box_bottom'].iloc[-1]) else None,
-            "box_state": df['box_state'].iloc[-1] if not df.empty else None,
-            "volume_ratio": float(df['volume_ratio'].iloc[-1]) if not df.empty and not pd.isna(df['volume_ratio'].iloc[-1]) else None,
+            "box_top": float(latest['box_top']) if latest is not None and not pd.isna(latest['box_top']) else None,
+            "box_bottom": float(latest['box_bottom']) if latest is not None and not pd.isna(latest['box_bottom']) else None,
+            "box_state": latest['box_state'] if latest is not None else None,
+            "volume_ratio": float(latest['volume_ratio']) if latest is not None and not pd.isna(latest['volume_ratio']) else None,
             "parameters": {
                 "box_period": self.parameters["box_period"],
                 "volume_threshold": self.parameters["volume_threshold"],
@@ -201,6 +219,48 @@ class DarvasBoxStrategy(BaseStrategy):
         logger.debug(f"Darvas Box strategy generated {signal_type} signal with confidence {confidence:.2f} for {symbol} {timeframe}")
         return signal_type, confidence, metadata
     
+    def _create_stream_indicators(self) -> Dict[str, Any]:
+        """Rolling box top/bottom and volume average for append_bar."""
+        box_period = self.parameters["box_period"]
+        return {
+            "box_top": RollingExtreme(box_period, "max"),
+            "box_bottom": RollingExtreme(box_period, "min"),
+            "volume_ma": RollingMean(box_period)
+        }
+    
+    def _update_stream_state(self, state: StreamState, bar: Dict[str, Any]) -> None:
+        """Advance the box state by one bar, mirroring _calculate_darvas_boxes for the newest row."""
+        indicators = state.indicators
+        close = bar["close"]
+        box_top = indicators["box_top"].update(bar["high"])
+        box_bottom = indicators["box_bottom"].update(bar["low"])
+        volume_ma = indicators["volume_ma"].update(bar["volume"])
+        volume_ratio = ieee_divide(bar["volume"], volume_ma)
+        
+        breakout_threshold = state.parameters["breakout_threshold"]
+        volume_threshold = state.parameters["volume_threshold"]
+        if close > box_top * (1 + breakout_threshold) and volume_ratio > volume_threshold:
+            box_state = "top_breakout"
+        elif close < box_bottom * (1 - breakout_threshold) and volume_ratio > volume_threshold:
+            box_state = "bottom_breakout"
+        else:
+            box_state = "inside_box"
+        
+        state.values = {
+            "box_top": box_top,
+            "box_bottom": box_bottom,
+            "volume_ratio": volume_ratio,
+            "distance_from_top": ieee_divide(close - box_top, box_top),
+            "distance_from_bottom": ieee_divide(close - box_bottom, box_bottom),
+            "box_state": box_state
+        }
+    
+    def _stream_signal(self, symbol: str, timeframe: Union[str, TimeFrame], state: StreamState) -> Tuple[SignalType, Optional[float], Dict[str, Any]]:
+        """Signal for the newest appended bar."""
+        return self._box_signal(symbol, timeframe, state.bars, state.values)
+    
+    SWEEP_GROUP_PARAMETERS = ("box_period",)
+
     def optimize_parameters(self, symbol: str, timeframe: Union[str, TimeFrame], optimization_metric: str = "win_rate") -> Dict[str, Any]:
         """
         Optimize strategy parameters for a specific symbol and timeframe.
@@ -213,45 +273,19 @@ class DarvasBoxStrategy(BaseStrategy):
         Returns:
             Dict with optimized parameters.
         """
-        key = f"{symbol}_{timeframe}"
-        if key not in self._market_data:
-            raise ValueError(f"No market data available for {symbol} {timeframe}")
-        
-        # In a real implementation, this would run a grid search or other optimization
-        # For now, we just return the current parameters with a simple optimization
         logger.info(f"Optimizing Darvas Box parameters for {symbol} {timeframe}")
         
-        # Simple optimization for demonstration
-        best_params = self.parameters.copy()
-        best_metric = 0.0
-        
-        # Try a few parameter combinations
-        box_periods = [3, 5, 7, 10]
-        volume_thresholds = [1.2, 1.5, 2.0]
-        breakout_thresholds = [0.005, 0.01, 0.02]
-        
-        for box_period in box_periods:
-            for volume_threshold in volume_thresholds:
-                for breakout_threshold in breakout_thresholds:
-                    # Set test parameters
-                    test_params = self.parameters.copy()
-                    test_params["box_period"] = box_period
-                    test_params["volume_threshold"] = volume_threshold
-                    test_params["breakout_threshold"] = breakout_threshold
-                    
-                    # Calculate metric (simplified)
-                    # In a real implementation, this would involve backtesting
-                    metric = self._calculate_test_metric(symbol, timeframe, test_params)
-                    
-                    # Update best parameters if better
-                    if metric > best_metric:
-                        best_metric = metric
-                        best_params = test_params
+        sweep = self.sweep_parameters(symbol, timeframe, {
+            "box_period": [3, 5, 7, 10],
+            "volume_threshold": [1.2, 1.5, 2.0],
+            "breakout_threshold": [0.005, 0.01, 0.02]
+        })
+        best_params = sweep["best_params"]
         
         logger.info(f"Optimized parameters: box_period={best_params['box_period']}, "
                   f"volume_threshold={best_params['volume_threshold']}, "
                   f"breakout_threshold={best_params['breakout_threshold']}, "
-                  f"metric={best_metric:.4f}")
+                  f"metric={sweep['best_metric']:.4f}")
         
         # Update the strategy parameters
         self.parameters = best_params
@@ -269,79 +303,78 @@ class DarvasBoxStrategy(BaseStrategy):
         Returns:
             Float value of the metric (higher is better).
         """
-        # This is a simplified metric calculation for demonstration
-        # In a real implementation, this would involve backtesting
-        
         key = f"{symbol}_{timeframe}"
-        df = self._market_data[key].copy()
-        
-        # Calculate Darvas Boxes with test parameters
-        box_period = test_params["box_period"]
-        volume_threshold = test_params["volume_threshold"]
-        breakout_threshold = test_params["breakout_threshold"]
+        df = self._market_data[key]
+        metrics = self._evaluate_parameter_group(
+            df,
+            {"box_period": test_params["box_period"]},
+            {
+                "volume_threshold": np.array([test_params["volume_threshold"]], dtype=float),
+                "breakout_threshold": np.array([test_params["breakout_threshold"]], dtype=float)
+            },
+            1,
+            RollingWindowCache(df)
+        )
+        return float(metrics[0])
+    
+    def _evaluate_parameter_group(
+        self,
+        df: pd.DataFrame,
+        group_params: Dict[str, Any],
+        threshold_points: Dict[str, np.ndarray],
+        num_points: int,
+        cache: RollingWindowCache
+    ) -> np.ndarray:
+        """
+        Breakout hit-rate metric for every threshold point sharing one box_period.
         
-        # Calculate box tops and bottoms
-        df['box_top'] = df['high'].rolling(window=box_period).max()
-        df['box_bottom'] = df['low'].rolling(window=box_period).min()
+        Box tops/bottoms and the volume average are computed once per box_period;
+        breakout conditions for all points are evaluated as one (points x bars)
+        comparison. A breakout is correct when the close five bars later (or the
+        last bar) moved in the breakout direction.
+        """
+        box_period = group_params.get("box_period", self.parameters["box_period"])
+        volume_threshold = threshold_points.get(
+            "volume_threshold", np.full(num_points, self.parameters["volume_threshold"], dtype=float)
+        )
+        breakout_threshold = threshold_points.get(
+            "breakout_threshold", np.full(num_points, self.parameters["breakout_threshold"], dtype=float)
+        )
         
-        # Calculate volume moving average
-        df['volume_ma'] = df['volume'].rolling(window=box_period).mean()
-        df['volume_ratio'] = df['volume'] / df['volume_ma']
+        box_top = cache.get("high", box_period, "max").to_numpy(dtype=float)
+        box_bottom = cache.get("low", box_period, "min").to_numpy(dtype=float)
+        volume_ma = cache.get("volume", box_period, "mean").to_numpy(dtype=float)
+        volume_ratio = df["volume"].to_numpy(dtype=float) / volume_ma
         
-        # Calculate breakout signals
-        df['top_breakout'] = (
-            (df['close'] > df['box_top'] * (1 + breakout_threshold)) & 
-            (df['volume_ratio'] > volume_threshold)
+        # Rows without NaN in the data or in any derived column
+        valid = (
+            ~df.isna().any(axis=1).to_numpy()
+            & ~np.isnan(box_top) & ~np.isnan(box_bottom)
+            & ~np.isnan(volume_ma) & ~np.isnan(volume_ratio)
         )
+        if np.count_nonzero(valid) < 10:
+            return np.zeros(num_points)
         
-        df['bottom_breakout'] = (
-            (df['close'] < df['box_bottom'] * (1 - breakout_threshold)) & 
-            (df['volume_ratio'] > volume_threshold)
-        )
+        close = df["close"].to_numpy(dtype=float)[valid]
+        box_top, box_bottom, volume_ratio = box_top[valid], box_bottom[valid], volume_ratio[valid]
         
-        # Drop NaN values
-        df = df.dropna()
-        
-        if len(df) < 10:
-            return 0.0
-        
-        # Count breakouts
-        buy_signals = df['top_breakout'].sum()
-        sell_signals = df['bottom_breakout'].sum()
-        total_signals = buy_signals + sell_signals
-        
-        if total_signals == 0:
-            return 0.0
-        
-        # Calculate a simple metric based on price movement after signals
-        # This is very simplified and for demonstration only
-        correct_buys = 0
-        correct_sells = 0
-        
-        for i in range(len(df) - 1):
-            if df['top_breakout'].iloc[i]:  # Buy signal
-                # Check if price increased in the next few periods
-                future_periods = min(5, len(df) - i - 1)
-                if future_periods > 0:
-                    future_return = (df['close'].iloc[i + future_periods] / df['close'].iloc[i]) - 1
-                    if future_return > 0:
-                        correct_buys += 1
-            
-            elif df['bottom_breakout'].iloc[i]:  # Sell signal
-                # Check if price decreased in the next few periods
-                future_periods = min(5, len(df) - i - 1)
-                if future_periods > 0:
-                    future_return = (df['close'].iloc[i + future_periods] / df['close'].iloc[i]) - 1
-                    if future_return < 0:
-                        correct_sells += 1
+        volume_ok = volume_ratio[None, :] > volume_threshold[:, None]
+        top_breakout = (close[None, :] > box_top[None, :] * (1 + breakout_threshold[:, None])) & volume_ok
+        bottom_breakout = (close[None, :] < box_bottom[None, :] * (1 - breakout_threshold[:, None])) & volume_ok
         
-        # Calculate win rate
-        win_rate = (correct_buys + correct_sells) / max(1, total_signals)
+        total_signals = top_breakout.sum(axis=1) + bottom_breakout.sum(axis=1)
         
-        # Prefer strategies with more signals (within reason)
-        signal_factor = min(1.0, total_signals / 20)
+        # Return over the next (up to) five bars from each bar except the last
+        n = len(close)
+        bars = np.arange(n - 1)
+        future_return = close[bars + np.minimum(5, n - 1 - bars)] / close[:-1] - 1
         
-        # Combine metrics
-        metric = win_rate * signal_factor
+        correct_buys = (top_breakout[:, :-1] & (future_return > 0)).sum(axis=1)
+        correct_sells = (bottom_breakout[:, :-1] & ~top_breakout[:, :-1] & (future_return < 0)).sum(axis=1)
+        
+        win_rate = (correct_buys + correct_sells) / np.maximum(1, total_signals)
+        
+        # Prefer strategies with more signals (within reason)
+        signal_factor = np.minimum(1.0, total_signals / 20)
         
-        return metric
+        return np.where(total_signals == 0, 0.0, win_rate * signal_factor)
@@ -11,7 +11,7 @@ import numpy as np
 from loguru import logger
 import scipy.signal as signal
 
-from .base_strategy import BaseStrategy
+from .base_strategy import BaseStrategy, RollingWindowCache
 from ..models.trading_strategy import SignalType, TimeFrame
 
 class ElliottWaveStrategy(BaseStrategy):
@@ -332,6 +332,8 @@ class ElliottWaveStrategy(BaseStrategy):
         logger.debug(f"Elliott Wave strategy generated {signal_type} signal with confidence {confidence:.2f} for {symbol} {timeframe}")
         return signal_type, confidence, metadata
     
+    SWEEP_GROUP_PARAMETERS = ("smoothing_period",)
+
     def optimize_parameters(self, symbol: str, timeframe: Union[str, TimeFrame], optimization_metric: str = "win_rate") -> Dict[str, Any]:
         """
         Optimize strategy parameters for a specific symbol and timeframe.
@@ -344,45 +346,19 @@ class ElliottWaveStrategy(BaseStrategy):
         Returns:
             Dict with optimized parameters.
         """
-        key = f"{symbol}_{timeframe}"
-        if key not in self._market_data:
-            raise ValueError(f"No market data available for {symbol} {timeframe}")
-        
-        # In a real implementation, this would run a grid search or other optimization
-        # For now, we just return the current parameters with a simple optimization
         logger.info(f"Optimizing Elliott Wave parameters for {symbol} {timeframe}")
         
-        # Simple optimization for demonstration
-        best_params = self.parameters.copy()
-        best_metric = 0.0
-        
-        # Try a few parameter combinations
-        smoothing_periods = [3, 5, 8]
-        peak_thresholds = [0.02, 0.03, 0.05]
-        min_wave_heights = [0.01, 0.02, 0.03]
-        
-        for smoothing_period in smoothing_periods:
-            for peak_threshold in peak_thresholds:
-                for min_wave_height in min_wave_heights:
-                    # Set test parameters
-                    test_params = self.parameters.copy()
-                    test_params["smoothing_period"] = smoothing_period
-                    test_params["peak_threshold"] = peak_threshold
-                    test_params["min_wave_height"] = min_wave_height
-                    
-                    # Calculate metric (simplified)
-                    # In a real implementation, this would involve backtesting
-                    metric = self._calculate_test_metric(symbol, timeframe, test_params)
-                    
-                    # Update best parameters if better
-                    if metric > best_metric:
-                        best_metric = metric
-                        best_params = test_params
+        sweep = self.sweep_parameters(symbol, timeframe, {
+            "smoothing_period": [3, 5, 8],
+            "peak_threshold": [0.02, 0.03, 0.05],
+            "min_wave_height": [0.01, 0.02, 0.03]
+        })
+        best_params = sweep["best_params"]
         
         logger.info(f"Optimized parameters: smoothing_period={best_params['smoothing_period']}, "
                   f"peak_threshold={best_params['peak_threshold']}, "
                   f"min_wave_height={best_params['min_wave_height']}, "
-                  f"metric={best_metric:.4f}")
+                  f"metric={sweep['best_metric']:.4f}")
         
         # Update the strategy parameters
         self.parameters = best_params
@@ -400,64 +376,73 @@ class ElliottWaveStrategy(BaseStrategy):
         Returns:
             Float value of the metric (higher is better).
         """
-        # This is a simplified metric calculation for demonstration
-        # In a real implementation, this would involve backtesting
-        
         key = f"{symbol}_{timeframe}"
-        df = self._market_data[key].copy()
-        
-        # Apply smoothing to close prices
-        smoothing_period = test_params["smoothing_period"]
-        df['smoothed_close'] = df['close'].rolling(window=smoothing_period, min_periods=1).mean()
-        
-        # Find peaks and troughs
-        price_array = df['smoothed_close'].values
-        peak_threshold = test_params["peak_threshold"] * np.mean(price_array)
-        
-        peaks, _ = signal.find_peaks(price_array, height=peak_threshold, distance=3)
-        troughs, _ = signal.find_peaks(-price_array, height=peak_threshold, distance=3)
-        
-        # Count the number of potential waves
-        extrema_count = len(peaks) + len(troughs)
-        
-        if extrema_count < 10:
-            return 0.0
-        
-        # More extrema points is better, but not too many (avoid noise)
-        extrema_factor = min(1.0, extrema_count / 50)
+        df = self._market_data[key]
+        metrics = self._evaluate_parameter_group(
+            df,
+            {"smoothing_period": test_params["smoothing_period"]},
+            {"peak_threshold": np.array([test_params["peak_threshold"]], dtype=float)},
+            1,
+            RollingWindowCache(df)
+        )
+        return float(metrics[0])
+    
+    def _evaluate_parameter_group(
+        self,
+        df: pd.DataFrame,
+        group_params: Dict[str, Any],
+        threshold_points: Dict[str, np.ndarray],
+        num_points: int,
+        cache: RollingWindowCache
+    ) -> np.ndarray:
+        """
+        Wave-completion hit-rate metric for every point sharing one smoothing_period.
         
-        # Calculate price movement after potential wave completions
-        # Assume wave completion at every 5th extrema point
-        correct_predictions = 0
-        total_predictions = 0
+        The smoothed series is computed once per smoothing_period and peak detection
+        runs once per distinct peak_threshold. min_wave_height does not enter the
+        metric, so points differing only in it share a result.
+        """
+        smoothing_period = group_params.get("smoothing_period", self.parameters["smoothing_period"])
+        peak_thresholds = threshold_points.get(
+            "peak_threshold", np.full(num_points, self.parameters["peak_threshold"], dtype=float)
+        )
         
-        # Combine and sort extrema
-        extrema_indices = np.sort(np.concatenate([peaks, troughs]))
+        price_array = cache.get("close", smoothing_period, "mean", min_periods=1).to_numpy(dtype=float)
+        close = df["close"].to_numpy(dtype=float)
+        n = len(df)
+        mean_price = np.mean(price_array)
         
-        for i in range(5, len(extrema_indices), 5):
-            if i + 5 >= len(extrema_indices) or i >= len(df) - 5:
-                break
+        metric_by_threshold: Dict[float, float] = {}
+        for peak_threshold in np.unique(peak_thresholds):
+            height = peak_threshold * mean_price
+            peaks, _ = signal.find_peaks(price_array, height=height, distance=3)
+            troughs, _ = signal.find_peaks(-price_array, height=height, distance=3)
             
-            # Check if there's a price movement after 5-wave pattern
-            current_idx = extrema_indices[i]
-            future_idx = min(current_idx + 5, len(df) - 1)
+            # Count the number of potential waves
+            extrema_count = len(peaks) + len(troughs)
+            if extrema_count < 10:
+                metric_by_threshold[peak_threshold] = 0.0
+                continue
             
-            if current_idx < len(df) and future_idx < len(df):
-                is_peak = current_idx in peaks
-                price_change = (df['close'].iloc[future_idx] - df['close'].iloc[current_idx]) / df['close'].iloc[current_idx]
-                
-                # If current point is a peak, expect price to go down, otherwise expect it to go up
-                correct_prediction = (is_peak and price_change < 0) or (not is_peak and price_change > 0)
-                
-                if correct_prediction:
-                    correct_predictions += 1
-                
-                total_predictions += 1
-        
-        # Calculate win rate
-        win_rate = correct_predictions / max(1, total_predictions)
-        
-        # Combine metrics
-        metric = win_rate * extrema_factor
-        
-        return metric
+            # More extrema points is better, but not too many (avoid noise)
+            extrema_factor = min(1.0, extrema_count / 50)
+            
+            # Assume wave completion at every 5th extrema point, while 5 more extrema
+            # and 5 more bars remain
+            extrema_indices = np.sort(np.concatenate([peaks, troughs]))
+            steps = np.arange(5, len(extrema_indices), 5)
+            steps = steps[(steps + 5 < len(extrema_indices)) & (steps < n - 5)]
+            
+            current_idx = extrema_indices[steps]
+            future_idx = np.minimum(current_idx + 5, n - 1)
+            is_peak = np.isin(current_idx, peaks)
+            price_change = (close[future_idx] - close[current_idx]) / close[current_idx]
+            
+            # If current point is a peak, expect price to go down, otherwise expect it to go up
+            correct_predictions = np.count_nonzero(
+                (is_peak & (price_change < 0)) | (~is_peak & (price_change > 0))
+            )
+            win_rate = correct_predictions / max(1, len(steps))
+            metric_by_threshold[peak_threshold] = win_rate * extrema_factor
+        
+        return np.array([metric_by_threshold[threshold] for threshold in peak_thresholds])
@@ -4,6 +4,8 @@ import vectorbt as vbt
 from logging import getLogger
 from typing import Optional, Tuple, Literal
 
+from .renko_bricks import RenkoBrickBuilder, build_renko_bricks
+
 try:
     from openbb import obb
 except ImportError:
@@ -25,6 +27,11 @@ def calculate_renko_bricks(
     Returns a DataFrame with 'open', 'high', 'low', 'close' of each Renko brick,
     and 'type' (1 for up brick, -1 for down brick). Brick timestamps match the
     original price series bar that completed the brick.
+
+    The first price is the reference close; the first brick forms after a move of
+    `brick_size` and reversals need a move of two bricks. Bricks are built into
+    preallocated arrays by RenkoBrickBuilder; use the builder directly to append
+    new prices to a live chart without recomputing history.
     """
     if price_series.empty:
         logger.warning("Input price_series is empty for Renko calculation.")
@@ -33,95 +40,7 @@ def calculate_renko_bricks(
         logger.error(f"Brick size must be positive. Got: {brick_size}")
         raise ValueError("Brick size must be positive.")
 
-    renko_bricks_list = []
-    # Initial reference price: first price in the series.
-    # Renko bricks traditionally start from a level that's a multiple of the brick size,
-    # or simply from the first price, and the first brick forms after a move of `brick_size`.
-    # For this implementation, we'll use the first price as the initial reference point (last_brick_close).
-    # The first actual brick will be plotted once the price moves `brick_size` away from this.
-
-    # More robust: start with the first price as the effective 'close' of a hypothetical zeroth brick.
-    last_brick_close = price_series.iloc[0]
-    brick_type = 0 # 0: no direction yet, 1: up, -1: down
-
-    for timestamp, current_price in price_series.items():
-        if brick_type == 0: # Determining direction for the very first brick
-            if current_price >= last_brick_close + brick_size:
-                brick_type = 1
-                num_bricks = int((current_price - last_brick_close) / brick_size)
-                for i in range(num_bricks):
-                    brick_open = last_brick_close + i * brick_size
-                    brick_close = brick_open + brick_size
-                    renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_close,
-                                         'low': brick_open, 'close': brick_close, 'type': 1})
-                last_brick_close = brick_close # Update to the close of the last formed brick
-            elif current_price <= last_brick_close - brick_size:
-                brick_type = -1
-                num_bricks = int((last_brick_close - current_price) / brick_size)
-                for i in range(num_bricks):
-                    brick_open = last_brick_close - i * brick_size
-                    brick_close = brick_open - brick_size
-                    renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_open,
-                                         'low': brick_close, 'close': brick_close, 'type': -1})
-                last_brick_close = brick_close
-            # If no brick formed yet, last_brick_close remains the initial price.
-            # If a brick did form, last_brick_close is updated.
-            continue # Move to next price point
-
-        # Subsequent bricks after the first one has formed
-        if brick_type == 1: # Last brick was UP
-            if current_price >= last_brick_close + brick_size: # New UP brick(s)
-                num_bricks = int((current_price - last_brick_close) / brick_size)
-                for _ in range(num_bricks):
-                    brick_open = last_brick_close
-                    brick_close = last_brick_close + brick_size
-                    renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_close,
-                                         'low': brick_open, 'close': brick_close, 'type': 1})
-                    last_brick_close = brick_close
-            elif current_price <= last_brick_close - 2 * brick_size: # Reversal to DOWN brick(s)
-                brick_type = -1
-                # First reversal brick opens one level down from previous close of the up brick
-                brick_open = last_brick_close - brick_size
-                brick_close = brick_open - brick_size
-                renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_open,
-                                     'low': brick_close, 'close': brick_close, 'type': -1})
-                last_brick_close = brick_close
-                # Check for further down bricks if the drop was large enough
-                num_additional_bricks = int(np.floor((last_brick_close - current_price) / brick_size)) # Use floor for additional bricks
-                for _ in range(num_additional_bricks):
-                    brick_open = last_brick_close
-                    brick_close = last_brick_close - brick_size
-                    renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_open,
-                                         'low': brick_close, 'close': brick_close, 'type': -1})
-                    last_brick_close = brick_close
-
-        elif brick_type == -1: # Last brick was DOWN
-            if current_price <= last_brick_close - brick_size: # New DOWN brick(s)
-                num_bricks = int((last_brick_close - current_price) / brick_size)
-                for _ in range(num_bricks):
-                    brick_open = last_brick_close
-                    brick_close = last_brick_close - brick_size
-                    renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_open,
-                                         'low': brick_close, 'close': brick_close, 'type': -1})
-                    last_brick_close = brick_close
-            elif current_price >= last_brick_close + 2 * brick_size: # Reversal to UP brick(s)
-                brick_type = 1
-                brick_open = last_brick_close + brick_size
-                brick_close = brick_open + brick_size
-                renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_close,
-                                     'low': brick_open, 'close': brick_close, 'type': 1})
-                last_brick_close = brick_close
-                num_additional_bricks = int(np.floor((current_price - last_brick_close) / brick_size)) # Use floor
-                for _ in range(num_additional_bricks):
-                    brick_open = last_brick_close
-                    brick_close = last_brick_close + brick_size
-                    renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_close,
-                                         'low': brick_open, 'close': brick_close, 'type': 1})
-                    last_brick_close = brick_close
-
-    if not renko_bricks_list:
-        return pd.DataFrame()
-    return pd.DataFrame(renko_bricks_list).set_index('timestamp')
+    return build_renko_bricks(price_series.to_numpy(dtype=float), price_series.index, brick_size)
 
 
 def get_renko_signals(
@@ -0,0 +1,320 @@
+"""
+Renko Brick Builder Module.
+
+Array-backed Renko brick construction shared by the Renko strategy functions and
+RenkoTechnicalService. Bricks are written into preallocated NumPy buffers, and
+price runs that cannot complete a brick are skipped with vectorized threshold
+scans, so long minute series never materialize one dict per brick.
+
+RenkoBrickBuilder keeps the running brick state between calls: feeding it new
+prices emits only the bricks those prices complete.
+"""
+
+import math
+from typing import Optional, Sequence, List
+
+import numpy as np
+import pandas as pd
+
+# First look-ahead window when scanning for the next brick-forming price; doubles
+# while no price in the window crosses a brick threshold.
+_MIN_SCAN_WINDOW = 16
+_MAX_SCAN_WINDOW = 1 << 16
+
+
+class RenkoBrickBuilder:
+    """
+    Stateful Renko brick builder.
+
+    With reversal_bricks=2 (classic Renko) a reversal needs the price to move two
+    brick sizes against the last brick; the first brick's direction is set by the
+    first one-brick move. The bricks are identical to the original dict-based
+    calculate_renko_bricks loop.
+
+    With reversal_bricks=1 every move of at least one brick size from the last
+    brick close forms bricks in the direction of the move, which is the simplified
+    construction RenkoTechnicalService uses.
+    """
+
+    def __init__(self, brick_size: float, reversal_bricks: int = 2, initial_capacity: int = 1024):
+        """
+        Initialize the builder.
+
+        Args:
+            brick_size: Brick size in price units (must be positive).
+            reversal_bricks: Brick sizes needed to reverse direction (1 or 2).
+            initial_capacity: Initial length of the brick buffers.
+        """
+        if brick_size <= 0:
+            raise ValueError("Brick size must be positive.")
+        if reversal_bricks not in (1, 2):
+            raise ValueError(f"reversal_bricks must be 1 or 2, got {reversal_bricks}")
+
+        self.brick_size = brick_size
+        self.reversal_bricks = reversal_bricks
+        self.last_brick_close: Optional[float] = None
+        self.brick_type = 0  # 0: no direction yet, 1: up, -1: down
+
+        capacity = max(16, initial_capacity)
+        self._prices = np.empty((4, capacity), dtype=np.float64)  # open, high, low, close
+        self._types = np.empty(capacity, dtype=np.int8)
+        self._count = 0
+        self._timestamp_chunks: List[pd.Index] = []
+
+    def __len__(self) -> int:
+        return self._count
+
+    def update(self, prices: Sequence[float], timestamps: Optional[Sequence] = None) -> pd.DataFrame:
+        """
+        Feed new prices and return the bricks they complete.
+
+        The first price ever fed becomes the reference close; bricks form once the
+        price moves a full brick size away from it.
+
+        Args:
+            prices: New prices in time order.
+            timestamps: Timestamps for the prices (default: positional index).
+
+        Returns:
+            DataFrame of newly completed bricks ('open', 'high', 'low', 'close',
+            'type'; 1 up, -1 down) indexed by the timestamp of the price that
+            completed each brick. Empty when no brick completed.
+        """
+        values = np.asarray(prices, dtype=np.float64)
+        index = pd.Index(timestamps if timestamps is not None else np.arange(len(values)))
+        if len(index) != len(values):
+            raise ValueError("prices and timestamps must have the same length")
+
+        start = self._count
+        positions = self._consume(values)
+        new_index = index.take(positions)
+        new_index.name = 'timestamp'
+        if len(positions):
+            self._append_timestamps(new_index)
+        return self._frame(start, self._count, new_index)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return every brick built so far."""
+        index = self._timestamps()
+        return self._frame(0, self._count, index)
+
+    def tail(self, n: int) -> pd.DataFrame:
+        """Return the last n bricks."""
+        n = min(n, self._count)
+        index = self._timestamps()[self._count - n:]
+        return self._frame(self._count - n, self._count, index)
+
+    def brick_types(self) -> np.ndarray:
+        """Return the brick directions (1 up, -1 down) as an array view."""
+        return self._types[:self._count]
+
+    def _frame(self, start: int, end: int, index: pd.Index) -> pd.DataFrame:
+        if end <= start:
+            return pd.DataFrame()
+        prices = self._prices[:, start:end]
+        frame = pd.DataFrame({
+            'open': prices[0].copy(),
+            'high': prices[1].copy(),
+            'low': prices[2].copy(),
+            'close': prices[3].copy(),
+            'type': self._types[start:end].astype(np.int64)
+        }, index=index)
+        frame.index.name = 'timestamp'
+        return frame
+
+    def _timestamps(self) -> pd.Index:
+        if len(self._timestamp_chunks) > 1:
+            self._timestamp_chunks = [self._timestamp_chunks[0].append(self._timestamp_chunks[1:])]
+        if not self._timestamp_chunks:
+            return pd.Index([], name='timestamp')
+        return self._timestamp_chunks[0]
+
+    def _append_timestamps(self, index: pd.Index) -> None:
+        self._timestamp_chunks.append(index)
+        if len(self._timestamp_chunks) > 64:
+            self._timestamps()
+
+    def _reserve(self, extra: int) -> None:
+        needed = self._count + extra
+        capacity = self._types.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        prices = np.empty((4, capacity), dtype=np.float64)
+        prices[:, :self._count] = self._prices[:, :self._count]
+        types = np.empty(capacity, dtype=np.int8)
+        types[:self._count] = self._types[:self._count]
+        self._prices, self._types = prices, types
+
+    def _write(self, opens: List[float], closes: List[float], types: List[int]) -> None:
+        """Append bricks to the preallocated buffers in one bulk copy."""
+        k = len(opens)
+        if k == 0:
+            return
+        self._reserve(k)
+        s = slice(self._count, self._count + k)
+        open_arr = np.asarray(opens, dtype=np.float64)
+        close_arr = np.asarray(closes, dtype=np.float64)
+        self._prices[0, s] = open_arr
+        self._prices[1, s] = np.maximum(open_arr, close_arr)
+        self._prices[2, s] = np.minimum(open_arr, close_arr)
+        self._prices[3, s] = close_arr
+        self._types[s] = types
+        self._count += k
+
+    def _next_trigger(self, values: np.ndarray, start: int, up_level: float, down_level: float) -> int:
+        """Vectorized scan for the first price at or after start crossing a level, or -1."""
+        n = len(values)
+        window = _MIN_SCAN_WINDOW
+        pos = start
+        while pos < n:
+            chunk = values[pos:pos + window]
+            hits = (chunk >= up_level) | (chunk <= down_level)
+            hit = int(np.argmax(hits))
+            if hits[hit]:
+                return pos + hit
+            pos += len(chunk)
+            window = min(window * 2, _MAX_SCAN_WINDOW)
+        return -1
+
+    def _consume(self, values: np.ndarray) -> np.ndarray:
+        """Build bricks from values, returning the source position of each new brick."""
+        n = len(values)
+        if n == 0:
+            return np.empty(0, dtype=np.int64)
+        if self.last_brick_close is None:
+            self.last_brick_close = float(values[0])
+
+        prices = values.tolist()
+        size = self.brick_size
+        classic = self.reversal_bricks == 2
+        last = self.last_brick_close
+        brick_type = self.brick_type
+        opens: List[float] = []
+        closes: List[float] = []
+        types: List[int] = []
+        positions: List[int] = []
+
+        i = 0
+        while i < n:
+            # Levels a price must reach to form a brick from the current state
+            if classic and brick_type == 1:
+                up_level, down_level = last + size, last - 2 * size
+            elif classic and brick_type == -1:
+                up_level, down_level = last + 2 * size, last - size
+            else:
+                up_level, down_level = last + size, last - size
+
+            # Probe a few prices directly, then skip quiet stretches with a vectorized scan
+            probe_end = min(n, i + _MIN_SCAN_WINDOW)
+            while i < probe_end:
+                price = prices[i]
+                if classic:
+                    if price >= up_level or price <= down_level:
+                        break
+                elif abs(price - last) >= size:
+                    break
+                i += 1
+            else:
+                if i >= n:
+                    break
+                # reversal_bricks=1 compares |price - last| >= size; the level scan
+                # only narrows the search, the exact test below confirms the hit
+                scan_slack = 0.0 if classic else (abs(last) * 1e-12 + size * 1e-9)
+                j = self._next_trigger(values, i, up_level - scan_slack, down_level + scan_slack)
+                if j < 0:
+                    break
+                i = j
+                price = prices[i]
+                if not classic and abs(price - last) < size:
+                    i += 1
+                    continue
+
+            before = len(opens)
+            if not classic:
+                price_diff = price - last
+                direction = 1 if price_diff > 0 else -1
+                step = direction * size
+                for _ in range(int(abs(price_diff) / size)):
+                    opens.append(last)
+                    last = last + step
+                    closes.append(last)
+                brick_type = direction
+            elif brick_type == 0:
+                # First bricks are laid from the reference price as multiples of the brick size
+                if price >= up_level:
+                    brick_type, num_bricks = 1, int((price - last) / size)
+                    for k in range(num_bricks):
+                        brick_open = last + k * size
+                        opens.append(brick_open)
+                        closes.append(brick_open + size)
+                else:
+                    brick_type, num_bricks = -1, int((last - price) / size)
+                    for k in range(num_bricks):
+                        brick_open = last - k * size
+                        opens.append(brick_open)
+                        closes.append(brick_open - size)
+                if num_bricks:
+                    last = closes[-1]
+            elif brick_type == 1 and price >= up_level:
+                for _ in range(int((price - last) / size)):
+                    opens.append(last)
+                    last = last + size
+                    closes.append(last)
+            elif brick_type == -1 and price <= down_level:
+                for _ in range(int((last - price) / size)):
+                    opens.append(last)
+                    last = last - size
+                    closes.append(last)
+            elif brick_type == 1:
+                # Reversal to down: the first brick opens one brick below the last close
+                brick_type = -1
+                brick_open = last - size
+                last = brick_open - size
+                opens.append(brick_open)
+                closes.append(last)
+                for _ in range(int(math.floor((last - price) / size))):
+                    opens.append(last)
+                    last = last - size
+                    closes.append(last)
+            else:
+                # Reversal to up: the first brick opens one brick above the last close
+                brick_type = 1
+                brick_open = last + size
+                last = brick_open + size
+                opens.append(brick_open)
+                closes.append(last)
+                for _ in range(int(math.floor((price - last) / size))):
+                    opens.append(last)
+                    last = last + size
+                    closes.append(last)
+
+            made = len(opens) - before
+            if made:
+                types.extend([brick_type] * made)
+                positions.extend([i] * made)
+            i += 1
+
+        self.last_brick_close = last
+        self.brick_type = brick_type
+        self._write(opens, closes, types)
+        return np.asarray(positions, dtype=np.int64)
+
+
+def build_renko_bricks(prices: Sequence[float], timestamps: Optional[Sequence], brick_size: float, reversal_bricks: int = 2) -> pd.DataFrame:
+    """
+    Build all Renko bricks for a price series in one pass.
+
+    Args:
+        prices: Prices in time order.
+        timestamps: Timestamps for the prices.
+        brick_size: Brick size in price units (must be positive).
+        reversal_bricks: Brick sizes needed to reverse direction (1 or 2).
+
+    Returns:
+        DataFrame of bricks as returned by RenkoBrickBuilder.update.
+    """
+    values = np.asarray(prices, dtype=np.float64)
+    builder = RenkoBrickBuilder(brick_size, reversal_bricks, initial_capacity=max(1024, len(values)))
+    return builder.update(values, timestamps)
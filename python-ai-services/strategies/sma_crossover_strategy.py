@@ -11,7 +11,8 @@ import pandas as pd
 import numpy as np
 from loguru import logger
 
-from .base_strategy import BaseStrategy
+from .base_strategy import BaseStrategy, RollingWindowCache, StreamState
+from .streaming_indicators import RollingMean
 from ..models.trading_strategy import SignalType, TimeFrame
 
 class SMACrossoverStrategy(BaseStrategy):
@@ -123,18 +124,35 @@ class SMACrossoverStrategy(BaseStrategy):
         df = self._market_data[key]
         df = self._calculate_indicators(df)
         
+        latest = df.iloc[-1] if not df.empty else None
+        return self._crossover_signal(symbol, timeframe, latest)
+    
+    def _crossover_signal(self, symbol: str, timeframe: Union[str, TimeFrame], latest: Optional[Any]) -> Tuple[SignalType, Optional[float], Dict[str, Any]]:
+        """
+        Turn the newest bar's SMA values into a signal.
+        
+        Shared by the batch path and append_bar so both produce the same signal.
+        
+        Args:
+            symbol: The trading symbol.
+            timeframe: The timeframe.
+            latest: Indicator columns for the newest bar (row or dict), None without data.
+            
+        Returns:
+            Tuple of signal type, confidence and metadata.
+        """
         # Default to HOLD
         signal_type = SignalType.HOLD
         confidence = 50.0
         
         # Check for recent crossover
-        last_crossover = df['crossover'].iloc[-1] if not df.empty else 0
-        last_diff = df['sma_diff'].iloc[-1] if not df.empty else 0
+        last_crossover = latest['crossover'] if latest is not None else 0
+        last_diff = latest['sma_diff'] if latest is not None else 0
         threshold = self.parameters["signal_threshold"]
         
         metadata = {
-            "fast_sma": float(df['fast_sma'].iloc[-1]) if not df.empty and not pd.isna(df['fast_sma'].iloc[-1]) else None,
-            "slow_sma": float(df['slow_sma'].iloc[-1]) if not df.empty and not pd.isna(df['slow_sma'].iloc[-1]) else None,
+            "fast_sma": float(latest['fast_sma']) if latest is not None and not pd.isna(latest['fast_sma']) else None,
+            "slow_sma": float(latest['slow_sma']) if latest is not None and not pd.isna(latest['slow_sma']) else None,
             "sma_diff": float(last_diff) if not pd.isna(last_diff) else None,
             "last_crossover": float(last_crossover) if not pd.isna(last_crossover) else None,
             "parameters": {
@@ -149,24 +167,53 @@ class SMACrossoverStrategy(BaseStrategy):
             # Fast SMA crossed above slow SMA
             signal_type = SignalType.BUY
             # Higher confidence with larger difference
-            confidence = min(90.0, 50.0 + (abs(last_diff) / (df['close'].iloc[-1] if not df.empty else 1)) * 1000)
+            confidence = min(90.0, 50.0 + (abs(last_diff) / (latest['close'] if latest is not None else 1)) * 1000)
         elif last_crossover < 0 and abs(last_diff) > threshold:
             # Fast SMA crossed below slow SMA
             signal_type = SignalType.SELL
             # Higher confidence with larger difference
-            confidence = min(90.0, 50.0 + (abs(last_diff) / (df['close'].iloc[-1] if not df.empty else 1)) * 1000)
+            confidence = min(90.0, 50.0 + (abs(last_diff) / (latest['close'] if latest is not None else 1)) * 1000)
         else:
             # No crossover or below threshold
             # If fast SMA is above slow SMA, a weak buy signal
             if last_diff > 0:
-                confidence = 50.0 + min(20.0, (last_diff / (df['close'].iloc[-1] if not df.empty else 1)) * 500)
+                confidence = 50.0 + min(20.0, (last_diff / (latest['close'] if latest is not None else 1)) * 500)
             # If fast SMA is below slow SMA, a weak sell signal
             elif last_diff < 0:
-                confidence = 50.0 - min(20.0, (abs(last_diff) / (df['close'].iloc[-1] if not df.empty else 1)) * 500)
+                confidence = 50.0 - min(20.0, (abs(last_diff) / (latest['close'] if latest is not None else 1)) * 500)
         
         logger.debug(f"SMA Crossover strategy generated {signal_type} signal with confidence {confidence:.2f} for {symbol} {timeframe}")
         return signal_type, confidence, metadata
     
+    def _create_stream_indicators(self) -> Dict[str, Any]:
+        """Running fast and slow SMAs for append_bar."""
+        return {
+            "fast_sma": RollingMean(self.parameters["fast_period"]),
+            "slow_sma": RollingMean(self.parameters["slow_period"])
+        }
+    
+    def _update_stream_state(self, state: StreamState, bar: Dict[str, Any]) -> None:
+        """Advance the SMAs by one bar, mirroring _calculate_indicators for the newest row."""
+        fast_sma = state.indicators["fast_sma"].update(bar["close"])
+        slow_sma = state.indicators["slow_sma"].update(bar["close"])
+        sma_diff = fast_sma - slow_sma
+        
+        # crossover is the first difference of sign(sma_diff)
+        previous_diff = state.values.get("sma_diff", np.nan)
+        state.values = {
+            "close": np.float64(bar["close"]),
+            "fast_sma": fast_sma,
+            "slow_sma": slow_sma,
+            "sma_diff": sma_diff,
+            "crossover": float(np.sign(sma_diff) - np.sign(previous_diff))
+        }
+    
+    def _stream_signal(self, symbol: str, timeframe: Union[str, TimeFrame], state: StreamState) -> Tuple[SignalType, Optional[float], Dict[str, Any]]:
+        """Signal for the newest appended bar."""
+        return self._crossover_signal(symbol, timeframe, state.values)
+    
+    SWEEP_GROUP_PARAMETERS = ("fast_period", "slow_period")
+
     def optimize_parameters(self, symbol: str, timeframe: Union[str, TimeFrame], optimization_metric: str = "win_rate") -> Dict[str, Any]:
         """
         Optimize strategy parameters for a specific symbol and timeframe.
@@ -179,43 +226,17 @@ class SMACrossoverStrategy(BaseStrategy):
         Returns:
             Dict with optimized parameters.
         """
-        key = f"{symbol}_{timeframe}"
-        if key not in self._market_data:
-            raise ValueError(f"No market data available for {symbol} {timeframe}")
-        
-        # In a real implementation, this would run a grid search or other optimization
-        # For now, we just return the current parameters
         logger.info(f"Optimizing SMA Crossover parameters for {symbol} {timeframe}")
         
-        # Simple optimization for demonstration
-        best_params = self.parameters.copy()
-        best_metric = 0.0
-        
-        # Try a few parameter combinations
-        fast_periods = [5, 10, 20, 30]
-        slow_periods = [20, 50, 100, 200]
-        
-        for fast_period in fast_periods:
-            for slow_period in slow_periods:
-                if fast_period >= slow_period:
-                    continue
-                    
-                # Set test parameters
-                test_params = self.parameters.copy()
-                test_params["fast_period"] = fast_period
-                test_params["slow_period"] = slow_period
-                
-                # Calculate metric (simplified)
-                # In a real implementation, this would involve backtesting
-                metric = self._calculate_test_metric(symbol, timeframe, test_params)
-                
-                # Update best parameters if better
-                if metric > best_metric:
-                    best_metric = metric
-                    best_params = test_params
+        sweep = self.sweep_parameters(
+            symbol, timeframe,
+            {"fast_period": [5, 10, 20, 30], "slow_period": [20, 50, 100, 200]},
+            constraint=lambda params: params["fast_period"] < params["slow_period"]
+        )
+        best_params = sweep["best_params"]
         
         logger.info(f"Optimized parameters: fast_period={best_params['fast_period']}, "
-                   f"slow_period={best_params['slow_period']}, metric={best_metric:.4f}")
+                   f"slow_period={best_params['slow_period']}, metric={sweep['best_metric']:.4f}")
         
         # Update the strategy parameters
         self.parameters = best_params
@@ -233,57 +254,59 @@ class SMACrossoverStrategy(BaseStrategy):
         Returns:
             Float value of the metric (higher is better).
         """
-        # This is a simplified metric calculation for demonstration
-        # In a real implementation, this would involve backtesting
-        
         key = f"{symbol}_{timeframe}"
-        df = self._market_data[key].copy()
-        
-        # Calculate SMAs with test parameters
-        fast_period = test_params["fast_period"]
-        slow_period = test_params["slow_period"]
+        df = self._market_data[key]
+        metrics = self._evaluate_parameter_group(
+            df,
+            {"fast_period": test_params["fast_period"], "slow_period": test_params["slow_period"]},
+            {},
+            1,
+            RollingWindowCache(df)
+        )
+        return float(metrics[0])
+    
+    def _evaluate_parameter_group(
+        self,
+        df: pd.DataFrame,
+        group_params: Dict[str, Any],
+        threshold_points: Dict[str, np.ndarray],
+        num_points: int,
+        cache: RollingWindowCache
+    ) -> np.ndarray:
+        """
+        Crossover hit-rate metric for one (fast_period, slow_period) pair.
         
-        df['fast_sma'] = df['close'].rolling(window=fast_period).mean()
-        df['slow_sma'] = df['close'].rolling(window=slow_period).mean()
-        df['sma_diff'] = df['fast_sma'] - df['slow_sma']
-        df['crossover'] = np.sign(df['sma_diff']).diff()
+        SMAs come from the sweep's rolling-window cache, so a window shared by
+        several pairs (e.g. 20 as both fast and slow period) is computed once.
+        A crossover is correct when the next close moves in its direction.
+        """
+        fast_sma = cache.get("close", group_params.get("fast_period", self.parameters["fast_period"]), "mean")
+        slow_sma = cache.get("close", group_params.get("slow_period", self.parameters["slow_period"]), "mean")
+        sma_diff = (fast_sma - slow_sma).to_numpy(dtype=float)
         
-        # Drop NaN values
-        df = df.dropna()
+        crossover = np.full(len(sma_diff), np.nan)
+        crossover[1:] = np.diff(np.sign(sma_diff))
         
-        if len(df) < 10:
-            return 0.0
+        # Rows without NaN in the data or in any derived column
+        valid = ~df.isna().any(axis=1).to_numpy() & ~np.isnan(sma_diff) & ~np.isnan(crossover)
+        if np.count_nonzero(valid) < 10:
+            return np.zeros(num_points)
         
-        # Count crossovers
-        buy_signals = (df['crossover'] > 0).sum()
-        sell_signals = (df['crossover'] < 0).sum()
-        total_signals = buy_signals + sell_signals
+        close = df["close"].to_numpy(dtype=float)[valid]
+        crossover = crossover[valid]
         
+        buy = crossover > 0
+        sell = crossover < 0
+        total_signals = np.count_nonzero(buy) + np.count_nonzero(sell)
         if total_signals == 0:
-            return 0.0
-        
-        # Calculate a simple metric based on price movement after signals
-        # This is very simplified and for demonstration only
-        correct_buys = 0
-        correct_sells = 0
-        
-        for i in range(len(df) - 1):
-            if df['crossover'].iloc[i] > 0:  # Buy signal
-                # Check if price increased in the next period
-                if df['close'].iloc[i + 1] > df['close'].iloc[i]:
-                    correct_buys += 1
-            elif df['crossover'].iloc[i] < 0:  # Sell signal
-                # Check if price decreased in the next period
-                if df['close'].iloc[i + 1] < df['close'].iloc[i]:
-                    correct_sells += 1
-        
-        # Calculate win rate
+            return np.zeros(num_points)
+        
+        correct_buys = np.count_nonzero(buy[:-1] & (close[1:] > close[:-1]))
+        correct_sells = np.count_nonzero(sell[:-1] & (close[1:] < close[:-1]))
+        
         win_rate = (correct_buys + correct_sells) / max(1, total_signals)
         
         # Prefer strategies with more signals (within reason)
         signal_factor = min(1.0, total_signals / 20)
         
-        # Combine metrics
-        metric = win_rate * signal_factor
-        
-        return metric
+        return np.full(num_points, win_rate * signal_factor)
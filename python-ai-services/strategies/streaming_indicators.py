@@ -0,0 +1,177 @@
+"""
+Streaming Indicator Module.
+
+O(1)-per-bar rolling window state used by BaseStrategy.append_bar. Each window
+reproduces the value pandas' ``Series.rolling(window)`` produces for the newest
+bar, so live signals match the batch DataFrame path bar for bar.
+"""
+
+import math
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+
+class RollingExtreme:
+    """
+    Rolling max or min over a fixed window using a monotonic deque.
+
+    Each value enters and leaves the deque once, so an update is amortized O(1).
+    NaN values occupy a slot in the window but never become the extreme, matching
+    pandas' NaN-skipping rolling max/min.
+    """
+
+    def __init__(self, window: int, mode: str = "max", min_periods: Optional[int] = None):
+        """
+        Initialize the rolling extreme.
+
+        Args:
+            window: Number of bars in the window.
+            mode: "max" or "min".
+            min_periods: Minimum non-NaN observations for a value (default: window).
+        """
+        if mode not in ("max", "min"):
+            raise ValueError(f"Unsupported rolling extreme mode: {mode}")
+        self.window = window
+        self.mode = mode
+        self.min_periods = window if min_periods is None else min_periods
+        self._index = 0
+        self._observations: Deque[bool] = deque()
+        self._count = 0
+        self._candidates: Deque[Tuple[int, float]] = deque()
+
+    def update(self, value: float) -> float:
+        """
+        Add the newest value and return the window extreme (NaN until warmed up).
+
+        Args:
+            value: The newest observation.
+
+        Returns:
+            The rolling max/min including this observation.
+        """
+        index = self._index
+        self._index += 1
+
+        is_observation = not math.isnan(value)
+        self._observations.append(is_observation)
+        self._count += is_observation
+        if len(self._observations) > self.window:
+            self._count -= self._observations.popleft()
+
+        if is_observation:
+            if self.mode == "max":
+                while self._candidates and self._candidates[-1][1] <= value:
+                    self._candidates.pop()
+            else:
+                while self._candidates and self._candidates[-1][1] >= value:
+                    self._candidates.pop()
+            self._candidates.append((index, value))
+
+        while self._candidates and self._candidates[0][0] <= index - self.window:
+            self._candidates.popleft()
+
+        if self._count >= max(self.min_periods, 1) and self._candidates:
+            return self._candidates[0][1]
+        return math.nan
+
+
+class RollingMean:
+    """
+    Rolling mean over a fixed window from a running sum.
+
+    The sum uses the same Kahan-compensated add/remove steps as pandas' rolling
+    mean, including its handling of runs of identical values and sign clamping,
+    so results are bit-for-bit equal to ``Series.rolling(window).mean()``.
+    """
+
+    def __init__(self, window: int, min_periods: Optional[int] = None):
+        """
+        Initialize the rolling mean.
+
+        Args:
+            window: Number of bars in the window.
+            min_periods: Minimum non-NaN observations for a value (default: window).
+        """
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self._values: Deque[float] = deque()
+        self._nobs = 0
+        self._neg_ct = 0
+        self._sum = 0.0
+        self._compensation_add = 0.0
+        self._compensation_remove = 0.0
+        self._same_value_run = 0
+        self._prev_value = math.nan
+
+    def update(self, value: float) -> float:
+        """
+        Add the newest value and return the window mean (NaN until warmed up).
+
+        Args:
+            value: The newest observation.
+
+        Returns:
+            The rolling mean including this observation.
+        """
+        self._values.append(value)
+        if len(self._values) > self.window:
+            self._remove(self._values.popleft())
+        self._add(value)
+        return self._mean()
+
+    def _add(self, value: float) -> None:
+        if math.isnan(value):
+            return
+        self._nobs += 1
+        y = value - self._compensation_add
+        t = self._sum + y
+        self._compensation_add = t - self._sum - y
+        self._sum = t
+        if math.copysign(1.0, value) < 0:
+            self._neg_ct += 1
+        if value == self._prev_value:
+            self._same_value_run += 1
+        else:
+            self._same_value_run = 1
+        self._prev_value = value
+
+    def _remove(self, value: float) -> None:
+        if math.isnan(value):
+            return
+        self._nobs -= 1
+        y = -value - self._compensation_remove
+        t = self._sum + y
+        self._compensation_remove = t - self._sum - y
+        self._sum = t
+        if math.copysign(1.0, value) < 0:
+            self._neg_ct -= 1
+
+    def _mean(self) -> float:
+        if self._nobs < self.min_periods or self._nobs == 0:
+            return math.nan
+        result = self._sum / self._nobs
+        if self._same_value_run >= self._nobs:
+            return self._prev_value
+        if self._neg_ct == 0 and result < 0:
+            return 0.0
+        if self._neg_ct == self._nobs and result > 0:
+            return 0.0
+        return result
+
+
+def to_float(value) -> float:
+    """Convert a bar value to float, mapping unparseable values to NaN like pd.to_numeric(errors='coerce')."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def ieee_divide(numerator: float, denominator: float) -> float:
+    """Divide with NumPy/pandas semantics: x/0 is +/-inf and 0/0 is NaN."""
+    try:
+        return numerator / denominator
+    except ZeroDivisionError:
+        if numerator == 0 or math.isnan(numerator):
+            return math.nan
+        return math.copysign(math.inf, numerator) * math.copysign(1.0, denominator)
@@ -0,0 +1,145 @@
+import asyncio
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# mcp_servers is a directory of standalone servers, not a package
+ENGINE_PATH = Path(__file__).resolve().parents[2] / "mcp_servers" / "technical_analysis_engine.py"
+_spec = importlib.util.spec_from_file_location("technical_analysis_engine", ENGINE_PATH)
+engine_module = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(engine_module)
+
+WINDOWED_INDICATORS = ["rsi", "bollinger", "stochastic", "williams_r", "adx", "atr", "ichimoku"]
+
+
+def _bars(n, seed=0, start="2026-01-01"):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.01, n))
+    spread = np.abs(rng.normal(0, 0.005, n)) * close
+    return pd.DataFrame({
+        "timestamp": pd.date_range(start, periods=n, freq="h"),
+        "open": close + rng.normal(0, 0.002, n) * close,
+        "high": close + spread,
+        "low": close - spread,
+        "close": close,
+        "volume": rng.integers(1_000, 100_000, n).astype(float),
+    })
+
+
+@pytest.fixture
+def engine():
+    return engine_module.TechnicalAnalysisEngine()
+
+
+def _assert_same_indicator(actual, expected):
+    assert actual is not None and expected is not None
+    assert actual.value == pytest.approx(expected.value, rel=1e-9, abs=1e-9)
+    assert (actual.signal, actual.strength) == (expected.signal, expected.strength)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("indicator_name", WINDOWED_INDICATORS)
+async def test_windowed_indicator_matches_full_recompute(engine, indicator_name):
+    df = _bars(400, seed=1)
+    engine.replace_market_data("TEST", df)
+
+    cached = await engine._cached_indicator(engine.market_data["TEST"], "TEST", "1h", indicator_name)
+    _assert_same_indicator(cached, await engine._calculate_single_indicator(df, indicator_name))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("indicator_name", engine_module.TechnicalAnalysisEngine.STATEFUL_INDICATORS)
+async def test_stateful_indicator_matches_full_recompute_as_bars_arrive(engine, indicator_name):
+    df = _bars(260, seed=2)
+    engine.replace_market_data("TEST", df.iloc[:200])
+    for i in range(200, len(df)):
+        engine.append_market_bar("TEST", df.iloc[i].to_dict())
+        if i % 3 == 0:
+            continue # Skipped bars are replayed on the next lookup
+        history = engine.market_data["TEST"]
+        cached = await engine._cached_indicator(history, "TEST", "1h", indicator_name)
+        _assert_same_indicator(cached, await engine._calculate_single_indicator(history, indicator_name))
+
+    # A revised bar rewinds the history; the running state is rebuilt rather than stepped
+    revised = {**df.iloc[-1].to_dict(), "close": float(df["close"].iloc[-1]) * 1.05}
+    engine.append_market_bar("TEST", revised)
+    history = engine.market_data["TEST"]
+    cached = await engine._cached_indicator(history, "TEST", "1h", indicator_name)
+    _assert_same_indicator(cached, await engine._calculate_single_indicator(history, indicator_name))
+    assert engine.indicator_cache.stats["incremental_updates"] > 0
+
+
+@pytest.mark.asyncio
+async def test_computation_started_before_invalidate_is_not_cached():
+    cache = engine_module.IndicatorCache()
+    key = ("TEST", "1h", "rsi", (), pd.Timestamp("2026-01-01"))
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow_compute():
+        started.set()
+        await release.wait()
+        return "from the old history"
+
+    stale = asyncio.create_task(cache.get_or_compute(key, slow_compute))
+    await started.wait()
+    cache.invalidate("TEST") # e.g. replace_market_data while the computation runs
+
+    async def fresh_compute():
+        return "from the new history"
+    # Does not join the stale computation
+    assert await asyncio.wait_for(cache.get_or_compute(key, fresh_compute), timeout=1) == "from the new history"
+
+    release.set()
+    assert await stale == "from the old history" # Its own caller still gets an answer
+    assert await cache.get_or_compute(key, slow_compute) == "from the new history"
+    assert cache.stats["stale_discards"] == 1
+
+
+def _reference_support_resistance(df, window=10):
+    """The per-bar pivot scan and sort-and-walk consolidation the vectorized pivot engine replaced"""
+    pivots = []
+    for i in range(window, len(df) - window):
+        if df['high'].iloc[i] == df['high'].iloc[i - window:i + window + 1].max():
+            pivots.append(('resistance', df['high'].iloc[i]))
+        if df['low'].iloc[i] == df['low'].iloc[i - window:i + window + 1].min():
+            pivots.append(('support', df['low'].iloc[i]))
+
+    def consolidate(levels, threshold=0.01):
+        if not levels:
+            return []
+        levels.sort()
+        consolidated = [levels[0]]
+        for level in levels[1:]:
+            if abs(level - consolidated[-1]) / consolidated[-1] > threshold:
+                consolidated.append(level)
+        return consolidated[-5:]
+
+    return {
+        "support": consolidate([p[1] for p in pivots if p[0] == 'support']),
+        "resistance": consolidate([p[1] for p in pivots if p[0] == 'resistance'])
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("n,decimals", [(15, 2), (21, 2), (600, 2), (600, 0)]) # Rounding to whole prices forces ties
+async def test_support_resistance_matches_per_bar_scan(engine, n, decimals):
+    df = _bars(n, seed=n + decimals).round(decimals)
+
+    levels = await engine._calculate_support_resistance(df)
+    expected = _reference_support_resistance(df)
+    assert levels["support"] == pytest.approx(expected["support"])
+    assert levels["resistance"] == pytest.approx(expected["resistance"])
+
+
+def test_consolidate_levels_matches_sort_and_walk():
+    rng = np.random.default_rng(8)
+    for _ in range(200):
+        levels = rng.choice(np.round(rng.uniform(50, 150, 40), 1), size=rng.integers(0, 60)).tolist()
+        expected = []
+        for level in sorted(levels):
+            if not expected or abs(level - expected[-1]) / expected[-1] > 0.01:
+                expected.append(level)
+        assert engine_module.consolidate_levels(np.array(levels)) == expected[-5:]
@@ -0,0 +1,110 @@
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from python_ai_services.services.agent_coordination_service import AgentCoordinationService
+from python_ai_services.services.agent_trading_bridge import AgentTradingBridge, ExecutionResult, TradingSignal
+from python_ai_services.services.agent_performance_service import AgentPerformanceService
+from python_ai_services.services.trading_safety_service import TradingSafetyService
+
+
+@pytest.fixture
+def safety():
+    service = TradingSafetyService(clock=lambda: 10_000.0)
+    service.trading_limits.max_daily_trades = 2
+    service.trading_limits.max_concurrent_positions = 2
+    return service
+
+
+@pytest.fixture
+def clock():
+    return {"now": 10_000.0}
+
+
+@pytest_asyncio.fixture
+async def coordination(safety, clock):
+    performance = MagicMock(spec=AgentPerformanceService)
+    performance.record_trade_entry = AsyncMock()
+    return AgentCoordinationService(
+        MagicMock(spec=AgentTradingBridge), safety, performance,
+        open_reservation_ttl_seconds=60.0, clock=lambda: clock["now"]
+    )
+
+
+def _signal(action="buy"):
+    return TradingSignal(agent_id="agent-1", symbol="BTC", action=action, quantity=1.0, price_target=100.0, confidence=0.8, strategy="test")
+
+
+def _result(signal, status, execution_id="exec-1", filled=0.0, price=None):
+    return ExecutionResult(
+        signal_id=signal.signal_id, execution_id=execution_id, status=status, message=status,
+        total_quantity_filled=filled, average_fill_price=price
+    )
+
+
+@pytest.mark.asyncio
+async def test_open_orders_keep_their_reservation_until_settled(coordination, safety):
+    limits = safety._get_agent_limits("agent-1")
+    first, second, third = _signal(), _signal(), _signal()
+    coordination.trading_bridge.process_agent_signal = AsyncMock(side_effect=[
+        _result(first, "executing", "exec-1"), _result(second, "pending", "exec-2")
+    ])
+
+    assert (await coordination.execute_trading_signal(first))["success"]
+    assert (await coordination.execute_trading_signal(second))["success"]
+    assert set(coordination.open_reservations) == {"exec-1", "exec-2"}
+    assert limits.trades.value(10_000.0) == 2 and limits.concurrent_positions == 2
+
+    # Both live orders still count, so a third submission is refused before reaching the bridge
+    assert not (await coordination.execute_trading_signal(third))["success"]
+    assert coordination.trading_bridge.process_agent_signal.await_count == 2
+
+    assert await coordination.record_execution_update(_result(first, "filled", "exec-1", filled=1.0, price=101.0))
+    assert limits.trades.value(10_000.0) == 2 and limits.concurrent_positions == 2 # Settled into the actual fill
+    coordination.performance_service.record_trade_entry.assert_awaited_once()
+
+    assert await coordination.record_execution_update(_result(second, "rejected", "exec-2"))
+    assert limits.trades.value(10_000.0) == 1 and limits.concurrent_positions == 1
+    assert coordination.open_reservations == {}
+    assert not await coordination.record_execution_update(_result(second, "filled", "exec-2"))
+
+
+@pytest.mark.asyncio
+async def test_rejected_order_releases_its_reservation(coordination, safety):
+    signal = _signal()
+    coordination.trading_bridge.process_agent_signal = AsyncMock(return_value=_result(signal, "rejected", ""))
+
+    assert (await coordination.execute_trading_signal(signal))["success"]
+    limits = safety._get_agent_limits("agent-1")
+    assert limits.trades.value(10_000.0) == 0 and limits.concurrent_positions == 0
+    assert coordination.open_reservations == {}
+
+
+@pytest.mark.asyncio
+async def test_unsettled_open_orders_release_their_reservation_after_ttl(coordination, safety, clock):
+    safety.trading_limits.max_daily_trades = 100
+    safety.trading_limits.max_concurrent_positions = 10
+    limits = safety._get_agent_limits("agent-1")
+    signals = [_signal() for _ in range(15)]
+    # Limit orders are routed and never reported back
+    coordination.trading_bridge.process_agent_signal = AsyncMock(side_effect=[
+        _result(signal, "executing", f"exec-{i}") for i, signal in enumerate(signals)
+    ])
+
+    outcomes = []
+    for i, signal in enumerate(signals[:12]):
+        clock["now"] = 10_000.0 + i
+        outcomes.append((await coordination.execute_trading_signal(signal))["success"])
+    assert outcomes == [True] * 10 + [False] * 2
+    assert len(coordination.open_reservations) == 10 and limits.concurrent_positions == 10
+
+    # Once the oldest reservations expire the agent can trade again
+    clock["now"] = 10_061.5
+    assert (await coordination.execute_trading_signal(signals[12]))["success"]
+    assert limits.concurrent_positions == 9
+    assert "exec-0" not in coordination.open_reservations and "exec-1" not in coordination.open_reservations
+
+    clock["now"] = 10_200.0
+    assert not await coordination.record_execution_update(_result(signals[5], "filled", "exec-5", filled=1.0, price=100.0))
+    assert coordination.open_reservations == {} and limits.concurrent_positions == 0
+    coordination.performance_service.record_trade_entry.assert_not_awaited()
@@ -0,0 +1,151 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from python_ai_services.services.agent_memory_index import AgentMemoryIndex, AgentMemoryIndexStore
+
+
+def _memories(vectors, prefix="m"):
+    return [
+        {"id": f"{prefix}{i}", "content": f"memory {i}", "metadata": {"i": i}, "embedding": vector.tolist()}
+        for i, vector in enumerate(vectors)
+    ]
+
+
+def _brute_force(vectors, queries, k):
+    v = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    q = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    return np.argsort(-(q @ v.T), axis=1)[:, :k]
+
+
+def test_exact_search_matches_brute_force_cosine(tmp_path):
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(300, 16)).astype(np.float32)
+    queries = rng.normal(size=(5, 16)).astype(np.float32)
+    index = AgentMemoryIndex(str(tmp_path / "agent"), dim=16)
+    assert index.add(_memories(vectors)) == 300
+    assert index.centroids is None # Below min_train_size: exact scan
+
+    results = index.search_records(queries, top_k=4)
+    expected = _brute_force(vectors, queries, 4)
+    for hits, rows in zip(results, expected):
+        assert [hit["id"] for hit in hits] == [f"m{row}" for row in rows]
+        assert hits[0]["content"] == f"memory {rows[0]}"
+        assert "embedding" not in hits[0]
+        assert hits[0]["similarity"] >= hits[-1]["similarity"]
+
+
+def test_match_threshold_and_duplicate_ids(tmp_path):
+    index = AgentMemoryIndex(str(tmp_path / "agent"), dim=2)
+    index.add([{"id": "a", "embedding": [1.0, 0.0]}, {"id": "b", "embedding": [0.0, 1.0]}])
+    assert index.add([{"id": "a", "embedding": [1.0, 0.0]}]) == 0
+    assert index.add([{"id": "c", "embedding": [1.0, 0.0, 0.0]}]) == 0 # Wrong dimension is skipped
+    assert len(index) == 2
+
+    hits = index.search_records([[2.0, 0.1]], top_k=5, match_threshold=0.5)[0]
+    assert [hit["id"] for hit in hits] == ["a"]
+    assert hits[0]["similarity"] == pytest.approx(2.0 / np.hypot(2.0, 0.1), rel=1e-5)
+
+
+def test_ivf_search_recall_and_incremental_adds(tmp_path):
+    rng = np.random.default_rng(2)
+    centers = rng.normal(size=(40, 32))
+    vectors = (centers[rng.integers(0, 40, 3000)] + 0.3 * rng.normal(size=(3000, 32))).astype(np.float32)
+    index = AgentMemoryIndex(str(tmp_path / "agent"), dim=32, min_train_size=1000)
+    index.add(_memories(vectors[:2500]))
+    assert index.centroids is not None and index.trained_count == 2500
+    index.add(_memories(vectors[2500:], prefix="n")) # Assigned to existing lists without retraining
+    assert index.trained_count == 2500 and len(index) == 3000
+
+    queries = (centers[rng.integers(0, 40, 50)] + 0.3 * rng.normal(size=(50, 32))).astype(np.float32)
+    results = index.search(queries, top_k=10)
+    expected = _brute_force(vectors, queries, 10)
+    recall = np.mean([len({row for row, _ in hits} & set(rows.tolist())) / 10 for hits, rows in zip(results, expected)])
+    assert recall >= 0.9
+
+
+def test_index_reloads_from_disk_and_drops_torn_record(tmp_path):
+    rng = np.random.default_rng(3)
+    vectors = rng.normal(size=(1200, 8)).astype(np.float32)
+    index = AgentMemoryIndex(str(tmp_path / "agent"), dim=8, min_train_size=1000)
+    index.add(_memories(vectors))
+    index.hydrated = True
+    index.flush()
+    with open(tmp_path / "agent" / "records.jsonl", "a") as f:
+        f.write('{"id": "torn"') # Crash mid-append
+
+    reloaded = AgentMemoryIndex.load(str(tmp_path / "agent"), min_train_size=1000)
+    assert reloaded.hydrated and len(reloaded) == 1200 and "torn" not in reloaded
+    assert np.array_equal(reloaded.centroids, index.centroids)
+    assert reloaded.search(vectors[:3], top_k=1) == index.search(vectors[:3], top_k=1)
+
+
+def test_store_tracks_warm_indexes(tmp_path):
+    store = AgentMemoryIndexStore(str(tmp_path))
+    assert store.get_warm("agent/1") is None
+    assert store.build("agent/1", []) is None # No memories and no dimension hint
+
+    empty = store.build("agent/1", [], dim=4)
+    assert store.get_warm("agent/1") is empty and len(empty) == 0
+    assert empty.search_records([[1, 0, 0, 0]]) == [[]]
+
+    store.build("agent/1", [{"id": 1, "embedding": "[1, 0, 0, 0]"}])
+    reopened = AgentMemoryIndexStore(str(tmp_path))
+    assert reopened.get_warm("agent/1") is None # Memories may have been saved while the index was closed
+    assert reopened.get("agent/1").search_records([[1, 0, 0, 0]])[0][0]["id"] == "1"
+
+
+def test_store_resumes_from_high_water_mark(tmp_path):
+    store = AgentMemoryIndexStore(str(tmp_path))
+    assert store.sync_cursor("agent") is None # Never hydrated: full listing
+    store.build("agent", [
+        {"id": "m1", "embedding": [1, 0], "created_at": "2026-10-16T10:00:00+00:00"},
+        {"id": "m2", "embedding": [0, 1], "created_at": "2026-10-16T10:05:00Z"},
+    ])
+
+    reopened = AgentMemoryIndexStore(str(tmp_path))
+    assert reopened.sync_cursor("agent") == "2026-10-16T10:04:00+00:00" # High-water mark less the overlap
+    index = reopened.build("agent", [
+        {"id": "m2", "embedding": [0, 1], "created_at": "2026-10-16T10:05:00+00:00"}, # Re-read by the overlap
+        {"id": "m3", "embedding": [-1, 0], "created_at": "2026-10-16T10:09:00+00:00"},
+    ])
+    assert reopened.get_warm("agent") is index and len(index) == 3
+    assert index.synced_through == "2026-10-16T10:09:00+00:00"
+
+
+def test_store_directories_are_distinct_and_inside_base_dir(tmp_path):
+    store = AgentMemoryIndexStore(str(tmp_path / "indexes"))
+    directories = {agent_id: store._directory(agent_id) for agent_id in ("a/b", "a_b", "..", "../../etc")}
+    assert len(set(directories.values())) == len(directories)
+    for directory in directories.values():
+        assert os.path.dirname(os.path.realpath(directory)) == os.path.realpath(tmp_path / "indexes")
+
+    store.build("a/b", [{"id": "ab", "embedding": [1, 0]}])
+    store.build("a_b", [{"id": "a_b", "embedding": [0, 1]}])
+    reloaded = AgentMemoryIndexStore(str(tmp_path / "indexes"))
+    assert "ab" in reloaded.get("a/b") and "ab" not in reloaded.get("a_b")
+
+
+def test_searches_during_a_catch_up_build_see_a_consistent_index(tmp_path):
+    rng = np.random.default_rng(7)
+    store = AgentMemoryIndexStore(str(tmp_path), min_train_size=512)
+    index = store.build("agent", _memories(rng.normal(size=(1000, 16)).astype(np.float32)))
+    batches = [_memories(rng.normal(size=(500, 16)).astype(np.float32), prefix=f"b{n}_") for n in range(8)]
+
+    # Each catch-up grows the arrays and retrains, swapping the memory maps the searches read
+    builder = threading.Thread(target=lambda: [store.build("agent", batch) for batch in batches])
+    builder.start()
+    errors, sizes = [], []
+    while builder.is_alive():
+        try:
+            sizes.append(len(index))
+            hits = index.search_records(rng.normal(size=(4, 16)), top_k=5)
+            assert all(len(row) == 5 and all(hit["id"] in index for hit in row) for row in hits)
+        except Exception as e: # Would make the service fall back to the Supabase RPC
+            errors.append(e)
+    builder.join()
+
+    assert errors == []
+    assert len(index) == 5000 and sizes == sorted(sizes)
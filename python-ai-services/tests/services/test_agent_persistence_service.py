@@ -8,6 +8,7 @@ from typing import Dict, List, Optional, Any, Tuple # Added Tuple
 from loguru import logger
 from datetime import datetime, timedelta # Added timedelta for date filtering tests
 import uuid # Added for task_id
+import numpy as np
 
 # Module to test
 from python_ai_services.services.agent_persistence_service import AgentPersistenceService
@@ -41,6 +42,8 @@ async def persistence_service_mock_clients() -> AgentPersistenceService:
     service.supabase_client.maybe_single = MagicMock(return_value=service.supabase_client) # Chain maybe_single()
     service.supabase_client.order = MagicMock(return_value=service.supabase_client)
     service.supabase_client.limit = MagicMock(return_value=service.supabase_client)
+    service.supabase_client.range = MagicMock(return_value=service.supabase_client)
+    service.supabase_client.rpc = MagicMock(return_value=service.supabase_client)
     service.supabase_client.execute = MagicMock() # This is what's called by to_thread
 
     service.redis_client = AsyncMock()
@@ -235,6 +238,82 @@ async def test_search_agent_memories_in_supabase(persistence_service_mock_client
         "agent_id_filter": agent_id, "query_embedding": embedding, "match_count": top_k
     })
 
+@pytest.mark.asyncio
+async def test_search_agent_memories_uses_local_index_once_hydrated(persistence_service_mock_clients: AgentPersistenceService, tmp_path):
+    service = persistence_service_mock_clients
+    service.memory_index = AgentPersistenceService(memory_index_dir=str(tmp_path)).memory_index
+    agent_id = "mem_agent_local"
+    stored = [
+        {"id": "m1", "agent_id": agent_id, "content": "buy the dip", "embedding": "[1.0, 0.0]", "metadata": {}},
+        {"id": "m2", "agent_id": agent_id, "content": "cut losses", "embedding": "[0.0, 1.0]", "metadata": {}},
+    ]
+    rpc_rows = [{"id": "m1", "content": "buy the dip", "similarity": 0.99}]
+    service.supabase_client.execute.side_effect = [MagicMock(data=rpc_rows, error=None), MagicMock(data=stored, error=None)]
+
+    # Cold start: answered by the RPC while the index hydrates in the background
+    assert await service.search_agent_memories_in_supabase(agent_id, [0.9, 0.1], top_k=1) == rpc_rows
+    await service._memory_hydrations[agent_id]
+    service.supabase_client.range.assert_called_with(0, 999)
+    service.supabase_client.rpc.reset_mock()
+
+    result = await service.search_agent_memories_in_supabase(agent_id, [0.1, 0.9], top_k=1)
+    assert [row["id"] for row in result] == ["m2"]
+    assert result[0]["similarity"] == pytest.approx(0.9 / np.hypot(0.1, 0.9), rel=1e-5)
+
+    # New memories are indexed as they are saved
+    service.supabase_client.execute.side_effect = None
+    service.supabase_client.execute.return_value = MagicMock(data=[{"id": "m3", "agent_id": agent_id, "content": "take profit"}], error=None)
+    await service.save_agent_memory_to_supabase(agent_id, "take profit", [-1.0, 0.0], {"kind": "exit"})
+    batch = await service.search_agent_memories_batch(agent_id, [[-1.0, 0.1], [1.0, 0.0]], top_k=2, match_threshold=0.5)
+    assert [[row["id"] for row in rows] for rows in batch] == [["m3"], ["m1"]]
+    assert batch[0][0]["metadata"] == {"kind": "exit"}
+    service.supabase_client.rpc.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_restarted_memory_index_catches_up_before_serving(persistence_service_mock_clients: AgentPersistenceService, tmp_path):
+    service = persistence_service_mock_clients
+    service.supabase_client.gte = MagicMock(return_value=service.supabase_client)
+    agent_id = "mem_agent_restart"
+    previous_run = AgentPersistenceService(memory_index_dir=str(tmp_path))
+    previous_run.memory_index.build(agent_id, [
+        {"id": "m1", "agent_id": agent_id, "content": "buy the dip", "embedding": [1.0, 0.0], "metadata": {}, "created_at": "2026-10-16T10:00:00+00:00"}
+    ])
+    service.memory_index = AgentPersistenceService(memory_index_dir=str(tmp_path)).memory_index
+
+    # Saved while the index was closed (or by another worker)
+    newer = [{"id": "m2", "agent_id": agent_id, "content": "cut losses", "embedding": "[0.0, 1.0]", "metadata": {}, "created_at": "2026-10-16T11:00:00+00:00"}]
+    rpc_rows = [{"id": "m2", "content": "cut losses", "similarity": 0.99}]
+    service.supabase_client.execute.side_effect = [MagicMock(data=rpc_rows, error=None), MagicMock(data=newer, error=None)]
+
+    # The index on disk is not trusted until it has fetched what is newer than its high-water mark
+    assert await service.search_agent_memories_in_supabase(agent_id, [0.1, 0.9], top_k=1) == rpc_rows
+    await service._memory_hydrations[agent_id]
+    service.supabase_client.gte.assert_called_once_with("created_at", "2026-10-16T09:59:00+00:00")
+    service.supabase_client.rpc.reset_mock()
+
+    result = await service.search_agent_memories_in_supabase(agent_id, [0.1, 0.9], top_k=1)
+    assert [row["id"] for row in result] == ["m2"]
+    service.supabase_client.rpc.assert_not_called()
+
+    # A warm index past the sync interval re-fetches in the background while still answering locally
+    service.memory_index_sync_interval_seconds = 0.0
+    service.supabase_client.execute.side_effect = None
+    service.supabase_client.execute.return_value = MagicMock(data=[], error=None)
+    assert [row["id"] for row in await service.search_agent_memories_in_supabase(agent_id, [1.0, 0.0], top_k=1)] == ["m1"]
+    await service._memory_hydrations[agent_id]
+    assert service.supabase_client.gte.call_args == (("created_at", "2026-10-16T10:59:00+00:00"),)
+    service.supabase_client.rpc.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_search_agent_memories_batch_falls_back_to_rpc_without_index(persistence_service_mock_clients: AgentPersistenceService):
+    service = persistence_service_mock_clients
+    service.supabase_client.execute.return_value = MagicMock(data=[{"id": "uuid_mem"}], error=None)
+
+    result = await service.search_agent_memories_batch("mem_agent_batch", [[0.1, 0.2], [0.3, 0.4]], top_k=2)
+    assert result == [[{"id": "uuid_mem"}], [{"id": "uuid_mem"}]]
+    assert service.supabase_client.rpc.call_count == 2
+    assert service._memory_hydrations == {}
+
 # --- Tests for AgentTask CRUD Methods ---
 
 class TestAgentTaskPersistence:
@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from python_ai_services.services.agent_scheduler_service import (
+    AgentSchedulerService, AgentCapability, ScheduledTask, SchedulePriority, TaskStatus, TaskType
+)
+
+
+class GatedExecutor:
+    """Records start order; each task runs until the test releases it."""
+
+    def __init__(self):
+        self.started = []
+        self.gates = {}
+
+    async def __call__(self, task):
+        self.started.append(task.task_id)
+        gate = self.gates.setdefault(task.task_id, asyncio.Event())
+        await gate.wait()
+        if task.task_data.get("fail"):
+            raise RuntimeError("boom")
+        return {"success": True}
+
+    async def release(self, task_id):
+        self.gates.setdefault(task_id, asyncio.Event()).set()
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+
+@pytest_asyncio.fixture
+async def scheduler():
+    executor = GatedExecutor()
+    service = AgentSchedulerService(task_executor=executor)
+    service.executor = executor
+    yield service
+    service.scheduler_running = False
+    for running in list(service._running.values()):
+        running.cancel()
+
+
+def _task(task_id, priority=SchedulePriority.MEDIUM, task_type=TaskType.ANALYSIS, **kwargs):
+    return ScheduledTask(task_id=task_id, task_type=task_type, priority=priority, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_dispatch_follows_priority_then_enqueue_order(scheduler):
+    await scheduler.register_agent(AgentCapability(agent_id="a1", supported_tasks=[TaskType.ANALYSIS], max_concurrent_tasks=1))
+    await scheduler.submit_task(_task("busy"))
+    await scheduler.submit_task(_task("low", SchedulePriority.LOW))
+    await scheduler.submit_task(_task("high_1", SchedulePriority.HIGH))
+    await scheduler.submit_task(_task("critical", SchedulePriority.CRITICAL))
+    await scheduler.submit_task(_task("high_2", SchedulePriority.HIGH))
+    await asyncio.sleep(0)
+
+    status = scheduler.get_scheduler_status()["queue_statistics"]
+    assert status["total_queued"] == 4 and status["by_priority"] == {"low": 1, "high": 2, "critical": 1}
+    assert scheduler.agent_workloads["a1"].active_tasks == ["busy"] # Capacity is respected
+
+    for task_id in ["busy", "critical", "high_1", "high_2"]:
+        await scheduler.executor.release(task_id)
+    assert scheduler.executor.started == ["busy", "critical", "high_1", "high_2", "low"]
+    assert (await scheduler.get_task_status("busy")).status == TaskStatus.COMPLETED
+
+
+@pytest.mark.asyncio
+async def test_task_types_dispatch_independently(scheduler):
+    await scheduler.register_agent(AgentCapability(agent_id="analyst", supported_tasks=[TaskType.ANALYSIS], max_concurrent_tasks=1))
+    await scheduler.submit_task(_task("analysis_1", SchedulePriority.CRITICAL))
+    await scheduler.submit_task(_task("analysis_2", SchedulePriority.CRITICAL))
+    with pytest.raises(ValueError):
+        await scheduler.submit_task(_task("trade_early", task_type=TaskType.TRADING))
+
+    await scheduler.register_agent(AgentCapability(agent_id="trader", supported_tasks=[TaskType.TRADING, TaskType.ANALYSIS], max_concurrent_tasks=2))
+    await scheduler.submit_task(_task("trade", SchedulePriority.LOW, TaskType.TRADING))
+    await asyncio.sleep(0)
+    assert scheduler.executor.started == ["analysis_1", "analysis_2", "trade"]
+    assert (await scheduler.get_task_status("analysis_2")).agent_id == "trader"
+    assert scheduler.get_scheduler_status()["queue_statistics"]["total_queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_dependencies_release_on_completion_and_cancel_on_failure(scheduler):
+    await scheduler.register_agent(AgentCapability(agent_id="a1", supported_tasks=[TaskType.ANALYSIS], max_concurrent_tasks=4))
+    await scheduler.submit_task(_task("root"))
+    await scheduler.submit_task(_task("child", SchedulePriority.CRITICAL, dependencies=["root"]))
+    await scheduler.submit_task(_task("flaky", task_data={"fail": True}, max_retries=0))
+    await scheduler.submit_task(_task("after_flaky", dependencies=["flaky"]))
+    await scheduler.submit_task(_task("grandchild", dependencies=["after_flaky", "root"]))
+    await asyncio.sleep(0)
+    assert scheduler.executor.started == ["root", "flaky"]
+    assert scheduler.get_scheduler_status()["queue_statistics"]["waiting_on_dependencies"] == 3
+
+    await scheduler.executor.release("root")
+    assert scheduler.executor.started == ["root", "flaky", "child"]
+
+    await scheduler.executor.release("flaky")
+    assert (await scheduler.get_task_status("flaky")).status == TaskStatus.FAILED
+    for task_id in ["after_flaky", "grandchild"]:
+        task = await scheduler.get_task_status(task_id)
+        assert task.status == TaskStatus.CANCELLED and "dependency" in task.error_message.lower()
+    assert scheduler.get_scheduler_status()["queue_statistics"]["total_queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancel_pending_and_running_tasks(scheduler):
+    await scheduler.register_agent(AgentCapability(agent_id="a1", supported_tasks=[TaskType.ANALYSIS], max_concurrent_tasks=1))
+    await scheduler.submit_task(_task("running"))
+    await scheduler.submit_task(_task("queued_1"))
+    await scheduler.submit_task(_task("queued_2"))
+    await asyncio.sleep(0)
+
+    assert await scheduler.cancel_task("queued_1") is True
+    assert scheduler.get_scheduler_status()["queue_statistics"]["total_queued"] == 1
+    assert await scheduler.cancel_task("running") is True
+    await asyncio.sleep(0)
+    assert scheduler.executor.started == ["running", "queued_2"]
+    assert await scheduler.cancel_task("queued_1") is False
@@ -0,0 +1,156 @@
+import pytest
+import pytest_asyncio
+import asyncio
+from unittest import mock
+from unittest.mock import MagicMock, patch
+
+from python_ai_services.services.agent_state_manager import AgentStateManager, AgentStateCache
+from python_ai_services.services.agent_persistence_service import AgentPersistenceService
+
+
+@pytest_asyncio.fixture
+async def mock_persistence_service() -> AgentPersistenceService:
+    """Provides a mock AgentPersistenceService."""
+    mock_svc = mock.AsyncMock(spec=AgentPersistenceService)
+    mock_svc.get_realtime_state_from_redis = mock.AsyncMock(return_value=None)
+    mock_svc.save_realtime_state_to_redis = mock.AsyncMock(return_value=True)
+    mock_svc.get_agent_state_from_supabase = mock.AsyncMock(return_value=None)
+    mock_svc.delete_agent_state_from_supabase = mock.AsyncMock(return_value=True)
+    mock_svc.delete_realtime_state_from_redis = mock.AsyncMock(return_value=True)
+    return mock_svc
+
+
+def test_agent_state_cache_lru_and_ttl_bounds():
+    cache = AgentStateCache(max_size=2, ttl_seconds=60)
+    cache["a"] = {"agent_id": "a"}
+    cache["b"] = {"agent_id": "b"}
+    assert cache.get("a") is not None # Touch "a" so "b" is least recently used
+    cache["c"] = {"agent_id": "c"}
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert cache.get_stats()["evictions"] == 1
+
+    with patch("python_ai_services.services.agent_state_manager.time.monotonic", return_value=10**9):
+        assert cache.get("a") is None # Older than the TTL
+    assert cache.get_stats()["expirations"] == 1
+
+@pytest.mark.asyncio
+async def test_update_agent_state_slow_write_does_not_block_other_agents(mock_persistence_service: mock.AsyncMock):
+    manager = AgentStateManager(persistence_service=mock_persistence_service)
+    slow_write_started = asyncio.Event()
+    release_slow_write = asyncio.Event()
+
+    async def save(agent_id, strategy_type, state, memory_references):
+        if agent_id == "slow_agent":
+            slow_write_started.set()
+            await release_slow_write.wait()
+        return {"agent_id": agent_id, "state": state, "strategy_type": strategy_type}
+    mock_persistence_service.save_agent_state_to_supabase.side_effect = save
+
+    # Pick an agent id on a different lock stripe than the slow agent
+    fast_agent = next(f"fast_agent_{i}" for i in range(1000) if manager._lock_for(f"fast_agent_{i}") is not manager._lock_for("slow_agent"))
+
+    slow = asyncio.create_task(manager.update_agent_state("slow_agent", {"v": 1}))
+    await slow_write_started.wait()
+    fast_result = await asyncio.wait_for(manager.update_agent_state(fast_agent, {"v": 2}), timeout=1.0)
+    assert fast_result["state"] == {"v": 2}
+    assert not slow.done()
+
+    release_slow_write.set()
+    assert (await slow)["agent_id"] == "slow_agent"
+
+@pytest.mark.asyncio
+async def test_write_behind_coalesces_and_batches_supabase_upserts(mock_persistence_service: mock.AsyncMock):
+    mock_persistence_service.save_agent_states_to_supabase = mock.AsyncMock(side_effect=lambda records: list(records))
+    manager = AgentStateManager(persistence_service=mock_persistence_service, write_behind_flush_interval_seconds=60)
+
+    await manager.update_agent_state("agent_a", {"step": 1}, strategy_type="s")
+    await manager.update_agent_state("agent_a", {"step": 2}, strategy_type="s")
+    result = await manager.update_agent_state("agent_b", {"step": 1}, strategy_type="s")
+
+    assert result["state"] == {"step": 1}
+    assert (await manager.get_agent_state("agent_a"))["state"] == {"step": 2} # Served before the flush
+    mock_persistence_service.save_agent_state_to_supabase.assert_not_called()
+    assert mock_persistence_service.save_realtime_state_to_redis.call_count == 3
+
+    assert await manager.flush_pending_states() == 2
+    batch = mock_persistence_service.save_agent_states_to_supabase.call_args[0][0]
+    assert [(r["agent_id"], r["state"]) for r in batch] == [("agent_a", {"step": 2}), ("agent_b", {"step": 1})]
+    stats = manager.get_cache_stats()
+    assert stats["records_coalesced"] == 1 and stats["pending_upserts"] == 0
+
+@pytest.mark.asyncio
+async def test_write_behind_failed_flush_is_retried_and_delete_drops_pending(mock_persistence_service: mock.AsyncMock):
+    mock_persistence_service.save_agent_states_to_supabase = mock.AsyncMock(return_value=[])
+    manager = AgentStateManager(persistence_service=mock_persistence_service, write_behind_flush_interval_seconds=60)
+    await manager.update_agent_state("agent_keep", {"v": 1})
+    await manager.update_agent_state("agent_gone", {"v": 1})
+
+    assert await manager.flush_pending_states() == 0
+    assert manager.get_cache_stats()["pending_upserts"] == 2
+
+    await manager.delete_agent_state("agent_gone")
+    mock_persistence_service.save_agent_states_to_supabase = mock.AsyncMock(side_effect=lambda records: list(records))
+    assert await manager.flush_pending_states() == 1
+    assert mock_persistence_service.save_agent_states_to_supabase.call_args[0][0][0]["agent_id"] == "agent_keep"
+
+@pytest.mark.asyncio
+async def test_invalidation_from_other_worker_evicts_cached_state(mock_persistence_service: mock.AsyncMock):
+    manager = AgentStateManager(persistence_service=mock_persistence_service)
+    manager.in_memory_cache["agent_x"] = {"agent_id": "agent_x", "state": {"v": 1}}
+    manager.in_memory_cache["agent_y"] = {"agent_id": "agent_y", "state": {"v": 1}}
+
+    async def messages():
+        yield {"agent_id": "agent_x", "origin": "other_worker"}
+        yield {"agent_id": "agent_y", "origin": manager.instance_id} # Own writes are ignored
+    mock_persistence_service.listen_state_invalidations = MagicMock(return_value=messages())
+    mock_persistence_service.redis_client = MagicMock()
+
+    await manager.start()
+    await asyncio.sleep(0.01)
+    await manager.close()
+
+    assert "agent_x" not in manager.in_memory_cache
+    assert "agent_y" in manager.in_memory_cache
+    assert manager.get_cache_stats()["invalidations_received"] == 1
+
+
+async def _flush_blocked_on_upsert(manager: AgentStateManager, mock_persistence_service: mock.AsyncMock, result):
+    """Starts a flush whose batch upsert waits until the returned event is set, then returns `result`."""
+    upsert_started, release_upsert = asyncio.Event(), asyncio.Event()
+
+    async def save(records):
+        upsert_started.set()
+        await release_upsert.wait()
+        return result(records)
+    mock_persistence_service.save_agent_states_to_supabase = mock.AsyncMock(side_effect=save)
+    flush = asyncio.create_task(manager.flush_pending_states())
+    await upsert_started.wait()
+    return flush, release_upsert
+
+@pytest.mark.asyncio
+async def test_delete_during_failed_flush_is_not_requeued(mock_persistence_service: mock.AsyncMock):
+    manager = AgentStateManager(persistence_service=mock_persistence_service, write_behind_flush_interval_seconds=60)
+    await manager.update_agent_state("agent_keep", {"v": 1})
+    await manager.update_agent_state("agent_gone", {"v": 1})
+
+    flush, release_upsert = await _flush_blocked_on_upsert(manager, mock_persistence_service, lambda records: [])
+    assert await manager.delete_agent_state("agent_gone")
+    release_upsert.set()
+    assert await flush == 0
+
+    assert list(manager._pending_upserts) == ["agent_keep"] # The deleted agent's record is dropped
+
+@pytest.mark.asyncio
+async def test_delete_during_successful_flush_deletes_the_upserted_row_again(mock_persistence_service: mock.AsyncMock):
+    manager = AgentStateManager(persistence_service=mock_persistence_service, write_behind_flush_interval_seconds=60)
+    await manager.update_agent_state("agent_keep", {"v": 1})
+    await manager.update_agent_state("agent_gone", {"v": 1})
+
+    flush, release_upsert = await _flush_blocked_on_upsert(manager, mock_persistence_service, lambda records: list(records))
+    assert await manager.delete_agent_state("agent_gone")
+    release_upsert.set()
+    assert await flush == 2
+
+    # The upsert may have landed after the delete, so the row is deleted once more
+    assert mock_persistence_service.delete_agent_state_from_supabase.await_args_list == [mock.call("agent_gone"), mock.call("agent_gone")]
+    assert manager.get_cache_stats()["pending_upserts"] == 0
@@ -0,0 +1,181 @@
+import pytest
+import asyncio
+import time
+import numpy as np
+from datetime import datetime, timezone, timedelta
+from decimal import Decimal
+from typing import List
+
+from python_ai_services.services.backtesting_service import (
+    BacktestEngine, VectorizedBacktestEngine, SharedMarketData, BacktestJobScheduler,
+    BacktestQueueFullError, BacktestJobCancelledError, MonteCarloSimulator
+)
+from python_ai_services.models.trading_strategy_models import (
+    TradingStrategy, StrategyType, StrategyBacktestRequest, MarketData, RiskLevel
+)
+
+
+def make_bars(n: int, seed: int = 7, symbol: str = "BTCUSD") -> List[MarketData]:
+    rng = np.random.default_rng(seed)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    bars = []
+    for i, price in enumerate(prices):
+        p = Decimal(str(round(float(price), 6)))
+        bars.append(MarketData(
+            symbol=symbol, timestamp=start + timedelta(minutes=i),
+            open=p, high=p, low=p, close=p, volume=Decimal("1")
+        ))
+    return bars
+
+
+@pytest.fixture
+def momentum_strategy() -> TradingStrategy:
+    return TradingStrategy(
+        name="Momentum",
+        description="Backtest parity strategy",
+        strategy_type=StrategyType.MOMENTUM,
+        max_position_size=Decimal("1000"),
+        max_portfolio_allocation=0.5,
+        risk_level=RiskLevel.MODERATE
+    )
+
+
+def make_request(strategy: TradingStrategy, warmup: int = 100) -> StrategyBacktestRequest:
+    now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return StrategyBacktestRequest(
+        strategy_id=strategy.strategy_id, start_date=now, end_date=now, warmup_period=warmup
+    )
+
+
+@pytest.mark.parametrize("warmup", [0, 5, 100])
+def test_vectorized_engine_matches_loop_engine(momentum_strategy, warmup):
+    bars = make_bars(3000)
+    request = make_request(momentum_strategy, warmup)
+
+    expected = BacktestEngine().run_backtest(momentum_strategy, bars, request)
+    actual = VectorizedBacktestEngine().run_backtest(momentum_strategy, bars, request)
+
+    assert actual.total_trades == expected.total_trades
+    assert actual.winning_trades == expected.winning_trades
+    assert actual.losing_trades == expected.losing_trades
+    assert float(actual.final_capital) == pytest.approx(float(expected.final_capital), rel=1e-9)
+    for field in ("total_return", "volatility", "sharpe_ratio", "sortino_ratio",
+                  "max_drawdown", "profit_factor", "average_trade", "annualized_return"):
+        assert getattr(actual, field) == pytest.approx(getattr(expected, field), rel=1e-6, abs=1e-12)
+
+    assert len(actual.equity_curve) == len(expected.equity_curve)
+    for got, want in zip(actual.equity_curve, expected.equity_curve):
+        assert got["timestamp"] == want["timestamp"]
+        assert got["portfolio_value"] == pytest.approx(want["portfolio_value"], rel=1e-9)
+
+    assert [t["action"] for t in actual.trades] == [t["action"] for t in expected.trades]
+    assert [t["timestamp"] for t in actual.trades] == [t["timestamp"] for t in expected.trades]
+
+
+def test_vectorized_engine_no_signals_for_non_momentum(momentum_strategy):
+    strategy = momentum_strategy.model_copy(update={"strategy_type": StrategyType.GRID})
+    bars = make_bars(500)
+    result = VectorizedBacktestEngine().run_backtest(strategy, bars, make_request(strategy))
+
+    assert result.total_trades == 0
+    assert result.final_capital == Decimal("100000.0")
+    assert all(point["capital"] == 100000.0 for point in result.equity_curve)
+
+
+def test_shared_market_data_round_trip():
+    bars = make_bars(50)
+    shared = SharedMarketData(bars)
+    try:
+        timestamps_us, ohlcv = SharedMarketData.load(shared.handle)
+    finally:
+        shared.release()
+
+    assert shared.handle.length == 50
+    assert shared.handle.symbol == "BTCUSD"
+    assert SharedMarketData.to_datetimes(shared.handle, timestamps_us) == [b.timestamp for b in bars]
+    assert ohlcv[3].tolist() == [float(b.close) for b in bars]
+
+
+@pytest.mark.asyncio
+async def test_job_scheduler_admission_and_cancellation():
+    scheduler = BacktestJobScheduler(max_workers=1, max_queued_jobs=1)
+    try:
+        running = asyncio.create_task(scheduler.submit("backtest", "s1", time.sleep, 0.3, job_id="running"))
+        queued = asyncio.create_task(scheduler.submit("backtest", "s1", time.sleep, 0.3, job_id="queued"))
+        await asyncio.sleep(0.05)
+
+        metrics = scheduler.get_metrics()
+        assert metrics["running_jobs"] == 1
+        assert metrics["queue_depth"] == 1
+
+        with pytest.raises(BacktestQueueFullError):
+            await scheduler.submit("backtest", "s1", time.sleep, 0.3)
+
+        assert scheduler.cancel("queued") is True
+        with pytest.raises(BacktestJobCancelledError):
+            await queued
+        await running
+
+        assert scheduler.get_job("running")["status"] == "completed"
+        assert scheduler.get_job("queued")["status"] == "cancelled"
+        assert scheduler.get_metrics()["rejected_jobs"] == 1
+    finally:
+        await scheduler.shutdown()
+
+
+@pytest.mark.parametrize("mode", MonteCarloSimulator.SIMULATION_MODES)
+def test_monte_carlo_modes_are_seeded_and_chunked(momentum_strategy, mode):
+    returns = np.random.default_rng(3).normal(0.0005, 0.01, 500)
+
+    chunked = MonteCarloSimulator(chunk_size=64).simulate_returns(
+        momentum_strategy, returns, num_simulations=300, time_horizon_days=50, mode=mode, seed=11
+    )
+    repeat = MonteCarloSimulator(chunk_size=64).simulate_returns(
+        momentum_strategy, returns, num_simulations=300, time_horizon_days=50, mode=mode, seed=11
+    )
+
+    assert chunked.num_simulations == 300
+    assert chunked.mean_return == repeat.mean_return
+    assert chunked.worst_drawdown >= chunked.avg_drawdown >= 0
+    assert 0 <= chunked.max_drawdown_duration <= 50
+    assert chunked.percentiles["5th"] <= chunked.percentiles["50th"] <= chunked.percentiles["95th"]
+
+
+def test_monte_carlo_path_statistics_match_explicit_paths(momentum_strategy):
+    returns = np.random.default_rng(5).normal(0.0, 0.02, 200)
+    simulator = MonteCarloSimulator(chunk_size=7)
+
+    paths = np.vstack(list(simulator.iter_return_chunks(returns, 20, 30, mode="bootstrap", seed=2)))
+    result = simulator.simulate_returns(
+        momentum_strategy, returns, num_simulations=20, time_horizon_days=30, mode="bootstrap", seed=2
+    )
+
+    equity = np.cumprod(1 + paths, axis=1)
+    peaks = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)
+    assert paths.shape == (20, 30)
+    assert result.mean_return == pytest.approx(np.mean(equity[:, -1] - 1))
+    assert result.worst_drawdown == pytest.approx(np.max(1 - equity / peaks))
+
+
+def test_monte_carlo_returns_cache_tracks_result_set():
+    simulator = MonteCarloSimulator()
+    strategy = TradingStrategy(
+        name="Momentum", description="cache", strategy_type=StrategyType.MOMENTUM,
+        max_position_size=Decimal("1000"), max_portfolio_allocation=0.5, risk_level=RiskLevel.MODERATE
+    )
+    engine = VectorizedBacktestEngine()
+    first = engine.run_backtest(strategy, make_bars(300, seed=1), make_request(strategy))
+    second = engine.run_backtest(strategy, make_bars(300, seed=2), make_request(strategy))
+
+    returns = simulator.get_strategy_returns(strategy.strategy_id, [first])
+    assert simulator.get_strategy_returns(strategy.strategy_id, [first]) is returns
+    assert len(returns) == len(first.equity_curve) - 1
+
+    combined = simulator.get_strategy_returns(strategy.strategy_id, [first, second])
+    assert len(combined) == len(first.equity_curve) + len(second.equity_curve) - 2
+
+
+def test_monte_carlo_rejects_unknown_mode(momentum_strategy):
+    with pytest.raises(ValueError):
+        MonteCarloSimulator().simulate_returns(momentum_strategy, np.array([0.01, -0.01]), 10, 5, mode="garch")
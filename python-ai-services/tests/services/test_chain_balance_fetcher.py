@@ -0,0 +1,140 @@
+import asyncio
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from python_ai_services.services.chain_balance_fetcher import (
+    ChainBalanceFetcher, RPCBatchError, BALANCE_OF_SELECTOR, DECIMALS_SELECTOR
+)
+
+ALICE = "0x" + "a1" * 20
+BOB = "0x" + "b2" * 20
+USDC = "0x" + "c3" * 20
+BROKEN = "0x" + "dd" * 20
+
+
+class StandInRPC:
+    """Local JSON-RPC endpoint per chain serving canned eth_getBalance / eth_call answers."""
+
+    def __init__(self):
+        self.native = {"ethereum": {ALICE: 2 * 10**18, BOB: 5 * 10**17}, "polygon": {ALICE: 3 * 10**18}}
+        self.token_balances = {(USDC, ALICE): 1_500_000, (USDC, BOB): 0}
+        self.decimals = {USDC: 6}
+        self.posts = []
+        self.calls = []
+        self.delay = 0.0
+
+    def answer(self, chain, request):
+        self.calls.append((chain, request["method"]))
+        params = request["params"]
+        if request["method"] == "eth_getBalance":
+            if params[0] not in self.native[chain]:
+                return {"error": {"code": -32000, "message": "unknown account"}}
+            return {"result": hex(self.native[chain][params[0]])}
+        call = params[0]
+        if call["to"] == BROKEN:
+            return {"error": {"code": 3, "message": "execution reverted"}}
+        if call["data"] == DECIMALS_SELECTOR:
+            return {"result": "0x" + format(self.decimals[call["to"]], "064x")}
+        assert call["data"].startswith(BALANCE_OF_SELECTOR)
+        owner = "0x" + call["data"][-40:]
+        return {"result": "0x" + format(self.token_balances.get((call["to"], owner), 0), "064x")}
+
+    async def handle(self, request):
+        chain = request.match_info["chain"]
+        self.posts.append(chain)
+        await asyncio.sleep(self.delay)
+        body = await request.json()
+        return web.json_response([{"jsonrpc": "2.0", "id": item["id"], **self.answer(chain, item)} for item in body])
+
+
+@pytest_asyncio.fixture
+async def rpc():
+    stand_in = StandInRPC()
+    app = web.Application()
+    app.router.add_post("/{chain}", stand_in.handle)
+    server = TestServer(app)
+    await server.start_server()
+    stand_in.url = lambda chain: str(server.make_url(f"/{chain}"))
+    yield stand_in
+    await server.close()
+
+
+@pytest_asyncio.fixture
+async def fetcher(rpc):
+    fetcher = ChainBalanceFetcher({chain: rpc.url(chain) for chain in ("ethereum", "polygon")}, max_batch_size=50)
+    yield fetcher
+    await fetcher.close()
+
+
+@pytest.mark.asyncio
+async def test_one_batch_per_chain_and_decimals_cached(rpc, fetcher):
+    result = await fetcher.fetch_balances(
+        {"ethereum": [ALICE, BOB, ALICE], "polygon": [ALICE]},
+        {"ethereum": {"USDC": USDC}}
+    )
+    assert sorted(rpc.posts) == ["ethereum", "polygon"]
+    ethereum = {balances.address: balances for balances in result["ethereum"]}
+    assert ethereum[ALICE].native_wei == 2 * 10**18 and ethereum[ALICE].token_balances == {"USDC": Decimal("1.5")}
+    assert ethereum[BOB].token_balances == {"USDC": Decimal(0)}
+    assert result["polygon"][0].native_wei == 3 * 10**18
+    assert fetcher.decimals_cache == {("ethereum", USDC): 6}
+
+    rpc.calls.clear()
+    await fetcher.fetch_balances({"ethereum": [ALICE]}, {"ethereum": {"USDC": USDC}})
+    assert rpc.calls == [("ethereum", "eth_getBalance"), ("ethereum", "eth_call")] # No decimals() call
+
+
+@pytest.mark.asyncio
+async def test_chains_are_fetched_concurrently_and_large_batches_chunked(rpc, fetcher):
+    rpc.delay = 0.2
+    addresses = ["0x" + format(i, "040x") for i in range(120)]
+    rpc.native["ethereum"].update({address: i for i, address in enumerate(addresses)})
+    started = asyncio.get_running_loop().time()
+    result = await fetcher.fetch_balances({"ethereum": addresses, "polygon": [ALICE]})
+    assert asyncio.get_running_loop().time() - started < 0.35 # 3 ethereum chunks and polygon all in flight together
+    assert rpc.posts.count("ethereum") == 3
+    assert [balances.native_wei for balances in result["ethereum"]] == list(range(120))
+
+
+@pytest.mark.asyncio
+async def test_token_errors_are_skipped_native_errors_raise(rpc, fetcher):
+    result = await fetcher.fetch_chain_balances("ethereum", [ALICE], {"USDC": USDC, "BAD": BROKEN})
+    assert result[0].token_balances == {"USDC": Decimal("1.5")}
+    assert ("ethereum", BROKEN) not in fetcher.decimals_cache
+
+    with pytest.raises(RPCBatchError):
+        await fetcher.fetch_chain_balances("polygon", [BOB])
+
+
+@pytest.mark.asyncio
+async def test_master_wallet_balances_use_batched_fetcher(rpc):
+    from python_ai_services.services.master_wallet_service import MasterWalletService
+    from python_ai_services.models.master_wallet_models import MasterWallet, MasterWalletConfig, WalletAddress
+
+    with patch("python_ai_services.services.master_wallet_service.get_registry", return_value=Mock()):
+        service = MasterWalletService()
+    service.balance_fetcher = ChainBalanceFetcher({chain: rpc.url(chain) for chain in ("ethereum", "polygon")})
+    service.token_contracts = {"ethereum": {"USDC": USDC}}
+    service.web3_connections = {"ethereum": Mock(), "polygon": Mock()}
+    wallet = MasterWallet(
+        config=MasterWalletConfig(name="w", supported_chains=["ethereum", "polygon"]),
+        addresses=[
+            WalletAddress(address=ALICE, chain_id=1, chain_name="ethereum"),
+            WalletAddress(address=BOB, chain_id=1, chain_name="ethereum"),
+            WalletAddress(address=ALICE, chain_id=137, chain_name="polygon"),
+            WalletAddress(address=ALICE, chain_id=56, chain_name="bsc"), # Not connected: skipped
+        ]
+    )
+    service.active_wallets[wallet.wallet_id] = wallet
+
+    balances = await service.get_wallet_balances(wallet.wallet_id)
+    assert [(b.asset_symbol, b.balance) for b in balances] == [
+        ("ETH", Decimal("2")), ("USDC", Decimal("1.5")), ("ETH", Decimal("0.5")), ("MATIC", Decimal("3"))
+    ]
+    assert sorted(rpc.posts) == ["ethereum", "polygon"]
+    await service.balance_fetcher.close()
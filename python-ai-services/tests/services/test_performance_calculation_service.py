@@ -3,10 +3,18 @@ import pytest_asyncio
 from unittest.mock import MagicMock, AsyncMock
 from datetime import datetime, timezone, timedelta
 import math
+import uuid
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from python_ai_services.core.database import Base
 
 from python_ai_services.services.performance_calculation_service import PerformanceCalculationService
 from python_ai_services.services.trading_data_service import TradingDataService
-from python_ai_services.models.dashboard_models import TradeLogItem
+from python_ai_services.services.trade_history_service import TradeHistoryService
+from python_ai_services.services.portfolio_snapshot_service import PortfolioSnapshotService
+from python_ai_services.models.trade_history_models import TradeStatistics, TradeFillData
 from python_ai_services.models.performance_models import PerformanceMetrics
 
 @pytest_asyncio.fixture
@@ -15,29 +23,21 @@ def mock_trading_data_service() -> TradingDataService:
 
 @pytest_asyncio.fixture
 def performance_service(mock_trading_data_service: TradingDataService) -> PerformanceCalculationService:
-    return PerformanceCalculationService(trading_data_service=mock_trading_data_service)
-
-def create_mock_trade(pnl: Optional[float], timestamp_offset_days: int, asset: str = "TEST_ASSET") -> TradeLogItem:
-    return TradeLogItem(
-        trade_id=str(uuid.uuid4()),
-        timestamp=datetime.now(timezone.utc) - timedelta(days=timestamp_offset_days),
-        agent_id="test_agent",
-        asset=asset,
-        side="buy",
-        order_type="market",
-        quantity=1.0,
-        price=100.0,
-        total_value=100.0,
-        realized_pnl=pnl
+    return PerformanceCalculationService(
+        trading_data_service=mock_trading_data_service,
+        portfolio_snapshot_service=MagicMock(spec=PortfolioSnapshotService)
     )
 
+def create_statistics(agent_id: str, **kwargs) -> TradeStatistics:
+    return TradeStatistics(agent_id=agent_id, **kwargs)
+
 @pytest.mark.asyncio
 async def test_calculate_performance_no_trades(
     performance_service: PerformanceCalculationService,
     mock_trading_data_service: MagicMock
 ):
     agent_id = "agent_no_trades"
-    mock_trading_data_service.get_trade_history = AsyncMock(return_value=[])
+    mock_trading_data_service.get_trade_statistics = AsyncMock(return_value=create_statistics(agent_id))
 
     metrics = await performance_service.calculate_performance_metrics(agent_id)
 
@@ -46,7 +46,7 @@ async def test_calculate_performance_no_trades(
     assert metrics.total_trades == 0
     assert metrics.total_net_pnl == 0.0
     assert "No trade history available" in metrics.notes
-    mock_trading_data_service.get_trade_history.assert_called_once_with(agent_id, limit=10000)
+    mock_trading_data_service.get_trade_statistics.assert_called_once_with(agent_id)
 
 @pytest.mark.asyncio
 async def test_calculate_performance_failed_to_fetch_trades(
@@ -54,7 +54,7 @@ async def test_calculate_performance_failed_to_fetch_trades(
     mock_trading_data_service: MagicMock
 ):
     agent_id = "agent_fetch_fail"
-    mock_trading_data_service.get_trade_history = AsyncMock(side_effect=Exception("DB Error"))
+    mock_trading_data_service.get_trade_statistics = AsyncMock(side_effect=Exception("DB Error"))
 
     metrics = await performance_service.calculate_performance_metrics(agent_id)
     assert metrics.agent_id == agent_id
@@ -67,27 +67,27 @@ async def test_calculate_performance_with_pnl_data(
     mock_trading_data_service: MagicMock
 ):
     agent_id = "agent_with_pnl"
-    trades = [
-        create_mock_trade(pnl=10.0, timestamp_offset_days=3), # Win
-        create_mock_trade(pnl=-5.0, timestamp_offset_days=2), # Loss
-        create_mock_trade(pnl=15.0, timestamp_offset_days=1), # Win
-        create_mock_trade(pnl=0.0, timestamp_offset_days=1),  # Neutral
-        create_mock_trade(pnl=None, timestamp_offset_days=0, asset="MOCK_COIN") # PnL missing
-    ]
-    mock_trading_data_service.get_trade_history = AsyncMock(return_value=trades)
+    start = datetime.now(timezone.utc) - timedelta(days=3)
+    end = datetime.now(timezone.utc)
+    statistics = create_statistics(
+        agent_id, total_trades=4, winning_trades=2, losing_trades=1, neutral_trades=1,
+        total_net_pnl=20.0, gross_profit=25.0, gross_loss=5.0,
+        first_exit_timestamp=start, last_exit_timestamp=end, assets=["MOCK_COIN", "TEST_ASSET"]
+    )
+    mock_trading_data_service.get_trade_statistics = AsyncMock(return_value=statistics)
 
     metrics = await performance_service.calculate_performance_metrics(agent_id)
 
-    assert metrics.total_trades == 5
+    assert metrics.total_trades == 4
     assert metrics.winning_trades == 2
     assert metrics.losing_trades == 1
-    assert metrics.neutral_trades == 2 # 0.0 PnL and None PnL
+    assert metrics.neutral_trades == 1
     assert math.isclose(metrics.total_net_pnl, 20.0)
-    assert math.isclose(metrics.gross_profit, 25.0)  # 10 + 15
-    assert math.isclose(metrics.gross_loss, 5.0)    # abs(-5)
+    assert math.isclose(metrics.gross_profit, 25.0)
+    assert math.isclose(metrics.gross_loss, 5.0)
 
-    assert metrics.data_start_time == trades[0].timestamp
-    assert metrics.data_end_time == trades[-1].timestamp # latest trade
+    assert metrics.data_start_time == start
+    assert metrics.data_end_time == end
 
     # Win rate = winning / (winning + losing)
     assert math.isclose(metrics.win_rate, 2 / 3)
@@ -99,7 +99,6 @@ async def test_calculate_performance_with_pnl_data(
     # Profit factor = gross_profit / gross_loss
     assert math.isclose(metrics.profit_factor, 25.0 / 5.0)
 
-    assert "Some trades were missing realized PnL" in metrics.notes
     assert "mocked trade history data" in metrics.notes # Due to MOCK_COIN
 
 @pytest.mark.asyncio
@@ -108,11 +107,8 @@ async def test_calculate_performance_all_wins(
     mock_trading_data_service: MagicMock
 ):
     agent_id = "agent_all_wins"
-    trades = [
-        create_mock_trade(pnl=10.0, timestamp_offset_days=1),
-        create_mock_trade(pnl=20.0, timestamp_offset_days=0)
-    ]
-    mock_trading_data_service.get_trade_history = AsyncMock(return_value=trades)
+    statistics = create_statistics(agent_id, total_trades=2, winning_trades=2, total_net_pnl=30.0, gross_profit=30.0)
+    mock_trading_data_service.get_trade_statistics = AsyncMock(return_value=statistics)
     metrics = await performance_service.calculate_performance_metrics(agent_id)
 
     assert metrics.winning_trades == 2
@@ -121,6 +117,7 @@ async def test_calculate_performance_all_wins(
     assert metrics.loss_rate == 0.0
     assert metrics.average_loss_amount is None
     assert metrics.profit_factor == float('inf') # Or some representation of infinite/undefined
+    assert metrics.notes is None
 
 @pytest.mark.asyncio
 async def test_calculate_performance_all_losses(
@@ -128,11 +125,8 @@ async def test_calculate_performance_all_losses(
     mock_trading_data_service: MagicMock
 ):
     agent_id = "agent_all_losses"
-    trades = [
-        create_mock_trade(pnl=-10.0, timestamp_offset_days=1),
-        create_mock_trade(pnl=-20.0, timestamp_offset_days=0)
-    ]
-    mock_trading_data_service.get_trade_history = AsyncMock(return_value=trades)
+    statistics = create_statistics(agent_id, total_trades=2, losing_trades=2, total_net_pnl=-30.0, gross_loss=30.0)
+    mock_trading_data_service.get_trade_statistics = AsyncMock(return_value=statistics)
     metrics = await performance_service.calculate_performance_metrics(agent_id)
 
     assert metrics.winning_trades == 0
@@ -143,49 +137,62 @@ async def test_calculate_performance_all_losses(
     assert metrics.profit_factor == 0.0
 
 @pytest.mark.asyncio
-async def test_calculate_performance_no_pnl_data(
+async def test_calculate_performance_all_neutral(
     performance_service: PerformanceCalculationService,
     mock_trading_data_service: MagicMock
 ):
-    agent_id = "agent_no_pnl"
-    trades = [
-        create_mock_trade(pnl=None, timestamp_offset_days=1),
-        create_mock_trade(pnl=None, timestamp_offset_days=0)
-    ]
-    mock_trading_data_service.get_trade_history = AsyncMock(return_value=trades)
+    agent_id = "agent_all_neutral"
+    statistics = create_statistics(agent_id, total_trades=2, neutral_trades=2)
+    mock_trading_data_service.get_trade_statistics = AsyncMock(return_value=statistics)
     metrics = await performance_service.calculate_performance_metrics(agent_id)
 
     assert metrics.total_trades == 2
-    assert metrics.winning_trades == 0
-    assert metrics.losing_trades == 0
     assert metrics.neutral_trades == 2
     assert metrics.total_net_pnl == 0.0
-    assert metrics.gross_profit is None # Because pnl_data_available will be False
-    assert metrics.gross_loss is None   # Same
     assert metrics.win_rate == 0.0 # Based on determined_trades being 0
     assert metrics.loss_rate == 0.0
-    assert "Realized PnL data was missing for all trades" in metrics.notes
+    assert metrics.profit_factor is None
 
 @pytest.mark.asyncio
-async def test_calculate_performance_invalid_pnl_values(
-    performance_service: PerformanceCalculationService,
+async def test_ledger_statistics_stay_finite_for_zero_quantity_and_zero_price_fills(
     mock_trading_data_service: MagicMock
 ):
-    agent_id = "agent_invalid_pnl"
-    trades = [
-        create_mock_trade(pnl=float('nan'), timestamp_offset_days=1),
-        create_mock_trade(pnl=float('inf'), timestamp_offset_days=0),
-        create_mock_trade(pnl=10.0, timestamp_offset_days=2) # One valid trade
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    trade_history_service = TradeHistoryService(session_factory=sessionmaker(autocommit=False, autoflush=False, bind=engine))
+    agent_id = "agent_degenerate_fills"
+    now = datetime.now(timezone.utc)
+    fills_config = [
+        ("buy", 0.0, 10.0, 0.1),  # Zero quantity
+        ("buy", 1.0, 0.0, 0.0),   # Zero price
+        ("sell", 1.0, 5.0, 0.1),
+        ("buy", 1.0, 10.0, 0.0),
+        ("sell", 1.0, 0.0, 0.0),  # Zero price
+        ("sell", 0.0, 0.0, 0.0),  # Zero quantity and price
     ]
-    mock_trading_data_service.get_trade_history = AsyncMock(return_value=trades)
+    for i, (side, quantity, price, fee) in enumerate(fills_config):
+        # model_construct skips the gt=0 validators, as a fill replayed from an exchange feed might
+        await trade_history_service.record_fill(TradeFillData.model_construct(
+            fill_id=str(uuid.uuid4()), agent_id=agent_id, timestamp=now - timedelta(seconds=60 - i),
+            asset="ZERO/USD", side=side, quantity=quantity, price=price, fee=fee, fee_currency="USD",
+            exchange_order_id=None, exchange_trade_id=None
+        ))
+
+    statistics = await trade_history_service.get_trade_statistics(agent_id)
+    assert statistics.total_trades == 3
+    for value in (statistics.total_net_pnl, statistics.gross_profit, statistics.gross_loss):
+        assert math.isfinite(value)
+    for trade in await trade_history_service.get_processed_trades(agent_id):
+        assert math.isfinite(trade.realized_pnl)
+        assert math.isfinite(trade.percentage_pnl)
+
+    mock_trading_data_service.get_trade_statistics = AsyncMock(side_effect=trade_history_service.get_trade_statistics)
+    performance_service = PerformanceCalculationService(
+        trading_data_service=mock_trading_data_service,
+        portfolio_snapshot_service=MagicMock(spec=PortfolioSnapshotService)
+    )
     metrics = await performance_service.calculate_performance_metrics(agent_id)
-
     assert metrics.total_trades == 3
-    assert metrics.winning_trades == 1 # Only the valid trade
-    assert metrics.losing_trades == 0
-    assert metrics.neutral_trades == 2 # NaN and Inf PnLs are counted as neutral
-    assert math.isclose(metrics.total_net_pnl, 10.0)
-
-
-# Need uuid for helper
-import uuid
+    for value in (metrics.total_net_pnl, metrics.gross_profit, metrics.gross_loss, metrics.win_rate, metrics.profit_factor):
+        assert math.isfinite(value)
+    Base.metadata.drop_all(bind=engine)
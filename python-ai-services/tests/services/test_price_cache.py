@@ -0,0 +1,120 @@
+import asyncio
+from decimal import Decimal
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from python_ai_services.services.price_cache import PriceCache, PriceUnavailableError
+
+
+class FakeSource:
+    def __init__(self, prices):
+        self.prices = prices
+        self.calls = []
+        self.fail = False
+
+    async def __call__(self, symbol):
+        self.calls.append(symbol)
+        await asyncio.sleep(0.01)
+        if self.fail or symbol not in self.prices:
+            raise RuntimeError(f"no quote for {symbol}")
+        return self.prices[symbol]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_single_flight_and_per_asset_staleness():
+    source, clock = FakeSource({"ETH": Decimal("2500"), "USDC": Decimal("1")}), FakeClock()
+    cache = PriceCache(source, default_max_age_seconds=30, max_age_overrides={"USDC": 300}, clock=clock)
+
+    prices = await asyncio.gather(*(cache.get_price("ETH") for _ in range(10)), cache.get_price("USDC"))
+    assert prices == [Decimal("2500")] * 10 + [Decimal("1")]
+    assert source.calls == ["ETH", "USDC"]
+    assert cache.get_metrics()["coalesced_refreshes"] == 9
+
+    clock.now += 60 # ETH expired, USDC still fresh
+    source.prices["ETH"] = Decimal("2600")
+    assert await cache.get_prices(["ETH", "USDC", "ETH"]) == {"ETH": Decimal("2600"), "USDC": Decimal("1")}
+    assert source.calls == ["ETH", "USDC", "ETH"]
+
+    metrics = cache.get_metrics()
+    assert metrics["hits"] == 1 and metrics["misses"] == 12 and metrics["refreshes"] == 3
+    assert metrics["staleness"]["USDC"] == {"age_seconds": 60.0, "max_age_seconds": 300, "stale": False}
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_serves_last_price_or_omits_symbol():
+    source, clock = FakeSource({"ETH": Decimal("2500")}), FakeClock()
+    cache = PriceCache(source, default_max_age_seconds=30, clock=clock)
+    await cache.get_price("ETH")
+
+    clock.now += 31
+    source.fail = True
+    assert await cache.get_price("ETH") == Decimal("2500")
+    with pytest.raises(PriceUnavailableError):
+        await cache.get_price("DOGE")
+    assert await cache.get_prices(["ETH", "DOGE"]) == {"ETH": Decimal("2500")}
+    metrics = cache.get_metrics()
+    assert metrics["stale_serves"] == 2 and metrics["refresh_failures"] == 4
+    assert metrics["staleness"]["ETH"]["stale"] is True
+
+
+@pytest.mark.asyncio
+async def test_cancelled_refresh_settles_its_waiters():
+    source, clock = FakeSource({"ETH": Decimal("2500")}), FakeClock()
+    cache = PriceCache(source, default_max_age_seconds=30, clock=clock)
+    await cache.get_price("ETH")
+    assert not cache._refresh_tasks # Refresh tasks are referenced only while they run
+
+    async def hang(symbol):
+        await asyncio.Event().wait()
+    cache.fetch_price = hang
+    clock.now += 31
+    waiters = [asyncio.create_task(cache.get_price("ETH")), asyncio.create_task(cache.get_prices(["ETH", "DOGE"]))]
+    await asyncio.sleep(0)
+    assert len(cache._refresh_tasks) == 2
+    for task in list(cache._refresh_tasks): # e.g. the loop shutting down
+        task.cancel()
+
+    eth, both = await asyncio.wait_for(asyncio.gather(*waiters), timeout=1)
+    assert eth == Decimal("2500") and both == {"ETH": Decimal("2500")} # Last price served, DOGE omitted
+    assert not cache._refresh_tasks and not cache._inflight
+
+
+@pytest.mark.asyncio
+async def test_wallet_total_prices_each_asset_once():
+    from python_ai_services.services.master_wallet_service import MasterWalletService
+    from python_ai_services.models.master_wallet_models import MasterWallet, MasterWalletConfig, WalletBalance
+
+    market_data = Mock()
+    market_data.get_live_data = AsyncMock(side_effect=lambda pair: {"price": {"ETH/USD": 2000, "USDC/USD": 1}.get(pair)} if pair != "BTC/USD" else None)
+    registry = Mock()
+    registry.get_service = Mock(return_value=market_data)
+    with patch("python_ai_services.services.master_wallet_service.get_registry", return_value=registry):
+        service = MasterWalletService()
+
+    wallet = MasterWallet(
+        config=MasterWalletConfig(name="w"),
+        balances=[
+            WalletBalance(asset_symbol="ETH", balance=Decimal("1.5"), available_balance=Decimal("1.5")),
+            WalletBalance(asset_symbol="USDC", balance=Decimal("100"), available_balance=Decimal("100")),
+            WalletBalance(asset_symbol="ETH", balance=Decimal("0.5"), available_balance=Decimal("0.5")),
+            WalletBalance(asset_symbol="BTC", balance=Decimal("0.1"), available_balance=Decimal("0.1")), # Hardcoded fallback
+            WalletBalance(asset_symbol="XYZ", balance=Decimal("3"), available_balance=Decimal("3"), balance_usd=Decimal("7")),
+        ]
+    )
+    service.active_wallets[wallet.wallet_id] = wallet
+
+    assert await service._calculate_total_balance_usd(wallet) == Decimal("2000") * 2 + 100 + Decimal("4500") + 7
+    assert market_data.get_live_data.await_count == 3
+    performance = await service.calculate_wallet_performance(wallet.wallet_id)
+    assert performance.total_value_usd == Decimal("8607")
+    assert market_data.get_live_data.await_count == 3 # Served from the cache
+    assert (await service.get_service_status())["price_cache"]["hits"] == 3
@@ -252,3 +252,24 @@ async def test_analyze_sell_signal_generated(renko_service: RenkoTechnicalServic
     assert payload.price_target == pytest.approx(98.5)
     # First signal brick is [101,100] down. SL is its open.
     assert payload.stop_loss == pytest.approx(101.0)
+
+@pytest.mark.asyncio
+async def test_analyze_appends_new_klines_to_live_chart(renko_service: RenkoTechnicalService, mock_market_data_service: MagicMock):
+    renko_service.params.brick_size_mode = "fixed"
+    renko_service.params.brick_size_value_fixed = 1.0
+    prices = [100, 101.2, 102.4, 101.1, 99.8, 100.9, 102.3, 103.6]
+    klines = generate_klines(prices, 0, interval_ms=60000)
+
+    mock_market_data_service.get_historical_klines.return_value = klines[:5]
+    await renko_service.analyze_symbol_and_generate_signal("BTC/USD")
+    chart = renko_service._renko_charts["BTC/USD"]
+    bricks_after_first_call = len(chart)
+
+    # Overlapping window: only klines after the last one seen are fed to the chart
+    mock_market_data_service.get_historical_klines.return_value = klines[2:]
+    await renko_service.analyze_symbol_and_generate_signal("BTC/USD")
+
+    assert renko_service._renko_charts["BTC/USD"] is chart
+    assert len(chart) > bricks_after_first_call
+    expected = renko_service._calculate_renko_bricks([k["timestamp"] for k in klines], prices, 1.0)
+    assert renko_service._brick_records(chart.to_frame()) == expected
@@ -2,13 +2,15 @@ import pytest
 import pytest_asyncio
 from datetime import datetime, timezone, timedelta
 import uuid
-from typing import List, Callable
+import asyncio
+from typing import List, Callable, Dict, Optional
 
 # SQLAlchemy imports for testing with in-memory DB
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import StaticPool
 from python_ai_services.core.database import Base # Your declarative base
-from python_ai_services.models.db_models import TradeFillDB # The DB model to test against
+from python_ai_services.models.db_models import TradeFillDB, TradeLotDB # The DB models to test against
 
 from python_ai_services.services.trade_history_service import TradeHistoryService, TradeHistoryServiceError
 from python_ai_services.models.trade_history_models import TradeFillData
@@ -19,7 +21,8 @@ from unittest.mock import MagicMock, AsyncMock # Added for mock_event_bus
 
 # --- In-Memory SQLite Test Database Setup ---
 DATABASE_URL_TEST = "sqlite:///:memory:"
-engine_test = create_engine(DATABASE_URL_TEST, connect_args={"check_same_thread": False})
+# StaticPool shares the one in-memory DB with the executor threads the service runs DB calls on
+engine_test = create_engine(DATABASE_URL_TEST, connect_args={"check_same_thread": False}, poolclass=StaticPool)
 TestSessionLocal: Callable[[], Session] = sessionmaker(autocommit=False, autoflush=False, bind=engine_test) # type: ignore
 
 # --- Fixtures ---
@@ -66,7 +69,7 @@ def create_fill_pydantic(
 # --- Test Cases ---
 
 @pytest.mark.asyncio
-async def test_record_fill_db(service: TradeHistoryService, db_session: Session):
+async def test_record_fill_db(service: TradeHistoryService, db_session: Session, mock_event_bus: MagicMock):
     agent_id = "agent_db_record"
     fill_to_record = create_fill_pydantic(agent_id, "BTC/USD", "buy", 1.0, 50000.0)
 
@@ -127,6 +130,8 @@ async def test_record_fill_db_error_handling(service: TradeHistoryService):
     mock_session = MagicMock(spec=Session)
     mock_session.commit.side_effect = Exception("DB commit error")
     mock_session.rollback.return_value = None # Ensure rollback doesn't also fail test
+    mock_session.get.return_value = None # No ledger row yet for this agent/asset
+    mock_session.execute.return_value.first.return_value = None # And no earlier fills to replay
 
     original_factory = service.session_factory
     service.session_factory = MagicMock(return_value=mock_session)
@@ -134,7 +139,7 @@ async def test_record_fill_db_error_handling(service: TradeHistoryService):
     with pytest.raises(TradeHistoryServiceError, match="DB error recording fill: DB commit error"):
         await service.record_fill(fill_data)
 
-    mock_session.add.assert_called_once()
+    mock_session.add.assert_called() # Fill plus its ledger rows, all in one transaction
     mock_session.commit.assert_called_once()
     mock_session.rollback.assert_called_once() # Ensure rollback was attempted
     mock_session.close.assert_called_once()
@@ -291,7 +296,7 @@ async def test_get_processed_trades_multiple_assets_db(service: TradeHistoryServ
     assert pytest.approx(btc_trades[0].realized_pnl) == expected_pnl_btc
 
     # Check ETH P&L (sum of two closing parts)
-    eth_trades.sort(key=lambda t: t.timestamp) # Oldest exit first for easier assertion
+    eth_trades.sort(key=lambda t: t.exit_timestamp) # Oldest exit first for easier assertion
 
     # PNL from first ETH sell (5 units @ $3100 against 10 units @ $3000)
     eth_buy_fill_original_qty = 10.0 # Original quantity of the ETH buy
@@ -323,6 +328,195 @@ async def test_get_processed_trades_multiple_assets_db(service: TradeHistoryServ
     assert trade_log_eth2.entry_price_avg == pytest.approx(3000.0)
 
 
-# Optional: Import for type hinting if not already present
-from typing import Optional
-from unittest.mock import MagicMock, AsyncMock # Ensure these are at the top if used by new fixtures
+# --- Ledger maintenance: paging, aggregates, out-of-order fills and backfill ---
+
+@pytest.mark.asyncio
+async def test_get_processed_trades_paging_most_recent_first(service: TradeHistoryService):
+    agent_id = "agent_paging_db"
+    fills_config = []
+    for i in range(5):
+        fills_config.append({"asset": "ADA/USD", "side": "buy", "qty": 1, "price": 1.0 + i, "offset": 100 - 2 * i})
+        fills_config.append({"asset": "ADA/USD", "side": "sell", "qty": 1, "price": 2.0 + i, "offset": 99 - 2 * i})
+    await _setup_fills_for_pnl_test(service, agent_id, fills_config)
+
+    all_trades = await service.get_processed_trades(agent_id)
+    assert [t.exit_price_avg for t in all_trades] == [6.0, 5.0, 4.0, 3.0, 2.0]
+
+    page = await service.get_processed_trades(agent_id, limit=2, offset=1)
+    assert [t.trade_id for t in page] == [t.trade_id for t in all_trades[1:3]]
+
+@pytest.mark.asyncio
+async def test_get_trade_statistics_maintained_at_write_time(service: TradeHistoryService, db_session: Session):
+    agent_id = "agent_stats_db"
+    fills_config = [
+        {"asset": "BTC/USD", "side": "buy", "qty": 2, "price": 100, "offset": 50},
+        {"asset": "BTC/USD", "side": "sell", "qty": 1, "price": 110, "offset": 40}, # +10
+        {"asset": "BTC/USD", "side": "sell", "qty": 1, "price": 95, "offset": 30},  # -5
+        {"asset": "ETH/USD", "side": "buy", "qty": 1, "price": 10, "offset": 20},
+        {"asset": "ETH/USD", "side": "sell", "qty": 1, "price": 10, "offset": 10},  # 0
+    ]
+    await _setup_fills_for_pnl_test(service, agent_id, fills_config)
+
+    stats = await service.get_trade_statistics(agent_id)
+    assert stats.total_trades == 3
+    assert (stats.winning_trades, stats.losing_trades, stats.neutral_trades) == (1, 1, 1)
+    assert stats.gross_profit == pytest.approx(10.0)
+    assert stats.gross_loss == pytest.approx(5.0)
+    assert stats.total_net_pnl == pytest.approx(5.0)
+    assert stats.assets == ["BTC/USD", "ETH/USD"]
+    assert stats.first_exit_timestamp < stats.last_exit_timestamp
+
+    # Fully matched lots leave the open-lot table
+    assert db_session.query(TradeLotDB).filter_by(agent_id=agent_id).count() == 0
+
+@pytest.mark.asyncio
+async def test_out_of_order_fill_replays_asset_ledger(service: TradeHistoryService):
+    agent_id = "agent_out_of_order_db"
+    now = datetime.now(timezone.utc)
+    late_buy = create_fill_pydantic(agent_id, "SOL/USD", "buy", 1, 150.0)
+    late_buy.timestamp = now - timedelta(seconds=10)
+    sell = create_fill_pydantic(agent_id, "SOL/USD", "sell", 2, 160.0)
+    sell.timestamp = now
+    early_buy = create_fill_pydantic(agent_id, "SOL/USD", "buy", 1, 140.0)
+    early_buy.timestamp = now - timedelta(seconds=20) # Recorded last, but opened first
+
+    for fill in (late_buy, sell, early_buy):
+        await service.record_fill(fill)
+
+    trades = await service.get_processed_trades(agent_id)
+    assert sorted(t.entry_price_avg for t in trades) == [140.0, 150.0]
+    stats = await service.get_trade_statistics(agent_id)
+    assert stats.total_trades == 2
+    assert stats.total_net_pnl == pytest.approx(30.0)
+
+@pytest.mark.asyncio
+async def test_fills_recorded_before_ledger_are_backfilled(service: TradeHistoryService, db_session: Session):
+    agent_id = "agent_backfill_db"
+    buy = create_fill_pydantic(agent_id, "XRP/USD", "buy", 10, 0.5, timestamp_offset_seconds=20)
+    sell = create_fill_pydantic(agent_id, "XRP/USD", "sell", 10, 0.6, timestamp_offset_seconds=10)
+    db_session.add(TradeFillDB(**service._pydantic_fill_to_db_dict(buy)))
+    db_session.add(TradeFillDB(**service._pydantic_fill_to_db_dict(sell)))
+    db_session.commit()
+
+    trades = await service.get_processed_trades(agent_id)
+    assert len(trades) == 1
+    assert trades[0].realized_pnl == pytest.approx(1.0)
+    assert (await service.get_trade_statistics(agent_id)).winning_trades == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_fills_for_same_asset_are_serialized(service: TradeHistoryService, db_session: Session):
+    agent_id = "agent_concurrent_ledger_db"
+    buys = [create_fill_pydantic(agent_id, "BTC/USD", "buy", 1, 100.0, timestamp_offset_seconds=60 - i) for i in range(5)]
+    sells = [create_fill_pydantic(agent_id, "BTC/USD", "sell", 1, 110.0, timestamp_offset_seconds=30 - i) for i in range(5)]
+
+    # The first buys race to create the ledger row; the sells race for the same open lots
+    await asyncio.gather(*(service.record_fill(fill) for fill in buys))
+    await asyncio.gather(*(service.record_fill(fill) for fill in sells))
+
+    stats = await service.get_trade_statistics(agent_id)
+    assert stats.total_trades == 5
+    assert stats.total_net_pnl == pytest.approx(50.0)
+    assert len(await service.get_processed_trades(agent_id)) == 5
+    assert db_session.query(TradeLotDB).filter_by(agent_id=agent_id).count() == 0
+
+# --- Group-commit ingestion ---
+
+@pytest.mark.asyncio
+async def test_ingest_fills_group_commits_concurrent_batches(db_session: Session, mock_event_bus: MagicMock):
+    service = TradeHistoryService(session_factory=TestSessionLocal, event_bus=mock_event_bus, group_commit_window_ms=20)
+    agent_id = "agent_ingest_db"
+    buys = [create_fill_pydantic(agent_id, "BTC/USD", "buy", 1, 100.0, timestamp_offset_seconds=30 - i) for i in range(3)]
+    sells = [create_fill_pydantic(agent_id, "BTC/USD", "sell", 1, 110.0, timestamp_offset_seconds=10 - i) for i in range(3)]
+    try:
+        await asyncio.gather(service.ingest_fills(buys), service.ingest_fills(sells))
+    finally:
+        await service.stop_fill_writer()
+
+    metrics = service.get_ingest_metrics()
+    assert metrics["groups_committed"] == 1
+    assert metrics["fills_committed"] == 6
+    assert mock_event_bus.publish.call_count == 6
+
+    stats = await service.get_trade_statistics(agent_id)
+    assert stats.total_trades == 3
+    assert stats.total_net_pnl == pytest.approx(30.0)
+    assert db_session.query(TradeLotDB).filter_by(agent_id=agent_id).count() == 0
+
+@pytest.mark.asyncio
+async def test_ingest_fills_isolates_failed_rows(db_session: Session, mock_event_bus: MagicMock):
+    service = TradeHistoryService(session_factory=TestSessionLocal, event_bus=mock_event_bus)
+    agent_id = "agent_ingest_dup_db"
+    existing = create_fill_pydantic(agent_id, "ETH/USD", "buy", 1, 10.0, timestamp_offset_seconds=20)
+    await service.record_fill(existing)
+
+    good = create_fill_pydantic(agent_id, "ETH/USD", "buy", 2, 11.0, timestamp_offset_seconds=10)
+    try:
+        with pytest.raises(TradeHistoryServiceError):
+            await service.ingest_fills([good, existing]) # Duplicate fill_id
+    finally:
+        await service.stop_fill_writer()
+
+    fills = await service.get_fills_for_agent(agent_id)
+    assert sorted(f.fill_id for f in fills) == sorted([existing.fill_id, good.fill_id])
+    assert service.get_ingest_metrics()["fills_failed"] == 1
+
+@pytest.mark.asyncio
+async def test_ingest_fills_duplicate_fill_id_in_one_group_fails_only_the_loser(db_session: Session, mock_event_bus: MagicMock):
+    service = TradeHistoryService(session_factory=TestSessionLocal, event_bus=mock_event_bus, group_commit_window_ms=20)
+    agent_id = "agent_ingest_dup_group_db"
+    fill = create_fill_pydantic(agent_id, "ETH/USD", "buy", 1, 10.0)
+    try:
+        # Two callers submit the same fill into one group: the first copy commits, the second is a duplicate
+        first, second = await asyncio.gather(
+            service.ingest_fills([fill]), service.ingest_fills([fill.model_copy()]), return_exceptions=True
+        )
+    finally:
+        await service.stop_fill_writer()
+
+    assert [f.fill_id for f in first] == [fill.fill_id]
+    assert isinstance(second, TradeHistoryServiceError)
+    assert [f.fill_id for f in await service.get_fills_for_agent(agent_id)] == [fill.fill_id]
+    assert mock_event_bus.publish.call_count == 1 # The committed row still gets its event
+    metrics = service.get_ingest_metrics()
+    assert metrics["fills_committed"] == 1 and metrics["fills_failed"] == 1
+
+@pytest.mark.asyncio
+async def test_ingest_fills_accept_mode_and_backpressure(db_session: Session):
+    service = TradeHistoryService(session_factory=TestSessionLocal, max_pending_fills=2, group_commit_max_rows=2, durability="accept")
+    agent_id = "agent_ingest_accept_db"
+    fills = [create_fill_pydantic(agent_id, "SOL/USD", "buy", 1, 100.0, timestamp_offset_seconds=50 - i) for i in range(10)]
+    try:
+        await service.ingest_fills(fills) # Returns once queued, waiting whenever two fills are pending
+        assert service.get_ingest_metrics()["queued_fills"] <= 2
+    finally:
+        await service.stop_fill_writer() # Drains the queue
+
+    assert len(await service.get_fills_for_agent(agent_id)) == 10
+    assert service.get_ingest_metrics()["max_group_size"] <= 2
+
+    with pytest.raises(ValueError):
+        await service.ingest_fills(fills, durability="fsync")
+
+@pytest.mark.asyncio
+async def test_ingest_fills_raises_when_session_factory_fails(db_session: Session):
+    service = TradeHistoryService(session_factory=MagicMock(side_effect=Exception("connection refused")))
+    fills = [create_fill_pydantic("agent_ingest_no_db", "BTC/USD", "buy", 1, 100.0)]
+    try:
+        with pytest.raises(TradeHistoryServiceError, match="connection refused"):
+            await asyncio.wait_for(service.ingest_fills(fills), timeout=5)
+    finally:
+        await service.stop_fill_writer()
+    assert service.get_ingest_metrics()["fills_failed"] == 1
+
+@pytest.mark.asyncio
+async def test_ingest_fills_raises_when_group_commit_fails_unexpectedly(db_session: Session):
+    service = TradeHistoryService(session_factory=TestSessionLocal)
+    service._run_db = AsyncMock(side_effect=RuntimeError("cannot schedule new futures after shutdown"))
+    fills = [create_fill_pydantic("agent_ingest_executor_down", "BTC/USD", "buy", 1, 100.0)]
+    try:
+        with pytest.raises(TradeHistoryServiceError, match="cannot schedule new futures"):
+            await asyncio.wait_for(service.ingest_fills(fills), timeout=5)
+        assert service.get_ingest_metrics()["writer_running"] # The writer outlives a failed group
+    finally:
+        await service.stop_fill_writer()
@@ -346,8 +346,8 @@ async def test_execute_live_trade_buy_limit_success(trading_coordinator: Trading
     # Status changed in a previous subtask due to risk management additions
     assert result["status"] == "live_executed_with_risk_management"
     assert result["details"]["main_order"]["oid"] == 67890
-    # Check that record_fill was NOT called because simulated_fills was None in mock_hl_response
-    trading_coordinator.trade_history_service.record_fill.assert_not_called()
+    # Check that no fills were ingested because simulated_fills was None in mock_hl_response
+    trading_coordinator.trade_history_service.ingest_fills.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -366,9 +366,6 @@ async def test_execute_live_trade_fetches_and_records_actual_fills(
     type(mock_order_db_return).internal_order_id = mock_internal_order_id # Make it behave like an ORM object with this attr
     mock_order_history_service.record_order_submission.return_value = mock_order_db_return
 
-    mock_recorded_fill = TradeFillData(fill_id=str(uuid.uuid4()), agent_id=user_id, asset="ETH", side="buy", quantity=0.01, price=2000.0, timestamp=datetime.now(timezone.utc))
-    mock_trade_history_service.record_fill.return_value = mock_recorded_fill
-
     mock_place_order_response = HyperliquidOrderResponseData(
         status="filled", oid=12345, order_type_info={"market": {"tif": "Ioc"}}
     )
@@ -398,7 +395,12 @@ async def test_execute_live_trade_fetches_and_records_actual_fills(
     )
 
     mock_hyperliquid_executor.get_fills_for_order.assert_called_once_with(user_address=user_id, oid=12345)
-    mock_trade_history_service.record_fill.assert_called_once()
+    mock_trade_history_service.ingest_fills.assert_called_once()
+    ingested_fills = mock_trade_history_service.ingest_fills.call_args[0][0]
+    assert len(ingested_fills) == 1
+    mock_recorded_fill = ingested_fills[0]
+    assert mock_recorded_fill.side == "buy"
+    assert mock_recorded_fill.exchange_trade_id == "HLTradeID_XYZ"
 
     mock_order_history_service.link_fill_to_order.assert_called_once_with(
         internal_order_id=mock_internal_order_id,
@@ -436,7 +438,7 @@ async def test_execute_live_trade_no_fills_found_for_order(
     mock_order_history_service.record_order_submission.assert_called_once()
     mock_order_history_service.update_order_from_hl_response.assert_called_once_with(mock_internal_order_id, mock_place_order_response)
     mock_hyperliquid_executor.get_fills_for_order.assert_called_once_with(user_address=user_id, oid=67890)
-    mock_trade_history_service.record_fill.assert_not_called()
+    mock_trade_history_service.ingest_fills.assert_not_called()
     mock_order_history_service.link_fill_to_order.assert_not_called()
 
 
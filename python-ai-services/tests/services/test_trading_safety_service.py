@@ -0,0 +1,105 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from python_ai_services.services.trading_safety_service import SlidingWindowCounter, TradingSafetyService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 10_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def safety(clock):
+    service = TradingSafetyService(clock=clock)
+    service.trading_limits.max_daily_trades = 3
+    service.trading_limits.max_daily_volume_usd = 1000.0
+    service.trading_limits.max_position_size_usd = 600.0
+    service.trading_limits.max_concurrent_positions = 2
+    return service
+
+
+def test_sliding_window_counter_expires_buckets():
+    counter = SlidingWindowCounter(window_seconds=60, bucket_count=6)
+    counter.add(5, now=0)
+    counter.add(2, now=35)
+    assert counter.value(now=59) == 7
+    assert counter.value(now=61) == 2 # First bucket left the window
+    counter.remove(2, added_at=35, now=62)
+    counter.remove(9, added_at=0, now=62) # Already expired: ignored
+    assert counter.value(now=62) == 0
+    counter.add(1, now=10_000)
+    assert counter.value(now=10_000) == 1
+
+
+@pytest.mark.asyncio
+async def test_limits_use_sliding_windows_and_queue_violations(safety, clock):
+    for _ in range(3):
+        await safety.record_trade_execution("a1", "BTC", 1, 100.0, "sell", success=True)
+    assert await safety.validate_trade_safety("a1", "BTC", 1, 100.0) == (False, "Daily trade limit exceeded (3)")
+    assert safety.safety_violations == [] # Recorded off the validation path
+    await asyncio.sleep(0)
+    assert [v.violation_type for v in safety.safety_violations] == ["daily_trade_limit"]
+
+    clock.now += 86400 + 1500 # Past the window (plus one bucket)
+    assert await safety.validate_trade_safety("a1", "BTC", 1, 100.0) == (True, None)
+    assert await safety.validate_trade_safety("a1", "BTC", 1, 700.0) == (False, "Position size exceeds limit (600.0)")
+    safety.trading_limits.max_symbol_daily_volume_usd = 250.0
+    await safety.record_trade_execution("a2", "ETH", 1, 200.0, "sell", success=True)
+    assert await safety.validate_trade_safety("a3", "ETH", 1, 100.0) == (False, "Daily volume limit for ETH would be exceeded")
+    safety.trading_limits.max_global_daily_trades = 1
+    assert await safety.validate_trade_safety("a3", "SOL", 1, 100.0) == (False, "Global daily trade limit exceeded (1)")
+
+    status = safety.get_agent_safety_status("a1")
+    assert status["daily_trades"] == 0 and status["daily_volume_usd"] == 0
+
+
+@pytest.mark.asyncio
+async def test_reserve_holds_capacity_until_settled(safety):
+    first, reason = safety.reserve_trade("a1", "BTC", 1, 500.0, side="buy")
+    assert reason is None
+    second, _ = safety.reserve_trade("a1", "BTC", 1, 400.0, side="buy")
+    rejected, reason = safety.reserve_trade("a1", "BTC", 1, 200.0, side="buy")
+    assert rejected is None and reason == "Daily volume limit would be exceeded"
+
+    safety.release_reservation(second)
+    safety.release_reservation(second) # Idempotent
+    await safety.record_trade_execution("a1", "BTC", 1, 450.0, "buy", success=True, reservation=first)
+    status = safety.get_agent_safety_status("a1")
+    assert (status["daily_trades"], status["daily_volume_usd"], status["concurrent_positions"]) == (1, 450.0, 1)
+    assert safety.get_safety_status()["global_window_totals"] == {"trades": 1, "volume_usd": 450.0}
+
+    third, _ = safety.reserve_trade("a1", "BTC", 1, 100.0, side="buy")
+    assert safety.reserve_trade("a1", "BTC", 1, 100.0, side="buy") == (None, "Concurrent positions limit reached (2)")
+
+
+@pytest.mark.asyncio
+async def test_halt_flags_and_breaker_reset(safety):
+    await safety.activate_emergency_stop("test")
+    assert safety._halt_flags and safety.emergency_stop_active
+    assert (await safety.validate_trade_safety("a1", "BTC", 1, 1.0))[1].startswith("Emergency stop")
+    await safety.deactivate_emergency_stop()
+    await safety.suspend_trading("maintenance")
+    assert (await safety.validate_trade_safety("a1", "BTC", 1, 1.0))[1] == "Trading is temporarily suspended"
+    await safety.resume_trading()
+    assert safety._halt_flags == 0
+
+    for _ in range(10):
+        await safety.record_trade_execution("a1", "BTC", 1, 1.0, "buy", success=False, error_message="timeout")
+    assert safety.circuit_breakers["error_rate_breaker"].status == "open"
+    assert await safety.validate_trade_safety("a1", "BTC", 1, 1.0) == (False, "Circuit breaker 'error_rate_breaker' is open")
+    assert safety.emergency_stop_active is False
+
+    safety.circuit_breakers["error_rate_breaker"].next_retry = datetime.now(timezone.utc) - timedelta(seconds=1)
+    assert await safety.validate_trade_safety("a1", "BTC", 1, 1.0) == (True, None)
+    assert safety.circuit_breakers["error_rate_breaker"].status == "closed" and safety._halt_flags == 0
@@ -0,0 +1,92 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from python_ai_services.strategies.darvas_box_strategy import DarvasBoxStrategy
+from python_ai_services.strategies.sma_crossover_strategy import SMACrossoverStrategy
+from python_ai_services.strategies.elliott_wave_strategy import ElliottWaveStrategy
+
+DARVAS_GRID = {
+    "box_period": [3, 5, 7, 10],
+    "volume_threshold": [1.2, 1.5, 2.0],
+    "breakout_threshold": [0.005, 0.01, 0.02]
+}
+
+
+@pytest.fixture
+def ohlcv_df() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    n = 1500
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=n, freq="h"),
+        "open": close,
+        "high": close * (1 + rng.normal(0, 0.004, n)),
+        "low": close * (1 + rng.normal(0, 0.004, n)),
+        "close": close,
+        "volume": rng.integers(1, 1000, n).astype(float)
+    })
+
+
+def test_darvas_grid_sweep_matches_single_point_metric(ohlcv_df):
+    strategy = DarvasBoxStrategy()
+    strategy.add_market_data("BTC", "1h", ohlcv_df)
+
+    sweep = strategy.sweep_parameters("BTC", "1h", DARVAS_GRID)
+
+    assert sweep["evaluations"] == 36
+    assert np.array(sweep["surface"]).shape == (4, 3, 3)
+    for result in sweep["results"][::5]:
+        params = {**strategy.parameters, **result["params"]}
+        assert strategy._calculate_test_metric("BTC", "1h", params) == pytest.approx(result["metric"])
+    assert sweep["best_metric"] == max(r["metric"] for r in sweep["results"])
+
+
+def test_random_sweep_evaluates_subset_of_grid(ohlcv_df):
+    strategy = DarvasBoxStrategy()
+    strategy.add_market_data("BTC", "1h", ohlcv_df)
+
+    grid = strategy.sweep_parameters("BTC", "1h", DARVAS_GRID)
+    by_params = {tuple(r["params"].values()): r["metric"] for r in grid["results"]}
+    sampled = strategy.sweep_parameters("BTC", "1h", DARVAS_GRID, method="random", n_iter=8, seed=3)
+
+    assert sampled["evaluations"] == 8
+    for result in sampled["results"]:
+        assert result["metric"] == pytest.approx(by_params[tuple(result["params"].values())])
+
+
+def test_process_sweep_matches_in_process_sweep(ohlcv_df):
+    strategy = DarvasBoxStrategy()
+    strategy.add_market_data("BTC", "1h", ohlcv_df)
+
+    serial = strategy.sweep_parameters("BTC", "1h", DARVAS_GRID)
+    parallel = strategy.sweep_parameters("BTC", "1h", DARVAS_GRID, max_workers=2)
+
+    assert parallel["results"] == serial["results"]
+
+
+def test_sma_sweep_constraint_leaves_gaps_in_surface(ohlcv_df):
+    strategy = SMACrossoverStrategy()
+    strategy.add_market_data("BTC", "1h", ohlcv_df)
+
+    sweep = strategy.sweep_parameters(
+        "BTC", "1h",
+        {"fast_period": [5, 20, 30], "slow_period": [20, 50]},
+        constraint=lambda p: p["fast_period"] < p["slow_period"]
+    )
+
+    surface = np.array(sweep["surface"])
+    assert sweep["evaluations"] == 4
+    assert np.isnan(surface[1, 0]) and np.isnan(surface[2, 0])
+    assert all(r["params"]["fast_period"] < r["params"]["slow_period"] for r in sweep["results"])
+
+
+def test_optimize_parameters_uses_best_sweep_point(ohlcv_df):
+    strategy = ElliottWaveStrategy()
+    strategy.add_market_data("BTC", "1h", ohlcv_df)
+
+    best = strategy.optimize_parameters("BTC", "1h")
+
+    assert strategy.parameters == best
+    assert best["smoothing_period"] in (3, 5, 8)
+    assert best["lookback_periods"] == 100
@@ -0,0 +1,56 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from python_ai_services.strategies.renko_bricks import RenkoBrickBuilder, build_renko_bricks
+
+
+def test_first_bricks_and_two_brick_reversal():
+    prices = [100.0, 101.0, 103.2, 102.1, 100.9, 99.5]
+    bricks = build_renko_bricks(prices, range(len(prices)), 1.0)
+
+    assert bricks["type"].tolist() == [1, 1, 1, -1, -1]
+    assert bricks["open"].tolist() == [100.0, 101.0, 102.0, 102.0, 101.0]
+    assert bricks["close"].tolist() == [101.0, 102.0, 103.0, 101.0, 100.0]
+    assert bricks["high"].tolist() == [101.0, 102.0, 103.0, 102.0, 101.0]
+    assert bricks["low"].tolist() == [100.0, 101.0, 102.0, 101.0, 100.0]
+    # 102.1 is only one brick below the 103 close, so the reversal forms at 100.9
+    assert bricks.index.tolist() == [1, 2, 2, 4, 5]
+
+
+def test_single_brick_reversal_mode():
+    prices = [100.0, 101.0, 102.0, 101.0, 100.0]
+    bricks = build_renko_bricks(prices, range(len(prices)), 1.0, reversal_bricks=1)
+
+    assert bricks["type"].tolist() == [1, 1, -1, -1]
+    assert bricks["close"].tolist() == [101.0, 102.0, 101.0, 100.0]
+
+
+@pytest.mark.parametrize("reversal_bricks", [1, 2])
+def test_incremental_updates_emit_only_new_bricks(reversal_bricks):
+    rng = np.random.default_rng(3)
+    prices = 100 + np.cumsum(rng.normal(0, 0.8, 5000))
+    timestamps = pd.date_range("2024-01-01", periods=len(prices), freq="min", tz="UTC")
+    expected = build_renko_bricks(prices, timestamps, 0.5, reversal_bricks)
+
+    builder = RenkoBrickBuilder(0.5, reversal_bricks, initial_capacity=16)
+    emitted = [builder.update(prices[i:i + 137], timestamps[i:i + 137]) for i in range(0, len(prices), 137)]
+    emitted = pd.concat([frame for frame in emitted if not frame.empty])
+
+    pd.testing.assert_frame_equal(emitted, expected)
+    pd.testing.assert_frame_equal(builder.to_frame(), expected)
+    pd.testing.assert_frame_equal(builder.tail(3), expected.iloc[-3:])
+    assert len(builder) == len(expected)
+
+
+def test_quiet_prices_form_no_bricks():
+    builder = RenkoBrickBuilder(5.0)
+    assert builder.update([100.0, 101.0, 99.0, 104.9]).empty
+    assert len(builder.update([105.0])) == 1
+
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError):
+        RenkoBrickBuilder(0)
+    with pytest.raises(ValueError):
+        RenkoBrickBuilder(1.0, reversal_bricks=3)
@@ -0,0 +1,100 @@
+import math
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from python_ai_services.strategies.darvas_box_strategy import DarvasBoxStrategy
+from python_ai_services.strategies.sma_crossover_strategy import SMACrossoverStrategy
+from python_ai_services.strategies.streaming_indicators import RollingExtreme, RollingMean
+
+
+def make_frame(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    close[80:120] = close[80]  # flat run
+    volume = rng.integers(0, 1000, n).astype(float)
+    volume[90:100] = 0.0
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=n, freq="min"),
+        "open": close,
+        "high": close * (1 + np.abs(rng.normal(0, 0.004, n))),
+        "low": close * (1 - np.abs(rng.normal(0, 0.004, n))),
+        "close": close,
+        "volume": volume
+    })
+
+
+def assert_same_value(actual, expected):
+    if isinstance(expected, float) and math.isnan(expected):
+        assert math.isnan(actual)
+    else:
+        assert actual == expected
+
+
+@pytest.mark.parametrize("window", [1, 3, 20])
+def test_rolling_windows_match_pandas(window):
+    values = np.random.default_rng(1).normal(0, 1, 300)
+    values[::17] = np.nan
+    values[100:140] = 2.5
+    series = pd.Series(values)
+
+    mean, high, low = RollingMean(window), RollingExtreme(window, "max"), RollingExtreme(window, "min")
+    for i, value in enumerate(values):
+        assert_same_value(mean.update(value), series.rolling(window).mean().iloc[i])
+        assert_same_value(high.update(value), series.rolling(window).max().iloc[i])
+        assert_same_value(low.update(value), series.rolling(window).min().iloc[i])
+
+
+@pytest.mark.parametrize("strategy_cls,parameters", [
+    (DarvasBoxStrategy, {}),
+    (SMACrossoverStrategy, {"fast_period": 5, "slow_period": 12})
+])
+def test_append_bar_matches_batch_signal(strategy_cls, parameters):
+    df = make_frame(300)
+    live = strategy_cls(parameters=dict(parameters))
+    batch = strategy_cls(parameters=dict(parameters))
+    live.STREAM_FLUSH_BARS = 25
+    live.add_market_data("BTC", "1m", df.iloc[:20])
+
+    for i in range(20, len(df)):
+        streamed = live.append_bar("BTC", "1m", df.iloc[i].to_dict())
+        batch.add_market_data("BTC", "1m", df.iloc[:i + 1])
+        expected = batch.generate_signal("BTC", "1m")
+
+        assert streamed.signal == expected.signal
+        assert streamed.confidence == expected.confidence
+        assert streamed.price == expected.price
+        for key, value in expected.metadata.items():
+            assert_same_value(streamed.metadata[key], value)
+
+    assert len(live.get_market_data("BTC", "1m")) == len(df)
+    assert live.performance_metrics["total_signals"] == len(df) - 20
+
+
+def test_append_bar_rebuilds_state_on_parameter_change():
+    df = make_frame(200)
+    live = DarvasBoxStrategy()
+    live.add_market_data("BTC", "1m", df.iloc[:150])
+    for i in range(150, 170):
+        live.append_bar("BTC", "1m", df.iloc[i].to_dict())
+
+    live.parameters = {**live.parameters, "box_period": 10}
+    streamed = live.append_bar("BTC", "1m", df.iloc[170].to_dict())
+
+    batch = DarvasBoxStrategy(parameters={"box_period": 10})
+    batch.add_market_data("BTC", "1m", df.iloc[:171])
+    expected = batch.generate_signal("BTC", "1m")
+    assert streamed.metadata["box_top"] == expected.metadata["box_top"]
+    assert streamed.confidence == expected.confidence
+
+
+def test_append_bar_without_history_starts_new_series():
+    df = make_frame(150)
+    strategy = SMACrossoverStrategy(parameters={"fast_period": 5, "slow_period": 10})
+
+    for i in range(len(df)):
+        signal = strategy.append_bar("ETH", "1m", df.iloc[i].to_dict())
+
+    assert signal.metadata["slow_sma"] == pytest.approx(df["close"].iloc[-10:].mean())
+    assert len(strategy.get_market_data("ETH", "1m")) == 150